@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.conf import settings
+        from . import checks  # noqa: F401
+        from .metricas import instalar_medicion_serializadores
+
+        if getattr(settings, 'METRICAS_HABILITADAS', True):
+            instalar_medicion_serializadores()
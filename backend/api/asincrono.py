@@ -0,0 +1,190 @@
+"""
+Vistas asíncronas de DRF y consultas concurrentes, para despliegues ASGI.
+
+DRF despacha todas las vistas de forma síncrona. Con
+``API_VISTAS_ASINCRONAS = True``, ``DespachoAsincronoMixin`` hace que Django
+trate la vista como asíncrona y despache las acciones que tienen variante
+``async def`` (``alist``, ``aestadisticas``, ``aget`` de los dashboards...)
+en el event loop, con el ORM asíncrono. Con el valor por defecto (``False``, para WSGI) las vistas son
+las síncronas de siempre.
+
+El ORM asíncrono de Django ejecuta todas las consultas de una petición en
+un mismo hilo, una tras otra. Para las consultas independientes de una
+vista, ``consultas_concurrentes`` ejecuta cada una en un hilo de un pool
+propio con su conexión, de modo que se solapan en la base de datos.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from .condicional import pide_validacion, respuesta_condicional
+from .metricas import envoltorio_sql, medicion_actual
+
+_ejecutor = None
+_ejecutor_lock = threading.Lock()
+
+
+def ejecutor_consultas():
+    """
+    Pool de hilos de ``consultas_concurrentes``, compartido por todas las
+    peticiones del proceso. El pool por defecto de asyncio se descarta con
+    su event loop (por ejemplo en cada ``async_to_sync``); con un pool propio
+    los hilos y sus conexiones persistentes se reutilizan y las conexiones
+    extra por proceso no pasan de ``API_CONSULTAS_HILOS``.
+    """
+    global _ejecutor
+    if _ejecutor is None:
+        with _ejecutor_lock:
+            if _ejecutor is None:
+                _ejecutor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'API_CONSULTAS_HILOS', 4),
+                    thread_name_prefix='consultas',
+                )
+    return _ejecutor
+
+
+def en_transaccion():
+    return any(
+        connection.in_atomic_block for connection in connections.all(initialized_only=True)
+    )
+
+
+def conexiones_persistentes():
+    """
+    Indica si todas las bases de datos conservan la conexión entre
+    peticiones (``CONN_MAX_AGE`` distinto de 0). Sin eso, cada consulta en
+    un hilo del pool abriría y cerraría su propia conexión.
+    """
+    return all(connection.settings_dict.get('CONN_MAX_AGE', 0) != 0 for connection in connections.all())
+
+
+def _en_conexion_propia(funcion):
+    """
+    Ejecuta ``funcion`` en un hilo de ``ejecutor_consultas``: mide sus
+    consultas si la petición se está midiendo y al terminar libera la
+    conexión del hilo según ``CONN_MAX_AGE``, igual que al final de una
+    petición.
+    """
+    def ejecutar():
+        try:
+            with ExitStack() as stack:
+                if medicion_actual() is not None:
+                    for connection in connections.all():
+                        stack.enter_context(connection.execute_wrapper(envoltorio_sql))
+                return funcion()
+        finally:
+            close_old_connections()
+    return ejecutar
+
+
+async def consultas_concurrentes(*funciones):
+    """
+    Ejecuta funciones síncronas independientes (cada una con sus consultas)
+    a la vez y devuelve sus resultados en orden.
+
+    Si la petición está dentro de una transacción, las funciones se
+    ejecutan en ella, una tras otra: otra conexión no vería sus cambios sin
+    confirmar. También se ejecutan una tras otra con
+    ``API_CONSULTAS_CONCURRENTES = False`` o sin conexiones persistentes.
+    """
+    if (len(funciones) < 2 or not getattr(settings, 'API_CONSULTAS_CONCURRENTES', True)
+            or not conexiones_persistentes() or await sync_to_async(en_transaccion)()):
+        return [await sync_to_async(funcion)() for funcion in funciones]
+    ejecutor = ejecutor_consultas()
+    return list(await asyncio.gather(*(
+        sync_to_async(_en_conexion_propia(funcion), thread_sensitive=False, executor=ejecutor)()
+        for funcion in funciones
+    )))
+
+
+class DespachoAsincronoMixin:
+    """
+    Mixin para vistas de DRF (ViewSets o ``APIView``) con variantes
+    asíncronas de algunas acciones.
+
+    La variante asíncrona de una acción es un método ``async def`` con el
+    mismo nombre y el prefijo ``a`` (``alist`` para ``list``). Solo se usa
+    con ``API_VISTAS_ASINCRONAS = True``, pensado para despliegues ASGI: con
+    WSGI cada vista asíncrona pasaría por ``async_to_sync`` y por saltos de
+    hilo sin ganar nada, así que la vista se despacha igual que siempre.
+
+    En modo asíncrono, autenticación, permisos y throttling se ejecutan en
+    el hilo de la petición (pueden consultar la base de datos) y luego se
+    espera a la variante. Las acciones sin variante (``create``,
+    ``update``...) se despachan completas en ese hilo.
+    """
+    # None: según API_VISTAS_ASINCRONAS al crear la vista
+    despacho_asincrono = None
+
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        if initkwargs.get('despacho_asincrono') is None:
+            initkwargs['despacho_asincrono'] = getattr(settings, 'API_VISTAS_ASINCRONAS', False)
+        view = super().as_view(*args, **initkwargs)
+        if initkwargs['despacho_asincrono']:
+            # ``ViewSetMixin.as_view`` no marca la vista como corrutina
+            markcoroutinefunction(view)
+        return view
+
+    def manejador(self, request):
+        """
+        Variante asíncrona del manejador de la petición, o ``None``.
+        """
+        metodo = request.method.lower()
+        if metodo not in self.http_method_names:
+            return None
+        handler = getattr(self, metodo, None)
+        asincrono = getattr(self, f'a{getattr(handler, "__name__", "")}', None)
+        return asincrono if iscoroutinefunction(asincrono) else None
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.despacho_asincrono:
+            return self.adispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        handler = self.manejador(request)
+        if handler is None:
+            return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = await sync_to_async(self.handle_exception)(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class ListaAsincronaMixin:
+    """
+    Variante asíncrona de ``list`` para ViewSets con ``ConditionalGetMixin``.
+
+    Si la petición no trae cabeceras condicionales, la respuesta no puede
+    ser un 304, así que el validador (ETag/Last-Modified) y la lista se
+    consultan a la vez. Si las trae, primero se calcula el validador, como
+    en la versión síncrona.
+    """
+    async def alist(self, request, *args, **kwargs):
+        lista = partial(self.list, request, *args, **kwargs)
+        if pide_validacion(request):
+            return await sync_to_async(lista)()
+
+        self.validar_lista = False
+        (etag, ultima), response = await consultas_concurrentes(
+            partial(self.validadores_lista, request), lista,
+        )
+        return respuesta_condicional(request, etag, ultima, lambda: response)
@@ -0,0 +1,129 @@
+"""
+Conjuntos de campos a pedido (``?fields=`` / ``?omit=``) y formato por
+columnas para las vistas de lectura.
+
+``?fields=id,motivo,monto`` devuelve solo esos campos y ``?omit=descripcion``
+todos menos esos. El conjunto pedido también reduce la consulta: el
+queryset se limita con ``.only()`` a las columnas que leen los campos
+elegidos (más las del orden, que necesita la paginación por cursor), y las
+vistas pueden omitir los JOIN de los campos calculados que no se pidieron.
+
+``?formato=columnas`` en ``list`` devuelve un objeto con un arreglo por
+campo en lugar de una lista de objetos. Los nombres de los campos no se
+repiten en cada fila, por lo que la respuesta pesa menos y el cliente la
+interpreta más rápido en listas grandes.
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+FORMATO_COLUMNAS = 'columnas'
+
+
+def parametro_lista(valor):
+    return [campo.strip() for campo in (valor or '').split(',') if campo.strip()]
+
+
+def a_columnas(filas, campos):
+    """
+    Convierte una lista de objetos en ``{campo: [valor de cada fila]}``.
+    """
+    return {campo: [fila[campo] for fila in filas] for campo in campos}
+
+
+class CamposDinamicosMixin:
+    """
+    Mixin de ViewSet que aplica ``fields``/``omit`` a las acciones de
+    ``acciones_campos`` y el formato por columnas a ``list``.
+
+    Debe ir antes de ``ConditionalGetMixin`` o de ``ModelViewSet`` en las
+    bases, para que la respuesta 304 no pase por la conversión.
+    """
+    acciones_campos = ('list', 'retrieve')
+    parametro_campos = 'fields'
+    parametro_omitir = 'omit'
+    parametro_formato = 'formato'
+    # Columnas del modelo que leen los campos calculados, por nombre de campo
+    columnas_campos_calculados = {}
+
+    def campos_disponibles(self):
+        return list(self.get_serializer_class()().fields)
+
+    def campos_respuesta(self):
+        """
+        Campos que se devuelven, en el orden del serializer, o ``None`` si
+        la petición no restringe los campos.
+        """
+        if getattr(self, 'action', None) not in self.acciones_campos:
+            return None
+        if not hasattr(self, '_campos_respuesta'):
+            parametros = self.request.query_params
+            pedidos = parametro_lista(parametros.get(self.parametro_campos))
+            omitidos = parametro_lista(parametros.get(self.parametro_omitir))
+            if not pedidos and not omitidos:
+                self._campos_respuesta = None
+                return None
+            disponibles = self.campos_disponibles()
+            desconocidos = [campo for campo in pedidos + omitidos if campo not in disponibles]
+            if desconocidos:
+                raise ValidationError({
+                    self.parametro_campos: [f"Campos desconocidos: {', '.join(desconocidos)}."]
+                })
+            elegidos = set(pedidos or disponibles) - set(omitidos)
+            self._campos_respuesta = [campo for campo in disponibles if campo in elegidos]
+        return self._campos_respuesta
+
+    def incluye_campo(self, campo):
+        campos = self.campos_respuesta()
+        return campos is None or campo in campos
+
+    def columnas_modelo(self, queryset, campos):
+        """
+        Columnas del modelo que leen los campos elegidos del serializer. Los
+        campos calculados (``SerializerMethodField``) agregan las columnas
+        declaradas en ``columnas_campos_calculados``.
+        """
+        modelo = queryset.model
+        serializer = self.get_serializer_class()()
+        columnas = {modelo._meta.pk.name}
+        for campo in campos:
+            field = serializer.fields[campo]
+            if isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+                columnas.update(self.columnas_campos_calculados.get(campo, ()))
+                continue
+            columnas.add(field.source.split('.')[0])
+        for termino in queryset.query.order_by:
+            if isinstance(termino, str):
+                columnas.add(termino.lstrip('-').split('__')[0])
+        concretos = {field.name for field in modelo._meta.concrete_fields}
+        return [columna for columna in columnas if columna in concretos]
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        campos = self.campos_respuesta()
+        if campos is not None:
+            queryset = queryset.only(*self.columnas_modelo(queryset, campos))
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        campos = self.campos_respuesta()
+        if campos is not None:
+            destino = getattr(serializer, 'child', serializer)
+            for campo in list(destino.fields):
+                if campo not in campos:
+                    destino.fields.pop(campo)
+        return serializer
+
+    def formato_columnas(self):
+        return self.request.query_params.get(self.parametro_formato) == FORMATO_COLUMNAS
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if response.status_code != 200 or not self.formato_columnas():
+            return response
+        campos = self.campos_respuesta() or self.campos_disponibles()
+        if isinstance(response.data, list):
+            response.data = a_columnas(response.data, campos)
+        else:
+            response.data['results'] = a_columnas(response.data['results'], campos)
+        return response
@@ -0,0 +1,31 @@
+"""
+Chequeos de sistema de la configuración de la API.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends cuyo contenido solo ve el proceso que lo escribió
+CACHES_LOCALES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches)
+def revisar_cache_compartida(app_configs, **kwargs):
+    """
+    La caché ``default`` guarda la versión de las estadísticas de multas y
+    la marca de lectura en la primaria de ``api.replicas``; con varios
+    procesos tiene que ser compartida.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in CACHES_LOCALES:
+        return []
+    return [Error(
+        f'La caché "default" ({backend}) no se comparte entre procesos.',
+        hint=(
+            'Las estadísticas de multas y las réplicas de lectura necesitan '
+            'una caché compartida: DatabaseCache, Redis o Memcached.'
+        ),
+        id='api.E001',
+    )]
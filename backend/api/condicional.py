@@ -0,0 +1,118 @@
+"""
+Soporte de peticiones GET condicionales (ETag / Last-Modified).
+
+El validador se calcula sin serializar la respuesta: la fecha de
+modificación más reciente y el número de filas del queryset que vería la
+vista, junto con su SQL (que incluye el alcance del usuario y los filtros)
+y los parámetros de la petición. Si el cliente envía un ``If-None-Match`` o
+``If-Modified-Since`` que coincide, se responde ``304 Not Modified``.
+
+Las listas solo llevan ``ETag``: al eliminar una fila la fecha más reciente
+no cambia, así que un ``If-Modified-Since`` respondería 304 con datos
+viejos. El número de filas del ETag sí lo detecta.
+"""
+import hashlib
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def calcular_etag(*partes):
+    contenido = '|'.join(str(parte) for parte in partes)
+    return '"%s"' % hashlib.md5(contenido.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+
+def validadores_queryset(request, queryset, campo='fecha_modificacion'):
+    """
+    Devuelve ``(etag, ultima_modificacion)`` para el queryset con una sola
+    consulta de agregación.
+    """
+    queryset = queryset.order_by()
+    datos = queryset.aggregate(ultima=Max(campo), total=Count('pk'))
+    sql, params = queryset.query.sql_with_params()
+    etag = calcular_etag(
+        sql, params, request.get_full_path(), datos['ultima'], datos['total']
+    )
+    return etag, datos['ultima']
+
+
+def pide_validacion(request):
+    """
+    Indica si la petición trae cabeceras condicionales; sin ellas la
+    respuesta nunca es un 304 ni un 412.
+    """
+    return any(cabecera in request.META for cabecera in (
+        'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE',
+    ))
+
+
+def respuesta_condicional(request, etag, ultima_modificacion, generar):
+    """
+    Devuelve un 304 si los validadores coinciden; si no, genera la
+    respuesta con ``generar()`` y le agrega ``ETag`` y ``Last-Modified``.
+    """
+    timestamp = ultima_modificacion.timestamp() if ultima_modificacion else None
+    if request.method in ('GET', 'HEAD'):
+        no_modificada = get_conditional_response(
+            request, etag=etag, last_modified=int(timestamp) if timestamp else None
+        )
+        if no_modificada is not None:
+            return no_modificada
+
+    response = generar()
+    if response.status_code == 200:
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+        # El navegador guarda la respuesta pero la revalida en cada uso
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Mixin para ViewSets que responde ``list`` y ``retrieve`` con 304 cuando
+    el cliente ya tiene la versión vigente.
+
+    ``campo_modificacion`` es el campo de fecha de modificación del modelo.
+    ``get_queryset_validador`` puede devolver una versión más liviana del
+    queryset de la vista (por ejemplo, sin JOINs que solo aportan columnas).
+    """
+    campo_modificacion = 'fecha_modificacion'
+    # ``ListaAsincronaMixin`` lo desactiva cuando calcula el validador aparte
+    validar_lista = True
+
+    def get_queryset_validador(self):
+        return self.get_queryset()
+
+    def validadores_lista(self, request):
+        queryset = self.filter_queryset(self.get_queryset_validador())
+        etag, _ = validadores_queryset(request, queryset, self.campo_modificacion)
+        # Sin Last-Modified: no refleja las eliminaciones
+        return etag, None
+
+    def list(self, request, *args, **kwargs):
+        if not self.validar_lista:
+            return super().list(request, *args, **kwargs)
+        etag, ultima = self.validadores_lista(request)
+        return respuesta_condicional(
+            request, etag, ultima, partial(super().list, request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset_validador()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+            etag, ultima = validadores_queryset(request, queryset, self.campo_modificacion)
+        except (TypeError, ValueError, ValidationError):
+            # Identificador inválido: get_object responde 404
+            return super().retrieve(request, *args, **kwargs)
+        return respuesta_condicional(
+            request, etag, ultima, partial(super().retrieve, request, *args, **kwargs)
+        )
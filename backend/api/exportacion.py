@@ -0,0 +1,196 @@
+"""
+Utilidades para exportar querysets como CSV o XLSX en streaming.
+
+Las filas se leen por lotes y se escriben a medida que llegan, de modo que
+la memoria no depende del número de filas y el primer byte sale antes de
+terminar la lectura.
+"""
+import csv
+import io
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.db import connections
+from django.db.models import Q
+
+FORMATOS_EXPORTACION = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+
+def iterar_por_lotes(queryset, campo, descendente, chunk_size=2000, keyset=None):
+    """
+    Recorre un queryset de ``.values()`` por lotes, ordenado por
+    ``(campo, id)``.
+
+    En MySQL el driver carga el resultado completo en memoria aunque se use
+    ``.iterator()``, así que allí se pagina por keyset: cada lote es una
+    consulta ``WHERE (campo, id) > (último)`` que usa el índice. En los
+    demás motores se usa ``.iterator()`` sobre un único cursor.
+    """
+    prefijo = '-' if descendente else ''
+    queryset = queryset.order_by(prefijo + campo, prefijo + 'id')
+    if keyset is None:
+        keyset = connections[queryset.db].vendor == 'mysql'
+
+    if not keyset:
+        yield from queryset.iterator(chunk_size=chunk_size)
+        return
+
+    lookup = 'lt' if descendente else 'gt'
+    ultimo = None
+    while True:
+        lote_qs = queryset
+        if ultimo is not None:
+            lote_qs = queryset.filter(
+                Q(**{f'{campo}__{lookup}': ultimo[0]})
+                | Q(**{campo: ultimo[0], f'id__{lookup}': ultimo[1]})
+            )
+        lote = list(lote_qs[:chunk_size])
+        if not lote:
+            return
+        yield from lote
+        ultimo = (lote[-1][campo], lote[-1]['id'])
+
+
+class _Eco:
+    """
+    Objeto tipo archivo que devuelve lo que se le escribe (para csv.writer).
+    """
+    def write(self, valor):
+        return valor
+
+
+# Prefijos con los que Excel, LibreOffice y Google Sheets interpretan una
+# celda de CSV como fórmula.
+_PREFIJOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+def neutralizar_formula(valor):
+    """
+    Antepone ``'`` a los textos que una planilla evaluaría como fórmula
+    (inyección de CSV). Los números no se tocan.
+    """
+    if isinstance(valor, str) and valor.startswith(_PREFIJOS_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def generar_csv(encabezados, filas):
+    """
+    Genera el CSV línea a línea. Empieza con un BOM para que Excel
+    reconozca la codificación UTF-8. Los textos que empiezan como una
+    fórmula se neutralizan con ``neutralizar_formula``.
+    """
+    writer = csv.writer(_Eco())
+    yield '﻿' + writer.writerow([neutralizar_formula(v) for v in encabezados])
+    for fila in filas:
+        yield writer.writerow([neutralizar_formula(v) for v in fila])
+
+
+class _SalidaZip(io.RawIOBase):
+    """
+    Destino no posicionable para ``zipfile``: acumula los bytes escritos
+    hasta que el generador los entrega.
+    """
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+_XLSX_ESTATICOS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{nombre}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+# Caracteres de control que no se permiten en XML 1.0
+_CONTROL = dict.fromkeys(c for c in range(32) if c not in (9, 10, 13))
+
+
+def _celda(valor):
+    """
+    Celda de la hoja. Los textos van siempre como cadena en línea
+    (``t="inlineStr"``), que Excel muestra tal cual y nunca evalúa como
+    fórmula, así que no necesitan el ``'`` del CSV.
+    """
+    if valor is None:
+        return '<c/>'
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return f'<c><v>{valor}</v></c>'
+    texto = escape(str(valor).translate(_CONTROL))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def generar_xlsx(encabezados, filas, nombre_hoja='Hoja1', filas_por_bloque=500):
+    """
+    Genera un libro XLSX de una hoja con cadenas en línea, sin cargarlo
+    completo en memoria: el ZIP se escribe en modo streaming y se entrega
+    cada ``filas_por_bloque`` filas.
+    """
+    salida = _SalidaZip()
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as libro:
+        for nombre, contenido in _XLSX_ESTATICOS.items():
+            libro.writestr(nombre, contenido)
+        libro.writestr('xl/workbook.xml', _XLSX_WORKBOOK.format(nombre=escape(nombre_hoja)))
+        yield salida.vaciar()
+
+        with libro.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as hoja:
+            hoja.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            bloque = ['<row>' + ''.join(_celda(v) for v in encabezados) + '</row>']
+            for fila in filas:
+                bloque.append('<row>' + ''.join(_celda(v) for v in fila) + '</row>')
+                if len(bloque) >= filas_por_bloque:
+                    hoja.write(''.join(bloque).encode('utf-8'))
+                    bloque = []
+                    yield salida.vaciar()
+            hoja.write(''.join(bloque).encode('utf-8') + b'</sheetData></worksheet>')
+        yield salida.vaciar()
+    yield salida.vaciar()
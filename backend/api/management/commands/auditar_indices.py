@@ -0,0 +1,141 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from multas.models import Multa
+from multas.views import MultaViewSet
+from usuarios.busqueda import consulta_busqueda
+from usuarios.models import Usuario
+from usuarios.views import UsuarioViewSet
+
+
+def queryset_de_vista(viewset_class, action, rol, params=None, pk=None):
+    """
+    Construye el queryset que genera un ViewSet para una acción, aplicando
+    los mismos filtros que recibiría con los parámetros ``params``.
+    """
+    usuario = Usuario(pk=1, username='auditoria', rol=rol)
+    request = Request(APIRequestFactory().get('/', params or {}))
+    request.user = usuario
+
+    view = viewset_class()
+    view.action = action
+    view.request = request
+    view.args = ()
+    view.kwargs = {'pk': pk} if pk is not None else {}
+    view.format_kwarg = None
+
+    queryset = view.filter_queryset(view.get_queryset())
+    if pk is not None:
+        return queryset.filter(pk=pk)
+    paginator = view.paginator
+    if paginator is not None:
+        # Igual que la paginación por cursor: orden + desempate + LIMIT
+        field, descending = paginator.get_ordering(request, queryset, view)
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(prefix + field, prefix + paginator.tiebreak_field)
+        return queryset[:paginator.page_size + 1]
+    return queryset
+
+
+def escenarios():
+    """
+    Consultas de las vistas a auditar: (nombre, queryset, permitir_scan).
+
+    ``permitir_scan`` marca consultas que recorren la tabla por diseño
+    (por ejemplo agregados sin filtro); se informan pero no fallan.
+    """
+    return [
+        ('multas.list admin', queryset_de_vista(MultaViewSet, 'list', 'admin'), False),
+        ('multas.list admin estado', queryset_de_vista(
+            MultaViewSet, 'list', 'admin', {'estado': 'pendiente'}), False),
+        ('multas.list admin ordering=monto', queryset_de_vista(
+            MultaViewSet, 'list', 'admin', {'ordering': 'monto'}), False),
+        ('multas.list residente', queryset_de_vista(MultaViewSet, 'list', 'residente'), False),
+        ('multas.list residente estado', queryset_de_vista(
+            MultaViewSet, 'list', 'residente', {'estado': 'pendiente'}), False),
+        ('multas.list admin search', queryset_de_vista(
+            MultaViewSet, 'list', 'admin', {'search': 'ruido perez'}), False),
+        ('multas.retrieve', queryset_de_vista(MultaViewSet, 'retrieve', 'admin', pk=1), False),
+        ('multas.estadisticas desde', Multa.objects.order_by().filter(
+            fecha_creacion__gte='2025-01-01'), False),
+        ('multas.estadisticas', Multa.objects.order_by(), True),
+        ('usuarios.retrieve', queryset_de_vista(UsuarioViewSet, 'retrieve', 'admin', pk=1), False),
+        ('usuarios.admin_dashboard', Usuario.objects.filter(rol='residente'), False),
+        ('usuarios.list residencia', queryset_de_vista(
+            UsuarioViewSet, 'list', 'admin', {'numero_residencia__startswith': 'E01'}), False),
+        ('usuarios.buscar', consulta_busqueda('per'), False),
+        ('usuarios.buscar dos palabras', consulta_busqueda('juan per'), False),
+    ]
+
+
+def scans_completos(queryset):
+    """
+    Ejecuta EXPLAIN sobre el queryset y devuelve las tablas que se recorren
+    completas, según el plan del motor de base de datos en uso.
+    """
+    connection = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+    tablas = []
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            for row in cursor.fetchall():
+                detalle = row[-1]
+                match = re.match(r'SCAN (\w+)', detalle)
+                if (match and 'USING' not in detalle and 'VIRTUAL TABLE INDEX' not in detalle
+                        and match.group(1) != 'CONSTANT'):
+                    tablas.append(match.group(1))
+        elif connection.vendor == 'mysql':
+            cursor.execute('EXPLAIN ' + sql, params)
+            columnas = [col[0] for col in cursor.description]
+            for row in cursor.fetchall():
+                fila = dict(zip(columnas, row))
+                if fila.get('type') == 'ALL':
+                    tablas.append(fila.get('table'))
+        elif connection.vendor == 'postgresql':
+            cursor.execute('EXPLAIN ' + sql, params)
+            for (linea,) in cursor.fetchall():
+                match = re.search(r'Seq Scan on (\w+)', linea)
+                if match:
+                    tablas.append(match.group(1))
+        else:
+            raise CommandError(f'Motor no soportado: {connection.vendor}')
+    return tablas
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta EXPLAIN sobre las consultas que generan los ViewSets y '
+        'reporta las que recorren tablas completas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plan', action='store_true',
+            help='Muestra el SQL de cada consulta auditada.',
+        )
+
+    def handle(self, *args, **options):
+        fallas = []
+        for nombre, queryset, permitir_scan in escenarios():
+            tablas = scans_completos(queryset)
+            if not tablas:
+                self.stdout.write(self.style.SUCCESS(f'OK      {nombre}'))
+            elif permitir_scan:
+                self.stdout.write(self.style.WARNING(
+                    f'SCAN    {nombre}: {", ".join(tablas)} (permitido)'))
+            else:
+                fallas.append(nombre)
+                self.stdout.write(self.style.ERROR(
+                    f'SCAN    {nombre}: {", ".join(tablas)}'))
+            if options['verbose_plan']:
+                self.stdout.write(f'        {queryset.query}')
+
+        if fallas:
+            raise CommandError(
+                f'{len(fallas)} consulta(s) recorren tablas completas: {", ".join(fallas)}'
+            )
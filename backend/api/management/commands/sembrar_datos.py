@@ -0,0 +1,184 @@
+import random
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from multas.busqueda import indexar_multas
+from multas.estadisticas import invalidar_estadisticas
+from multas.models import Multa
+from multas.saldos import reconciliar
+from usuarios.busqueda import CAMPOS_TERMINOS, indexar_usuarios
+from usuarios.models import Usuario
+
+MOTIVOS = (
+    ('Ruidos molestos', 'Música a alto volumen después de las 22:00.'),
+    ('Mascota sin correa', 'Perro suelto en áreas comunes.'),
+    ('Estacionamiento indebido', 'Vehículo en estacionamiento de visitas.'),
+    ('Basura fuera de horario', 'Bolsas en el pasillo fuera del horario de retiro.'),
+    ('Daño a áreas comunes', 'Daño en el mobiliario de la sala multiuso.'),
+    ('Uso indebido de piscina', 'Ingreso con invitados sin reserva.'),
+    ('Fumar en áreas comunes', None),
+    ('Mudanza sin aviso', 'Uso del ascensor sin reserva previa.'),
+)
+# Pesos de cada motivo: unos pocos concentran la mayoría de las multas
+PESOS_MOTIVOS = (30, 20, 15, 12, 8, 6, 5, 4)
+MONTOS = (5000, 10000, 15000, 20000, 30000, 50000)
+NOMBRES = ('Ana', 'Luis', 'María', 'José', 'Camila', 'Pedro', 'Javiera', 'Diego', 'Sofía', 'Matías')
+APELLIDOS = ('González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva', 'Martínez', 'Sepúlveda')
+
+
+@contextmanager
+def fechas_manuales(*campos):
+    """
+    Desactiva temporalmente ``auto_now``/``auto_now_add`` para poder
+    insertar fechas históricas.
+    """
+    originales = []
+    for modelo, nombre in campos:
+        campo = modelo._meta.get_field(nombre)
+        originales.append((campo, campo.auto_now, campo.auto_now_add))
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in originales:
+            campo.auto_now = auto_now
+            campo.auto_now_add = auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos para pruebas de rendimiento: edificios '
+        '(como prefijo del número de residencia), residentes y multas con '
+        'distribuciones sesgadas de estado, fecha y residente.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--edificios', type=int, default=50)
+        parser.add_argument('--residentes', type=int, default=20000)
+        parser.add_argument('--multas', type=int, default=2000000)
+        parser.add_argument('--dias', type=int, default=3 * 365,
+                            help='Antigüedad máxima de las multas en días.')
+        parser.add_argument('--pagadas', type=float, default=0.7,
+                            help='Probabilidad de pago de las multas más antiguas; las recientes la mitad.')
+        parser.add_argument('--password', default='Clave-Sintetica-123',
+                            help='Contraseña de todos los usuarios generados.')
+        parser.add_argument('--prefijo', default='sint',
+                            help='Prefijo de los nombres de usuario generados.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--sin-busqueda', action='store_true',
+                            help='No generar los documentos de búsqueda de las multas.')
+
+    def handle(self, *args, **options):
+        if options['edificios'] < 1 or options['residentes'] < 1:
+            raise CommandError('Se necesita al menos un edificio y un residente.')
+        if not 0 <= options['pagadas'] <= 1:
+            raise CommandError('--pagadas debe estar entre 0 y 1.')
+        prefijo = options['prefijo']
+        if Usuario.objects.filter(username__startswith=f'{prefijo}_').exists():
+            raise CommandError(f"Ya existen usuarios con el prefijo '{prefijo}_'.")
+
+        self.aleatorio = random.Random(options['semilla'])
+        self.batch_size = options['batch_size']
+        # Todas las cuentas comparten la contraseña: se hashea una sola vez
+        password = make_password(options['password'])
+
+        Usuario.objects.bulk_create(
+            [Usuario(username=f'{prefijo}_admin', password=password, rol='admin',
+                     is_staff=True, first_login=False)]
+        )
+        ids = self.crear_residentes(options, password)
+        indexar_usuarios(
+            Usuario.objects.filter(username__startswith=f'{prefijo}_').only(*CAMPOS_TERMINOS),
+            reemplazar=False, batch_size=self.batch_size,
+        )
+        self.stdout.write(f'{len(ids)} residentes creados.')
+
+        desde = Multa.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        total = self.crear_multas(options, ids)
+        self.stdout.write(f'{total} multas creadas.')
+
+        if not options['sin_busqueda']:
+            indexados = indexar_multas(
+                Multa.objects.filter(id__gt=desde), batch_size=self.batch_size
+            )
+            self.stdout.write(f'{indexados} documentos de búsqueda generados.')
+        # bulk_create no pasa por Multa.save: los saldos se calculan al final
+        reconciliar()
+        invalidar_estadisticas()
+        self.stdout.write(self.style.SUCCESS(
+            f"Usuario administrador: {prefijo}_admin, residentes: {prefijo}_00001..."
+        ))
+
+    def crear_residentes(self, options, password):
+        prefijo = options['prefijo']
+        edificios = options['edificios']
+        usuarios = []
+        for n in range(1, options['residentes'] + 1):
+            edificio = (n - 1) % edificios + 1
+            depto = (n - 1) // edificios + 1
+            usuarios.append(Usuario(
+                username=f'{prefijo}_{n:05d}',
+                password=password,
+                rol='residente',
+                first_name=self.aleatorio.choice(NOMBRES),
+                last_name=self.aleatorio.choice(APELLIDOS),
+                numero_residencia=f'E{edificio:02d}-{depto:04d}',
+                first_login=False,
+            ))
+        with transaction.atomic():
+            Usuario.objects.bulk_create(usuarios, batch_size=self.batch_size)
+        return list(
+            Usuario.objects.filter(username__startswith=f'{prefijo}_', rol='residente')
+            .order_by('id').values_list('id', flat=True)
+        )
+
+    def crear_multas(self, options, ids):
+        aleatorio = self.aleatorio
+        hoy = date.today()
+        dias = max(options['dias'], 1)
+        pagadas = options['pagadas']
+        # Pareto: unos pocos residentes acumulan la mayoría de las multas
+        pesos = [1 / (i + 1) ** 0.8 for i in range(len(ids))]
+        aleatorio.shuffle(pesos)
+
+        total = 0
+        restantes = options['multas']
+        with fechas_manuales((Multa, 'fecha_creacion'), (Multa, 'fecha_modificacion')):
+            while restantes > 0:
+                cantidad = min(self.batch_size, restantes)
+                usuarios = aleatorio.choices(ids, weights=pesos, k=cantidad)
+                motivos = aleatorio.choices(MOTIVOS, weights=PESOS_MOTIVOS, k=cantidad)
+                lote = []
+                for usuario_id, (motivo, descripcion) in zip(usuarios, motivos):
+                    # Más multas recientes que antiguas
+                    antiguedad = min(int(aleatorio.expovariate(3 / dias)), dias - 1)
+                    creacion = hoy - timedelta(days=antiguedad)
+                    # Las multas antiguas tienden a estar pagadas
+                    prob_pago = pagadas * min(1.0, 0.5 + antiguedad / dias)
+                    fecha_pago = None
+                    if aleatorio.random() < prob_pago:
+                        fecha_pago = min(hoy, creacion + timedelta(days=int(aleatorio.expovariate(1 / 20))))
+                    ultima = fecha_pago or creacion
+                    lote.append(Multa(
+                        usuario_id=usuario_id,
+                        motivo=motivo,
+                        descripcion=descripcion,
+                        monto=aleatorio.choice(MONTOS),
+                        fecha_creacion=creacion,
+                        fecha_pago=fecha_pago,
+                        estado='pagado' if fecha_pago else 'pendiente',
+                        fecha_modificacion=timezone.make_aware(datetime.combine(ultima, time(12))),
+                    ))
+                with transaction.atomic():
+                    Multa.objects.bulk_create(lote)
+                total += cantidad
+                restantes -= cantidad
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'  {total} multas...')
+        return total
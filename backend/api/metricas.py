@@ -0,0 +1,265 @@
+"""
+Métricas de rendimiento por vista y acción.
+
+Por cada petición se mide la latencia total, el número de consultas SQL,
+el tiempo en la base de datos y el tiempo dentro de ``serializer.data``.
+Los valores se agregan en memoria por ``(vista, acción)`` y se exponen en
+el formato de texto de Prometheus.
+
+Las métricas son por proceso: con varios workers cada uno expone las suyas.
+El costo por petición es un par de ``perf_counter()`` por consulta y un
+lock al final, por lo que se puede dejar activo en producción.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Límites superiores de los buckets de los histogramas
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+_medicion_actual = ContextVar('medicion_actual', default=None)
+
+
+class Medicion:
+    """
+    Acumula los tiempos de una petición.
+    """
+    __slots__ = ('inicio', 'consultas', 'tiempo_db', 'tiempo_serializador', '_profundidad')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.tiempo_serializador = 0.0
+        self._profundidad = 0
+
+    def duracion(self):
+        return time.perf_counter() - self.inicio
+
+
+def iniciar_medicion():
+    medicion = Medicion()
+    return medicion, _medicion_actual.set(medicion)
+
+
+def terminar_medicion(token):
+    _medicion_actual.reset(token)
+
+
+def medicion_actual():
+    return _medicion_actual.get()
+
+
+def envoltorio_sql(execute, sql, params, many, context):
+    """
+    ``execute_wrapper`` que cuenta las consultas y su duración.
+    """
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.tiempo_db += time.perf_counter() - inicio
+        medicion.consultas += 1
+
+
+@contextmanager
+def medir_serializacion():
+    """
+    Suma la duración del bloque al tiempo de serialización de la petición,
+    para las vistas que serializan sin pasar por ``serializer.data``.
+    """
+    medicion = _medicion_actual.get()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if medicion is not None:
+            medicion.tiempo_serializador += time.perf_counter() - inicio
+
+
+def instalar_medicion_serializadores():
+    """
+    Envuelve ``BaseSerializer.data`` para medir el tiempo de serialización.
+
+    ``Serializer.data`` y ``ListSerializer.data`` llegan a esta propiedad
+    una sola vez por llamada; los serializadores anidados usan
+    ``to_representation``, así que no se cuentan dos veces. Incluye las
+    consultas que se evalúan de forma diferida al serializar.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.data
+    if getattr(original, '_medido', False):
+        return
+
+    def data(self):
+        medicion = _medicion_actual.get()
+        if medicion is None:
+            return original.fget(self)
+        medicion._profundidad += 1
+        inicio = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            medicion._profundidad -= 1
+            if medicion._profundidad == 0:
+                medicion.tiempo_serializador += time.perf_counter() - inicio
+
+    propiedad = property(data)
+    propiedad.fget._medido = True
+    BaseSerializer.data = propiedad
+
+
+class Histograma:
+    __slots__ = ('limites', 'cuentas', 'suma', 'total')
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.cuentas[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def acumulados(self):
+        acumulado = 0
+        for limite, cuenta in zip(self.limites + (float('inf'),), self.cuentas):
+            acumulado += cuenta
+            yield limite, acumulado
+
+
+class MetricasVista:
+    __slots__ = ('latencia', 'consultas', 'tiempo_db', 'tiempo_serializador', 'respuestas')
+
+    def __init__(self):
+        self.latencia = Histograma(BUCKETS_LATENCIA)
+        self.consultas = Histograma(BUCKETS_CONSULTAS)
+        self.tiempo_db = 0.0
+        self.tiempo_serializador = 0.0
+        self.respuestas = {}
+
+
+class RegistroMetricas:
+    """
+    Agregado en memoria de las mediciones por ``(vista, acción)``.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vistas = {}
+
+    def registrar(self, vista, accion, codigo, medicion, duracion):
+        clase = f'{codigo // 100}xx'
+        with self._lock:
+            metricas = self._vistas.get((vista, accion))
+            if metricas is None:
+                metricas = self._vistas[(vista, accion)] = MetricasVista()
+            metricas.latencia.observar(duracion)
+            metricas.consultas.observar(medicion.consultas)
+            metricas.tiempo_db += medicion.tiempo_db
+            metricas.tiempo_serializador += medicion.tiempo_serializador
+            metricas.respuestas[clase] = metricas.respuestas.get(clase, 0) + 1
+
+    def limpiar(self):
+        with self._lock:
+            self._vistas = {}
+
+    def obtener(self, vista, accion):
+        with self._lock:
+            return self._vistas.get((vista, accion))
+
+    def exportar_prometheus(self):
+        """
+        Devuelve las métricas en el formato de texto de Prometheus (0.0.4).
+        """
+        with self._lock:
+            vistas = sorted(self._vistas.items())
+            lineas = []
+
+            def histograma(nombre, ayuda, atributo):
+                lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} histogram')
+                for (vista, accion), metricas in vistas:
+                    etiquetas = _etiquetas(vista=vista, accion=accion)
+                    hist = getattr(metricas, atributo)
+                    for limite, acumulado in hist.acumulados():
+                        le = '+Inf' if limite == float('inf') else _numero(limite)
+                        lineas.append(
+                            f'{nombre}_bucket{{{etiquetas},le="{le}"}} {acumulado}'
+                        )
+                    lineas.append(f'{nombre}_sum{{{etiquetas}}} {_numero(hist.suma)}')
+                    lineas.append(f'{nombre}_count{{{etiquetas}}} {hist.total}')
+
+            def contador(nombre, ayuda, atributo):
+                lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} counter')
+                for (vista, accion), metricas in vistas:
+                    etiquetas = _etiquetas(vista=vista, accion=accion)
+                    lineas.append(f'{nombre}{{{etiquetas}}} {_numero(getattr(metricas, atributo))}')
+
+            histograma(
+                'http_request_duration_seconds',
+                'Latencia de las peticiones por vista y acción.', 'latencia'
+            )
+            histograma(
+                'http_request_db_queries',
+                'Consultas SQL por petición.', 'consultas'
+            )
+            contador(
+                'http_request_db_seconds_total',
+                'Tiempo total en la base de datos.', 'tiempo_db'
+            )
+            contador(
+                'http_request_serializer_seconds_total',
+                'Tiempo total en serializer.data (incluye consultas diferidas).',
+                'tiempo_serializador'
+            )
+            lineas.append('# HELP http_responses_total Respuestas por clase de código.')
+            lineas.append('# TYPE http_responses_total counter')
+            for (vista, accion), metricas in vistas:
+                for clase, total in sorted(metricas.respuestas.items()):
+                    etiquetas = _etiquetas(vista=vista, accion=accion, codigo=clase)
+                    lineas.append(f'http_responses_total{{{etiquetas}}} {total}')
+
+        return '\n'.join(lineas) + '\n'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def _etiquetas(**valores):
+    return ','.join(
+        '{}="{}"'.format(
+            clave, str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        )
+        for clave, valor in valores.items()
+    )
+
+
+registro = RegistroMetricas()
+
+
+def nombre_vista(view_func, metodo):
+    """
+    Devuelve ``(vista, acción)`` para la vista resuelta.
+
+    En los ViewSets la acción es la del router (``list``, ``estadisticas``);
+    en las APIView es el método HTTP en minúsculas.
+    """
+    clase = getattr(view_func, 'cls', None)
+    metodo = metodo.lower()
+    if clase is None:
+        return f'{view_func.__module__}.{view_func.__name__}', metodo
+    acciones = getattr(view_func, 'actions', None)
+    if acciones:
+        return clase.__name__, acciones.get(metodo, metodo)
+    return clase.__name__, metodo
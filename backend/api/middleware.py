@@ -0,0 +1,348 @@
+import re
+import secrets
+import struct
+import zlib
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from .metricas import (
+    envoltorio_sql, iniciar_medicion, nombre_vista, registro, terminar_medicion,
+)
+from .replicas import ainiciar_peticion, aterminar_peticion, iniciar_peticion, terminar_peticion
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+SIN_RESOLVER = ('sin_resolver', '')
+
+
+class MiddlewareDual:
+    """
+    Base de los middlewares que funcionan con WSGI y con ASGI: con una
+    cadena asíncrona ``__call__`` delega en ``__acall__``, sin pasar la
+    petición a un hilo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.procesar(request)
+
+
+def instalar_envoltorios(stack):
+    """
+    Instala ``envoltorio_sql`` en las conexiones del hilo actual hasta que
+    se cierre ``stack``.
+    """
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(envoltorio_sql))
+
+
+class MetricasMiddleware(MiddlewareDual):
+    """
+    Mide cada petición y la registra bajo la vista y acción resueltas.
+
+    Agrega la cabecera ``Server-Timing`` con la duración total, el tiempo en
+    la base de datos (con el número de consultas) y el tiempo de
+    serialización, visible en las herramientas de desarrollo del navegador.
+    Se desactiva con ``METRICAS_HABILITADAS = False``.
+
+    Con ASGI las consultas de la petición se hacen en su hilo de
+    ``sync_to_async``, así que los envoltorios se instalan en ese hilo.
+    """
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.habilitado = getattr(settings, 'METRICAS_HABILITADAS', True)
+        self.server_timing = getattr(settings, 'METRICAS_SERVER_TIMING', True)
+
+    def procesar(self, request):
+        if not self.habilitado:
+            return self.get_response(request)
+
+        medicion, token = iniciar_medicion()
+        request._vista_metricas = SIN_RESOLVER
+        try:
+            with ExitStack() as stack:
+                instalar_envoltorios(stack)
+                response = self.get_response(request)
+            duracion = medicion.duracion()
+        finally:
+            terminar_medicion(token)
+        return self.registrar(request, response, medicion, duracion)
+
+    async def __acall__(self, request):
+        if not self.habilitado:
+            return await self.get_response(request)
+
+        medicion, token = iniciar_medicion()
+        request._vista_metricas = SIN_RESOLVER
+        stack = ExitStack()
+        try:
+            await sync_to_async(instalar_envoltorios)(stack)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+            duracion = medicion.duracion()
+        finally:
+            terminar_medicion(token)
+        return self.registrar(request, response, medicion, duracion)
+
+    def registrar(self, request, response, medicion, duracion):
+        vista, accion = request._vista_metricas
+        registro.registrar(vista, accion, response.status_code, medicion, duracion)
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'total;dur={duracion * 1000:.1f}, '
+                f'db;dur={medicion.tiempo_db * 1000:.1f};desc="{medicion.consultas} consultas", '
+                f'serializer;dur={medicion.tiempo_serializador * 1000:.1f}'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.habilitado:
+            request._vista_metricas = nombre_vista(view_func, request.method)
+        return None
+
+
+class ReplicasMiddleware(MiddlewareDual):
+    """
+    Marca cada petición para que ``ReplicaRouter`` decida si sus lecturas
+    van a una réplica o a la primaria (ver ``api.replicas``).
+    """
+    def procesar(self, request):
+        token = iniciar_peticion(request)
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            terminar_peticion(token, request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = await ainiciar_peticion(request)
+        response = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            await aterminar_peticion(token, request, response)
+        return response
+
+
+def codificaciones_aceptadas(cabecera):
+    """
+    Codificaciones de ``Accept-Encoding`` con su calidad: ``{'gzip': 1.0}``.
+    """
+    aceptadas = {}
+    for parte in cabecera.split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+        calidad = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', parametros)
+        if match:
+            try:
+                calidad = float(match.group(1))
+            except ValueError:
+                calidad = 0.0
+        aceptadas[nombre] = calidad
+    return aceptadas
+
+
+def cabecera_gzip(relleno_maximo):
+    """
+    Cabecera gzip con un nombre de archivo de largo aleatorio (entre 0 y
+    ``relleno_maximo - 1`` bytes), igual que ``GZipMiddleware`` de Django:
+    el largo de la respuesta deja de delatar cuánto se comprimió el cuerpo,
+    que es lo que explota BREACH.
+    """
+    if not relleno_maximo:
+        return b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+    nombre = b'a' * secrets.randbelow(relleno_maximo)
+    # FLG=FNAME, MTIME=0, XFL=0, OS=desconocido
+    return b'\x1f\x8b\x08\x08\x00\x00\x00\x00\x00\xff' + nombre + b'\x00'
+
+
+class _Gzip:
+    """
+    Compresor gzip por partes con la cabecera de ``cabecera_gzip``: deflate
+    crudo más el CRC y el largo al final.
+    """
+    def __init__(self, nivel, relleno_maximo):
+        self._deflate = zlib.compressobj(nivel, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self._cabecera = cabecera_gzip(relleno_maximo)
+        self._crc = 0
+        self._largo = 0
+
+    def process(self, parte):
+        self._crc = zlib.crc32(parte, self._crc)
+        self._largo += len(parte)
+        comprimido = self._cabecera + self._deflate.compress(parte)
+        self._cabecera = b''
+        return comprimido
+
+    def finish(self):
+        cola = struct.pack('<II', self._crc, self._largo & 0xffffffff)
+        return self._cabecera + self._deflate.flush() + cola
+
+
+class Compresor:
+    """
+    Compresión gzip o brotli de un cuerpo completo o por partes.
+    """
+    def __init__(self, codificacion, nivel, relleno_maximo=0):
+        self.codificacion = codificacion
+        self.nivel = nivel
+        self.relleno_maximo = relleno_maximo
+
+    def comprimir(self, contenido):
+        procesar, terminar = self._nuevo()
+        return procesar(contenido) + terminar()
+
+    def _nuevo(self):
+        if self.codificacion == 'br':
+            compresor = brotli.Compressor(quality=self.nivel)
+        else:
+            compresor = _Gzip(self.nivel, self.relleno_maximo)
+        return compresor.process, compresor.finish
+
+    def por_partes(self, partes):
+        procesar, terminar = self._nuevo()
+        for parte in partes:
+            comprimido = procesar(parte)
+            if comprimido:
+                yield comprimido
+        yield terminar()
+
+    async def por_partes_async(self, partes):
+        procesar, terminar = self._nuevo()
+        async for parte in partes:
+            comprimido = procesar(parte)
+            if comprimido:
+                yield comprimido
+        yield terminar()
+
+
+def contexto_secreto(request, response):
+    """
+    Indica si la respuesta puede llevar secretos del usuario (BREACH): la
+    petición trae credenciales o la respuesta fija cookies.
+    """
+    return bool(
+        request.META.get('HTTP_AUTHORIZATION')
+        or request.META.get('HTTP_COOKIE')
+        or response.cookies
+    )
+
+
+class CompresionMiddleware(MiddlewareDual):
+    """
+    Comprime las respuestas con brotli (si está instalado) o gzip, según
+    ``Accept-Encoding``.
+
+    Solo se comprimen los tipos de ``COMPRESION_TIPOS`` (JSON, CSV, texto) de
+    al menos ``COMPRESION_TAMANIO_MINIMO`` bytes; las respuestas en streaming
+    se comprimen por partes. Igual que ``GZipMiddleware`` de Django, un ETag
+    fuerte pasa a débil, lo que mantiene las respuestas 304.
+
+    Contra BREACH, gzip lleva en la cabecera un relleno de largo aleatorio
+    de hasta ``COMPRESION_RELLENO_MAXIMO`` bytes, como ``GZipMiddleware``.
+    Brotli no tiene dónde llevarlo, así que no se usa cuando la respuesta
+    puede incluir secretos: peticiones con ``Authorization`` o ``Cookie`` y
+    respuestas que fijan cookies. En ese caso se usa gzip si el cliente lo
+    acepta, o se responde sin comprimir.
+
+    Con ASGI la compresión se hace en un hilo, para no bloquear el event
+    loop con las respuestas grandes.
+    """
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.habilitado = getattr(settings, 'COMPRESION_HABILITADA', True)
+        self.tamanio_minimo = getattr(settings, 'COMPRESION_TAMANIO_MINIMO', 1024)
+        self.tipos = tuple(getattr(settings, 'COMPRESION_TIPOS', ('application/json', 'text/')))
+        self.niveles = {
+            'br': getattr(settings, 'COMPRESION_NIVEL_BROTLI', 4),
+            'gzip': getattr(settings, 'COMPRESION_NIVEL_GZIP', 6),
+        }
+        self.relleno_maximo = getattr(settings, 'COMPRESION_RELLENO_MAXIMO', 100)
+
+    def codificacion(self, request, response=None):
+        """
+        Codificación a usar: la de mayor calidad aceptada por el cliente,
+        brotli ante un empate. Con credenciales de por medio solo gzip.
+        """
+        aceptadas = codificaciones_aceptadas(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        disponibles = ['br', 'gzip'] if brotli is not None else ['gzip']
+        if response is not None and contexto_secreto(request, response):
+            disponibles = ['gzip']
+        elegida, calidad_elegida = None, 0.0
+        for codificacion in disponibles:
+            calidad = aceptadas.get(codificacion, aceptadas.get('*', 0.0))
+            if calidad > calidad_elegida:
+                elegida, calidad_elegida = codificacion, calidad
+        return elegida
+
+    def procesar(self, request):
+        response = self.get_response(request)
+        codificacion = self.codificacion_respuesta(request, response)
+        if codificacion is None:
+            return response
+        return self.comprimir(response, codificacion)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        codificacion = self.codificacion_respuesta(request, response)
+        if codificacion is None:
+            return response
+        return await sync_to_async(self.comprimir)(response, codificacion)
+
+    def codificacion_respuesta(self, request, response):
+        """
+        Codificación con la que se comprime la respuesta, o ``None``.
+        """
+        if not self.habilitado or response.has_header('Content-Encoding'):
+            return None
+        if not response.get('Content-Type', '').startswith(self.tipos):
+            return None
+        if not response.streaming and len(response.content) < self.tamanio_minimo:
+            return None
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return self.codificacion(request, response)
+
+    def comprimir(self, response, codificacion):
+        compresor = Compresor(codificacion, self.niveles[codificacion], self.relleno_maximo)
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compresor.por_partes_async(response.streaming_content)
+            else:
+                response.streaming_content = compresor.por_partes(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            comprimido = compresor.comprimir(response.content)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codificacion
+        return response
+
@@ -0,0 +1,243 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework import filters
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre el par (campo de orden, id).
+
+    A diferencia de la paginación por offset, cada página se obtiene con un
+    ``WHERE (campo, id) < (v, id)`` que usa el índice, por lo que el costo
+    no crece con la profundidad de la página ni con el tamaño de la tabla.
+
+    La paginación es opcional: solo se activa cuando la petición incluye
+    ``cursor`` o ``page_size``. Sin esos parámetros la vista devuelve la
+    lista completa como hasta ahora, para no romper a los clientes actuales.
+
+    Con ``?count=1`` la respuesta incluye un total aproximado que el cliente
+    puede usar para mostrar números de página sin un ``COUNT(*)`` completo.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    page_size = 50
+    max_page_size = 500
+    # Tope del conteo cuando la base de datos no entrega una estimación
+    max_exact_count = 10000
+    tiebreak_field = 'id'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (self.cursor_query_param not in request.query_params
+                and self.page_size_query_param not in request.query_params):
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request, queryset, view)
+        self.count = None
+        if self._flag(request, self.count_query_param):
+            self.count = self.get_approximate_count(queryset)
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor['reverse'])
+
+        # Al retroceder se invierte el orden y luego se invierte el resultado
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(prefix + self.field, prefix + self.tiebreak_field)
+
+        if cursor is not None:
+            queryset = queryset.filter(self._after(cursor, descending))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Obtiene el campo de orden permitido por el ``OrderingFilter`` de la
+        vista. Solo el primer término se usa como clave; ``id`` desempata.
+        """
+        ordering = filters.OrderingFilter().get_ordering(request, queryset, view)
+        if not ordering:
+            ordering = ['-' + self.tiebreak_field]
+        term = ordering[0]
+        descending = term.startswith('-')
+        return term.lstrip('-'), descending
+
+    def _after(self, cursor, descending):
+        lookup = 'lt' if descending else 'gt'
+        return (
+            Q(**{f'{self.field}__{lookup}': cursor['value']})
+            | Q(**{self.field: cursor['value'], f'{self.tiebreak_field}__{lookup}': cursor['id']})
+        )
+
+    def _flag(self, request, param):
+        return request.query_params.get(param, '').lower() in ('1', 'true', 'yes')
+
+    # Cursores
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if data['f'] != self.field:
+                raise ValueError
+            field = model._meta.get_field(self.field)
+            return {
+                'value': field.to_python(data['v']),
+                'id': int(data['id']),
+                'reverse': bool(data.get('r')),
+            }
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        value = getattr(obj, self.field)
+        payload = {
+            'f': self.field,
+            'v': value.isoformat() if hasattr(value, 'isoformat') else str(value),
+            'id': getattr(obj, self.tiebreak_field),
+        }
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    # Conteo aproximado
+
+    def get_approximate_count(self, queryset):
+        """
+        Devuelve una estimación del número de filas sin recorrer la tabla.
+
+        En MySQL y PostgreSQL se usa la estimación del planificador
+        (``EXPLAIN``). En otros motores se cuenta con un tope, de modo que el
+        costo queda acotado por ``max_exact_count``.
+        """
+        queryset = queryset.order_by()
+        connection = connections[queryset.db]
+        estimate = None
+        try:
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                if connection.vendor == 'mysql':
+                    cursor.execute('EXPLAIN ' + sql, params)
+                    columns = [col[0] for col in cursor.description]
+                    row = cursor.fetchone()
+                    if row is not None and 'rows' in columns:
+                        estimate = int(row[columns.index('rows')] or 0)
+                elif connection.vendor == 'postgresql':
+                    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                    plan = cursor.fetchone()[0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    estimate = int(plan[0]['Plan']['Plan Rows'])
+        except Exception:
+            estimate = None
+
+        if estimate is not None:
+            return {'value': estimate, 'approximate': True}
+
+        capped = queryset[:self.max_exact_count + 1].count()
+        return {
+            'value': min(capped, self.max_exact_count),
+            'approximate': capped > self.max_exact_count,
+        }
+
+    def get_paginated_response(self, data):
+        response = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.count is not None:
+            response['count'] = self.count['value']
+            response['count_is_approximate'] = self.count['approximate']
+        response['results'] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'count_is_approximate': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor de paginación.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Número de resultados por página.',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Incluir un total aproximado.',
+                'schema': {'type': 'boolean'},
+            },
+        ]
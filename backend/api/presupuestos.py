@@ -0,0 +1,169 @@
+"""
+Presupuestos de consultas SQL y de tiempo por ruta de la API, para pruebas.
+
+Cada ruta declara cuántas consultas puede hacer como máximo y,
+opcionalmente, cuántos segundos puede tardar. Las pruebas ejecutan todas
+las rutas con dos tamaños de datos. Una ruta falla si supera su presupuesto
+en cualquiera de los dos tamaños. También falla si hace más consultas con
+los datos grandes que con los chicos, que es la señal de una consulta por
+fila (N+1).
+
+Cada petición se ejecuta dentro de un savepoint que se revierte, así que
+las rutas de escritura no alteran los datos de las siguientes.
+"""
+import re
+import time
+from collections import Counter
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+class Ruta:
+    """
+    Declaración de una ruta con su presupuesto.
+
+    ``ruta`` y ``datos`` pueden contener marcadores ``{nombre}`` que se
+    completan con el contexto de la prueba; ``datos`` también puede ser una
+    función que recibe el contexto. Con ``crece=True`` se permite que el
+    número de consultas dependa del tamaño de los datos.
+    """
+    def __init__(self, nombre, metodo, ruta, consultas, usuario='admin', datos=None,
+                 formato='json', status=200, segundos=None, crece=False):
+        self.nombre = nombre
+        self.metodo = metodo
+        self.ruta = ruta
+        self.consultas = consultas
+        self.usuario = usuario
+        self.datos = datos
+        self.formato = formato
+        self.status = status
+        self.segundos = segundos
+        self.crece = crece
+
+    def __str__(self):
+        return f'{self.nombre} ({self.usuario} {self.metodo.upper()} {self.ruta})'
+
+    def resolver(self, contexto):
+        ruta = self.ruta.format(**contexto)
+        datos = self.datos(contexto) if callable(self.datos) else self.datos
+        return ruta, datos
+
+
+class Medicion:
+    def __init__(self, ruta, tamanio, status, consultas, segundos):
+        self.ruta = ruta
+        self.tamanio = tamanio
+        self.status = status
+        self.consultas = consultas
+        self.segundos = segundos
+
+    @property
+    def total(self):
+        return len(self.consultas)
+
+
+def normalizar_sql(sql):
+    """
+    Reemplaza literales por ``?`` para agrupar consultas repetidas.
+    """
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    return re.sub(r'\((?:\s*\?\s*,)+\s*\?\s*\)', '(?, ...)', sql)
+
+
+def medir(ruta, clientes, contexto, tamanio):
+    """
+    Ejecuta la ruta y devuelve su ``Medicion``. La respuesta se consume por
+    completo (incluidas las respuestas en streaming) dentro de la medición.
+    """
+    url, datos = ruta.resolver(contexto)
+    cliente = clientes[ruta.usuario]
+    kwargs = {'format': ruta.formato} if datos is not None else {}
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            response = getattr(cliente, ruta.metodo)(url, datos, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            segundos = time.perf_counter() - inicio
+        transaction.set_rollback(True)
+    consultas = [consulta['sql'] for consulta in capturadas.captured_queries]
+    return Medicion(ruta, tamanio, response.status_code, consultas, segundos)
+
+
+def infracciones(chica, grande):
+    """
+    Devuelve la lista de problemas de una ruta medida con los dos tamaños.
+    """
+    ruta = chica.ruta
+    problemas = []
+    for medicion in (chica, grande):
+        if medicion.status != ruta.status:
+            problemas.append(
+                f'status {medicion.status}, se esperaba {ruta.status} [tamaño {medicion.tamanio}]'
+            )
+        if medicion.total > ruta.consultas:
+            problemas.append(
+                f'{medicion.total} consultas, presupuesto {ruta.consultas} [tamaño {medicion.tamanio}]'
+            )
+        if ruta.segundos is not None and medicion.segundos > ruta.segundos:
+            problemas.append(
+                f'{medicion.segundos:.3f} s, presupuesto {ruta.segundos} s [tamaño {medicion.tamanio}]'
+            )
+    if not ruta.crece and grande.total > chica.total:
+        problemas.append(
+            f'crece con los datos: {chica.total} consultas con tamaño {chica.tamanio}, '
+            f'{grande.total} con tamaño {grande.tamanio}'
+        )
+    return problemas
+
+
+def informe(chica, grande, problemas):
+    """
+    Texto legible con los problemas y las consultas agrupadas de la
+    medición más grande, las repetidas primero.
+    """
+    lineas = [str(chica.ruta)]
+    lineas.extend(f'  - {problema}' for problema in problemas)
+    repetidas = Counter(normalizar_sql(sql) for sql in grande.consultas)
+    lineas.append(f'  Consultas con tamaño {grande.tamanio}:')
+    for sql, veces in repetidas.most_common():
+        lineas.append(f'    {veces}x {sql}')
+    return '\n'.join(lineas)
+
+
+class PresupuestoMixin:
+    """
+    Mixin de ``TestCase`` para verificar una lista de ``Ruta``.
+
+    La clase define ``rutas``, ``tamanios`` (dos tamaños de datos) y
+    ``preparar(tamanio)``, que crea los datos y devuelve
+    ``(clientes, contexto)``. ``clientes`` asocia cada valor de
+    ``Ruta.usuario`` con un cliente de pruebas autenticado.
+    """
+    rutas = ()
+    tamanios = (5, 50)
+
+    def preparar(self, tamanio):
+        raise NotImplementedError
+
+    def medir_rutas(self):
+        mediciones = {}
+        for tamanio in self.tamanios:
+            clientes, contexto = self.preparar(tamanio)
+            mediciones[tamanio] = [
+                medir(ruta, clientes, contexto, tamanio) for ruta in self.rutas
+            ]
+        return list(zip(*(mediciones[tamanio] for tamanio in self.tamanios)))
+
+    def assertPresupuestos(self):
+        errores = []
+        for chica, grande in self.medir_rutas():
+            problemas = infracciones(chica, grande)
+            if problemas:
+                errores.append(informe(chica, grande, problemas))
+        if errores:
+            self.fail(
+                f'{len(errores)} ruta(s) fuera de presupuesto:\n\n' + '\n\n'.join(errores)
+            )
@@ -0,0 +1,97 @@
+"""
+Renderer y parser JSON con ``orjson``.
+
+``orjson`` serializa listas grandes varias veces más rápido que
+``json.dumps`` y escribe de forma nativa los textos, números, fechas
+(``date``) y las subclases de ``dict``/``list`` que entregan los
+serializers. Lo que no conoce (``Decimal``, ``datetime``, textos
+traducibles, querysets) pasa por el ``JSONEncoder`` de DRF, por lo que la
+salida es la misma que la del ``JSONRenderer`` estándar.
+
+Si ``orjson`` no está instalado, si ``API_JSON_RAPIDO`` es ``False`` o si
+la petición pide sangría (``application/json; indent=4`` o la API
+navegable), se usa la implementación estándar de DRF.
+"""
+import re
+
+from django.conf import settings
+from rest_framework import parsers, renderers
+from rest_framework.utils import encoders, json
+from rest_framework.exceptions import ParseError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+_codificador_drf = encoders.JSONEncoder()
+# ``datetime`` pasa por el codificador de DRF, que recorta a milisegundos y
+# escribe UTC como "Z"
+OPCIONES_ORJSON = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+NUMERO_LARGO = re.compile(rb'\d{19}')
+
+
+def json_rapido_disponible():
+    return orjson is not None and getattr(settings, 'API_JSON_RAPIDO', True)
+
+
+def _por_defecto(obj):
+    return _codificador_drf.default(obj)
+
+
+class JSONRendererRapido(renderers.JSONRenderer):
+
+    def usar_orjson(self, accepted_media_type, renderer_context):
+        """
+        ``orjson`` escribe igual que DRF en su modo por defecto: compacto,
+        sin escapar Unicode y estricto (la única diferencia es que NaN e
+        infinito salen como ``null`` en lugar de fallar). Con otra
+        configuración o con sangría se usa el renderer estándar.
+        """
+        return (
+            json_rapido_disponible() and self.compact and self.strict and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if not self.usar_orjson(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_por_defecto, option=OPCIONES_ORJSON)
+        except orjson.JSONEncodeError:
+            # Enteros de más de 64 bits, claves no soportadas...: el
+            # renderer estándar los escribe o informa su propio error
+            return super().render(data, accepted_media_type, renderer_context)
+        # Igual que DRF: \u2028 y \u2029 escapados para que sea JavaScript válido
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class JSONParserRapido(parsers.JSONParser):
+    renderer_class = JSONRendererRapido
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not json_rapido_disponible():
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        contenido = stream.read() if stream is not None else b''
+        encoding = parsers.get_encoding(parser_context)
+        # orjson lee los enteros de más de 64 bits como float: con números
+        # tan largos se usa la biblioteca estándar
+        if encoding.lower().replace('-', '') == 'utf8' and not NUMERO_LARGO.search(contenido):
+            try:
+                return orjson.loads(contenido)
+            except orjson.JSONDecodeError:
+                # Se repite con la biblioteca estándar para dar su mismo
+                # mensaje de error
+                pass
+        try:
+            parse_constant = json.strict_constant if self.strict else None
+            return json.loads(contenido.decode(encoding), parse_constant=parse_constant)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
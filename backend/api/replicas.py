@@ -0,0 +1,244 @@
+"""
+Enrutamiento de lecturas a réplicas con lectura de las propias escrituras.
+
+Las escrituras van siempre a la base de datos primaria (``default``). Las
+lecturas de una petición GET/HEAD/OPTIONS van a una réplica de
+``REPLICAS_LECTURA``, elegida una vez por petición para que todas sus
+consultas vean los mismos datos. Van a la primaria en estos casos:
+
+- Peticiones que escriben (POST, PUT, PATCH, DELETE).
+- Consultas dentro de una transacción en la primaria.
+- Código fuera de una petición (comandos, tareas).
+- Durante ``REPLICAS_VENTANA_PRIMARIA`` segundos después de que el mismo
+  cliente (identificado por su token o su sesión) hizo una escritura
+  exitosa. Así, un administrador que acaba de marcar una multa como pagada
+  la ve pagada aunque la réplica vaya atrasada.
+- Cuando ninguna réplica está sana. Una réplica se descarta si su retraso
+  supera ``REPLICAS_RETRASO_MAXIMO`` segundos o no se puede medir. El
+  retraso se mide cada ``REPLICAS_INTERVALO_VERIFICACION`` segundos por
+  proceso.
+
+La marca de "usar la primaria" se guarda en la caché ``default``, que es
+compartida entre procesos (``DatabaseCache``, ver ``CACHES`` y el chequeo
+``api.E001``): la escritura puede atenderla un worker y la lectura
+siguiente otro.
+"""
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+_peticion_actual = ContextVar('replicas_peticion', default=None)
+
+
+def _ajuste(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def replicas_configuradas():
+    return list(_ajuste('REPLICAS_LECTURA', []))
+
+
+class EstadoPeticion:
+    """
+    Decisión de enrutamiento de una petición.
+    """
+    __slots__ = ('primaria', 'alias')
+
+    def __init__(self, primaria):
+        self.primaria = primaria
+        self.alias = None
+
+
+def clave_cliente(request):
+    """
+    Identifica al cliente por su cabecera Authorization o su cookie de
+    sesión, sin consultar la base de datos.
+    """
+    credencial = request.META.get('HTTP_AUTHORIZATION')
+    if not credencial:
+        credencial = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credencial:
+        return None
+    return 'replicas:primaria:' + hashlib.sha256(credencial.encode()).hexdigest()
+
+
+def _lee_de_primaria(request):
+    """
+    ``(primaria, clave)``: si la petición va a la primaria sin consultar la
+    caché, o la clave de caché que lo decide.
+    """
+    if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        return True, None
+    if not replicas_configuradas():
+        return False, None
+    return False, clave_cliente(request)
+
+
+def _clave_escritura(request, response):
+    """
+    Clave de caché que fija al cliente en la primaria tras una escritura
+    exitosa, o ``None``.
+    """
+    if (response is not None and request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and response.status_code < 400 and replicas_configuradas()):
+        return clave_cliente(request)
+    return None
+
+
+def iniciar_peticion(request):
+    """
+    Decide si la petición lee de la primaria y la registra como actual.
+    """
+    primaria, clave = _lee_de_primaria(request)
+    if clave is not None:
+        primaria = cache.get(clave) is not None
+    return _peticion_actual.set(EstadoPeticion(primaria))
+
+
+async def ainiciar_peticion(request):
+    primaria, clave = _lee_de_primaria(request)
+    if clave is not None:
+        primaria = await cache.aget(clave) is not None
+    return _peticion_actual.set(EstadoPeticion(primaria))
+
+
+def terminar_peticion(token, request, response):
+    """
+    Tras una escritura exitosa, fija al cliente en la primaria durante la
+    ventana configurada.
+    """
+    _peticion_actual.reset(token)
+    clave = _clave_escritura(request, response)
+    if clave is not None:
+        cache.set(clave, 1, _ajuste('REPLICAS_VENTANA_PRIMARIA', 10))
+
+
+async def aterminar_peticion(token, request, response):
+    _peticion_actual.reset(token)
+    clave = _clave_escritura(request, response)
+    if clave is not None:
+        await cache.aset(clave, 1, _ajuste('REPLICAS_VENTANA_PRIMARIA', 10))
+
+
+class MonitorRetraso:
+    """
+    Mide el retraso de cada réplica y lo recuerda durante el intervalo de
+    verificación.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._medidas = {}
+
+    def retraso(self, alias):
+        intervalo = _ajuste('REPLICAS_INTERVALO_VERIFICACION', 5)
+        ahora = time.monotonic()
+        medida = self._medidas.get(alias)
+        if medida is not None and ahora - medida[0] < intervalo:
+            return medida[1]
+        with self._lock:
+            medida = self._medidas.get(alias)
+            if medida is not None and ahora - medida[0] < intervalo:
+                return medida[1]
+            try:
+                valor = medir_retraso(connections[alias])
+            except Exception:
+                logger.warning('No se pudo medir el retraso de la réplica %s', alias, exc_info=True)
+                valor = None
+            self._medidas[alias] = (ahora, valor)
+            return valor
+
+    def limpiar(self):
+        with self._lock:
+            self._medidas = {}
+
+
+def medir_retraso(connection):
+    """
+    Segundos de retraso de la réplica, o ``None`` si no está replicando.
+
+    Los motores sin replicación (como SQLite) se consideran al día.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            for consulta, columna in (
+                ('SHOW REPLICA STATUS', 'Seconds_Behind_Source'),
+                ('SHOW SLAVE STATUS', 'Seconds_Behind_Master'),
+            ):
+                try:
+                    cursor.execute(consulta)
+                except Exception:
+                    continue
+                fila = cursor.fetchone()
+                if fila is None:
+                    # El servidor no es una réplica
+                    return 0
+                columnas = [col[0] for col in cursor.description]
+                return fila[columnas.index(columna)]
+            return None
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT CASE WHEN pg_is_in_recovery() '
+                'THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) '
+                'ELSE 0 END'
+            )
+            return float(cursor.fetchone()[0])
+    return 0
+
+
+monitor = MonitorRetraso()
+
+
+class ReplicaRouter:
+    """
+    Router de base de datos: escrituras a la primaria, lecturas a réplicas
+    sanas según el estado de la petición actual.
+    """
+    primaria = DEFAULT_DB_ALIAS
+
+    def replicas_sanas(self):
+        maximo = _ajuste('REPLICAS_RETRASO_MAXIMO', 2)
+        sanas = []
+        for alias in replicas_configuradas():
+            retraso = monitor.retraso(alias)
+            if retraso is not None and retraso <= maximo:
+                sanas.append(alias)
+        return sanas
+
+    def db_for_read(self, model, **hints):
+        # La tabla de DatabaseCache guarda estado compartido que se acaba de
+        # escribir (versiones, marcas): se lee de la primaria
+        if model._meta.app_label == 'django_cache':
+            return self.primaria
+        estado = _peticion_actual.get()
+        if estado is None or estado.primaria:
+            return self.primaria
+        if connections[self.primaria].in_atomic_block:
+            return self.primaria
+        if estado.alias is None:
+            sanas = self.replicas_sanas()
+            estado.alias = random.choice(sanas) if sanas else self.primaria
+        return estado.alias
+
+    def db_for_write(self, model, **hints):
+        return self.primaria
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bases = {self.primaria, *replicas_configuradas()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas reciben el esquema por replicación
+        if db in replicas_configuradas():
+            return False
+        return None
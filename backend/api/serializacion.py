@@ -0,0 +1,165 @@
+"""
+Serialización rápida de listas de solo lectura.
+
+Con miles de filas, ``ModelSerializer`` cuesta más que la consulta: crea
+una instancia del modelo por fila, recorre los campos del serializer y
+llama a ``to_representation`` de cada uno. ``PlanLista`` produce la misma
+salida a partir de tuplas de ``values_list()``:
+
+- Las columnas se leen en el orden del serializer y cada valor pasa por un
+  conversor precompilado que replica ``to_representation`` del campo
+  (``Decimal`` con sus decimales, fechas en ISO 8601, opciones). Los enteros
+  y textos no necesitan conversión.
+- Los ``SerializerMethodField`` se declaran en la vista como
+  ``(columnas, función)`` y se calculan con esas columnas de la misma fila.
+
+Los campos sin conversor conocido usan ``to_representation`` del propio
+campo, así que el resultado es siempre el del serializer. Si un campo
+calculado no está declarado, la vista usa el serializer normal.
+"""
+import decimal
+
+from rest_framework import relations, serializers
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from .metricas import medir_serializacion
+
+
+def conversor(field):
+    """
+    Función que convierte un valor (no nulo) de la base de datos igual que
+    ``field.to_representation``, o ``None`` si el valor ya es la salida.
+    """
+    if isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None:
+        return None
+    if isinstance(field, serializers.DecimalField):
+        coerce = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        if not coerce or field.localize or field.decimal_places is None:
+            return field.to_representation
+        exponente = decimal.Decimal('.1') ** field.decimal_places
+        contexto = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            contexto.prec = field.max_digits
+        rounding = field.rounding
+
+        def decimal_a_texto(valor):
+            return '{:f}'.format(valor.quantize(exponente, rounding=rounding, context=contexto))
+        return decimal_a_texto
+    if isinstance(field, serializers.DateField):
+        formato = getattr(field, 'format', api_settings.DATE_FORMAT)
+        if formato is None:
+            return None
+        if formato.lower() == ISO_8601:
+            return lambda valor: valor.isoformat()
+        return lambda valor: valor.strftime(formato)
+    if isinstance(field, serializers.ChoiceField):
+        opciones = field.choice_strings_to_values
+        return lambda valor: valor if valor == '' else opciones.get(str(valor), valor)
+    if isinstance(field, getattr(serializers, 'BigIntegerField', ())):
+        if getattr(field, 'coerce_to_string', api_settings.COERCE_BIGINT_TO_STRING):
+            return str
+        return None
+    if type(field) in (serializers.IntegerField, serializers.CharField, serializers.EmailField):
+        return None
+    return field.to_representation
+
+
+class PlanLista:
+    """
+    Columnas que se leen y conversores de cada campo de un serializer.
+
+    ``calculados`` asocia cada ``SerializerMethodField`` con
+    ``(columnas, función)``: la función recibe los valores de esas columnas
+    y devuelve el valor del campo.
+    """
+    def __init__(self, fields, calculados):
+        self.columnas = []
+        self.campos = []
+        for nombre, field in fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                columnas, funcion = calculados[nombre]
+                indices = tuple(self.columna(columna) for columna in columnas)
+                self.campos.append((nombre, indices, funcion, True))
+            else:
+                if field.source == '*' or '.' in field.source:
+                    raise KeyError(nombre)
+                self.campos.append((nombre, self.columna(field.source), conversor(field), False))
+
+    @classmethod
+    def crear(cls, fields, calculados):
+        """
+        Devuelve el plan, o ``None`` si algún campo no se puede leer de
+        columnas (por ejemplo un campo calculado sin declarar).
+        """
+        try:
+            return cls(fields, calculados)
+        except KeyError:
+            return None
+
+    def columna(self, ruta):
+        if ruta not in self.columnas:
+            self.columnas.append(ruta)
+        return self.columnas.index(ruta)
+
+    def serializar(self, filas):
+        campos = self.campos
+        resultado = []
+        agregar = resultado.append
+        for fila in filas:
+            datos = {}
+            for nombre, indice, funcion, calculado in campos:
+                if calculado:
+                    datos[nombre] = funcion(*[fila[i] for i in indice])
+                    continue
+                valor = fila[indice]
+                if valor is None or funcion is None:
+                    datos[nombre] = valor
+                else:
+                    datos[nombre] = funcion(valor)
+            agregar(datos)
+        return resultado
+
+
+class ListaRapidaMixin:
+    """
+    Mixin de ViewSet que responde ``list`` con ``PlanLista`` en lugar del
+    serializer. Respeta filtros, orden, paginación por cursor y los campos
+    del serializer que entrega ``get_serializer()`` (incluidos los de
+    ``?fields=``/``?omit=``).
+
+    ``campos_calculados_lista`` declara los ``SerializerMethodField`` del
+    serializer de ``list`` como ``{campo: (columnas, función)}``.
+    """
+    lista_rapida = True
+    campos_calculados_lista = {}
+
+    def plan_lista(self):
+        if not self.lista_rapida:
+            return None
+        return PlanLista.crear(self.get_serializer().fields, self.campos_calculados_lista)
+
+    def list(self, request, *args, **kwargs):
+        plan = self.plan_lista()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # La paginación por cursor lee de cada fila el campo de orden y el id
+        columnas = list(plan.columnas)
+        for termino in [*queryset.query.order_by, 'id']:
+            if isinstance(termino, str) and termino.lstrip('-') not in columnas:
+                columnas.append(termino.lstrip('-'))
+        filas = queryset.values_list(*columnas, named=True)
+
+        page = self.paginate_queryset(filas)
+        if page is not None:
+            with medir_serializacion():
+                datos = plan.serializar(page)
+            return self.get_paginated_response(datos)
+        filas = list(filas)
+        with medir_serializacion():
+            datos = plan.serializar(filas)
+        return Response(datos)
@@ -1,3 +1,719 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import unittest
+import zlib
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connections, transaction
+from django.db.utils import load_backend
+from django.db.models import Count
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import include, path, resolve
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.routers import DefaultRouter
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from multas.models import Multa
+from multas.saldos import reconciliar
+from multas.views import MultaViewSet
+from usuarios.hashing import reiniciar_ejecutor
+from usuarios.models import Usuario
+from usuarios.views import AdminDashboardView, ResidenteDashboardView, UsuarioViewSet
+from .asincrono import consultas_concurrentes
+from .checks import revisar_cache_compartida
+from .metricas import registro
+from .middleware import brotli, codificaciones_aceptadas
+from .renderers import JSONParserRapido, JSONRendererRapido
+from . import replicas
+from .presupuestos import Medicion, PresupuestoMixin, Ruta, informe, infracciones
+
+
+class MetricasTests(TestCase):
+
+    def setUp(self):
+        registro.limpiar()
+        self.admin = Usuario.objects.create_user(
+            username='admin', password='admin123', rol='admin'
+        )
+        self.residente = Usuario.objects.create_user(
+            username='residente', password='residente123', rol='residente'
+        )
+        Multa.objects.create(usuario=self.residente, motivo='Ruido', monto=1000)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_registra_vista_y_accion(self):
+        response = self.client.get('/api/multas/')
+        self.assertEqual(response.status_code, 200)
+        self.client.get('/api/multas/estadisticas/')
+        self.client.get('/api/auth/usuarios/mi-perfil/')
+
+        metricas = registro.obtener('MultaViewSet', 'list')
+        self.assertEqual(metricas.latencia.total, 1)
+        self.assertGreaterEqual(metricas.consultas.suma, 1)
+        self.assertGreater(metricas.tiempo_serializador, 0)
+        self.assertIsNotNone(registro.obtener('MultaViewSet', 'estadisticas'))
+        self.assertIsNotNone(registro.obtener('UsuarioViewSet', 'mi_perfil'))
+
+    def test_server_timing(self):
+        response = self.client.get('/api/multas/')
+        match = re.match(
+            r'total;dur=[\d.]+, db;dur=[\d.]+;desc="(\d+) consultas", serializer;dur=[\d.]+',
+            response['Server-Timing']
+        )
+        self.assertIsNotNone(match)
+        self.assertEqual(int(match.group(1)), registro.obtener('MultaViewSet', 'list').consultas.suma)
+
+    def test_login(self):
+        self.client.post('/api/auth/login/', {'username': 'admin', 'password': 'admin123'})
+        self.client.post('/api/auth/login/', {'username': 'admin', 'password': 'mala'})
+        metricas = registro.obtener('LoginView', 'post')
+        self.assertEqual(metricas.respuestas, {'2xx': 1, '4xx': 1})
+
+    def test_endpoint_prometheus(self):
+        self.client.get('/api/multas/')
+        response = self.client.get('/api/metricas/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        texto = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', texto)
+        self.assertIn(
+            'http_request_duration_seconds_count{vista="MultaViewSet",accion="list"} 1', texto
+        )
+        self.assertIn(
+            'http_request_db_queries_bucket{vista="MultaViewSet",accion="list",le="+Inf"} 1', texto
+        )
+
+        self.client.force_authenticate(self.residente)
+        self.assertEqual(self.client.get('/api/metricas/').status_code, 403)
+
+
+class SembrarDatosTests(TestCase):
+
+    def sembrar(self, **opciones):
+        call_command(
+            'sembrar_datos', edificios=3, residentes=30, multas=500, batch_size=200,
+            stdout=StringIO(), **opciones
+        )
+
+    def test_genera_datos_sesgados(self):
+        self.sembrar()
+        self.assertEqual(Usuario.objects.filter(rol='residente').count(), 30)
+        self.assertTrue(Usuario.objects.filter(username='sint_admin', rol='admin').exists())
+        self.assertEqual(Multa.objects.count(), 500)
+        self.assertEqual(Multa.objects.filter(documento_busqueda__isnull=True).count(), 0)
+
+        pagadas = Multa.objects.filter(estado='pagado')
+        self.assertTrue(0 < pagadas.count() < 500)
+        self.assertFalse(pagadas.filter(fecha_pago__isnull=True).exists())
+        self.assertFalse(Multa.objects.filter(estado='pendiente', fecha_pago__isnull=False).exists())
+        self.assertGreater(Multa.objects.values('fecha_creacion').distinct().count(), 30)
+        self.assertEqual(
+            Usuario.objects.filter(numero_residencia__startswith='E01-').count(), 10
+        )
+
+    def test_prefijo_repetido(self):
+        self.sembrar()
+        with self.assertRaises(CommandError):
+            self.sembrar()
+
+
+def csv_importacion(contexto):
+    filas = ''.join(f"imp{contexto['tamanio']}_{i},X{i}\n" for i in range(3))
+    contenido = 'username,numero_residencia\n' + filas
+    return {'archivo': SimpleUploadedFile('usuarios.csv', contenido.encode())}
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    USUARIOS_HASH_PROCESOS=0, USUARIOS_IMPORTACION_PROCESOS=1,
+)
+class PresupuestoRutasTests(PresupuestoMixin, TestCase):
+    """
+    Presupuesto de consultas de todas las rutas de multas, usuarios y
+    dashboards.
+    """
+    tamanios = (5, 40)
+    rutas = (
+        # Multas
+        Ruta('multas.list', 'get', '/api/multas/', 2, segundos=1),
+        Ruta('multas.list paginado', 'get', '/api/multas/?page_size=10&ordering=monto', 2),
+        Ruta('multas.list búsqueda', 'get', '/api/multas/?search=ruidos', 2),
+        Ruta('multas.list residente', 'get', '/api/multas/', 2, usuario='residente'),
+        Ruta('multas.retrieve', 'get', '/api/multas/{multa}/', 2),
+        Ruta('multas.create', 'post', '/api/multas/', 9, status=201, datos=lambda c: {
+            'usuario': c['residente'], 'motivo': 'Ruidos molestos', 'monto': 5000,
+        }),
+        Ruta('multas.update', 'put', '/api/multas/{multa}/', 7, datos=lambda c: {
+            'usuario': c['residente'], 'motivo': 'Otro motivo', 'monto': 7000,
+        }),
+        Ruta('multas.partial_update', 'patch', '/api/multas/{multa}/', 6, datos={'monto': 9000}),
+        Ruta('multas.destroy', 'delete', '/api/multas/{multa}/', 5, status=204),
+        Ruta('multas.marcar_como_pagada', 'post', '/api/multas/{multa}/marcar_como_pagada/', 6),
+        Ruta('multas.marcar_pagadas', 'post', '/api/multas/marcar-pagadas/', 6,
+             datos=lambda c: {'ids': c['pendientes']}),
+        Ruta('multas.emision_masiva', 'post', '/api/multas/emision-masiva/', 10, status=201, datos={
+            'plantilla': {'motivo': 'Cuota extraordinaria', 'monto': 1000},
+            'filtro': {'numero_residencia_prefijo': 'E01'},
+        }),
+        Ruta('multas.exportar', 'get', '/api/multas/exportar/?estado=pendiente', 1),
+        # Con la caché vacía: lectura de la foto, versión nueva, las dos
+        # agregaciones y la foto guardada (DatabaseCache escribe en 5 pasos)
+        Ruta('multas.estadisticas', 'get', '/api/multas/estadisticas/?agrupar_por=mes', 13, segundos=1),
+        # Usuarios
+        Ruta('usuarios.list', 'get', '/api/auth/usuarios/', 2),
+        Ruta('usuarios.retrieve', 'get', '/api/auth/usuarios/{residente}/', 2),
+        Ruta('usuarios.list filtrada', 'get', '/api/auth/usuarios/?rol=residente&is_active=true&page_size=20', 2),
+        Ruta('usuarios.buscar', 'get', '/api/auth/usuarios/buscar/?q=res', 1),
+        Ruta('usuarios.create', 'post', '/api/auth/usuarios/', 3, status=201, datos=lambda c: {
+            'username': f"nuevo{c['tamanio']}", 'email': 'nuevo@example.com',
+            'password': 'Clave-123', 'rol': 'residente',
+        }),
+        Ruta('usuarios.update', 'put', '/api/auth/usuarios/{residente}/', 8, datos=lambda c: {
+            'username': c['residente_username'], 'rol': 'residente', 'first_name': 'Nuevo',
+        }),
+        Ruta('usuarios.partial_update', 'patch', '/api/auth/usuarios/{residente}/', 7,
+             datos={'telefono': '123'}),
+        Ruta('usuarios.destroy', 'delete', '/api/auth/usuarios/{residente}/', 12, status=204),
+        Ruta('usuarios.importar', 'post', '/api/auth/usuarios/importar/', 5, status=201,
+             datos=csv_importacion, formato='multipart'),
+        Ruta('usuarios.mi_perfil', 'get', '/api/auth/usuarios/mi-perfil/', 0, usuario='residente'),
+        Ruta('auth.login', 'post', '/api/auth/login/', 1, usuario='anonimo', datos=lambda c: {
+            'username': c['residente_username'], 'password': 'Clave-123',
+        }),
+        # Dashboards
+        Ruta('dashboard.admin', 'get', '/api/auth/admin-dashboard/', 1),
+        Ruta('dashboard.residente', 'get', '/api/auth/residente-dashboard/', 1, usuario='residente'),
+    )
+
+    def preparar(self, tamanio):
+        prefijo = f'p{tamanio}'
+        call_command(
+            'sembrar_datos', edificios=3, residentes=tamanio, multas=tamanio * 10,
+            prefijo=prefijo, password='Clave-123', stdout=StringIO(),
+        )
+        cache.clear()
+        # El pool de hashing pudo crearse con otros PASSWORD_HASHERS
+        reiniciar_ejecutor()
+        self.addCleanup(reiniciar_ejecutor)
+        admin = Usuario.objects.get(username=f'{prefijo}_admin')
+        residente = (
+            Usuario.objects.filter(username__startswith=f'{prefijo}_', rol='residente')
+            .annotate(total=Count('multas')).order_by('-total').first()
+        )
+        pendientes = list(
+            residente.multas.filter(estado='pendiente').values_list('id', flat=True)[:3]
+        )
+        clientes = {'admin': APIClient(), 'residente': APIClient(), 'anonimo': APIClient()}
+        clientes['admin'].force_authenticate(admin)
+        clientes['residente'].force_authenticate(residente)
+        return clientes, {
+            'tamanio': tamanio,
+            'residente': residente.pk,
+            'residente_username': residente.username,
+            'multa': pendientes[0],
+            'pendientes': pendientes,
+        }
+
+    def test_presupuestos(self):
+        self.assertPresupuestos()
+
+
+class SerializacionRapidaTests(TestCase):
+    """
+    La lista serializada desde ``values_list`` debe ser idéntica, byte a
+    byte, a la que produce el serializer.
+    """
+    def setUp(self):
+        call_command(
+            'sembrar_datos', edificios=3, residentes=12, multas=150, prefijo='sr',
+            password='x', stdout=StringIO(),
+        )
+        admin = Usuario.objects.get(username='sr_admin')
+        residente = Usuario.objects.filter(rol='residente', username__startswith='sr_').first()
+        Usuario.objects.filter(pk=residente.pk).update(
+            first_name='José Ñandú', numero_residencia=None, email='jose@example.com', is_active=False,
+        )
+        multa = Multa.objects.filter(usuario=residente).first() or Multa.objects.first()
+        Multa.objects.filter(pk=multa.pk).update(descripcion=None, motivo='Ruido "fuerte" \\ <b>')
+        Multa.objects.bulk_create([
+            Multa(usuario=residente, motivo='Monto alto', monto=9999999999, descripcion=''),
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def comparar(self, viewset, url):
+        rapida = self.client.get(url)
+        with mock.patch.object(viewset, 'lista_rapida', False):
+            normal = self.client.get(url)
+        self.assertEqual(rapida.status_code, 200, rapida.content[:200])
+        self.assertEqual(rapida.content, normal.content, url)
+        return rapida
+
+    def test_multas_identica(self):
+        for consulta in (
+            '', 'estado=pagado', 'ordering=monto', 'ordering=-estado', 'search=ruido',
+            'fields=id,monto,fecha_pago', 'omit=usuario_nombre', 'fields=usuario_nombre',
+            'page_size=7', 'page_size=7&ordering=monto&count=1',
+            'formato=columnas', 'formato=columnas&page_size=5&fields=id,descripcion',
+        ):
+            self.comparar(MultaViewSet, f'/api/multas/?{consulta}')
+
+    def test_siguiente_pagina_identica(self):
+        primera = self.comparar(MultaViewSet, '/api/multas/?page_size=10&ordering=fecha_creacion')
+        self.comparar(MultaViewSet, primera.data['next'])
+
+    def test_usuarios_identica(self):
+        for consulta in ('', 'rol=residente', 'fields=id,is_active,rol', 'page_size=5&ordering=username'):
+            self.comparar(UsuarioViewSet, f'/api/auth/usuarios/?{consulta}')
+
+    def test_no_crea_instancias(self):
+        with mock.patch.object(Multa, 'from_db', side_effect=AssertionError):
+            response = self.client.get('/api/multas/')
+        self.assertEqual(len(response.data), Multa.objects.count())
+
+
+class JSONRapidoTests(TestCase):
+
+    datos = {
+        'texto': 'Peña ñandú "comillas" \\ \n \u2028 \u2029 \x00 😀',
+        'monto': Decimal('1500'),
+        'decimal': Decimal('12.50'),
+        'fecha': date(2025, 3, 1),
+        'momento': datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        'momento_local': datetime(2025, 3, 1, 12, 30),
+        'enteros': [0, -1, 2 ** 62],
+        'reales': [0.1, 1.5, -2.25],
+        'anidado': {'lista': (1, 'dos', None, True, False), 1: 'clave entera'},
+        'grande': 2 ** 70,
+    }
+
+    def test_misma_salida_que_drf(self):
+        for datos in (self.datos, [self.datos] * 3, {'vacio': []}, []):
+            self.assertEqual(JSONRendererRapido().render(datos), JSONRenderer().render(datos))
+
+    def test_sangria_y_desactivado_usan_estandar(self):
+        datos = {'a': [1, 2]}
+        self.assertEqual(
+            JSONRendererRapido().render(datos, 'application/json; indent=2'),
+            JSONRenderer().render(datos, 'application/json; indent=2'),
+        )
+        with self.settings(API_JSON_RAPIDO=False):
+            self.assertEqual(JSONRendererRapido().render(datos), JSONRenderer().render(datos))
+
+    def parsear(self, parser, contenido):
+        return parser.parse(BytesIO(contenido))
+
+    def test_parser(self):
+        for contenido in ('{"a": [1, 2.5, "ñ", null, true], "b": {"c": 12345678901234567890123}}', '[]'):
+            cuerpo = contenido.encode()
+            self.assertEqual(self.parsear(JSONParserRapido(), cuerpo), self.parsear(JSONParser(), cuerpo))
+        for invalido in (b'{"a": ', b'{"a": NaN}', b'\xff'):
+            with self.assertRaises(ParseError):
+                self.parsear(JSONParserRapido(), invalido)
+
+    def test_peticion_json(self):
+        admin = Usuario.objects.create_user(username='admin', password='x', rol='admin')
+        residente = Usuario.objects.create_user(username='residente', password='x', rol='residente')
+        cliente = APIClient()
+        cliente.force_authenticate(admin)
+        response = cliente.post('/api/multas/', {
+            'usuario': residente.pk, 'motivo': 'Ruido ñ', 'monto': '1500',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['motivo'], 'Ruido ñ')
+
+
+class CompresionTests(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='admin', password='x', rol='admin')
+        residente = Usuario.objects.create_user(username='residente', password='x', rol='residente')
+        Multa.objects.bulk_create([
+            Multa(usuario=residente, motivo=f'Motivo repetido {i}', monto=1000 + i) for i in range(60)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_negociacion(self):
+        self.assertEqual(codificaciones_aceptadas('gzip, br;q=0.5, *;q=0'), {'gzip': 1.0, 'br': 0.5, '*': 0.0})
+
+    def test_gzip(self):
+        normal = self.client.get('/api/multas/')
+        response = self.client.get('/api/multas/', HTTP_ACCEPT_ENCODING='gzip;q=1, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), normal.content)
+        self.assertLess(len(response.content), len(normal.content) / 3)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+        no_modificada = self.client.get(
+            '/api/multas/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(no_modificada.status_code, 304)
+
+    @unittest.skipIf(brotli is None, 'brotli no está instalado')
+    def test_brotli(self):
+        normal = self.client.get('/api/multas/')
+        response = self.client.get('/api/multas/', HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), normal.content)
+
+    def test_relleno_aleatorio_gzip(self):
+        normal = self.client.get('/api/multas/')
+        largos = set()
+        for _ in range(10):
+            response = self.client.get('/api/multas/', HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(gzip.decompress(response.content), normal.content)
+            largos.add(len(response.content))
+        self.assertGreater(len(largos), 1)
+
+        with self.settings(COMPRESION_RELLENO_MAXIMO=0):
+            self.client = APIClient()
+            self.client.force_authenticate(self.admin)
+            response = self.client.get('/api/multas/', HTTP_ACCEPT_ENCODING='gzip')
+        # Sin relleno la cabecera no lleva nombre de archivo (FLG=0)
+        self.assertEqual(response.content[3], 0)
+        self.assertEqual(gzip.decompress(response.content), normal.content)
+
+    @unittest.skipIf(brotli is None, 'brotli no está instalado')
+    def test_sin_brotli_con_credenciales(self):
+        normal = self.client.get('/api/multas/')
+        for cabecera in ({'HTTP_AUTHORIZATION': 'Bearer token'}, {'HTTP_COOKIE': 'sessionid=x'}):
+            response = self.client.get('/api/multas/', HTTP_ACCEPT_ENCODING='gzip, br', **cabecera)
+            self.assertEqual(response['Content-Encoding'], 'gzip', cabecera)
+            self.assertEqual(gzip.decompress(response.content), normal.content)
+            response = self.client.get('/api/multas/', HTTP_ACCEPT_ENCODING='br', **cabecera)
+            self.assertFalse(response.has_header('Content-Encoding'), cabecera)
+
+    def test_sin_compresion(self):
+        for cabecera in ('', 'identity', 'gzip;q=0'):
+            response = self.client.get('/api/multas/', HTTP_ACCEPT_ENCODING=cabecera)
+            self.assertFalse(response.has_header('Content-Encoding'), cabecera)
+        # Bajo el umbral
+        response = self.client.get('/api/auth/usuarios/mi-perfil/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        with self.settings(COMPRESION_HABILITADA=False):
+            self.client = APIClient()
+            self.client.force_authenticate(self.admin)
+            response = self.client.get('/api/multas/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming(self):
+        normal = b''.join(self.client.get('/api/multas/exportar/').streaming_content)
+        response = self.client.get('/api/multas/exportar/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(zlib.decompress(b''.join(response.streaming_content), 31), normal)
+
+
+# URLconf de las pruebas de vistas asíncronas: las rutas del proyecto con
+# las vistas de multas y los dashboards creados con API_VISTAS_ASINCRONAS
+router_asincrono = DefaultRouter()
+router_asincrono.register(r'', MultaViewSet)
+with override_settings(API_VISTAS_ASINCRONAS=True):
+    urls_asincronas = router_asincrono.urls
+urlpatterns = [
+    path('api/multas/', include(urls_asincronas)),
+    path('api/auth/admin-dashboard/', AdminDashboardView.as_view(despacho_asincrono=True)),
+    path('api/auth/residente-dashboard/', ResidenteDashboardView.as_view(despacho_asincrono=True)),
+    path('', include('backend.urls')),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class VistasAsincronasTests(TestCase):
+    """
+    Las variantes asíncronas responden igual con la cadena de middlewares
+    asíncrona (ASGI) que las vistas síncronas con la de WSGI.
+    """
+    def setUp(self):
+        cache.clear()
+        self.admin = Usuario.objects.create_user(username='admin', password='x', rol='admin')
+        self.residente = Usuario.objects.create_user(
+            username='residente', password='x', rol='residente', numero_residencia='101',
+        )
+        Multa.objects.bulk_create([
+            Multa(usuario=self.residente, motivo=f'Motivo {i}', monto=1000 + i,
+                  estado='pagado' if i % 3 else 'pendiente')
+            for i in range(30)
+        ])
+        # bulk_create no actualiza los saldos del dashboard de residentes
+        reconciliar()
+        self.tokens = {
+            usuario.pk: str(RefreshToken.for_user(usuario).access_token)
+            for usuario in (self.admin, self.residente)
+        }
+
+    def cabeceras(self, usuario):
+        return {'Authorization': f'Bearer {self.tokens[usuario.pk]}'}
+
+    def get_sincrono(self, url, **kwargs):
+        with self.settings(ROOT_URLCONF='backend.urls'):
+            return self.client.get(url, **kwargs)
+
+    async def comparar(self, url, usuario):
+        cabeceras = self.cabeceras(usuario)
+        respuesta_asgi = await self.async_client.get(url, headers=cabeceras)
+        await cache.aclear()
+        respuesta_wsgi = await sync_to_async(self.get_sincrono)(url, headers=cabeceras)
+        self.assertEqual(respuesta_asgi.status_code, respuesta_wsgi.status_code, url)
+        self.assertEqual(respuesta_asgi.content, respuesta_wsgi.content, url)
+        self.assertIn('Server-Timing', respuesta_asgi)
+        return respuesta_asgi
+
+    def test_sincronas_por_defecto(self):
+        for url in ('/api/multas/', '/api/multas/estadisticas/', '/api/auth/admin-dashboard/'):
+            with self.settings(ROOT_URLCONF='backend.urls'):
+                self.assertFalse(iscoroutinefunction(resolve(url).func), url)
+        for url in ('/api/multas/', '/api/auth/admin-dashboard/', '/api/auth/residente-dashboard/'):
+            self.assertTrue(iscoroutinefunction(resolve(url).func), url)
+
+    async def test_respuestas_identicas(self):
+        for url, usuario in (
+            ('/api/multas/', self.admin),
+            ('/api/multas/', self.residente),
+            ('/api/multas/?page_size=7&ordering=monto&fields=id,monto', self.admin),
+            ('/api/multas/?formato=columnas', self.admin),
+            ('/api/multas/?fields=desconocido', self.admin),
+            ('/api/multas/estadisticas/', self.admin),
+            ('/api/multas/estadisticas/?agrupar_por=residencia', self.admin),
+            ('/api/multas/estadisticas/?desde=ayer', self.admin),
+            ('/api/multas/estadisticas/', self.residente),
+            ('/api/auth/admin-dashboard/', self.admin),
+            ('/api/auth/admin-dashboard/', self.residente),
+            ('/api/auth/residente-dashboard/', self.residente),
+            ('/api/auth/residente-dashboard/', self.admin),
+        ):
+            await self.comparar(url, usuario)
+
+    async def test_sin_autenticar(self):
+        response = await self.async_client.get('/api/multas/estadisticas/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+
+    async def test_lista_condicional(self):
+        response = await self.comparar('/api/multas/', self.admin)
+        no_modificada = await self.async_client.get(
+            '/api/multas/', headers={**self.cabeceras(self.admin), 'If-None-Match': response['ETag']},
+        )
+        self.assertEqual(no_modificada.status_code, 304)
+
+    async def test_acciones_sincronas(self):
+        response = await self.async_client.post(
+            '/api/multas/', {'usuario': self.residente.pk, 'motivo': 'Nueva', 'monto': 500},
+            content_type='application/json', headers=self.cabeceras(self.admin),
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(await Multa.objects.filter(motivo='Nueva').acount(), 1)
+
+
+class ConsultasConcurrentesTests(TransactionTestCase):
+    """
+    Con conexiones persistentes y fuera de una transacción, las consultas
+    independientes se ejecutan a la vez en hilos distintos.
+    """
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='admin', password='x', rol='admin')
+        Multa.objects.create(usuario=self.admin, motivo='Ruido', monto=1000)
+        # Los hilos del pool crean sus conexiones con el mismo diccionario
+        persistentes = mock.patch.dict(connections['default'].settings_dict, {'CONN_MAX_AGE': 60})
+        persistentes.start()
+        self.addCleanup(persistentes.stop)
+
+    def consulta(self):
+        return threading.get_ident(), Multa.objects.count()
+
+    def test_en_paralelo(self):
+        # Si las funciones corrieran una tras otra, la barrera no se liberaría
+        barrera = threading.Barrier(2, timeout=5)
+
+        def consulta():
+            barrera.wait()
+            return self.consulta()
+
+        (hilo_1, total_1), (hilo_2, total_2) = async_to_sync(consultas_concurrentes)(consulta, consulta)
+        self.assertNotEqual(hilo_1, hilo_2)
+        self.assertEqual((total_1, total_2), (1, 1))
+
+    def test_en_transaccion_usa_la_conexion_de_la_peticion(self):
+        with transaction.atomic():
+            Multa.objects.create(usuario=self.admin, motivo='Basura', monto=2000)
+            resultados = async_to_sync(consultas_concurrentes)(self.consulta, self.consulta)
+        self.assertEqual(resultados, [(threading.get_ident(), 2)] * 2)
+
+    def test_sin_conexiones_persistentes_usa_la_conexion_de_la_peticion(self):
+        with mock.patch.dict(connections['default'].settings_dict, {'CONN_MAX_AGE': 0}):
+            resultados = async_to_sync(consultas_concurrentes)(self.consulta, self.consulta)
+        self.assertEqual(resultados, [(threading.get_ident(), 1)] * 2)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_lista_mide_las_consultas_de_otros_hilos(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        concurrente = client.get('/api/multas/')
+        with override_settings(API_CONSULTAS_CONCURRENTES=False):
+            secuencial = client.get('/api/multas/')
+        self.assertEqual(concurrente.content, secuencial.content)
+        self.assertEqual(concurrente['ETag'], secuencial['ETag'])
+        self.assertIn('desc="2 consultas"', concurrente['Server-Timing'])
+
+
+class InformePresupuestoTests(TestCase):
+
+    def test_detecta_consultas_por_fila(self):
+        ruta = Ruta('multas.list', 'get', '/api/multas/', 3)
+        chica = Medicion(ruta, 5, 200, ['SELECT 1'] + ['SELECT * FROM u WHERE id = 1'] * 2, 0.01)
+        grande = Medicion(ruta, 50, 200, ['SELECT 1'] + [
+            f"SELECT * FROM u WHERE id = {i} AND nombre = 'x'" for i in range(20)
+        ], 0.01)
+        problemas = infracciones(chica, grande)
+        self.assertEqual(problemas, [
+            '21 consultas, presupuesto 3 [tamaño 50]',
+            'crece con los datos: 3 consultas con tamaño 5, 21 con tamaño 50',
+        ])
+        texto = informe(chica, grande, problemas)
+        self.assertIn("20x SELECT * FROM u WHERE id = ? AND nombre = ?", texto)
+
+
+REPLICA = 'replica_prueba'
+
+
+@override_settings(REPLICAS_LECTURA=[REPLICA], REPLICAS_INTERVALO_VERIFICACION=0)
+class ReplicasTests(TransactionTestCase):
+    """
+    Usa un segundo archivo SQLite como réplica. La "replicación" se simula
+    copiando filas a mano, así que la réplica está atrasada a propósito.
+    Es un TransactionTestCase porque dentro de una transacción todas las
+    lecturas van a la primaria.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        descriptor, cls.archivo = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(descriptor)
+        configuracion = connections.configure_settings({
+            'default': connections.settings['default'],
+            REPLICA: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': cls.archivo},
+        })[REPLICA]
+        # Conexión creada en tiempo de ejecución, fuera de DATABASES
+        connections[REPLICA] = load_backend(configuracion['ENGINE']).DatabaseWrapper(
+            configuracion, REPLICA
+        )
+        with connections[REPLICA].schema_editor() as editor:
+            editor.create_model(Usuario)
+            editor.create_model(Multa)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        os.remove(cls.archivo)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        replicas.monitor.limpiar()
+        self.admin = Usuario.objects.create_user(username='admin', password='x', rol='admin')
+        self.residente = Usuario.objects.create_user(username='residente', password='x', rol='residente')
+        self.multa = Multa.objects.create(usuario=self.residente, motivo='Ruido', monto=1000)
+        Multa.objects.create(usuario=self.residente, motivo='Basura', monto=2000)
+        # La réplica solo alcanzó a recibir la primera multa
+        for usuario in (self.admin, self.residente):
+            usuario.save(using=REPLICA, force_insert=True)
+        Multa.objects.filter(pk=self.multa.pk).first().save(using=REPLICA, force_insert=True)
+        self.addCleanup(self.vaciar_replica)
+
+        self.client = self.cliente('token-admin')
+
+    def vaciar_replica(self):
+        with connections[REPLICA].cursor() as cursor:
+            cursor.execute('DELETE FROM multas_multa')
+            cursor.execute('DELETE FROM usuarios_usuario')
+
+    def cliente(self, token):
+        cliente = APIClient()
+        cliente.force_authenticate(self.admin)
+        cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return cliente
+
+    def test_lecturas_van_a_la_replica(self):
+        self.assertEqual(len(self.client.get('/api/multas/').data), 1)
+        self.assertEqual(self.client.get('/api/auth/admin-dashboard/').data['total_residentes'], 1)
+
+    def test_lee_sus_escrituras(self):
+        response = self.client.post(f'/api/multas/{self.multa.pk}/marcar_como_pagada/')
+        self.assertEqual(response.status_code, 200)
+
+        datos = self.client.get('/api/multas/').data
+        self.assertEqual(len(datos), 2)
+        self.assertEqual(
+            {d['estado'] for d in datos if d['id'] == self.multa.pk}, {'pagado'}
+        )
+        # Otro cliente sigue leyendo de la réplica
+        self.assertEqual(len(self.cliente('token-otro').get('/api/multas/').data), 1)
+
+    def test_marca_visible_desde_otro_proceso(self):
+        self.client.post(f'/api/multas/{self.multa.pk}/marcar_como_pagada/')
+        # La marca queda en la tabla de la caché, que leen todos los workers
+        clave = 'replicas:primaria:' + hashlib.sha256(b'Bearer token-admin').hexdigest()
+        with connections['default'].cursor() as cursor:
+            cursor.execute(
+                'SELECT COUNT(*) FROM cache_compartida WHERE cache_key = %s', [cache.make_key(clave)]
+            )
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_sin_ventana_vuelve_a_la_replica(self):
+        with override_settings(REPLICAS_VENTANA_PRIMARIA=0):
+            self.client.post(f'/api/multas/{self.multa.pk}/marcar_como_pagada/')
+        self.assertEqual(len(self.client.get('/api/multas/').data), 1)
+
+    def test_replica_atrasada(self):
+        with mock.patch.object(replicas, 'medir_retraso', return_value=30):
+            self.assertEqual(len(self.client.get('/api/multas/').data), 2)
+        with mock.patch.object(replicas, 'medir_retraso', side_effect=Exception('caída')):
+            replicas.monitor.limpiar()
+            self.assertEqual(len(self.client.get('/api/multas/').data), 2)
+
+    def test_fuera_de_peticiones_y_en_transacciones(self):
+        self.assertEqual(Multa.objects.count(), 2)
+        router = replicas.ReplicaRouter()
+        token = replicas._peticion_actual.set(replicas.EstadoPeticion(primaria=False))
+        try:
+            self.assertEqual(router.db_for_read(Multa), REPLICA)
+            self.assertEqual(router.db_for_write(Multa), 'default')
+            # La marca de la primaria se lee de la caché compartida en la primaria
+            self.assertEqual(router.db_for_read(cache.cache_model_class), 'default')
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Multa), 'default')
+        finally:
+            replicas._peticion_actual.reset(token)
+
+    def test_no_migra_replicas(self):
+        router = replicas.ReplicaRouter()
+        self.assertFalse(router.allow_migrate(REPLICA, 'multas'))
+        self.assertIsNone(router.allow_migrate('default', 'multas'))
+
+
+class CacheCompartidaTests(TestCase):
+
+    def test_rechaza_cache_del_proceso(self):
+        self.assertEqual(revisar_cache_compartida(None), [])
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=locmem):
+            errores = revisar_cache_compartida(None)
+        self.assertEqual([error.id for error in errores], ['api.E001'])
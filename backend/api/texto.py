@@ -0,0 +1,19 @@
+"""
+Normalización de texto para los índices de búsqueda de multas y usuarios.
+"""
+import re
+import unicodedata
+
+
+def minusculas_sin_tildes(texto):
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def normalizar(texto):
+    """
+    Separa el texto en palabras en minúsculas y sin tildes ("Peña" -> "pena").
+    """
+    if not texto:
+        return []
+    return re.findall(r'\w+', minusculas_sin_tildes(str(texto)))
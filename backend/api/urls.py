@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import MetricasView
+
+urlpatterns = [
+    path('metricas/', MetricasView.as_view(), name='metricas'),
+]
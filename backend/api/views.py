@@ -1,3 +1,19 @@
-from django.shortcuts import render
+from django.http import HttpResponse
+from rest_framework.views import APIView
 
-# Create your views here.
+from usuarios.views import IsAdminUser
+from .metricas import registro
+
+
+class MetricasView(APIView):
+    """
+    Vista para exponer las métricas de rendimiento en formato Prometheus
+    (solo administradores).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(
+            registro.exportar_prometheus(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
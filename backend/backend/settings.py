@@ -54,9 +54,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricasMiddleware',
+    'api.middleware.ReplicasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'api.middleware.CompresionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -102,6 +105,29 @@ DATABASES = {
     }
 }
 
+# Réplicas de lectura: alias de DATABASES que reciben las lecturas de las
+# peticiones GET. Cada réplica debe declarar 'TEST': {'MIRROR': 'default'}.
+# Con la lista vacía todo el tráfico va a 'default'.
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+REPLICAS_LECTURA = []
+# Segundos de retraso máximos para usar una réplica y cada cuánto se miden
+REPLICAS_RETRASO_MAXIMO = 2
+REPLICAS_INTERVALO_VERIFICACION = 5
+# Segundos que un cliente lee de la primaria después de escribir
+REPLICAS_VENTANA_PRIMARIA = 10
+
+# Caché compartida por todos los procesos (workers, comandos): guarda las
+# fotos de estadísticas de multas y la marca de lectura en la primaria de
+# las réplicas. Se usa la base de datos para no agregar un servicio; la tabla
+# se crea con "python manage.py createcachetable". Una caché en memoria del
+# proceso (LocMemCache) no sirve y la rechaza el chequeo api.E001.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_compartida',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -150,13 +176,48 @@ AUTH_USER_MODEL = 'usuarios.Usuario'
 # Configuración de REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'usuarios.autenticacion.JWTAutenticacionCacheada',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.JSONRendererRapido',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.JSONParserRapido',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# JSON de la API con orjson (si está instalado); False usa el módulo json
+API_JSON_RAPIDO = True
+
+# Variantes asíncronas de las vistas de lectura (lista y estadísticas de
+# multas y dashboards, ver api.asincrono). Activar solo al servir con ASGI:
+# con WSGI agregan saltos de hilo sin ganar nada
+API_VISTAS_ASINCRONAS = False
+
+# Consultas independientes de las vistas asíncronas (estadísticas, validador
+# y página de las listas) a la vez, en un pool de API_CONSULTAS_HILOS hilos
+# por proceso. Cada hilo usa su propia conexión, por lo que solo se aplica
+# con conexiones persistentes (CONN_MAX_AGE distinto de 0)
+API_CONSULTAS_CONCURRENTES = True
+API_CONSULTAS_HILOS = 4
+
+# Compresión de respuestas (brotli si está instalado, si no gzip) para los
+# tipos de COMPRESION_TIPOS desde COMPRESION_TAMANIO_MINIMO bytes. Contra
+# BREACH, gzip agrega hasta COMPRESION_RELLENO_MAXIMO bytes aleatorios en su
+# cabecera y las respuestas con credenciales o cookies no usan brotli
+COMPRESION_HABILITADA = True
+COMPRESION_TAMANIO_MINIMO = 1024
+COMPRESION_TIPOS = ('application/json', 'text/')
+COMPRESION_NIVEL_GZIP = 6
+COMPRESION_NIVEL_BROTLI = 4
+COMPRESION_RELLENO_MAXIMO = 100
+
 # Configuración de JWT
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -186,6 +247,17 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Caché de usuarios autenticados por JWT (segundos de vida y máximo de entradas)
+USUARIOS_AUTH_CACHE_TTL = 60
+USUARIOS_AUTH_CACHE_MAX = 2048
+
+# Pool de procesos para verificar contraseñas en el login: procesos (None:
+# uno por CPU, 0: en el proceso web), tareas pendientes admitidas antes de
+# responder 503 (None: 4 por proceso) y segundos máximos de espera
+USUARIOS_HASH_PROCESOS = None
+USUARIOS_HASH_COLA_MAXIMA = None
+USUARIOS_HASH_TIMEOUT = 10
+
 # Configuración de CORS
 CORS_ALLOW_ALL_ORIGINS = True  # En producción, esto debería ser más restrictivo
 CORS_ALLOWED_ORIGINS = [
@@ -212,3 +284,48 @@ CORS_ALLOW_HEADERS = [
     "x-csrftoken",
     "x-requested-with",
 ]
+
+# Vigencia máxima (segundos) de la foto de estadísticas de multas; además
+# se invalida cada vez que una multa se guarda o se elimina, o un residente
+# cambia de residencia
+MULTAS_ESTADISTICAS_CACHE_TIMEOUT = 3600
+
+# Backend de búsqueda de texto de multas (ruta a la clase). Con None se usa
+# FTS5 en SQLite, FULLTEXT en MySQL y un documento indexado en otros motores
+MULTAS_BUSQUEDA_BACKEND = None
+
+# Procesos para hashear contraseñas en la importación masiva de usuarios con
+# manage.py importar_usuarios (None: uno por CPU). La importación desde la
+# API usa el pool del login (USUARIOS_HASH_PROCESOS) y admite archivos de
+# hasta USUARIOS_IMPORTACION_TAMANIO_MAXIMO bytes
+USUARIOS_IMPORTACION_PROCESOS = None
+USUARIOS_IMPORTACION_TAMANIO_MAXIMO = 256 * 1024
+
+# Métricas de rendimiento por vista (/api/metricas/) y cabecera Server-Timing
+METRICAS_HABILITADAS = True
+METRICAS_SERVER_TIMING = True
+
+# Entrega de notificaciones (manage.py procesar_notificaciones): transporte
+# (ruta a la clase), archivo de ArchivoTransporte, intentos máximos, espera
+# exponencial entre reintentos y plazo (segundos) tras el que un evento
+# reclamado por un proceso que murió vuelve a estar disponible
+NOTIFICACIONES_TRANSPORTE = 'notificaciones.transportes.ConsolaTransporte'
+NOTIFICACIONES_ARCHIVO = BASE_DIR / 'notificaciones.jsonl'
+NOTIFICACIONES_REINTENTOS = 5
+NOTIFICACIONES_ESPERA_BASE = 30
+NOTIFICACIONES_ESPERA_MAXIMA = 3600
+NOTIFICACIONES_BLOQUEO = 300
+
+# Webhook de Mercado Pago (/api/pagos/mercado-pago/webhook/) y su procesador
+# (manage.py procesar_pagos_mercado_pago): clave secreta de la firma (vacía:
+# el webhook responde 503), token y cliente de la API de pagos (ruta a la
+# clase), intentos y espera base (segundos) ante fallas de la API o pagos
+# mal formados, plazo de bloqueo de los eventos reclamados y diferencia
+# máxima (segundos) entre la marca de la firma y la hora actual
+MERCADO_PAGO_SECRETO_WEBHOOK = ''
+MERCADO_PAGO_ACCESS_TOKEN = ''
+MERCADO_PAGO_CLIENTE = 'mercado_pago.cliente.ClienteMercadoPago'
+MERCADO_PAGO_REINTENTOS = 8
+MERCADO_PAGO_ESPERA_BASE = 10
+MERCADO_PAGO_BLOQUEO = 300
+MERCADO_PAGO_FIRMA_TOLERANCIA = 300
@@ -28,7 +28,10 @@ urlpatterns = [
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     
     # Otras URLs de la API
-    # path('api/gastos/', include('gastos.urls')),
+    path('api/gastos/', include('gasto_comun.urls')),
     path('api/multas/', include('multas.urls')),
-    # path('api/pagos/', include('pagos.urls')),
+    path('api/pagos/', include('mercado_pago.urls')),
+    
+    # Métricas de rendimiento
+    path('api/', include('api.urls')),
 ]
@@ -0,0 +1,136 @@
+"""
+Benchmarks de la API.
+
+Cada módulo se ejecuta desde el directorio ``backend`` con
+``python -m benchmarks.<nombre>``. Igual que ``manage.py test``, los
+benchmarks crean su propia base de datos de prueba a partir de la
+configuración activa, por lo que nunca tocan datos reales.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def entorno_de_prueba():
+    """
+    Inicializa Django y crea una base de datos de prueba que se destruye
+    al salir del bloque.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment(debug=False)
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+
+
+@contextmanager
+def cronometro(resultado, clave):
+    """
+    Guarda en ``resultado[clave]`` los segundos que tarda el bloque.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        resultado[clave] = time.perf_counter() - inicio
+
+
+@contextmanager
+def servidor_wsgi():
+    """
+    Atiende la aplicación WSGI de Django en un servidor con hilos y entrega
+    la URL base. Debe usarse dentro de ``entorno_de_prueba``.
+    """
+    from django.conf import settings
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+    from django.test.utils import override_settings
+
+    class Manejador(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadedWSGIServer(('127.0.0.1', 0), Manejador, allow_reuse_address=False)
+    servidor.set_app(get_wsgi_application())
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    try:
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, '127.0.0.1']):
+            yield f'http://127.0.0.1:{servidor.server_address[1]}'
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def peticion(url, metodo='GET', datos=None, token=None, cabeceras=None):
+    """
+    Hace una petición HTTP y devuelve ``(status, segundos, cuerpo)``.
+    """
+    import json
+    import urllib.error
+    import urllib.request
+
+    cuerpo = json.dumps(datos).encode() if datos is not None else None
+    request = urllib.request.Request(url, data=cuerpo, method=metodo)
+    if cuerpo is not None:
+        request.add_header('Content-Type', 'application/json')
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+    for nombre, valor in (cabeceras or {}).items():
+        request.add_header(nombre, valor)
+
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as respuesta:
+            contenido = respuesta.read()
+            status = respuesta.status
+    except urllib.error.HTTPError as error:
+        contenido = error.read()
+        status = error.code
+    return status, time.perf_counter() - inicio, contenido
+
+
+def carga(url, duracion, clientes, **kwargs):
+    """
+    Lanza ``clientes`` hilos que repiten la petición durante ``duracion``
+    segundos; devuelve las latencias y los códigos de estado.
+    """
+    latencias = []
+    estados = []
+    lock = threading.Lock()
+    limite = time.monotonic() + duracion
+
+    def cliente():
+        while time.monotonic() < limite:
+            status, segundos, _ = peticion(url, **kwargs)
+            with lock:
+                latencias.append(segundos)
+                estados.append(status)
+
+    hilos = [threading.Thread(target=cliente) for _ in range(clientes)]
+    for hilo in hilos:
+        hilo.start()
+    return hilos, latencias, estados
+
+
+def percentil(valores, p):
+    """
+    Percentil ``p`` (0-100) por el método del rango más cercano.
+    """
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
@@ -0,0 +1,189 @@
+"""
+Benchmark de las rutas principales de la API con una línea base comparable.
+
+Genera un conjunto de datos sintéticos con ``sembrar_datos`` en una base de
+datos de prueba, atiende la aplicación en un servidor WSGI con hilos y, para
+cada escenario y nivel de concurrencia, mide el rendimiento (peticiones por
+segundo) y la latencia p50/p95/p99.
+
+Uso:
+    python -m benchmarks.api --salida linea_base.json
+    python -m benchmarks.api --comparar linea_base.json --tolerancia 0.15
+    python -m benchmarks.api --comparar linea_base.json --actual resultado.json
+
+Al comparar, el proceso termina con código 1 si algún escenario empeora más
+que la tolerancia (latencia mayor o rendimiento menor).
+"""
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime
+
+from . import carga, entorno_de_prueba, peticion, percentil, servidor_wsgi
+
+PASSWORD = 'Clave-Bench-123'
+PREFIJO = 'bench'
+
+
+def escenarios(admin, residente):
+    """
+    Escenarios disponibles: nombre -> (ruta, argumentos de ``peticion``).
+    """
+    return {
+        'login': ('/api/auth/login/', {
+            'metodo': 'POST',
+            'datos': {'username': f'{PREFIJO}_00001', 'password': PASSWORD},
+        }),
+        'multas': ('/api/multas/?page_size=50', {'token': admin}),
+        'multas_residente': ('/api/multas/', {'token': residente}),
+        'estadisticas': ('/api/multas/estadisticas/', {'token': admin}),
+        'mi_perfil': ('/api/auth/usuarios/mi-perfil/', {'token': residente}),
+    }
+
+
+def medir(url, concurrencia, duracion, calentamiento, **kwargs):
+    if calentamiento:
+        for hilo in carga(url, calentamiento, concurrencia, **kwargs)[0]:
+            hilo.join()
+    hilos, latencias, estados = carga(url, duracion, concurrencia, **kwargs)
+    for hilo in hilos:
+        hilo.join()
+
+    def ms(p):
+        valor = percentil(latencias, p)
+        return round(valor * 1000, 2) if valor is not None else None
+
+    return {
+        'peticiones': len(latencias),
+        'por_segundo': round(len(latencias) / duracion, 1),
+        'p50_ms': ms(50),
+        'p95_ms': ms(95),
+        'p99_ms': ms(99),
+        'errores': sum(1 for s in estados if s >= 400),
+    }
+
+
+def comparar(base, actual, tolerancia):
+    """
+    Devuelve la lista de regresiones de ``actual`` respecto de ``base``.
+    """
+    regresiones = []
+    for escenario, niveles in actual['resultados'].items():
+        for concurrencia, medida in niveles.items():
+            referencia = base['resultados'].get(escenario, {}).get(concurrencia)
+            if not referencia:
+                continue
+            for metrica in ('p50_ms', 'p95_ms', 'p99_ms'):
+                antes, ahora = referencia.get(metrica), medida.get(metrica)
+                if antes and ahora and ahora > antes * (1 + tolerancia):
+                    regresiones.append((escenario, concurrencia, metrica, antes, ahora))
+            antes, ahora = referencia.get('por_segundo'), medida.get('por_segundo')
+            if antes and ahora is not None and ahora < antes * (1 - tolerancia):
+                regresiones.append((escenario, concurrencia, 'por_segundo', antes, ahora))
+            if medida.get('errores', 0) > referencia.get('errores', 0):
+                regresiones.append(
+                    (escenario, concurrencia, 'errores', referencia.get('errores', 0), medida['errores'])
+                )
+    return regresiones
+
+
+def ejecutar(args):
+    with entorno_de_prueba():
+        from django.core.management import call_command
+        from django.db import connection
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        from usuarios.models import Usuario
+
+        call_command(
+            'sembrar_datos',
+            edificios=args.edificios, residentes=args.residentes, multas=args.multas,
+            password=PASSWORD, prefijo=PREFIJO, semilla=args.semilla, verbosity=0,
+        )
+        admin = Usuario.objects.get(username=f'{PREFIJO}_admin')
+        residente = Usuario.objects.get(username=f'{PREFIJO}_00001')
+        tokens = (
+            str(RefreshToken.for_user(admin).access_token),
+            str(RefreshToken.for_user(residente).access_token),
+        )
+        disponibles = escenarios(*tokens)
+
+        resultados = {}
+        with servidor_wsgi() as base:
+            for nombre in args.escenarios or disponibles:
+                ruta, kwargs = disponibles[nombre]
+                status, _, cuerpo = peticion(base + ruta, **kwargs)
+                if status >= 400:
+                    raise SystemExit(f'{nombre}: {status} {cuerpo[:200]!r}')
+                resultados[nombre] = {}
+                for concurrencia in args.concurrencia:
+                    medida = medir(base + ruta, concurrencia, args.duracion, args.calentamiento, **kwargs)
+                    resultados[nombre][str(concurrencia)] = medida
+                    print(f'{nombre:18} c={concurrencia:<3} {medida["por_segundo"]:>8} req/s  '
+                          f'p50 {medida["p50_ms"]} ms  p95 {medida["p95_ms"]} ms  '
+                          f'p99 {medida["p99_ms"]} ms', file=sys.stderr)
+
+        return {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'entorno': {
+                'python': platform.python_version(),
+                'plataforma': platform.platform(),
+                'motor': connection.vendor,
+            },
+            'parametros': {
+                'edificios': args.edificios,
+                'residentes': args.residentes,
+                'multas': args.multas,
+                'duracion': args.duracion,
+            },
+            'resultados': resultados,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--edificios', type=int, default=20)
+    parser.add_argument('--residentes', type=int, default=2000)
+    parser.add_argument('--multas', type=int, default=100000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--concurrencia', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--duracion', type=float, default=5,
+                        help='Segundos de medición por escenario y concurrencia.')
+    parser.add_argument('--calentamiento', type=float, default=1)
+    parser.add_argument('--escenarios', nargs='+',
+                        choices=sorted(escenarios(None, None)))
+    parser.add_argument('--salida', help='Archivo JSON donde guardar el resultado.')
+    parser.add_argument('--comparar', help='Línea base JSON contra la que comparar.')
+    parser.add_argument('--actual', help='Comparar este resultado JSON en vez de medir.')
+    parser.add_argument('--tolerancia', type=float, default=0.15,
+                        help='Empeoramiento relativo admitido (0.15 = 15%%).')
+    args = parser.parse_args()
+
+    if args.actual:
+        if not args.comparar:
+            parser.error('--actual requiere --comparar')
+        with open(args.actual) as archivo:
+            resultado = json.load(archivo)
+    else:
+        resultado = ejecutar(args)
+
+    if args.salida:
+        with open(args.salida, 'w') as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+    elif not args.actual:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+    if args.comparar:
+        with open(args.comparar) as archivo:
+            base = json.load(archivo)
+        regresiones = comparar(base, resultado, args.tolerancia)
+        for escenario, concurrencia, metrica, antes, ahora in regresiones:
+            print(f'REGRESIÓN {escenario} c={concurrencia} {metrica}: {antes} -> {ahora}')
+        if regresiones:
+            sys.exit(1)
+        print(f'Sin regresiones (tolerancia {args.tolerancia:.0%}).')
+
+
+if __name__ == '__main__':
+    main()
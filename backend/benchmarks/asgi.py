@@ -0,0 +1,256 @@
+"""
+Prueba de carga de las vistas de lectura con WSGI y con ASGI.
+
+Siembra ``--residentes`` residentes y ``--multas`` multas y lanza
+``--clientes`` clientes concurrentes contra cada ruta durante
+``--duracion`` segundos, primero con la aplicación WSGI atendida por
+``--hilos`` hilos (como ``gunicorn --threads``) y luego con la aplicación
+ASGI en un event loop, con las variantes asíncronas de las vistas
+(``API_VISTAS_ASINCRONAS``). Las peticiones se entregan directo a la
+aplicación, sin sockets, para medir solo el manejo de Django.
+
+SQLite reemplaza a MySQL; ``--latencia-ms`` agrega a cada consulta la
+espera de ida y vuelta al servidor (``time.sleep``, que libera el GIL igual
+que la espera de un socket). Las estadísticas se calculan en cada petición
+(sin la foto en caché). Las conexiones se conservan ``--conn-max-age``
+segundos (las consultas concurrentes lo requieren). Informa peticiones por
+segundo, latencias p50/p95, errores y el máximo de hilos vivos.
+
+Uso: python -m benchmarks.asgi --clientes 32 --hilos 8 --latencia-ms 5
+"""
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+
+from . import entorno_de_prueba, percentil
+
+RUTAS = (
+    ('dashboard.admin', '/api/auth/admin-dashboard/', 'admin'),
+    ('dashboard.residente', '/api/auth/residente-dashboard/', 'residente'),
+    ('multas.list', '/api/multas/?page_size=50', 'admin'),
+    ('multas.estadisticas', '/api/multas/estadisticas/?agrupar_por=mes', 'admin'),
+)
+
+
+def instalar_latencia(segundos):
+    """
+    Agrega ``segundos`` de espera a cada consulta de todas las conexiones,
+    incluidas las que abran los hilos de Django.
+    """
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def esperar(execute, sql, params, many, context):
+        time.sleep(segundos)
+        return execute(sql, params, many, context)
+
+    def instalar(connection, **kwargs):
+        # Al principio de la lista: la conexión puede abrirse dentro de un
+        # ``execute_wrapper()`` de la petición, que quita el último al salir
+        if esperar not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, esperar)
+
+    connection_created.connect(instalar, weak=False)
+    for connection in connections.all():
+        instalar(connection)
+
+
+class Monitor:
+    """
+    Registra latencias y códigos de estado, y el máximo de hilos vivos.
+    """
+    def __init__(self):
+        self.latencias = []
+        self.errores = 0
+        self.hilos_max = threading.active_count()
+        self._lock = threading.Lock()
+
+    def registrar(self, status, segundos):
+        with self._lock:
+            self.latencias.append(segundos)
+            self.errores += status != 200
+            self.hilos_max = max(self.hilos_max, threading.active_count())
+
+    def resultado(self, duracion):
+        return {
+            'peticiones_por_segundo': round(len(self.latencias) / duracion, 1),
+            'p50_ms': round(percentil(self.latencias, 50) * 1000, 1),
+            'p95_ms': round(percentil(self.latencias, 95) * 1000, 1),
+            'errores': self.errores,
+            'hilos_max': self.hilos_max,
+        }
+
+
+def llamar_wsgi(aplicacion, ruta, token):
+    path, _, query = ruta.partition('?')
+    entorno = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'testserver', 'HTTP_AUTHORIZATION': f'Bearer {token}',
+        'REMOTE_ADDR': '127.0.0.1', 'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+    }
+    estado = []
+    cuerpo = aplicacion(entorno, lambda status, headers, exc_info=None: estado.append(int(status[:3])))
+    try:
+        b''.join(cuerpo)
+    finally:
+        cuerpo.close()
+    return estado[0]
+
+
+async def llamar_asgi(aplicacion, ruta, token):
+    path, _, query = ruta.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+    }
+    terminada = asyncio.Event()
+    leida = False
+    estado = []
+
+    async def receive():
+        nonlocal leida
+        if not leida:
+            leida = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await terminada.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(mensaje):
+        if mensaje['type'] == 'http.response.start':
+            estado.append(mensaje['status'])
+        elif not mensaje.get('more_body'):
+            terminada.set()
+
+    await aplicacion(scope, receive, send)
+    terminada.set()
+    return estado[0]
+
+
+def carga_wsgi(ruta, token, clientes, hilos, duracion):
+    from django.core.wsgi import get_wsgi_application
+
+    aplicacion = get_wsgi_application()
+    monitor = Monitor()
+    limite = time.monotonic() + duracion
+
+    with ThreadPoolExecutor(max_workers=hilos) as servidor:
+        def cliente():
+            while time.monotonic() < limite:
+                inicio = time.perf_counter()
+                status = servidor.submit(llamar_wsgi, aplicacion, ruta, token).result()
+                monitor.registrar(status, time.perf_counter() - inicio)
+
+        usuarios = [threading.Thread(target=cliente) for _ in range(clientes)]
+        for usuario in usuarios:
+            usuario.start()
+        for usuario in usuarios:
+            usuario.join()
+    return monitor.resultado(duracion)
+
+
+class UrlsAsincronas:
+    """
+    URLconf del proyecto con las vistas creadas con API_VISTAS_ASINCRONAS.
+    """
+    def __init__(self):
+        from django.test.utils import override_settings
+        from django.urls import include, path
+        from rest_framework.routers import DefaultRouter
+        from multas.views import MultaViewSet
+        from usuarios.views import AdminDashboardView, ResidenteDashboardView
+
+        router = DefaultRouter()
+        router.register(r'', MultaViewSet)
+        with override_settings(API_VISTAS_ASINCRONAS=True):
+            multas = router.urls
+            dashboards = [
+                path('admin-dashboard/', AdminDashboardView.as_view()),
+                path('residente-dashboard/', ResidenteDashboardView.as_view()),
+            ]
+        self.urlpatterns = [
+            path('api/multas/', include(multas)),
+            path('api/auth/', include(dashboards)),
+            path('', include('backend.urls')),
+        ]
+
+
+def carga_asgi(ruta, token, clientes, duracion):
+    from django.core.asgi import get_asgi_application
+
+    aplicacion = get_asgi_application()
+    monitor = Monitor()
+
+    async def principal():
+        limite = time.monotonic() + duracion
+
+        async def cliente():
+            while time.monotonic() < limite:
+                inicio = time.perf_counter()
+                status = await llamar_asgi(aplicacion, ruta, token)
+                monitor.registrar(status, time.perf_counter() - inicio)
+
+        await asyncio.gather(*(cliente() for _ in range(clientes)))
+
+    asyncio.run(principal())
+    return monitor.resultado(duracion)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--residentes', type=int, default=200)
+    parser.add_argument('--multas', type=int, default=5000)
+    parser.add_argument('--clientes', type=int, default=32)
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--duracion', type=float, default=5)
+    parser.add_argument('--latencia-ms', type=float, default=5)
+    parser.add_argument('--conn-max-age', type=int, default=60)
+    args = parser.parse_args()
+
+    with entorno_de_prueba():
+        from django.core.management import call_command
+        from django.db import connections
+        from django.test.utils import override_settings
+        from rest_framework_simplejwt.tokens import RefreshToken
+        from usuarios.models import Usuario
+
+        call_command(
+            'sembrar_datos', residentes=args.residentes, multas=args.multas, stdout=StringIO(),
+        )
+        usuarios = {
+            'admin': Usuario.objects.get(username='sint_admin'),
+            'residente': Usuario.objects.filter(rol='residente').order_by('id').first(),
+        }
+        tokens = {rol: str(RefreshToken.for_user(usuario).access_token) for rol, usuario in usuarios.items()}
+        if args.latencia_ms:
+            instalar_latencia(args.latencia_ms / 1000)
+        for connection in connections.all():
+            connection.settings_dict['CONN_MAX_AGE'] = args.conn_max_age
+
+        resultado = {}
+        urls_asincronas = UrlsAsincronas()
+        with override_settings(MULTAS_ESTADISTICAS_CACHE_TIMEOUT=0, METRICAS_SERVER_TIMING=False):
+            for nombre, ruta, rol in RUTAS:
+                resultado[nombre] = {
+                    'wsgi': carga_wsgi(ruta, tokens[rol], args.clientes, args.hilos, args.duracion),
+                }
+                with override_settings(ROOT_URLCONF=urls_asincronas):
+                    resultado[nombre]['asgi'] = carga_asgi(ruta, tokens[rol], args.clientes, args.duracion)
+    print(json.dumps({
+        'clientes': args.clientes, 'hilos_wsgi': args.hilos, 'latencia_ms': args.latencia_ms,
+        'conn_max_age': args.conn_max_age,
+        'rutas': resultado,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
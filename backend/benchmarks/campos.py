@@ -0,0 +1,65 @@
+"""
+Compara el tamaño y el tiempo de interpretación de la lista de multas
+completa, con ``?fields=`` y en formato por columnas.
+
+Siembra ``--multas`` multas con ``sembrar_datos`` y pide la lista como
+administrador en cada variante. Informa los bytes de la respuesta, el
+tiempo del servidor y el de ``json.loads`` en el cliente.
+
+Uso: python -m benchmarks.campos --multas 20000
+"""
+import argparse
+import json
+import time
+from io import StringIO
+
+from . import entorno_de_prueba
+
+VARIANTES = {
+    'completa': '',
+    'fields': 'fields=id,usuario_nombre,monto,estado,fecha_creacion',
+    'fields_columnas': 'fields=id,usuario_nombre,monto,estado,fecha_creacion&formato=columnas',
+    'columnas': 'formato=columnas',
+}
+
+
+def medir(cliente, url, repeticiones):
+    servidor, interpretacion = [], []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        response = cliente.get(url)
+        servidor.append(time.perf_counter() - inicio)
+        contenido = response.content
+        inicio = time.perf_counter()
+        json.loads(contenido)
+        interpretacion.append(time.perf_counter() - inicio)
+    return {
+        'bytes': len(contenido),
+        'servidor_ms': round(min(servidor) * 1000, 1),
+        'json_loads_ms': round(min(interpretacion) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--multas', type=int, default=20000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    with entorno_de_prueba():
+        from django.core.management import call_command
+        from rest_framework.test import APIClient
+        from usuarios.models import Usuario
+
+        call_command('sembrar_datos', residentes=500, multas=args.multas, sin_busqueda=True, stdout=StringIO())
+        cliente = APIClient()
+        cliente.force_authenticate(Usuario.objects.get(username='sint_admin'))
+        resultado = {
+            nombre: medir(cliente, f'/api/multas/?{consulta}', args.repeticiones)
+            for nombre, consulta in VARIANTES.items()
+        }
+    print(json.dumps({'multas': args.multas, 'variantes': resultado}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Compara la emisión de multas una a una (``POST /api/multas/``) con la
+emisión masiva (``POST /api/multas/emision-masiva/``).
+
+Uso: python -m benchmarks.emision_masiva --cantidad 1000 --batch-size 500
+"""
+import argparse
+
+from . import cronometro, entorno_de_prueba
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cantidad', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--residentes', type=int, default=50)
+    args = parser.parse_args()
+
+    with entorno_de_prueba():
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework.test import APIClient
+
+        from multas.models import Multa
+        from usuarios.models import Usuario
+
+        admin = Usuario.objects.create(username='admin', rol='admin')
+        residentes = Usuario.objects.bulk_create([
+            Usuario(username=f'residente{i}', rol='residente', numero_residencia=f'A-{i:04d}')
+            for i in range(args.residentes)
+        ])
+        multas = [
+            {
+                'usuario': residentes[i % len(residentes)].id,
+                'motivo': 'Ruidos molestos',
+                'monto': 15000,
+            }
+            for i in range(args.cantidad)
+        ]
+
+        client = APIClient()
+        client.force_authenticate(admin)
+        tiempos = {}
+        consultas = {}
+
+        with CaptureQueriesContext(connection) as contexto, cronometro(tiempos, 'individual'):
+            for datos in multas:
+                client.post('/api/multas/', datos, format='json')
+        consultas['individual'] = len(contexto.captured_queries)
+        assert Multa.objects.count() == args.cantidad
+        Multa.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as contexto, cronometro(tiempos, 'masiva'):
+            client.post(
+                '/api/multas/emision-masiva/',
+                {'multas': multas, 'batch_size': args.batch_size},
+                format='json',
+            )
+        consultas['masiva'] = len(contexto.captured_queries)
+        assert Multa.objects.count() == args.cantidad
+
+    print(f'{args.cantidad} multas ({connection.vendor})')
+    for camino in ('individual', 'masiva'):
+        segundos = tiempos[camino]
+        print(
+            f'  {camino:<10} {segundos:8.3f} s  '
+            f'{args.cantidad / segundos:10.1f} multas/s  {consultas[camino]:6d} consultas'
+        )
+    print(f'  aceleración {tiempos["individual"] / tiempos["masiva"]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Mide el renderer JSON y la compresión de respuestas en las listas grandes.
+
+Siembra ``--multas`` multas y ``--residentes`` residentes, y pide
+``/api/multas/`` y ``/api/auth/usuarios/`` como administrador con cada
+variante: el ``json`` estándar sin comprimir (como antes), ``orjson`` sin
+comprimir, y ``orjson`` con gzip y con brotli (si está instalado). Informa
+bytes enviados, tiempo de CPU y de reloj por petición, y MB de JSON
+servidos por segundo de CPU.
+
+Uso: python -m benchmarks.json_compresion --multas 20000
+"""
+import argparse
+import json
+import time
+from io import StringIO
+
+from . import entorno_de_prueba
+
+URLS = ('/api/multas/', '/api/auth/usuarios/')
+
+
+def variantes(brotli_disponible):
+    yield 'json_estandar', {'API_JSON_RAPIDO': False}, ''
+    yield 'orjson', {'API_JSON_RAPIDO': True}, ''
+    yield 'orjson_gzip', {'API_JSON_RAPIDO': True}, 'gzip'
+    if brotli_disponible:
+        yield 'orjson_brotli', {'API_JSON_RAPIDO': True}, 'br'
+
+
+def medir(admin, url, ajustes, codificacion, repeticiones):
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    with override_settings(**ajustes):
+        cliente = APIClient()
+        cliente.force_authenticate(admin)
+        cliente.get(url, HTTP_ACCEPT_ENCODING=codificacion)
+        cpu, reloj = [], []
+        for _ in range(repeticiones):
+            inicio_cpu, inicio = time.process_time(), time.perf_counter()
+            response = cliente.get(url, HTTP_ACCEPT_ENCODING=codificacion)
+            cpu.append(time.process_time() - inicio_cpu)
+            reloj.append(time.perf_counter() - inicio)
+    return response, min(cpu), min(reloj)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--multas', type=int, default=20000)
+    parser.add_argument('--residentes', type=int, default=5000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    with entorno_de_prueba():
+        from django.core.management import call_command
+        from api.middleware import brotli
+        from usuarios.models import Usuario
+
+        call_command(
+            'sembrar_datos', residentes=args.residentes, multas=args.multas,
+            sin_busqueda=True, stdout=StringIO(),
+        )
+        admin = Usuario.objects.get(username='sint_admin')
+        resultado = {}
+        for url in URLS:
+            tamanio_json = None
+            resultado[url] = {}
+            for nombre, ajustes, codificacion in variantes(brotli is not None):
+                response, cpu, reloj = medir(admin, url, ajustes, codificacion, args.repeticiones)
+                if tamanio_json is None:
+                    tamanio_json = len(response.content)
+                resultado[url][nombre] = {
+                    'bytes_enviados': len(response.content),
+                    'cpu_ms': round(cpu * 1000, 1),
+                    'reloj_ms': round(reloj * 1000, 1),
+                    'mb_json_por_s_cpu': round(tamanio_json / cpu / 1e6, 1),
+                }
+    print(json.dumps({'multas': args.multas, 'residentes': args.residentes, 'rutas': resultado}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Mide el login bajo carga y su efecto sobre la latencia de otro endpoint.
+
+Atiende la aplicación en un servidor WSGI con hilos y, para cada modo de
+verificación de contraseñas (en el hilo de la petición y en el pool de
+procesos), mide la latencia de ``/api/auth/usuarios/mi-perfil/`` en reposo
+y mientras varios clientes hacen login sin pausa.
+
+Uso: python -m benchmarks.login --clientes-login 16 --clientes-lectura 4 --duracion 10
+"""
+import argparse
+import json
+import os
+
+from . import carga, entorno_de_prueba, percentil, servidor_wsgi
+
+
+def resumen(latencias, estados, duracion):
+    return {
+        'peticiones': len(latencias),
+        'por_segundo': round(len(latencias) / duracion, 1),
+        'p50_ms': round(percentil(latencias, 50) * 1000, 1) if latencias else None,
+        'p99_ms': round(percentil(latencias, 99) * 1000, 1) if latencias else None,
+        'estados': {str(s): estados.count(s) for s in sorted(set(estados))},
+    }
+
+
+def medir(base, token, args):
+    perfil = f'{base}/api/auth/usuarios/mi-perfil/'
+    login = f'{base}/api/auth/login/'
+    credenciales = {'username': 'residente', 'password': 'Clave-Bench-123'}
+
+    hilos, latencias, estados = carga(perfil, args.duracion, args.clientes_lectura, token=token)
+    for hilo in hilos:
+        hilo.join()
+    reposo = resumen(latencias, estados, args.duracion)
+
+    hilos_login, lat_login, est_login = carga(
+        login, args.duracion, args.clientes_login, metodo='POST', datos=credenciales
+    )
+    hilos, latencias, estados = carga(perfil, args.duracion, args.clientes_lectura, token=token)
+    for hilo in hilos + hilos_login:
+        hilo.join()
+
+    exitosos = est_login.count(200)
+    return {
+        'perfil_en_reposo': reposo,
+        'perfil_durante_logins': resumen(latencias, estados, args.duracion),
+        'login': dict(resumen(lat_login, est_login, args.duracion),
+                      exitosos_por_segundo=round(exitosos / args.duracion, 1)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clientes-login', type=int, default=16)
+    parser.add_argument('--clientes-lectura', type=int, default=4)
+    parser.add_argument('--duracion', type=float, default=10)
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1,
+                        help='Procesos del pool de hashing en el modo pool.')
+    args = parser.parse_args()
+
+    with entorno_de_prueba():
+        from django.test.utils import override_settings
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        from usuarios.hashing import reiniciar_ejecutor
+        from usuarios.models import Usuario
+
+        residente = Usuario.objects.create_user(
+            username='residente', password='Clave-Bench-123', rol='residente'
+        )
+        token = str(RefreshToken.for_user(residente).access_token)
+
+        resultados = {}
+        with servidor_wsgi() as base:
+            for modo, procesos in (('en_hilo', 0), ('pool', args.procesos)):
+                with override_settings(USUARIOS_HASH_PROCESOS=procesos):
+                    reiniciar_ejecutor()
+                    resultados[modo] = medir(base, token, args)
+            reiniciar_ejecutor()
+
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Mide el prorrateo de gastos comunes de un edificio grande y lo compara con
+la implementación de referencia unidad por unidad.
+
+Crea un edificio con ``--unidades`` unidades de alícuotas y superficies
+aleatorias, un periodo anterior emitido con pagos parciales (para que haya
+saldos que arrastrar) y un periodo nuevo con gastos de los tres tipos.
+Verifica que ambos cálculos coincidan en cada unidad.
+
+Uso: python -m benchmarks.prorrateo --unidades 10000
+"""
+import argparse
+import json
+import random
+import sys
+from datetime import date
+from decimal import Decimal
+
+from . import cronometro, entorno_de_prueba
+
+
+def crear_edificio(unidades, semilla):
+    from gasto_comun.models import Edificio, ItemGasto, PeriodoGasto, Unidad
+    from gasto_comun.prorrateo import prorratear
+
+    aleatorio = random.Random(semilla)
+    edificio = Edificio.objects.create(nombre='Edificio de prueba')
+    Unidad.objects.bulk_create([
+        Unidad(
+            edificio=edificio,
+            numero=f'{i:05d}',
+            alicuota=Decimal(aleatorio.randint(50_000, 400_000)) / 10 ** 8,
+            metros_cuadrados=Decimal(aleatorio.randint(3_000, 15_000)) / 100,
+        )
+        for i in range(unidades)
+    ], batch_size=2000)
+
+    def periodo(mes):
+        periodo = PeriodoGasto.objects.create(edificio=edificio, mes=mes)
+        ItemGasto.objects.bulk_create([
+            ItemGasto(periodo=periodo, descripcion='Remuneraciones', tipo='alicuota', monto=Decimal('48250317')),
+            ItemGasto(periodo=periodo, descripcion='Consumo eléctrico', tipo='alicuota', monto=Decimal('9311872.55')),
+            ItemGasto(periodo=periodo, descripcion='Fondo de reserva', tipo='fijo', monto=Decimal('2500')),
+            ItemGasto(periodo=periodo, descripcion='Calefacción', tipo='m2', monto=Decimal('312.75')),
+        ])
+        return periodo
+
+    anterior = periodo(date(2025, 1, 1))
+    prorratear(anterior)
+    # Pagos parciales en el periodo anterior
+    from gasto_comun.models import CobroGastoComun
+    cobros = list(CobroGastoComun.objects.filter(periodo=anterior))
+    for cobro in cobros:
+        cobro.monto_pagado = cobro.total_a_pagar * aleatorio.choice((0, 0, 1, 1, 1, Decimal('0.5')))
+        cobro.monto_pagado = cobro.monto_pagado.quantize(Decimal('1'))
+    CobroGastoComun.objects.bulk_update(cobros, ['monto_pagado'], batch_size=2000)
+    return periodo(date(2025, 2, 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--unidades', type=int, default=10000)
+    parser.add_argument('--semilla', type=int, default=7)
+    args = parser.parse_args()
+
+    with entorno_de_prueba():
+        from gasto_comun.models import CobroGastoComun
+        from gasto_comun.prorrateo import calcular_referencia, prorratear
+
+        periodo = crear_edificio(args.unidades, args.semilla)
+        tiempos = {}
+        with cronometro(tiempos, 'columnas_con_bulk_create'):
+            prorratear(periodo)
+        with cronometro(tiempos, 'referencia_por_unidad_sin_guardar'):
+            referencia = calcular_referencia(periodo)
+
+        campos = list(next(iter(referencia.values())))
+        calculado = {
+            fila[0]: dict(zip(campos, map(int, fila[1:])))
+            for fila in CobroGastoComun.objects.filter(periodo=periodo).values_list('unidad_id', *campos)
+        }
+        diferencias = [pk for pk in referencia if referencia[pk] != calculado.get(pk)]
+
+    print(json.dumps({
+        'unidades': args.unidades,
+        'segundos': {clave: round(valor, 3) for clave, valor in tiempos.items()},
+        'aceleracion': round(tiempos['referencia_por_unidad_sin_guardar'] / tiempos['columnas_con_bulk_create'], 1),
+        'unidades_distintas': len(diferencias),
+    }, indent=2))
+    if diferencias:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Compara la serialización de la lista de multas con ``MultaSerializer`` y
+con ``PlanLista`` (tuplas de ``values_list`` y conversores precompilados).
+
+Para cada tamaño de ``--filas`` siembra las multas con ``sembrar_datos`` y
+mide la petición completa ``GET /api/multas/`` como administrador con
+cada camino, verificando que las respuestas sean idénticas byte a byte.
+Informa el tiempo total de la petición y el de serialización (de la
+cabecera ``Server-Timing``).
+
+Uso: python -m benchmarks.serializacion --filas 10000 100000
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from io import StringIO
+from unittest import mock
+
+from . import entorno_de_prueba
+
+
+def medir(cliente, url, repeticiones):
+    tiempos, serializacion = [], []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        response = cliente.get(url)
+        tiempos.append(time.perf_counter() - inicio)
+        serializacion.append(float(re.search(r'serializer;dur=([\d.]+)', response['Server-Timing']).group(1)))
+    return {'total_s': round(min(tiempos), 3), 'serializacion_ms': min(serializacion)}, response.content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    with entorno_de_prueba():
+        from django.core.management import call_command
+        from rest_framework.test import APIClient
+        from multas.models import Multa
+        from multas.views import MultaViewSet
+        from usuarios.models import Usuario
+
+        resultados = []
+        distintas = False
+        for filas in args.filas:
+            Multa.objects.all().delete()
+            Usuario.objects.all().delete()
+            call_command('sembrar_datos', residentes=1000, multas=filas, sin_busqueda=True, stdout=StringIO())
+            cliente = APIClient()
+            cliente.force_authenticate(Usuario.objects.get(username='sint_admin'))
+
+            rapida, contenido_rapido = medir(cliente, '/api/multas/', args.repeticiones)
+            with mock.patch.object(MultaViewSet, 'lista_rapida', False):
+                serializer, contenido = medir(cliente, '/api/multas/', args.repeticiones)
+            distintas |= contenido != contenido_rapido
+            resultados.append({
+                'filas': filas,
+                'bytes': len(contenido),
+                'serializer': serializer,
+                'values_list': rapida,
+                'aceleracion_total': round(serializer['total_s'] / rapida['total_s'], 1),
+                'aceleracion_serializacion': round(
+                    serializer['serializacion_ms'] / rapida['serializacion_ms'], 1),
+                'identicas': contenido == contenido_rapido,
+            })
+    print(json.dumps(resultados, indent=2))
+    if distintas:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
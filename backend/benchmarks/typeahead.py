@@ -0,0 +1,89 @@
+"""
+Mide el autocompletado de residentes con muchos usuarios.
+
+Siembra ``--residentes`` residentes con ``sembrar_datos`` (sin multas) y
+simula a un administrador escribiendo consultas letra por letra. Cada
+pulsación ejecuta ``buscar_usuarios``; como comparación se ejecuta la misma
+búsqueda con ``icontains`` sobre las columnas, que recorre la tabla.
+
+Uso: python -m benchmarks.typeahead --residentes 20000
+"""
+import argparse
+import json
+import time
+from io import StringIO
+
+from . import cronometro, entorno_de_prueba, percentil
+
+CONSULTAS = ('sepulveda', 'maria gonz', 'e07-0123', 'sint_01234', 'jose mu', 'camila')
+
+
+def pulsaciones(consultas):
+    for consulta in consultas:
+        for fin in range(1, len(consulta) + 1):
+            if not consulta[fin - 1].isspace():
+                yield consulta[:fin]
+
+
+def buscar_con_icontains(texto, limite):
+    from django.db.models import Q
+    from usuarios.models import Usuario
+
+    queryset = Usuario.objects.filter(rol='residente', is_active=True)
+    for palabra in texto.split():
+        queryset = queryset.filter(
+            Q(first_name__icontains=palabra) | Q(last_name__icontains=palabra)
+            | Q(username__icontains=palabra) | Q(numero_residencia__icontains=palabra)
+        )
+    return list(queryset.order_by('last_name', 'id').values_list(
+        'id', 'first_name', 'last_name', 'numero_residencia')[:limite])
+
+
+def medir(funcion, textos, limite, repeticiones):
+    latencias = []
+    for _ in range(repeticiones):
+        for texto in textos:
+            inicio = time.perf_counter()
+            funcion(texto, limite)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+    return {
+        'p50_ms': round(percentil(latencias, 50), 3),
+        'p95_ms': round(percentil(latencias, 95), 3),
+        'max_ms': round(max(latencias), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--residentes', type=int, default=20000)
+    parser.add_argument('--limite', type=int, default=10)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    with entorno_de_prueba():
+        from django.core.management import call_command
+        from usuarios.busqueda import buscar_usuarios
+        from usuarios.models import TerminoBusquedaUsuario
+
+        tiempos = {}
+        with cronometro(tiempos, 'sembrar_e_indexar'):
+            call_command('sembrar_datos', residentes=args.residentes, multas=0, stdout=StringIO())
+
+        textos = list(pulsaciones(CONSULTAS))
+        # Calentamiento de la caché de páginas
+        for texto in textos:
+            buscar_usuarios(texto, args.limite)
+        resultado = {
+            'residentes': args.residentes,
+            'terminos': TerminoBusquedaUsuario.objects.count(),
+            'pulsaciones': len(textos),
+            'sembrar_e_indexar_s': round(tiempos['sembrar_e_indexar'], 2),
+            'indice_de_terminos': medir(buscar_usuarios, textos, args.limite, args.repeticiones),
+            'icontains': medir(buscar_con_icontains, textos, args.limite, 1),
+            'resultados_ejemplo': buscar_usuarios('maria gonz', 3),
+        }
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
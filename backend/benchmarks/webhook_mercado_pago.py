@@ -0,0 +1,110 @@
+"""
+Repite contra el webhook de Mercado Pago miles de notificaciones firmadas
+de un proveedor simulado, con reintentos duplicados y en desorden, y mide
+la recepción (respuestas por segundo y latencia) y el procesamiento en
+lotes (eventos por segundo). Verifica que se paguen exactamente las multas
+de los pagos aprobados.
+
+Como Mercado Pago, el cliente reintenta las respuestas que no son 200 (con
+SQLite en memoria, las escrituras concurrentes pueden fallar con "database
+table is locked").
+
+Uso: python -m benchmarks.webhook_mercado_pago --pagos 2000 --concurrencia 8
+"""
+import argparse
+import json
+import queue
+import threading
+from collections import Counter
+
+from . import cronometro, entorno_de_prueba, percentil, peticion, servidor_wsgi
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pagos', type=int, default=2000)
+    parser.add_argument('--duplicados', type=float, default=0.3)
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--lote', type=int, default=500)
+    args = parser.parse_args()
+
+    with entorno_de_prueba():
+        from django.test.utils import override_settings
+
+        with override_settings(MERCADO_PAGO_SECRETO_WEBHOOK='secreto-benchmark', METRICAS_SERVER_TIMING=False):
+            from mercado_pago.models import EventoWebhook
+            from mercado_pago.procesamiento import MetricasProcesamiento, procesar_lote
+            from mercado_pago.simulador import ProveedorFalso
+            from multas.models import Multa
+            from usuarios.models import Usuario
+
+            residente = Usuario.objects.create(username='residente', rol='residente')
+            Multa.objects.bulk_create([
+                Multa(usuario=residente, motivo='Ruidos molestos', monto=15000) for _ in range(args.pagos)
+            ], batch_size=1000)
+            proveedor = ProveedorFalso(semilla=3)
+            multas = list(Multa.objects.values_list('pk', 'monto'))
+            # Uno de cada diez pagos es rechazado
+            for i, (pk, monto) in enumerate(multas):
+                proveedor.pagar(pk, monto, estado='rejected' if i % 10 == 9 else 'approved')
+            aprobadas = {pk for i, (pk, _) in enumerate(multas) if i % 10 != 9}
+
+            entregas = proveedor.entregas(duplicados=args.duplicados)
+            cola = queue.Queue()
+            for entrega in entregas:
+                cola.put(entrega)
+            latencias = []
+            estados = []
+            lock = threading.Lock()
+            tiempos = {}
+
+            with servidor_wsgi() as base:
+                url = base + '/api/pagos/mercado-pago/webhook/'
+
+                def cliente():
+                    while True:
+                        try:
+                            cuerpo, cabeceras = cola.get_nowait()
+                        except queue.Empty:
+                            return
+                        status, segundos, _ = peticion(url, 'POST', json.loads(cuerpo), cabeceras=cabeceras)
+                        with lock:
+                            latencias.append(segundos)
+                            estados.append(status)
+                        if status != 200:
+                            # Mercado Pago reintenta las respuestas que no son 2xx
+                            cola.put(proveedor.firmar(json.loads(cuerpo)))
+
+                with cronometro(tiempos, 'recepcion'):
+                    hilos = [threading.Thread(target=cliente) for _ in range(args.concurrencia)]
+                    for hilo in hilos:
+                        hilo.start()
+                    for hilo in hilos:
+                        hilo.join()
+
+            metricas = MetricasProcesamiento()
+            with cronometro(tiempos, 'procesamiento'):
+                while procesar_lote(proveedor, args.lote, metricas):
+                    pass
+
+            pagadas = set(Multa.objects.filter(estado='pagado').values_list('pk', flat=True))
+            resultado = {
+                'notificaciones_enviadas': len(entregas),
+                'eventos_guardados': EventoWebhook.objects.count(),
+                'notificaciones_distintas': len(ProveedorFalso.notificaciones),
+                'respuestas_por_estado': dict(Counter(estados)),
+                'recepcion': {
+                    'segundos': round(tiempos['recepcion'], 3),
+                    'respuestas_por_segundo': round(len(estados) / tiempos['recepcion'], 1),
+                    'p50_ms': round(percentil(latencias, 50) * 1000, 2),
+                    'p99_ms': round(percentil(latencias, 99) * 1000, 2),
+                },
+                'procesamiento': metricas.como_dict(),
+                'multas_pagadas_correctas': pagadas == aprobadas,
+            }
+
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,39 @@
 from django.contrib import admin
+from .models import CobroGastoComun, Edificio, ItemGasto, PeriodoGasto, Unidad
 
 # Register your models here.
+
+@admin.register(Edificio)
+class EdificioAdmin(admin.ModelAdmin):
+    list_display = ('id', 'nombre', 'direccion')
+    search_fields = ('nombre',)
+
+
+@admin.register(Unidad)
+class UnidadAdmin(admin.ModelAdmin):
+    list_display = ('id', 'edificio', 'numero', 'residente', 'alicuota', 'metros_cuadrados')
+    list_filter = ('edificio',)
+    search_fields = ('numero', 'residente__username')
+    raw_id_fields = ('residente',)
+    list_per_page = 50
+
+
+class ItemGastoInline(admin.TabularInline):
+    model = ItemGasto
+    extra = 1
+
+
+@admin.register(PeriodoGasto)
+class PeriodoGastoAdmin(admin.ModelAdmin):
+    list_display = ('id', 'edificio', 'mes', 'estado', 'total_cobrado', 'diferencia_redondeo')
+    list_filter = ('edificio', 'estado')
+    readonly_fields = ('estado', 'fecha_emision', 'total_cobrado', 'diferencia_redondeo')
+    inlines = [ItemGastoInline]
+
+
+@admin.register(CobroGastoComun)
+class CobroGastoComunAdmin(admin.ModelAdmin):
+    list_display = ('id', 'periodo', 'unidad', 'total_periodo', 'total_a_pagar', 'monto_pagado')
+    list_filter = ('periodo__edificio', 'periodo__mes')
+    raw_id_fields = ('periodo', 'unidad')
+    list_per_page = 50
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:34
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Edificio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, verbose_name='Nombre')),
+                ('direccion', models.CharField(blank=True, max_length=255, verbose_name='Dirección')),
+            ],
+            options={
+                'verbose_name': 'Edificio',
+                'verbose_name_plural': 'Edificios',
+            },
+        ),
+        migrations.CreateModel(
+            name='PeriodoGasto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primer día del mes.', verbose_name='Mes')),
+                ('estado', models.CharField(choices=[('abierto', 'Abierto'), ('emitido', 'Emitido')], default='abierto', max_length=10, verbose_name='Estado')),
+                ('fecha_emision', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de emisión')),
+                ('total_cobrado', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='Total cobrado')),
+                ('diferencia_redondeo', models.DecimalField(decimal_places=0, default=0, help_text='Gastos por alícuota menos lo efectivamente prorrateado.', max_digits=10, verbose_name='Diferencia de redondeo')),
+                ('edificio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='periodos', to='gasto_comun.edificio', verbose_name='Edificio')),
+            ],
+            options={
+                'verbose_name': 'Periodo de gasto común',
+                'verbose_name_plural': 'Periodos de gasto común',
+                'ordering': ['-mes'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemGasto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('descripcion', models.CharField(max_length=255, verbose_name='Descripción')),
+                ('tipo', models.CharField(choices=[('alicuota', 'Prorrateado por alícuota'), ('fijo', 'Cargo fijo por unidad'), ('m2', 'Cargo por metro cuadrado')], default='alicuota', max_length=10, verbose_name='Tipo')),
+                ('monto', models.DecimalField(decimal_places=2, help_text='Total a prorratear, monto por unidad o tarifa por m² según el tipo.', max_digits=12, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Monto')),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='gasto_comun.periodogasto', verbose_name='Periodo')),
+            ],
+            options={
+                'verbose_name': 'Ítem de gasto',
+                'verbose_name_plural': 'Ítems de gasto',
+            },
+        ),
+        migrations.CreateModel(
+            name='Unidad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.CharField(max_length=20, verbose_name='Número')),
+                ('alicuota', models.DecimalField(decimal_places=8, help_text='Coeficiente de prorrateo; se normaliza por la suma del edificio.', max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Alícuota')),
+                ('metros_cuadrados', models.DecimalField(decimal_places=2, max_digits=8, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Metros cuadrados')),
+                ('edificio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unidades', to='gasto_comun.edificio', verbose_name='Edificio')),
+                ('residente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='unidades', to=settings.AUTH_USER_MODEL, verbose_name='Residente')),
+            ],
+            options={
+                'verbose_name': 'Unidad',
+                'verbose_name_plural': 'Unidades',
+            },
+        ),
+        migrations.CreateModel(
+            name='CobroGastoComun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('saldo_anterior', models.DecimalField(decimal_places=0, default=0, max_digits=12, verbose_name='Saldo anterior')),
+                ('cargo_alicuota', models.DecimalField(decimal_places=0, default=0, max_digits=12, verbose_name='Cargo por alícuota')),
+                ('cargo_fijo', models.DecimalField(decimal_places=0, default=0, max_digits=12, verbose_name='Cargo fijo')),
+                ('cargo_m2', models.DecimalField(decimal_places=0, default=0, max_digits=12, verbose_name='Cargo por m²')),
+                ('total_periodo', models.DecimalField(decimal_places=0, default=0, max_digits=12, verbose_name='Total del periodo')),
+                ('total_a_pagar', models.DecimalField(decimal_places=0, default=0, max_digits=12, verbose_name='Total a pagar')),
+                ('monto_pagado', models.DecimalField(decimal_places=0, default=0, max_digits=12, verbose_name='Monto pagado')),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cobros', to='gasto_comun.periodogasto', verbose_name='Periodo')),
+                ('unidad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cobros', to='gasto_comun.unidad', verbose_name='Unidad')),
+            ],
+            options={
+                'verbose_name': 'Cobro de gasto común',
+                'verbose_name_plural': 'Cobros de gasto común',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='periodogasto',
+            constraint=models.UniqueConstraint(fields=('edificio', 'mes'), name='periodo_edificio_mes_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='unidad',
+            constraint=models.UniqueConstraint(fields=('edificio', 'numero'), name='unidad_edificio_numero_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='cobrogastocomun',
+            index=models.Index(fields=['unidad', 'periodo'], name='cobro_unidad_periodo_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cobrogastocomun',
+            constraint=models.UniqueConstraint(fields=('periodo', 'unidad'), name='cobro_periodo_unidad_uniq'),
+        ),
+    ]
@@ -1,3 +1,183 @@
+from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils.translation import gettext_lazy as _
+from usuarios.models import Usuario
 
-# Create your models here.
+
+class Edificio(models.Model):
+    """
+    Edificio o condominio cuyas unidades comparten los gastos comunes.
+    """
+    nombre = models.CharField(max_length=100, verbose_name=_("Nombre"))
+    direccion = models.CharField(max_length=255, blank=True, verbose_name=_("Dirección"))
+
+    class Meta:
+        verbose_name = _("Edificio")
+        verbose_name_plural = _("Edificios")
+
+    def __str__(self):
+        return self.nombre
+
+
+class Unidad(models.Model):
+    """
+    Unidad (departamento, local, bodega) de un edificio, con su coeficiente
+    de prorrateo (alícuota) y su superficie.
+    """
+    edificio = models.ForeignKey(
+        Edificio,
+        on_delete=models.CASCADE,
+        related_name='unidades',
+        verbose_name=_("Edificio")
+    )
+    numero = models.CharField(max_length=20, verbose_name=_("Número"))
+    residente = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='unidades',
+        verbose_name=_("Residente")
+    )
+    alicuota = models.DecimalField(
+        max_digits=10,
+        decimal_places=8,
+        validators=[MinValueValidator(0)],
+        verbose_name=_("Alícuota"),
+        help_text=_("Coeficiente de prorrateo; se normaliza por la suma del edificio.")
+    )
+    metros_cuadrados = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        validators=[MinValueValidator(0)],
+        verbose_name=_("Metros cuadrados")
+    )
+
+    class Meta:
+        verbose_name = _("Unidad")
+        verbose_name_plural = _("Unidades")
+        constraints = [
+            models.UniqueConstraint(fields=['edificio', 'numero'], name='unidad_edificio_numero_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.edificio} - {self.numero}"
+
+
+class PeriodoGasto(models.Model):
+    """
+    Mes de gastos comunes de un edificio.
+    """
+    ESTADOS = (
+        ('abierto', 'Abierto'),
+        ('emitido', 'Emitido'),
+    )
+
+    edificio = models.ForeignKey(
+        Edificio,
+        on_delete=models.CASCADE,
+        related_name='periodos',
+        verbose_name=_("Edificio")
+    )
+    mes = models.DateField(verbose_name=_("Mes"), help_text=_("Primer día del mes."))
+    estado = models.CharField(max_length=10, choices=ESTADOS, default='abierto', verbose_name=_("Estado"))
+    fecha_emision = models.DateTimeField(null=True, blank=True, verbose_name=_("Fecha de emisión"))
+    total_cobrado = models.DecimalField(
+        max_digits=14, decimal_places=0, default=0, verbose_name=_("Total cobrado")
+    )
+    diferencia_redondeo = models.DecimalField(
+        max_digits=10, decimal_places=0, default=0,
+        verbose_name=_("Diferencia de redondeo"),
+        help_text=_("Gastos por alícuota menos lo efectivamente prorrateado.")
+    )
+
+    class Meta:
+        verbose_name = _("Periodo de gasto común")
+        verbose_name_plural = _("Periodos de gasto común")
+        ordering = ['-mes']
+        constraints = [
+            models.UniqueConstraint(fields=['edificio', 'mes'], name='periodo_edificio_mes_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.edificio} - {self.mes:%Y-%m}"
+
+
+class ItemGasto(models.Model):
+    """
+    Gasto del periodo y la forma en que se cobra a las unidades.
+    """
+    TIPOS = (
+        ('alicuota', 'Prorrateado por alícuota'),
+        ('fijo', 'Cargo fijo por unidad'),
+        ('m2', 'Cargo por metro cuadrado'),
+    )
+
+    periodo = models.ForeignKey(
+        PeriodoGasto,
+        on_delete=models.CASCADE,
+        related_name='items',
+        verbose_name=_("Periodo")
+    )
+    descripcion = models.CharField(max_length=255, verbose_name=_("Descripción"))
+    tipo = models.CharField(max_length=10, choices=TIPOS, default='alicuota', verbose_name=_("Tipo"))
+    monto = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        validators=[MinValueValidator(0)],
+        verbose_name=_("Monto"),
+        help_text=_("Total a prorratear, monto por unidad o tarifa por m² según el tipo.")
+    )
+
+    class Meta:
+        verbose_name = _("Ítem de gasto")
+        verbose_name_plural = _("Ítems de gasto")
+
+    def __str__(self):
+        return f"{self.descripcion} ({self.get_tipo_display()})"
+
+
+class CobroGastoComun(models.Model):
+    """
+    Cobro de gasto común de una unidad en un periodo.
+
+    ``saldo_anterior`` es lo que quedó pendiente (o a favor, si es negativo)
+    del periodo anterior de la misma unidad.
+    """
+    periodo = models.ForeignKey(
+        PeriodoGasto,
+        on_delete=models.CASCADE,
+        related_name='cobros',
+        verbose_name=_("Periodo")
+    )
+    unidad = models.ForeignKey(
+        Unidad,
+        on_delete=models.CASCADE,
+        related_name='cobros',
+        verbose_name=_("Unidad")
+    )
+    saldo_anterior = models.DecimalField(max_digits=12, decimal_places=0, default=0, verbose_name=_("Saldo anterior"))
+    cargo_alicuota = models.DecimalField(max_digits=12, decimal_places=0, default=0, verbose_name=_("Cargo por alícuota"))
+    cargo_fijo = models.DecimalField(max_digits=12, decimal_places=0, default=0, verbose_name=_("Cargo fijo"))
+    cargo_m2 = models.DecimalField(max_digits=12, decimal_places=0, default=0, verbose_name=_("Cargo por m²"))
+    total_periodo = models.DecimalField(max_digits=12, decimal_places=0, default=0, verbose_name=_("Total del periodo"))
+    total_a_pagar = models.DecimalField(max_digits=12, decimal_places=0, default=0, verbose_name=_("Total a pagar"))
+    monto_pagado = models.DecimalField(max_digits=12, decimal_places=0, default=0, verbose_name=_("Monto pagado"))
+
+    class Meta:
+        verbose_name = _("Cobro de gasto común")
+        verbose_name_plural = _("Cobros de gasto común")
+        constraints = [
+            models.UniqueConstraint(fields=['periodo', 'unidad'], name='cobro_periodo_unidad_uniq'),
+        ]
+        indexes = [
+            # Historial de cobros de una unidad
+            models.Index(fields=['unidad', 'periodo'], name='cobro_unidad_periodo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.unidad} - {self.periodo.mes:%Y-%m}"
+
+    @property
+    def saldo(self):
+        return self.total_a_pagar - self.monto_pagado
@@ -0,0 +1,215 @@
+"""
+Motor de prorrateo de gastos comunes.
+
+El cobro de cada unidad en un periodo se compone de:
+
+- ``cargo_alicuota``: el total de los ítems ``alicuota`` multiplicado por la
+  alícuota de la unidad, normalizada por la suma de alícuotas del edificio.
+- ``cargo_fijo``: la suma de los ítems ``fijo``, igual para todas.
+- ``cargo_m2``: la suma de las tarifas ``m2`` por la superficie de la unidad.
+- ``saldo_anterior``: lo que quedó sin pagar (o a favor) en el periodo
+  emitido anterior del edificio.
+
+Cada cargo se redondea al peso con redondeo "mitad hacia arriba". La
+diferencia entre los gastos por alícuota y lo prorrateado queda registrada
+en el periodo.
+
+``prorratear`` calcula el edificio completo por columnas: carga todas las
+unidades con una consulta, calcula cada cargo como una operación sobre la
+columna completa y guarda los cobros con ``bulk_create``. Usa enteros
+escalados (alícuota x 10^8, m² y montos x 100), por lo que el resultado es
+exacto. ``calcular_referencia`` es la implementación unidad por unidad con
+``Decimal`` contra la que se verifica.
+"""
+from decimal import ROUND_HALF_UP, Decimal, localcontext
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import CobroGastoComun, ItemGasto, PeriodoGasto, Unidad
+
+ESCALA_ALICUOTA = 10 ** 8
+ESCALA_MONTO = 100
+ESCALA_M2 = 100
+
+
+class ErrorProrrateo(Exception):
+    pass
+
+
+def _entero(valor, escala):
+    return int(valor * escala)
+
+
+def _dividir_redondeando(numerador, denominador):
+    """
+    ``round(numerador / denominador)`` con redondeo mitad hacia arriba, para
+    enteros no negativos y sin pasar por punto flotante.
+    """
+    return (2 * numerador + denominador) // (2 * denominador)
+
+
+def totales_items(periodo):
+    """
+    Devuelve la suma de los ítems del periodo por tipo, en centavos.
+    """
+    totales = ItemGasto.objects.filter(periodo=periodo).aggregate(**{
+        tipo: Sum('monto', filter=Q(tipo=tipo)) for tipo, _ in ItemGasto.TIPOS
+    })
+    return {tipo: _entero(total or 0, ESCALA_MONTO) for tipo, total in totales.items()}
+
+
+def cargar_unidades(edificio_id):
+    """
+    Columnas de las unidades del edificio: ids, alícuotas y m² escalados.
+    """
+    filas = list(
+        Unidad.objects.filter(edificio_id=edificio_id)
+        .order_by('id')
+        .values_list('id', 'alicuota', 'metros_cuadrados')
+    )
+    return {
+        'ids': [fila[0] for fila in filas],
+        'alicuotas': [_entero(fila[1], ESCALA_ALICUOTA) for fila in filas],
+        'metros': [_entero(fila[2], ESCALA_M2) for fila in filas],
+    }
+
+
+def periodo_anterior(periodo):
+    return (
+        PeriodoGasto.objects
+        .filter(edificio_id=periodo.edificio_id, mes__lt=periodo.mes, estado='emitido')
+        .order_by('-mes')
+        .first()
+    )
+
+
+def saldos_anteriores(periodo):
+    """
+    Saldo de cada unidad en el periodo emitido anterior: ``{unidad_id: saldo}``.
+    """
+    anterior = periodo_anterior(periodo)
+    if anterior is None:
+        return {}
+    return dict(
+        CobroGastoComun.objects.filter(periodo=anterior)
+        .annotate(saldo=F('total_a_pagar') - F('monto_pagado'))
+        .values_list('unidad_id', 'saldo')
+    )
+
+
+def calcular(columnas, totales, saldos):
+    """
+    Calcula los cobros de todas las unidades a la vez.
+
+    Devuelve un diccionario de columnas alineadas con ``columnas['ids']``
+    y la diferencia de redondeo del prorrateo por alícuota.
+    """
+    ids = columnas['ids']
+    alicuotas = columnas['alicuotas']
+    suma_alicuotas = sum(alicuotas)
+    total_alicuota = totales['alicuota']
+    if total_alicuota and not suma_alicuotas:
+        raise ErrorProrrateo('La suma de las alícuotas del edificio es cero.')
+
+    if total_alicuota:
+        denominador = suma_alicuotas * ESCALA_MONTO
+        cargo_alicuota = [
+            _dividir_redondeando(total_alicuota * alicuota, denominador) for alicuota in alicuotas
+        ]
+    else:
+        cargo_alicuota = [0] * len(ids)
+
+    tarifa_m2 = totales['m2']
+    divisor_m2 = ESCALA_MONTO * ESCALA_M2
+    cargo_m2 = [_dividir_redondeando(tarifa_m2 * metros, divisor_m2) for metros in columnas['metros']]
+
+    cargo_fijo = [_dividir_redondeando(totales['fijo'], ESCALA_MONTO)] * len(ids)
+    saldo_anterior = [int(saldos.get(unidad_id, 0)) for unidad_id in ids]
+
+    total_periodo = list(map(sum, zip(cargo_alicuota, cargo_fijo, cargo_m2)))
+    total_a_pagar = [saldo + total for saldo, total in zip(saldo_anterior, total_periodo)]
+
+    diferencia = _dividir_redondeando(total_alicuota, ESCALA_MONTO) - sum(cargo_alicuota)
+    return {
+        'unidad_id': ids,
+        'saldo_anterior': saldo_anterior,
+        'cargo_alicuota': cargo_alicuota,
+        'cargo_fijo': cargo_fijo,
+        'cargo_m2': cargo_m2,
+        'total_periodo': total_periodo,
+        'total_a_pagar': total_a_pagar,
+    }, diferencia
+
+
+def prorratear(periodo, batch_size=2000):
+    """
+    Calcula y guarda los cobros del periodo y lo marca como emitido.
+
+    Devuelve el número de cobros creados.
+    """
+    with transaction.atomic():
+        periodo = PeriodoGasto.objects.select_for_update().get(pk=periodo.pk)
+        if periodo.estado == 'emitido':
+            raise ErrorProrrateo('El periodo ya fue emitido.')
+
+        columnas, diferencia = calcular(
+            cargar_unidades(periodo.edificio_id),
+            totales_items(periodo),
+            saldos_anteriores(periodo),
+        )
+        campos = list(columnas)
+        cobros = (
+            CobroGastoComun(periodo_id=periodo.pk, **dict(zip(campos, fila)))
+            for fila in zip(*columnas.values())
+        )
+        creados = len(CobroGastoComun.objects.bulk_create(cobros, batch_size=batch_size))
+
+        periodo.estado = 'emitido'
+        periodo.fecha_emision = timezone.now()
+        periodo.total_cobrado = sum(columnas['total_periodo'])
+        periodo.diferencia_redondeo = diferencia
+        periodo.save(update_fields=['estado', 'fecha_emision', 'total_cobrado', 'diferencia_redondeo'])
+    return creados
+
+
+def calcular_referencia(periodo):
+    """
+    Implementación de referencia: recorre las unidades una por una con
+    aritmética ``Decimal``. Devuelve ``{unidad_id: {campo: valor}}``.
+    """
+    peso = Decimal('1')
+    items = list(ItemGasto.objects.filter(periodo=periodo))
+    total_alicuota = sum((i.monto for i in items if i.tipo == 'alicuota'), Decimal(0))
+    total_fijo = sum((i.monto for i in items if i.tipo == 'fijo'), Decimal(0))
+    tarifa_m2 = sum((i.monto for i in items if i.tipo == 'm2'), Decimal(0))
+
+    unidades = list(Unidad.objects.filter(edificio_id=periodo.edificio_id).order_by('id'))
+    suma_alicuotas = sum((u.alicuota for u in unidades), Decimal(0))
+    anterior = periodo_anterior(periodo)
+
+    resultado = {}
+    with localcontext() as contexto:
+        contexto.prec = 60
+        for unidad in unidades:
+            saldo = Decimal(0)
+            if anterior is not None:
+                cobro = CobroGastoComun.objects.filter(periodo=anterior, unidad=unidad).first()
+                if cobro is not None:
+                    saldo = cobro.saldo
+            cargo_alicuota = Decimal(0)
+            if total_alicuota:
+                cargo_alicuota = (total_alicuota * unidad.alicuota / suma_alicuotas).quantize(peso, ROUND_HALF_UP)
+            cargo_fijo = total_fijo.quantize(peso, ROUND_HALF_UP)
+            cargo_m2 = (tarifa_m2 * unidad.metros_cuadrados).quantize(peso, ROUND_HALF_UP)
+            total_periodo = cargo_alicuota + cargo_fijo + cargo_m2
+            resultado[unidad.pk] = {
+                'saldo_anterior': int(saldo),
+                'cargo_alicuota': int(cargo_alicuota),
+                'cargo_fijo': int(cargo_fijo),
+                'cargo_m2': int(cargo_m2),
+                'total_periodo': int(total_periodo),
+                'total_a_pagar': int(saldo + total_periodo),
+            }
+    return resultado
@@ -0,0 +1,57 @@
+from rest_framework import serializers
+from .models import CobroGastoComun, ItemGasto, PeriodoGasto
+
+
+class ItemGastoSerializer(serializers.ModelSerializer):
+    """
+    Serializer para los ítems de gasto de un periodo.
+    """
+    class Meta:
+        model = ItemGasto
+        fields = ['id', 'periodo', 'descripcion', 'tipo', 'monto']
+
+    def validate(self, attrs):
+        # Al editar se revisa el periodo actual del ítem (un PATCH puede no
+        # traer ``periodo``) y también el de destino si se cambia
+        periodos = [attrs.get('periodo')]
+        if self.instance is not None:
+            periodos.append(self.instance.periodo)
+        if any(periodo is not None and periodo.estado == 'emitido' for periodo in periodos):
+            raise serializers.ValidationError("No se pueden modificar los gastos de un periodo emitido.")
+        return attrs
+
+
+class PeriodoGastoSerializer(serializers.ModelSerializer):
+    """
+    Serializer para los periodos de gasto común, con sus ítems.
+    """
+    items = ItemGastoSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = PeriodoGasto
+        fields = [
+            'id', 'edificio', 'mes', 'estado', 'fecha_emision',
+            'total_cobrado', 'diferencia_redondeo', 'items'
+        ]
+        read_only_fields = ['estado', 'fecha_emision', 'total_cobrado', 'diferencia_redondeo']
+
+    def validate_mes(self, value):
+        # Los periodos se identifican por el primer día del mes
+        return value.replace(day=1)
+
+
+class CobroGastoComunSerializer(serializers.ModelSerializer):
+    """
+    Serializer para los cobros de gasto común de cada unidad.
+    """
+    unidad_numero = serializers.CharField(source='unidad.numero', read_only=True)
+    mes = serializers.DateField(source='periodo.mes', read_only=True)
+    saldo = serializers.DecimalField(max_digits=12, decimal_places=0, read_only=True)
+
+    class Meta:
+        model = CobroGastoComun
+        fields = [
+            'id', 'periodo', 'mes', 'unidad', 'unidad_numero', 'saldo_anterior',
+            'cargo_alicuota', 'cargo_fijo', 'cargo_m2', 'total_periodo',
+            'total_a_pagar', 'monto_pagado', 'saldo'
+        ]
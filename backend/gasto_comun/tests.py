@@ -1,3 +1,183 @@
+from datetime import date
+from decimal import Decimal
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from usuarios.models import Usuario
+from .models import CobroGastoComun, Edificio, ItemGasto, PeriodoGasto, Unidad
+from .prorrateo import ErrorProrrateo, calcular_referencia, prorratear
+
+
+class ProrrateoTestCase(TestCase):
+    """
+    Base con un edificio de tres unidades de igual alícuota.
+    """
+    def setUp(self):
+        self.residente = Usuario.objects.create_user(
+            username='residente', password='residente123', rol='residente'
+        )
+        self.edificio = Edificio.objects.create(nombre='Torre A')
+        self.unidades = [
+            Unidad.objects.create(edificio=self.edificio, numero='101', alicuota=Decimal('1'),
+                                  metros_cuadrados=Decimal('50'), residente=self.residente),
+            Unidad.objects.create(edificio=self.edificio, numero='102', alicuota=Decimal('1'),
+                                  metros_cuadrados=Decimal('70.25')),
+            Unidad.objects.create(edificio=self.edificio, numero='103', alicuota=Decimal('1'),
+                                  metros_cuadrados=Decimal('100')),
+        ]
+
+    def crear_periodo(self, mes, alicuota='1000', fijo='500', m2='10.50'):
+        periodo = PeriodoGasto.objects.create(edificio=self.edificio, mes=mes)
+        ItemGasto.objects.create(periodo=periodo, descripcion='Aseo', tipo='alicuota', monto=Decimal(alicuota))
+        ItemGasto.objects.create(periodo=periodo, descripcion='Reserva', tipo='fijo', monto=Decimal(fijo))
+        ItemGasto.objects.create(periodo=periodo, descripcion='Agua caliente', tipo='m2', monto=Decimal(m2))
+        return periodo
+
+    def cobros(self, periodo):
+        return {
+            cobro.unidad.numero: cobro
+            for cobro in CobroGastoComun.objects.filter(periodo=periodo).select_related('unidad')
+        }
+
+
+class ProrrateoTests(ProrrateoTestCase):
+
+    def test_calcula_cargos_y_diferencia_de_redondeo(self):
+        periodo = self.crear_periodo(date(2025, 1, 1))
+        self.assertEqual(prorratear(periodo), 3)
+
+        cobros = self.cobros(periodo)
+        self.assertEqual([cobros[n].cargo_alicuota for n in ('101', '102', '103')], [333, 333, 333])
+        self.assertEqual([cobros[n].cargo_m2 for n in ('101', '102', '103')], [525, 738, 1050])
+        self.assertEqual(cobros['102'].cargo_fijo, 500)
+        self.assertEqual(cobros['102'].total_a_pagar, 333 + 500 + 738)
+
+        periodo.refresh_from_db()
+        self.assertEqual(periodo.estado, 'emitido')
+        self.assertIsNotNone(periodo.fecha_emision)
+        self.assertEqual(periodo.diferencia_redondeo, 1)
+        self.assertEqual(periodo.total_cobrado, 999 + 1500 + 525 + 738 + 1050)
+
+    def test_arrastra_saldo_del_periodo_anterior(self):
+        enero = self.crear_periodo(date(2025, 1, 1))
+        prorratear(enero)
+        CobroGastoComun.objects.filter(periodo=enero, unidad=self.unidades[0]).update(monto_pagado=358)
+        CobroGastoComun.objects.filter(periodo=enero, unidad=self.unidades[1]).update(monto_pagado=2000)
+
+        febrero = self.crear_periodo(date(2025, 2, 1))
+        prorratear(febrero)
+        cobros = self.cobros(febrero)
+        self.assertEqual(cobros['101'].saldo_anterior, 1000)
+        self.assertEqual(cobros['102'].saldo_anterior, -429)
+        self.assertEqual(cobros['103'].saldo_anterior, 333 + 500 + 1050)
+        self.assertEqual(cobros['101'].total_a_pagar, 1000 + cobros['101'].total_periodo)
+
+    def test_coincide_con_la_referencia(self):
+        Unidad.objects.filter(pk=self.unidades[0].pk).update(alicuota=Decimal('0.12345678'))
+        Unidad.objects.filter(pk=self.unidades[1].pk).update(alicuota=Decimal('0.00000001'))
+        enero = self.crear_periodo(date(2025, 1, 1), alicuota='9999999.99', m2='0.05')
+        prorratear(enero)
+        CobroGastoComun.objects.filter(periodo=enero, unidad=self.unidades[2]).update(monto_pagado=17)
+        febrero = self.crear_periodo(date(2025, 2, 1), alicuota='123456.78', fijo='0.50', m2='3.33')
+
+        referencia = calcular_referencia(febrero)
+        prorratear(febrero)
+        for numero, cobro in self.cobros(febrero).items():
+            with self.subTest(unidad=numero):
+                self.assertEqual(referencia[cobro.unidad_id], {
+                    campo: int(getattr(cobro, campo)) for campo in referencia[cobro.unidad_id]
+                })
+
+    def test_no_emite_dos_veces(self):
+        periodo = self.crear_periodo(date(2025, 1, 1))
+        prorratear(periodo)
+        with self.assertRaises(ErrorProrrateo):
+            prorratear(periodo)
+        self.assertEqual(CobroGastoComun.objects.filter(periodo=periodo).count(), 3)
+
+    def test_alicuotas_en_cero(self):
+        Unidad.objects.update(alicuota=0)
+        periodo = self.crear_periodo(date(2025, 1, 1))
+        with self.assertRaises(ErrorProrrateo):
+            prorratear(periodo)
+        periodo.refresh_from_db()
+        self.assertEqual(periodo.estado, 'abierto')
+
+
+class GastoComunAPITests(ProrrateoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = Usuario.objects.create_user(username='admin', password='admin123', rol='admin')
+        self.client = APIClient()
+
+    def test_emitir(self):
+        periodo = self.crear_periodo(date(2025, 1, 1))
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(f'/api/gastos/periodos/{periodo.pk}/emitir/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['cobros'], 3)
+        self.assertEqual(response.data['periodo']['estado'], 'emitido')
+
+        response = self.client.post(f'/api/gastos/periodos/{periodo.pk}/emitir/')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/gastos/items/', {
+            'periodo': periodo.pk, 'descripcion': 'Extra', 'tipo': 'fijo', 'monto': '10',
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_items_de_periodo_emitido_son_inmutables(self):
+        enero = self.crear_periodo(date(2025, 1, 1))
+        febrero = self.crear_periodo(date(2025, 2, 1))
+        item_enero = enero.items.get(tipo='fijo')
+        item_febrero = febrero.items.get(tipo='fijo')
+        prorratear(enero)
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.patch(f'/api/gastos/items/{item_enero.pk}/', {'monto': '1'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(f'/api/gastos/items/{item_enero.pk}/', {'periodo': febrero.pk})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(f'/api/gastos/items/{item_febrero.pk}/', {'periodo': enero.pk})
+        self.assertEqual(response.status_code, 400)
+        item_enero.refresh_from_db()
+        self.assertEqual((item_enero.periodo_id, item_enero.monto), (enero.pk, Decimal('500')))
+
+        response = self.client.patch(f'/api/gastos/items/{item_febrero.pk}/', {'monto': '600'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_periodo_emitido_es_inmutable(self):
+        enero = self.crear_periodo(date(2025, 1, 1))
+        prorratear(enero)
+        self.client.force_authenticate(self.admin)
+        url = f'/api/gastos/periodos/{enero.pk}/'
+
+        for cambio in ({'mes': '2025-03-01'}, {'edificio': Edificio.objects.create(nombre='Otro').pk}):
+            response = self.client.patch(url, cambio)
+            self.assertEqual(response.status_code, 400, cambio)
+        response = self.client.put(url, {'edificio': self.edificio.pk, 'mes': '2025-04-01'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.delete(url).status_code, 400)
+
+        enero.refresh_from_db()
+        self.assertEqual((enero.mes, enero.edificio_id), (date(2025, 1, 1), self.edificio.pk))
+        self.assertEqual(CobroGastoComun.objects.filter(periodo=enero).count(), 3)
+
+        febrero = self.crear_periodo(date(2025, 2, 1))
+        response = self.client.patch(f'/api/gastos/periodos/{febrero.pk}/', {'mes': '2025-03-15'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['mes'], '2025-03-01')
+        self.assertEqual(self.client.delete(f'/api/gastos/periodos/{febrero.pk}/').status_code, 204)
+
+    def test_residente_solo_ve_sus_cobros(self):
+        prorratear(self.crear_periodo(date(2025, 1, 1)))
+        self.client.force_authenticate(self.residente)
+        response = self.client.get('/api/gastos/cobros/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([cobro['unidad'] for cobro in response.data], [self.unidades[0].pk])
 
-# Create your tests here.
+        periodo = PeriodoGasto.objects.get()
+        response = self.client.post(f'/api/gastos/periodos/{periodo.pk}/emitir/')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,12 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import CobroGastoComunViewSet, ItemGastoViewSet, PeriodoGastoViewSet
+
+router = DefaultRouter()
+router.register(r'periodos', PeriodoGastoViewSet)
+router.register(r'items', ItemGastoViewSet)
+router.register(r'cobros', CobroGastoComunViewSet, basename='cobrogastocomun')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
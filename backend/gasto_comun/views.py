@@ -1,3 +1,89 @@
-from django.shortcuts import render
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from django.db import transaction
+from django_filters.rest_framework import DjangoFilterBackend
+from usuarios.views import IsAdminUser
+from .models import CobroGastoComun, ItemGasto, PeriodoGasto
+from .prorrateo import ErrorProrrateo, prorratear
+from .serializers import CobroGastoComunSerializer, ItemGastoSerializer, PeriodoGastoSerializer
 
-# Create your views here.
+
+class PeriodoGastoViewSet(viewsets.ModelViewSet):
+    """
+    API endpoint para gestionar los periodos de gasto común (administradores).
+    """
+    queryset = PeriodoGasto.objects.prefetch_related('items')
+    serializer_class = PeriodoGastoSerializer
+    permission_classes = [IsAdminUser]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['edificio', 'estado']
+
+    def verificar_abierto(self, periodo):
+        """
+        Bloquea el periodo (como ``prorratear``) y rechaza el cambio si ya fue
+        emitido: sus cobros dependen del edificio, el mes y los ítems.
+        """
+        estado = PeriodoGasto.objects.select_for_update().values_list('estado', flat=True).get(pk=periodo.pk)
+        if estado == 'emitido':
+            raise ValidationError("No se puede modificar ni eliminar un periodo emitido.")
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            self.verificar_abierto(serializer.instance)
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            self.verificar_abierto(instance)
+            instance.delete()
+
+    @action(detail=True, methods=['post'])
+    def emitir(self, request, pk=None):
+        """
+        Calcula y guarda el cobro de cada unidad del edificio para el periodo.
+        """
+        periodo = self.get_object()
+        try:
+            creados = prorratear(periodo)
+        except ErrorProrrateo as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        periodo.refresh_from_db()
+        return Response({
+            'cobros': creados,
+            'periodo': self.get_serializer(periodo).data,
+        })
+
+
+class ItemGastoViewSet(viewsets.ModelViewSet):
+    """
+    API endpoint para gestionar los ítems de gasto (administradores).
+    """
+    queryset = ItemGasto.objects.all()
+    serializer_class = ItemGastoSerializer
+    permission_classes = [IsAdminUser]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['periodo', 'tipo']
+
+    def perform_destroy(self, instance):
+        if instance.periodo.estado == 'emitido':
+            raise ValidationError("No se pueden modificar los gastos de un periodo emitido.")
+        instance.delete()
+
+
+class CobroGastoComunViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint para consultar cobros de gasto común.
+    Los residentes solo ven los cobros de sus unidades.
+    """
+    serializer_class = CobroGastoComunSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['periodo', 'unidad']
+
+    def get_queryset(self):
+        queryset = CobroGastoComun.objects.select_related('unidad', 'periodo').order_by('-periodo__mes', 'unidad_id')
+        if self.request.user.es_admin:
+            return queryset
+        return queryset.filter(unidad__residente=self.request.user)
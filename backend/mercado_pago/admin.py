@@ -1,3 +1,20 @@
 from django.contrib import admin
+from .models import EventoWebhook, PagoMercadoPago
 
 # Register your models here.
+
+@admin.register(EventoWebhook)
+class EventoWebhookAdmin(admin.ModelAdmin):
+    list_display = ('id', 'clave', 'tipo', 'accion', 'recurso_id', 'estado', 'intentos', 'recibido_en')
+    list_filter = ('estado', 'tipo')
+    search_fields = ('clave', 'recurso_id')
+    readonly_fields = ('recibido_en', 'procesado_en')
+    list_per_page = 50
+
+
+@admin.register(PagoMercadoPago)
+class PagoMercadoPagoAdmin(admin.ModelAdmin):
+    list_display = ('pago_id', 'referencia_externa', 'estado', 'monto', 'fecha_actualizacion')
+    list_filter = ('estado',)
+    search_fields = ('pago_id', 'referencia_externa')
+    list_per_page = 50
@@ -0,0 +1,50 @@
+"""
+Consulta de pagos a la API de Mercado Pago.
+
+Las notificaciones solo traen el id del pago; su estado, monto y referencia
+externa (el id de la multa) se consultan a la API. El cliente se elige con
+``MERCADO_PAGO_CLIENTE`` (ruta a la clase), lo que permite reemplazarlo por
+``simulador.ProveedorFalso`` en pruebas y benchmarks.
+"""
+import json
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class ClienteMercadoPago:
+    URL_PAGO = 'https://api.mercadopago.com/v1/payments/{}'
+
+    def __init__(self, token=None, timeout=10, hilos=8):
+        self.token = token or getattr(settings, 'MERCADO_PAGO_ACCESS_TOKEN', '')
+        self.timeout = timeout
+        self.hilos = hilos
+
+    def obtener_pago(self, pago_id):
+        request = urllib.request.Request(self.URL_PAGO.format(pago_id))
+        request.add_header('Authorization', f'Bearer {self.token}')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as respuesta:
+                return json.load(respuesta)
+        except urllib.error.HTTPError as error:
+            if error.code == 404:
+                return None
+            raise
+
+    def obtener_pagos(self, ids):
+        """
+        Devuelve ``{pago_id: pago}`` con los pagos que existen. Las consultas
+        se hacen en paralelo; cualquier error distinto de 404 se propaga.
+        """
+        ids = list(ids)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.hilos, len(ids)))) as ejecutor:
+            pagos = ejecutor.map(self.obtener_pago, ids)
+            return {pago_id: pago for pago_id, pago in zip(ids, pagos) if pago is not None}
+
+
+def obtener_cliente():
+    ruta = getattr(settings, 'MERCADO_PAGO_CLIENTE', 'mercado_pago.cliente.ClienteMercadoPago')
+    return import_string(ruta)()
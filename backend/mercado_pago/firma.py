@@ -0,0 +1,71 @@
+"""
+Firma de las notificaciones de Mercado Pago.
+
+Mercado Pago envía la cabecera ``x-signature: ts=<marca>,v1=<hmac>``, donde
+``v1`` es el HMAC-SHA256 en hexadecimal, con la clave secreta del webhook,
+del manifiesto ``id:<data.id>;request-id:<x-request-id>;ts:<marca>;``. La
+marca es la hora del envío en milisegundos; una firma con una marca muy
+lejana a la hora actual se rechaza, para que no se pueda reenviar una
+notificación capturada.
+"""
+import hashlib
+import hmac
+import time
+
+
+def manifiesto(recurso_id, request_id, ts):
+    partes = []
+    if recurso_id:
+        # Mercado Pago firma los ids alfanuméricos en minúsculas
+        partes.append(f'id:{str(recurso_id).lower()};')
+    if request_id:
+        partes.append(f'request-id:{request_id};')
+    partes.append(f'ts:{ts};')
+    return ''.join(partes)
+
+
+def firmar(secreto, recurso_id, request_id, ts):
+    """
+    Valor de la cabecera ``x-signature`` para una notificación.
+    """
+    firma = hmac.new(
+        secreto.encode(), manifiesto(recurso_id, request_id, ts).encode(), hashlib.sha256
+    ).hexdigest()
+    return f'ts={ts},v1={firma}'
+
+
+def marca_en_segundos(ts):
+    """
+    Marca ``ts`` de la firma en segundos, o ``None`` si no es un número.
+    Se aceptan también marcas en segundos (hasta 10 dígitos).
+    """
+    try:
+        valor = int(ts)
+    except ValueError:
+        return None
+    return valor / 1000 if valor >= 10 ** 11 else valor
+
+
+def verificar(secreto, cabecera, recurso_id, request_id, tolerancia=None, ahora=None):
+    """
+    ``True`` si la cabecera ``x-signature`` corresponde a la notificación.
+
+    Con ``tolerancia`` (segundos), la marca ``ts`` firmada no puede
+    diferir de ``ahora`` (por defecto la hora actual) en más que eso.
+    """
+    if not secreto or not cabecera:
+        return False
+    partes = dict(
+        parte.strip().split('=', 1) for parte in cabecera.split(',') if '=' in parte
+    )
+    ts = partes.get('ts')
+    recibida = partes.get('v1')
+    if not ts or not recibida:
+        return False
+    if tolerancia is not None:
+        marca = marca_en_segundos(ts)
+        ahora = time.time() if ahora is None else ahora
+        if marca is None or abs(ahora - marca) > tolerancia:
+            return False
+    esperada = firmar(secreto, recurso_id, request_id, ts).rsplit('v1=', 1)[1]
+    return hmac.compare_digest(esperada, recibida)
@@ -0,0 +1,51 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from mercado_pago.cliente import obtener_cliente
+from mercado_pago.procesamiento import MetricasProcesamiento, procesar_lote
+
+
+class Command(BaseCommand):
+    help = (
+        'Aplica en lotes las notificaciones de Mercado Pago recibidas por el '
+        'webhook y marca como pagadas las multas de los pagos aprobados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=500,
+            help='Eventos reclamados por lote.',
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=1.0,
+            help='Segundos de espera cuando no hay eventos pendientes.',
+        )
+        parser.add_argument(
+            '--reporte', type=float, default=60.0,
+            help='Segundos entre reportes de métricas.',
+        )
+        parser.add_argument(
+            '--una-vez', action='store_true',
+            help='Procesa los pendientes y termina en vez de quedar esperando.',
+        )
+
+    def handle(self, *args, **options):
+        cliente = obtener_cliente()
+        metricas = MetricasProcesamiento()
+        ultimo_reporte = time.monotonic()
+
+        try:
+            while True:
+                if not procesar_lote(cliente, options['lote'], metricas):
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                if time.monotonic() - ultimo_reporte >= options['reporte']:
+                    self.stderr.write(json.dumps(metricas.como_dict()))
+                    ultimo_reporte = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(json.dumps(metricas.como_dict())))
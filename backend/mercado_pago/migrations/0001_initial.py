@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PagoMercadoPago',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pago_id', models.CharField(max_length=50, unique=True, verbose_name='Id del pago')),
+                ('referencia_externa', models.CharField(blank=True, help_text='Id de la multa pagada, enviado al crear la preferencia de pago.', max_length=64, verbose_name='Referencia externa')),
+                ('estado', models.CharField(max_length=20, verbose_name='Estado')),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Monto')),
+                ('fecha_actualizacion', models.DateTimeField(verbose_name='Fecha de actualización')),
+            ],
+            options={
+                'verbose_name': 'Pago de Mercado Pago',
+                'verbose_name_plural': 'Pagos de Mercado Pago',
+            },
+        ),
+        migrations.CreateModel(
+            name='EventoWebhook',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=100, unique=True, verbose_name='Clave de idempotencia')),
+                ('tipo', models.CharField(blank=True, max_length=50, verbose_name='Tipo')),
+                ('accion', models.CharField(blank=True, max_length=50, verbose_name='Acción')),
+                ('recurso_id', models.CharField(blank=True, max_length=50, verbose_name='Id del recurso')),
+                ('cuerpo', models.TextField(verbose_name='Cuerpo')),
+                ('recibido_en', models.DateTimeField(auto_now_add=True, verbose_name='Recibido en')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesado', 'Procesado'), ('ignorado', 'Ignorado'), ('error', 'Error')], default='pendiente', max_length=10, verbose_name='Estado')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('disponible_en', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Disponible en')),
+                ('procesado_en', models.DateTimeField(blank=True, null=True, verbose_name='Procesado en')),
+                ('detalle', models.CharField(blank=True, max_length=255, verbose_name='Detalle')),
+            ],
+            options={
+                'verbose_name': 'Evento de webhook',
+                'verbose_name_plural': 'Eventos de webhook',
+                'indexes': [models.Index(fields=['estado', 'disponible_en', 'id'], name='webhook_pendiente_idx')],
+            },
+        ),
+    ]
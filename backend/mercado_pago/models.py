@@ -1,3 +1,68 @@
 from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+
+class EventoWebhook(models.Model):
+    """
+    Notificación de Mercado Pago tal como llegó al webhook.
+
+    ``clave`` es la clave de idempotencia: el id de la notificación, que
+    Mercado Pago repite en cada reintento. Un reintento no crea otra fila.
+    """
+    ESTADOS = (
+        ('pendiente', 'Pendiente'),
+        ('procesado', 'Procesado'),
+        ('ignorado', 'Ignorado'),
+        ('error', 'Error'),
+    )
+
+    clave = models.CharField(max_length=100, unique=True, verbose_name=_("Clave de idempotencia"))
+    tipo = models.CharField(max_length=50, blank=True, verbose_name=_("Tipo"))
+    accion = models.CharField(max_length=50, blank=True, verbose_name=_("Acción"))
+    recurso_id = models.CharField(max_length=50, blank=True, verbose_name=_("Id del recurso"))
+    cuerpo = models.TextField(verbose_name=_("Cuerpo"))
+    recibido_en = models.DateTimeField(auto_now_add=True, verbose_name=_("Recibido en"))
+    estado = models.CharField(max_length=10, choices=ESTADOS, default='pendiente', verbose_name=_("Estado"))
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name=_("Intentos"))
+    disponible_en = models.DateTimeField(default=timezone.now, verbose_name=_("Disponible en"))
+    procesado_en = models.DateTimeField(null=True, blank=True, verbose_name=_("Procesado en"))
+    detalle = models.CharField(max_length=255, blank=True, verbose_name=_("Detalle"))
+
+    class Meta:
+        verbose_name = _("Evento de webhook")
+        verbose_name_plural = _("Eventos de webhook")
+        indexes = [
+            # Eventos listos para procesar, en orden de llegada
+            models.Index(fields=['estado', 'disponible_en', 'id'], name='webhook_pendiente_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} {self.recurso_id} ({self.clave})"
+
+
+class PagoMercadoPago(models.Model):
+    """
+    Último estado conocido de un pago de Mercado Pago.
+
+    ``fecha_actualizacion`` es la fecha de última actualización informada por
+    Mercado Pago; un estado más antiguo que el guardado se descarta, así que
+    el orden en que lleguen las notificaciones no importa.
+    """
+    pago_id = models.CharField(max_length=50, unique=True, verbose_name=_("Id del pago"))
+    referencia_externa = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name=_("Referencia externa"),
+        help_text=_("Id de la multa pagada, enviado al crear la preferencia de pago.")
+    )
+    estado = models.CharField(max_length=20, verbose_name=_("Estado"))
+    monto = models.DecimalField(max_digits=12, decimal_places=2, verbose_name=_("Monto"))
+    fecha_actualizacion = models.DateTimeField(verbose_name=_("Fecha de actualización"))
+
+    class Meta:
+        verbose_name = _("Pago de Mercado Pago")
+        verbose_name_plural = _("Pagos de Mercado Pago")
+
+    def __str__(self):
+        return f"{self.pago_id} ({self.estado})"
@@ -0,0 +1,235 @@
+"""
+Aplicación en lotes de las notificaciones de Mercado Pago.
+
+Cada lote:
+
+1. Reclama eventos pendientes con ``SELECT ... FOR UPDATE SKIP LOCKED`` y
+   corre ``disponible_en`` como plazo de bloqueo (igual que la entrega de
+   notificaciones), así que pueden correr varios procesadores.
+2. Consulta una sola vez cada pago distinto del lote. Los reintentos de
+   Mercado Pago y las varias notificaciones de un mismo pago se resuelven
+   aquí.
+3. Guarda el último estado de cada pago, descartando estados más antiguos
+   que el guardado (notificaciones fuera de orden).
+4. Marca como pagadas, con un solo ``UPDATE`` condicional
+   (``multas.pagos.marcar_pagadas``), las multas de los pagos aprobados
+   cuyo monto cubre el de la multa.
+
+Si la consulta a Mercado Pago falla, los eventos del lote se reintentan con
+espera exponencial hasta ``MERCADO_PAGO_REINTENTOS`` intentos. Lo mismo
+ocurre solo con los eventos de un pago que llega mal formado (sin fecha de
+actualización, con una fecha ilegible...): el resto del lote se aplica. Un
+pago reembolsado después de aprobado queda registrado, pero no revierte la
+multa.
+"""
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from multas.models import Multa
+from multas.pagos import marcar_pagadas
+from .models import EventoWebhook, PagoMercadoPago
+
+
+def _ajuste(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+class MetricasProcesamiento:
+    """
+    Contadores acumulados de un procesador.
+    """
+    CAMPOS = ('lotes', 'eventos', 'pagos_consultados', 'multas_pagadas', 'ignorados', 'reintentos', 'errores')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        for campo in self.CAMPOS:
+            setattr(self, campo, 0)
+
+    def como_dict(self):
+        transcurrido = time.perf_counter() - self.inicio
+        datos = {campo: getattr(self, campo) for campo in self.CAMPOS}
+        datos['segundos'] = round(transcurrido, 3)
+        datos['eventos_por_segundo'] = round(self.eventos / transcurrido, 1) if transcurrido else 0.0
+        return datos
+
+
+def reclamar(lote):
+    ahora = timezone.now()
+    marca = ahora + timedelta(seconds=_ajuste('MERCADO_PAGO_BLOQUEO', 300))
+    with transaction.atomic():
+        ids = list(
+            EventoWebhook.objects
+            .filter(estado='pendiente', disponible_en__lte=ahora)
+            .order_by('disponible_en', 'id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:lote]
+        )
+        if not ids:
+            return []
+        EventoWebhook.objects.filter(
+            pk__in=ids, estado='pendiente', disponible_en__lte=ahora
+        ).update(disponible_en=marca, intentos=F('intentos') + 1)
+    return list(
+        EventoWebhook.objects
+        .filter(pk__in=ids, disponible_en=marca)
+        .only('tipo', 'recurso_id', 'intentos')
+        .order_by('id')
+    )
+
+
+def leer_pago(datos):
+    """
+    Campos de ``PagoMercadoPago`` de un pago de la API. Lanza
+    ``ValueError`` si falta alguno o está mal formado.
+    """
+    try:
+        fecha = parse_datetime(datos['date_last_updated'])
+        estado = str(datos['status'])
+        monto = Decimal(str(datos['transaction_amount']))
+    except (KeyError, TypeError, ValueError, ArithmeticError) as error:
+        raise ValueError(f'Pago mal formado: {error!r}') from error
+    if fecha is None or timezone.is_naive(fecha):
+        raise ValueError(f'Pago mal formado: fecha {datos["date_last_updated"]!r}')
+    if not monto.is_finite():
+        raise ValueError(f'Pago mal formado: monto {datos["transaction_amount"]!r}')
+    return {
+        'fecha_actualizacion': fecha,
+        'estado': estado,
+        'monto': monto,
+        'referencia_externa': str(datos.get('external_reference') or ''),
+    }
+
+
+def separar_pagos(pagos):
+    """
+    Separa ``pagos`` (``{pago_id: pago}`` de la API) en
+    ``({pago_id: campos}, {pago_id: error})`` según ``leer_pago``.
+    """
+    validos, invalidos = {}, {}
+    for pago_id, datos in pagos.items():
+        try:
+            validos[pago_id] = leer_pago(datos)
+        except ValueError as error:
+            invalidos[pago_id] = error
+    return validos, invalidos
+
+
+def actualizar_pagos(pagos):
+    """
+    Guarda el estado de ``pagos`` (``{pago_id: campos}`` de ``leer_pago``)
+    salvo que el guardado sea más reciente. Devuelve
+    ``{pago_id: PagoMercadoPago}`` con el estado vigente de cada uno.
+    """
+    existentes = {
+        pago.pago_id: pago
+        for pago in PagoMercadoPago.objects.select_for_update().filter(pago_id__in=list(pagos))
+    }
+    nuevos = []
+    cambiados = []
+    for pago_id, campos in pagos.items():
+        fecha = campos['fecha_actualizacion']
+        actual = existentes.get(pago_id)
+        if actual is None:
+            actual = PagoMercadoPago(pago_id=pago_id)
+            nuevos.append(actual)
+        elif fecha > actual.fecha_actualizacion:
+            cambiados.append(actual)
+        else:
+            continue
+        for campo, valor in campos.items():
+            setattr(actual, campo, valor)
+        existentes[pago_id] = actual
+
+    PagoMercadoPago.objects.bulk_create(nuevos, ignore_conflicts=True)
+    PagoMercadoPago.objects.bulk_update(
+        cambiados, ['estado', 'monto', 'referencia_externa', 'fecha_actualizacion']
+    )
+    return existentes
+
+
+def multas_cubiertas(pagos):
+    """
+    Ids de las multas pagadas por los pagos aprobados de ``pagos``.
+    """
+    aprobados = {
+        int(pago.referencia_externa): pago.monto
+        for pago in pagos
+        if pago.estado == 'approved' and pago.referencia_externa.isdigit()
+    }
+    montos = dict(Multa.objects.filter(pk__in=list(aprobados)).values_list('pk', 'monto'))
+    return [pk for pk, monto in montos.items() if aprobados[pk] >= monto]
+
+
+def _reintentar(eventos, error, metricas):
+    ahora = timezone.now()
+    maximo = _ajuste('MERCADO_PAGO_REINTENTOS', 8)
+    base = _ajuste('MERCADO_PAGO_ESPERA_BASE', 10)
+    for evento in eventos:
+        evento.detalle = f'{type(error).__name__}: {error}'[:255]
+        if evento.intentos >= maximo:
+            evento.estado = 'error'
+        else:
+            evento.disponible_en = ahora + timedelta(seconds=min(base * 2 ** (evento.intentos - 1), 3600))
+    EventoWebhook.objects.bulk_update(eventos, ['estado', 'disponible_en', 'detalle'])
+    if metricas is not None:
+        errores = sum(1 for evento in eventos if evento.estado == 'error')
+        metricas.errores += errores
+        metricas.reintentos += len(eventos) - errores
+
+
+def procesar_lote(cliente, lote=500, metricas=None):
+    """
+    Procesa un lote de notificaciones. Devuelve el número de eventos
+    reclamados (0 si no había pendientes).
+    """
+    eventos = reclamar(lote)
+    if not eventos:
+        return 0
+    reclamados = len(eventos)
+    if metricas is not None:
+        metricas.lotes += 1
+        metricas.eventos += reclamados
+
+    de_pago = [evento for evento in eventos if evento.tipo == 'payment' and evento.recurso_id]
+    ids = list(dict.fromkeys(evento.recurso_id for evento in de_pago))
+    try:
+        consultados = cliente.obtener_pagos(ids) if ids else {}
+    except Exception as error:
+        _reintentar(de_pago, error, metricas)
+        reintentados = {evento.pk for evento in de_pago}
+        eventos = [evento for evento in eventos if evento.pk not in reintentados]
+        consultados = None
+    else:
+        consultados, invalidos = separar_pagos(consultados)
+        for pago_id, error in invalidos.items():
+            _reintentar([evento for evento in de_pago if evento.recurso_id == pago_id], error, metricas)
+        eventos = [evento for evento in eventos if evento.recurso_id not in invalidos]
+
+    ahora = timezone.now()
+    with transaction.atomic():
+        pagadas = []
+        if consultados is not None:
+            vigentes = actualizar_pagos(consultados)
+            pagadas = marcar_pagadas(multas_cubiertas(vigentes.values()))['marcadas']
+        for evento in eventos:
+            evento.procesado_en = ahora
+            if evento.tipo != 'payment' or not evento.recurso_id:
+                evento.estado, evento.detalle = 'ignorado', 'Tipo de notificación no procesado.'
+            elif evento.recurso_id not in consultados:
+                evento.estado, evento.detalle = 'ignorado', 'Pago inexistente.'
+            else:
+                evento.estado, evento.detalle = 'procesado', ''
+        EventoWebhook.objects.bulk_update(eventos, ['estado', 'procesado_en', 'detalle'])
+
+    if metricas is not None:
+        metricas.pagos_consultados += len(consultados or ())
+        metricas.multas_pagadas += len(pagadas)
+        metricas.ignorados += sum(1 for evento in eventos if evento.estado == 'ignorado')
+    return reclamados
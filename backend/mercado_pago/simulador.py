@@ -0,0 +1,90 @@
+"""
+Mercado Pago simulado para pruebas y benchmarks.
+
+``ProveedorFalso`` registra pagos, genera sus notificaciones firmadas (con
+reintentos duplicados y en desorden, como las entrega Mercado Pago) y
+responde las consultas de pagos igual que ``ClienteMercadoPago``. Los pagos
+se guardan a nivel de clase para que el procesador los vea aunque cree su
+propia instancia con ``MERCADO_PAGO_CLIENTE``.
+"""
+import itertools
+import json
+import random
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .firma import firmar
+
+
+class ProveedorFalso:
+    pagos = {}
+    notificaciones = []
+    _ids = itertools.count(10 ** 9)
+    _lock = threading.Lock()
+
+    def __init__(self, secreto=None, semilla=0):
+        self.secreto = secreto or settings.MERCADO_PAGO_SECRETO_WEBHOOK
+        self.aleatorio = random.Random(semilla)
+
+    @classmethod
+    def limpiar(cls):
+        with cls._lock:
+            cls.pagos.clear()
+            cls.notificaciones.clear()
+
+    def pagar(self, multa_id, monto, estado='approved'):
+        """
+        Registra un pago de la multa y sus dos notificaciones: la creación
+        (pendiente) y la actualización al ``estado`` final. Devuelve el id
+        del pago.
+        """
+        with self._lock:
+            pago_id = str(next(self._ids))
+            creado = timezone.now()
+            actualizado = creado + timedelta(seconds=1)
+            self.pagos[pago_id] = {
+                'id': int(pago_id),
+                'status': estado,
+                'transaction_amount': float(monto),
+                'external_reference': str(multa_id),
+                'date_last_updated': actualizado.isoformat(),
+            }
+            for accion, fecha in (('payment.created', creado), ('payment.updated', actualizado)):
+                self.notificaciones.append({
+                    'id': next(self._ids),
+                    'live_mode': False,
+                    'type': 'payment',
+                    'action': accion,
+                    'date_created': fecha.isoformat(),
+                    'data': {'id': pago_id},
+                })
+        return pago_id
+
+    def entregas(self, duplicados=0.0, desordenar=True):
+        """
+        Lista de ``(cuerpo, cabeceras)`` a enviar al webhook. Una fracción
+        ``duplicados`` de las notificaciones se repite, como un reintento,
+        con otro ``x-request-id`` y otra firma.
+        """
+        notificaciones = list(self.notificaciones)
+        repetidas = self.aleatorio.sample(notificaciones, int(len(notificaciones) * duplicados))
+        notificaciones.extend(repetidas)
+        if desordenar:
+            self.aleatorio.shuffle(notificaciones)
+        return [self.firmar(notificacion) for notificacion in notificaciones]
+
+    def firmar(self, notificacion):
+        request_id = str(uuid.uuid4())
+        ts = str(int(timezone.now().timestamp() * 1000))
+        cabeceras = {
+            'x-request-id': request_id,
+            'x-signature': firmar(self.secreto, notificacion['data']['id'], request_id, ts),
+        }
+        return json.dumps(notificacion).encode(), cabeceras
+
+    def obtener_pagos(self, ids):
+        return {pago_id: dict(self.pagos[pago_id]) for pago_id in ids if pago_id in self.pagos}
@@ -1,3 +1,191 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from multas.models import Multa
+from notificaciones.models import EventoNotificacion
+from usuarios.models import Usuario
+from .firma import firmar
+from .models import EventoWebhook, PagoMercadoPago
+from .procesamiento import MetricasProcesamiento, actualizar_pagos, leer_pago, procesar_lote
+from .simulador import ProveedorFalso
+
+URL = '/api/pagos/mercado-pago/webhook/'
+
+
+class ClienteQueFalla:
+    def obtener_pagos(self, ids):
+        raise TimeoutError('sin respuesta')
+
+
+@override_settings(MERCADO_PAGO_SECRETO_WEBHOOK='secreto-de-prueba')
+class MercadoPagoTestCase(TestCase):
+
+    def setUp(self):
+        ProveedorFalso.limpiar()
+        self.addCleanup(ProveedorFalso.limpiar)
+        self.proveedor = ProveedorFalso(semilla=1)
+        self.residente = Usuario.objects.create_user(
+            username='residente', password='residente123', rol='residente'
+        )
+        self.client = APIClient()
+
+    def crear_multas(self, cantidad, monto=5000):
+        Multa.objects.bulk_create([
+            Multa(usuario=self.residente, motivo=f'Motivo {i}', monto=monto) for i in range(cantidad)
+        ])
+        return list(Multa.objects.order_by('id'))
+
+    def enviar(self, entrega):
+        cuerpo, cabeceras = entrega
+        return self.client.post(URL, cuerpo, content_type='application/json', headers=cabeceras)
+
+    def procesar(self, cliente=None, lote=100):
+        metricas = MetricasProcesamiento()
+        while procesar_lote(cliente or self.proveedor, lote, metricas):
+            pass
+        return metricas
+
+
+class WebhookTests(MercadoPagoTestCase):
+
+    def test_guarda_el_evento_una_sola_vez(self):
+        self.proveedor.pagar(1, 5000)
+        notificacion = ProveedorFalso.notificaciones[0]
+        for _ in range(3):
+            # Cada reintento llega con otro x-request-id y otra firma
+            response = self.enviar(self.proveedor.firmar(notificacion))
+            self.assertEqual(response.status_code, 200)
+        evento = EventoWebhook.objects.get()
+        self.assertEqual(evento.clave, str(notificacion['id']))
+        self.assertEqual((evento.tipo, evento.accion), ('payment', 'payment.created'))
+        self.assertEqual(json.loads(evento.cuerpo), notificacion)
+
+    def test_rechaza_firma_invalida(self):
+        self.proveedor.pagar(1, 5000)
+        cuerpo, cabeceras = self.proveedor.firmar(ProveedorFalso.notificaciones[0])
+        cabeceras['x-signature'] = firmar('otro-secreto', '1', cabeceras['x-request-id'], '1')
+        self.assertEqual(self.enviar((cuerpo, cabeceras)).status_code, 401)
+        del cabeceras['x-signature']
+        self.assertEqual(self.enviar((cuerpo, cabeceras)).status_code, 401)
+        self.assertEqual(self.enviar((b'no es json', cabeceras)).status_code, 400)
+        self.assertFalse(EventoWebhook.objects.exists())
+
+    def test_rechaza_firma_antigua(self):
+        self.proveedor.pagar(1, 5000)
+        cuerpo, cabeceras = self.proveedor.firmar(ProveedorFalso.notificaciones[0])
+        recurso_id = str(ProveedorFalso.notificaciones[0]['data']['id'])
+        hace_una_hora = str(int((timezone.now() - timedelta(hours=1)).timestamp() * 1000))
+        cabeceras['x-signature'] = firmar(
+            'secreto-de-prueba', recurso_id, cabeceras['x-request-id'], hace_una_hora
+        )
+        self.assertEqual(self.enviar((cuerpo, cabeceras)).status_code, 401)
+        with self.settings(MERCADO_PAGO_FIRMA_TOLERANCIA=7200):
+            self.assertEqual(self.enviar((cuerpo, cabeceras)).status_code, 200)
+
+    @override_settings(MERCADO_PAGO_SECRETO_WEBHOOK='')
+    def test_sin_configurar(self):
+        self.assertEqual(self.client.post(URL, {}, format='json').status_code, 503)
+
+
+class ProcesamientoTests(MercadoPagoTestCase):
+
+    def test_repeticion_con_duplicados_y_desorden(self):
+        multas = self.crear_multas(400)
+        aprobadas = multas[:300]
+        for multa in aprobadas:
+            self.proveedor.pagar(multa.pk, multa.monto)
+        for multa in multas[300:340]:
+            self.proveedor.pagar(multa.pk, multa.monto, estado='rejected')
+        for multa in multas[340:360]:
+            self.proveedor.pagar(multa.pk, multa.monto - 1)
+        self.proveedor.pagar(10 ** 6, 5000)
+
+        entregas = self.proveedor.entregas(duplicados=0.5)
+        self.assertGreater(len(entregas), 1000)
+        for entrega in entregas:
+            self.assertEqual(self.enviar(entrega).status_code, 200)
+        self.assertEqual(EventoWebhook.objects.count(), len(ProveedorFalso.notificaciones))
+
+        metricas = self.procesar()
+        pagadas = set(Multa.objects.filter(estado='pagado').values_list('pk', flat=True))
+        self.assertEqual(pagadas, {multa.pk for multa in aprobadas})
+        self.assertEqual(metricas.multas_pagadas, 300)
+        self.assertEqual(PagoMercadoPago.objects.count(), 361)
+        self.assertFalse(EventoWebhook.objects.filter(estado='pendiente').exists())
+        self.assertEqual(PagoMercadoPago.objects.filter(estado='rejected').count(), 40)
+        self.assertEqual(EventoNotificacion.objects.filter(tipo='multa_pagada').count(), 300)
+
+        # Un reintento tardío ya no cambia nada
+        self.enviar(self.proveedor.firmar(ProveedorFalso.notificaciones[0]))
+        self.assertEqual(self.procesar().eventos, 0)
+
+    def test_estado_antiguo_no_reemplaza_al_nuevo(self):
+        ahora = timezone.now()
+        pago = {'status': 'refunded', 'transaction_amount': 5000, 'external_reference': '1',
+                'date_last_updated': ahora.isoformat()}
+        actualizar_pagos({'1': leer_pago(pago)})
+        antiguo = {**pago, 'status': 'approved', 'date_last_updated': (ahora - timedelta(minutes=5)).isoformat()}
+        vigentes = actualizar_pagos({'1': leer_pago(antiguo)})
+        self.assertEqual(vigentes['1'].estado, 'refunded')
+        self.assertEqual(PagoMercadoPago.objects.get().estado, 'refunded')
+
+    @override_settings(MERCADO_PAGO_REINTENTOS=2)
+    def test_pago_mal_formado_no_detiene_el_lote(self):
+        multas = self.crear_multas(3)
+        pagos = [self.proveedor.pagar(multa.pk, multa.monto) for multa in multas]
+        for entrega in self.proveedor.entregas():
+            self.enviar(entrega)
+        del self.proveedor.pagos[pagos[1]]['date_last_updated']
+        self.proveedor.pagos[pagos[2]]['date_last_updated'] = 'ayer'
+
+        metricas = self.procesar()
+        self.assertEqual(metricas.multas_pagadas, 1)
+        # Dos notificaciones por pago
+        self.assertEqual(metricas.reintentos, 4)
+        self.assertEqual(
+            set(Multa.objects.filter(estado='pagado').values_list('pk', flat=True)), {multas[0].pk}
+        )
+        malos = EventoWebhook.objects.filter(recurso_id__in=pagos[1:])
+        self.assertEqual(set(malos.values_list('estado', flat=True)), {'pendiente'})
+        self.assertIn('date_last_updated', malos.filter(recurso_id=pagos[1]).first().detalle)
+        self.assertIn("'ayer'", malos.filter(recurso_id=pagos[2]).first().detalle)
+
+        EventoWebhook.objects.update(disponible_en=timezone.now())
+        self.procesar()
+        self.assertEqual(set(malos.values_list('estado', flat=True)), {'error'})
+
+    @override_settings(MERCADO_PAGO_REINTENTOS=2, MERCADO_PAGO_ESPERA_BASE=10)
+    def test_reintenta_si_falla_la_api(self):
+        multa = self.crear_multas(1)[0]
+        self.proveedor.pagar(multa.pk, multa.monto)
+        for entrega in self.proveedor.entregas():
+            self.enviar(entrega)
+
+        metricas = self.procesar(ClienteQueFalla())
+        self.assertEqual(metricas.reintentos, 2)
+        evento = EventoWebhook.objects.first()
+        self.assertEqual(evento.estado, 'pendiente')
+        self.assertIn('sin respuesta', evento.detalle)
+        self.assertGreater(evento.disponible_en, timezone.now() + timedelta(seconds=5))
+
+        EventoWebhook.objects.update(disponible_en=timezone.now())
+        self.procesar(ClienteQueFalla())
+        self.assertEqual(EventoWebhook.objects.filter(estado='error').count(), 2)
+
+    @override_settings(MERCADO_PAGO_CLIENTE='mercado_pago.simulador.ProveedorFalso')
+    def test_comando(self):
+        multas = self.crear_multas(3)
+        for multa in multas:
+            self.proveedor.pagar(multa.pk, multa.monto)
+        for entrega in self.proveedor.entregas(duplicados=0.5):
+            self.enviar(entrega)
+        salida = StringIO()
+        call_command('procesar_pagos_mercado_pago', '--una-vez', '--lote', '4', stdout=salida)
+        metricas = json.loads(salida.getvalue())
+        self.assertEqual((metricas['eventos'], metricas['lotes'], metricas['multas_pagadas']), (6, 2, 3))
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import WebhookView
+
+urlpatterns = [
+    path('mercado-pago/webhook/', WebhookView.as_view(), name='mercado_pago_webhook'),
+]
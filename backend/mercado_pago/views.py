@@ -1,3 +1,58 @@
-from django.shortcuts import render
+import hashlib
+import json
 
-# Create your views here.
+from django.conf import settings
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .firma import verificar
+from .models import EventoWebhook
+
+
+class WebhookView(APIView):
+    """
+    Recibe las notificaciones de Mercado Pago.
+
+    Solo verifica la firma y guarda la notificación con una inserción que
+    ignora los duplicados, para responder antes de que Mercado Pago
+    reintente. Los pagos se aplican después, en lotes, con
+    ``manage.py procesar_pagos_mercado_pago``.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        secreto = getattr(settings, 'MERCADO_PAGO_SECRETO_WEBHOOK', None)
+        if not secreto:
+            return Response(
+                {"detail": "El webhook de Mercado Pago no está configurado."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        cuerpo = request.body
+        try:
+            datos = json.loads(cuerpo)
+        except ValueError:
+            datos = None
+        if not isinstance(datos, dict):
+            return Response({"detail": "Cuerpo inválido."}, status=status.HTTP_400_BAD_REQUEST)
+
+        recurso = datos.get('data') if isinstance(datos.get('data'), dict) else {}
+        recurso_id = str(request.query_params.get('data.id') or recurso.get('id') or '')
+        request_id = request.headers.get('x-request-id', '')
+        tolerancia = getattr(settings, 'MERCADO_PAGO_FIRMA_TOLERANCIA', 300)
+        if not verificar(secreto, request.headers.get('x-signature'), recurso_id, request_id, tolerancia):
+            return Response({"detail": "Firma inválida."}, status=status.HTTP_401_UNAUTHORIZED)
+
+        clave = datos.get('id') or request_id or hashlib.sha256(cuerpo).hexdigest()
+        EventoWebhook.objects.bulk_create([
+            EventoWebhook(
+                clave=str(clave)[:100],
+                tipo=str(datos.get('type') or request.query_params.get('type') or '')[:50],
+                accion=str(datos.get('action') or '')[:50],
+                recurso_id=recurso_id[:50],
+                cuerpo=cuerpo.decode('utf-8', 'replace'),
+            )
+        ], ignore_conflicts=True)
+        return Response({'recibido': True})
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Multa
+from .models import Multa, SaldoResidente
 
 # Register your models here.
 
@@ -24,3 +24,11 @@ class MultaAdmin(admin.ModelAdmin):
         if obj and obj.estado == 'pagado':
             return self.readonly_fields + ('usuario', 'motivo', 'descripcion', 'monto', 'estado', 'fecha_pago')
         return self.readonly_fields
+
+
+@admin.register(SaldoResidente)
+class SaldoResidenteAdmin(admin.ModelAdmin):
+    list_display = ('usuario', 'pendientes', 'monto_pendiente', 'monto_pagado', 'pendiente_mas_antigua')
+    search_fields = ('usuario__username', 'usuario__numero_residencia')
+    readonly_fields = ('usuario', 'pendientes', 'monto_pendiente', 'monto_pagado', 'pendiente_mas_antigua', 'fecha_modificacion')
+    list_per_page = 50
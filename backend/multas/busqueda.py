@@ -0,0 +1,170 @@
+"""
+Búsqueda de texto sobre multas.
+
+Cada multa tiene un ``DocumentoBusquedaMulta`` con el motivo, la descripción
+y los datos del residente normalizados (minúsculas y sin tildes). Un backend
+de búsqueda traduce los términos de ``?search=`` a una consulta sobre un
+índice de texto de ese documento:
+
+- SQLite: tabla virtual FTS5 sincronizada con triggers.
+- MySQL: índice FULLTEXT en modo booleano.
+- Otros motores: coincidencia por prefijo de palabra sobre el documento.
+
+Cada término se busca como prefijo de palabra y todos deben coincidir.
+El backend se puede fijar con ``MULTAS_BUSQUEDA_BACKEND`` (ruta a la clase).
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+from api.texto import normalizar
+from .models import DocumentoBusquedaMulta, Multa
+
+TABLA_FTS = 'multas_documento_fts'
+
+# Columnas que componen el documento, en orden
+COLUMNAS_DOCUMENTO = (
+    'motivo', 'descripcion',
+    'usuario__username', 'usuario__first_name', 'usuario__last_name',
+)
+
+
+def construir_documento(*textos):
+    return ' '.join(token for texto in textos for token in normalizar(texto))
+
+
+def indexar_multas(queryset, batch_size=1000):
+    """
+    Crea o actualiza los documentos de búsqueda de las multas del queryset.
+    """
+    filas = queryset.order_by().values_list('id', *COLUMNAS_DOCUMENTO)
+    documentos = (
+        DocumentoBusquedaMulta(multa_id=fila[0], documento=construir_documento(*fila[1:]))
+        for fila in filas.iterator(chunk_size=batch_size)
+    )
+    connection = connections[router.db_for_write(DocumentoBusquedaMulta)]
+    unique_fields = None
+    if connection.features.supports_update_conflicts_with_target:
+        unique_fields = ['multa']
+
+    total = 0
+    while True:
+        lote = list(islice(documentos, batch_size))
+        if not lote:
+            break
+        DocumentoBusquedaMulta.objects.bulk_create(
+            lote,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=['documento'],
+        )
+        total += len(lote)
+    return total
+
+
+class BackendBusqueda:
+    """
+    Interfaz de los backends de búsqueda de multas.
+    """
+    def filtrar(self, queryset, tokens):
+        raise NotImplementedError
+
+
+class DocumentoBackend(BackendBusqueda):
+    """
+    Backend genérico: busca cada término como prefijo de una palabra del
+    documento. No necesita un índice de texto y sirve en cualquier motor.
+    """
+    def filtrar(self, queryset, tokens):
+        campo = 'documento_busqueda__documento'
+        for token in tokens:
+            queryset = queryset.filter(
+                Q(**{f'{campo}__startswith': token})
+                | Q(**{f'{campo}__contains': f' {token}'})
+            )
+        return queryset
+
+
+class SQLiteFTS5Backend(BackendBusqueda):
+    """
+    Backend para SQLite con una tabla virtual FTS5 sobre los documentos.
+    """
+    def filtrar(self, queryset, tokens):
+        consulta = ' '.join(f'"{token}"*' for token in tokens)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s',
+            [consulta],
+        ))
+
+
+class MySQLFullTextBackend(BackendBusqueda):
+    """
+    Backend para MySQL con un índice FULLTEXT sobre los documentos.
+
+    InnoDB no indexa las palabras de menos de ``innodb_ft_min_token_size``
+    caracteres (3) ni sus palabras vacías ("de", "la"...), así que un
+    término obligatorio con ellas no encontraría nada. Esos términos quedan
+    fuera del ``MATCH`` y se buscan como prefijo de palabra en el documento,
+    igual que ``DocumentoBackend``.
+    """
+    longitud_minima = 3
+    # Lista por defecto de InnoDB (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD)
+    palabras_vacias = frozenset((
+        'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en',
+        'for', 'from', 'how', 'i', 'in', 'is', 'it', 'la', 'of', 'on', 'or',
+        'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where', 'who',
+        'will', 'with', 'und', 'www',
+    ))
+
+    def indexable(self, token):
+        return len(token) >= self.longitud_minima and token not in self.palabras_vacias
+
+    def filtrar(self, queryset, tokens):
+        indexables = [token for token in tokens if self.indexable(token)]
+        resto = [token for token in tokens if not self.indexable(token)]
+        if indexables:
+            consulta = ' '.join(f'+{token}*' for token in indexables)
+            tabla = DocumentoBusquedaMulta._meta.db_table
+            queryset = queryset.filter(pk__in=RawSQL(
+                f'SELECT multa_id FROM {tabla} '
+                f'WHERE MATCH(documento) AGAINST (%s IN BOOLEAN MODE)',
+                [consulta],
+            ))
+        if resto:
+            queryset = DocumentoBackend().filtrar(queryset, resto)
+        return queryset
+
+
+BACKENDS_POR_MOTOR = {
+    'sqlite': SQLiteFTS5Backend,
+    'mysql': MySQLFullTextBackend,
+}
+
+
+def obtener_backend():
+    """
+    Devuelve el backend configurado o el que corresponde al motor en uso.
+    """
+    ruta = getattr(settings, 'MULTAS_BUSQUEDA_BACKEND', None)
+    if ruta:
+        return import_string(ruta)()
+    vendor = connections[router.db_for_read(Multa)].vendor
+    return BACKENDS_POR_MOTOR.get(vendor, DocumentoBackend)()
+
+
+class BusquedaMultaFilter(filters.SearchFilter):
+    """
+    Reemplaza el ``SearchFilter`` de DRF manteniendo el parámetro ``?search=``,
+    pero resolviendo la búsqueda con el backend de texto configurado.
+    """
+    def filter_queryset(self, request, queryset, view):
+        terminos = self.get_search_terms(request)
+        tokens = [token for termino in terminos for token in normalizar(termino)]
+        if not tokens:
+            return queryset
+        return obtener_backend().filtrar(queryset, tokens)
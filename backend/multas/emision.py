@@ -0,0 +1,136 @@
+"""
+Emisión masiva de multas.
+
+Valida el rol de todos los destinatarios con una sola consulta e inserta las
+multas con ``bulk_create`` por lotes dentro de una transacción. Como
+``bulk_create`` no dispara señales, aquí mismo se indexan los documentos de
+búsqueda, se actualizan los saldos, se encolan los avisos a los residentes
+y se invalida la foto de estadísticas.
+
+En los motores que no devuelven los ids de ``bulk_create`` (MySQL), los ids
+se leen de vuelta dentro de la misma transacción antes de armar los
+resultados y los avisos.
+"""
+from collections import defaultdict, deque
+
+from django.db import connections, router, transaction
+from django.db.models import Max
+
+from notificaciones.bandeja import encolar_multas
+from usuarios.models import Usuario
+from .busqueda import indexar_multas
+from .estadisticas import invalidar_estadisticas
+from .models import Multa
+from .saldos import aplicar, estado
+from .serializers import MultaMasivaItemSerializer
+
+
+def _items_desde_plantilla(plantilla, filtro):
+    usuarios = (
+        Usuario.objects
+        .filter(
+            rol='residente',
+            is_active=True,
+            numero_residencia__startswith=filtro['numero_residencia_prefijo'],
+        )
+        .order_by('numero_residencia', 'id')
+        .values_list('id', flat=True)
+    )
+    return [({**plantilla, 'usuario': usuario_id}, None) for usuario_id in usuarios]
+
+
+def _items_desde_lista(multas):
+    items = []
+    for datos in multas:
+        serializer = MultaMasivaItemSerializer(data=datos)
+        if serializer.is_valid():
+            items.append((serializer.validated_data, None))
+        else:
+            items.append((None, serializer.errors))
+    return items
+
+
+def _asignar_ids(nuevas, ultimo_id, usuarios):
+    """
+    Asigna a ``nuevas`` los ids de las filas recién insertadas, que son las
+    de id mayor a ``ultimo_id`` (el máximo antes de insertar). Las filas se
+    emparejan por contenido y, entre iguales, en el orden de inserción.
+    """
+    ids = defaultdict(deque)
+    filas = (
+        Multa.objects
+        .filter(pk__gt=ultimo_id, usuario_id__in=usuarios)
+        .order_by('pk')
+        .values_list('pk', 'usuario_id', 'motivo', 'descripcion', 'monto')
+    )
+    for pk, *datos in filas:
+        ids[tuple(datos)].append(pk)
+    for multa in nuevas:
+        multa.pk = ids[multa.usuario_id, multa.motivo, multa.descripcion, multa.monto].popleft()
+
+
+def emitir_multas(multas=None, plantilla=None, filtro=None, batch_size=500):
+    """
+    Emite multas en bloque y devuelve el resultado de cada ítem.
+
+    Cada resultado incluye el ``indice`` del ítem y, según corresponda, el
+    ``id`` de la multa creada o los ``errores`` de validación. Los ítems
+    inválidos no impiden crear los válidos.
+    """
+    if plantilla is not None:
+        items = _items_desde_plantilla(plantilla, filtro)
+    else:
+        items = _items_desde_lista(multas)
+
+    ids_usuarios = {datos['usuario'] for datos, errores in items if datos}
+    roles = dict(
+        Usuario.objects.filter(pk__in=ids_usuarios).values_list('id', 'rol')
+    )
+
+    resultados = []
+    nuevas = []
+    for indice, (datos, errores) in enumerate(items):
+        if datos is not None:
+            rol = roles.get(datos['usuario'])
+            if rol is None:
+                errores = {'usuario': ["El usuario no existe."]}
+            elif rol != 'residente':
+                errores = {'usuario': ["Solo se pueden asignar multas a residentes."]}
+
+        if errores:
+            resultados.append({'indice': indice, 'errores': errores})
+            continue
+
+        multa = Multa(
+            usuario_id=datos['usuario'],
+            motivo=datos['motivo'],
+            descripcion=datos.get('descripcion'),
+            monto=datos['monto'],
+        )
+        nuevas.append(multa)
+        resultados.append({'indice': indice, 'multa': multa})
+
+    if nuevas:
+        usuarios = {multa.usuario_id for multa in nuevas}
+        devuelve_ids = connections[router.db_for_write(Multa)].features.can_return_rows_from_bulk_insert
+        with transaction.atomic():
+            if not devuelve_ids:
+                ultimo_id = Multa.objects.aggregate(ultimo=Max('pk'))['ultimo'] or 0
+            Multa.objects.bulk_create(nuevas, batch_size=batch_size)
+            if not devuelve_ids:
+                _asignar_ids(nuevas, ultimo_id, usuarios)
+            # Multas de los destinatarios que aún no tienen documento de búsqueda
+            indexar_multas(
+                Multa.objects.filter(usuario_id__in=usuarios, documento_busqueda__isnull=True),
+                batch_size=batch_size,
+            )
+            aplicar([(None, estado(multa)) for multa in nuevas])
+            encolar_multas('multa_creada', nuevas, batch_size=batch_size)
+            transaction.on_commit(invalidar_estadisticas)
+
+    for resultado in resultados:
+        multa = resultado.pop('multa', None)
+        if multa is not None:
+            resultado['id'] = multa.pk
+
+    return resultados, len(nuevas)
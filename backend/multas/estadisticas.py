@@ -0,0 +1,179 @@
+"""
+Cálculo y caché de las estadísticas de multas.
+
+Las estadísticas se calculan con una sola consulta de agregación condicional
+y se guardan como una "foto" en la caché de Django junto con la versión con
+que se calcularon. La versión cambia cada vez que una multa se guarda o se
+elimina, o un residente cambia de residencia, de modo que las fotos antiguas
+dejan de usarse sin tener que borrarlas una por una. La versión y la foto se
+leen juntas, en una sola ida a la caché.
+
+La caché debe ser compartida entre procesos (ver ``CACHES`` y el chequeo
+``api.E001``): una invalidación hecha por otro worker o por un comando como
+``procesar_pagos_mercado_pago`` tiene que verse en todos.
+
+``aobtener_estadisticas`` es la versión para vistas asíncronas: usa la API
+asíncrona de la caché y, con ``agrupar_por``, hace la agregación total y la
+agrupada a la vez.
+"""
+import uuid
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from api.asincrono import consultas_concurrentes
+
+from .models import Multa
+
+VERSION_KEY = 'multas:estadisticas:version'
+
+# Agrupaciones permitidas: nombre del parámetro -> expresión de agrupación
+AGRUPACIONES = {
+    'estado': F('estado'),
+    'mes': TruncMonth('fecha_creacion'),
+    'residencia': F('usuario__numero_residencia'),
+}
+
+
+def _metricas():
+    pendiente = Q(estado='pendiente')
+    pagado = Q(estado='pagado')
+    return {
+        'total_multas': Count('id'),
+        'multas_pendientes': Count('id', filter=pendiente),
+        'multas_pagadas': Count('id', filter=pagado),
+        'monto_pendiente': Sum('monto', filter=pendiente),
+        'monto_pagado': Sum('monto', filter=pagado),
+    }
+
+
+def _normalizar(fila):
+    # Sum devuelve None cuando no hay filas; se mantiene el 0 de siempre
+    fila['monto_pendiente'] = fila['monto_pendiente'] or 0
+    fila['monto_pagado'] = fila['monto_pagado'] or 0
+    return fila
+
+
+def _filtrar(desde, hasta):
+    queryset = Multa.objects.order_by()
+    if desde:
+        queryset = queryset.filter(fecha_creacion__gte=desde)
+    if hasta:
+        queryset = queryset.filter(fecha_creacion__lte=hasta)
+    return queryset
+
+
+def _totales(queryset):
+    return _normalizar(queryset.aggregate(**_metricas()))
+
+
+def _grupos(queryset, agrupar_por):
+    grupos = (
+        queryset
+        .annotate(grupo=AGRUPACIONES[agrupar_por])
+        .values('grupo')
+        .annotate(**_metricas())
+        .order_by('grupo')
+    )
+    return [_normalizar(grupo) for grupo in grupos]
+
+
+def calcular_estadisticas(desde=None, hasta=None, agrupar_por=None):
+    """
+    Calcula las estadísticas de multas en una sola pasada.
+
+    ``desde`` y ``hasta`` acotan ``fecha_creacion`` (ambos inclusive).
+    Con ``agrupar_por`` se agrega la lista ``grupos`` con las mismas
+    métricas por cada valor de la agrupación.
+    """
+    queryset = _filtrar(desde, hasta)
+    datos = _totales(queryset)
+    if agrupar_por:
+        datos['grupos'] = _grupos(queryset, agrupar_por)
+    return datos
+
+
+async def acalcular_estadisticas(desde=None, hasta=None, agrupar_por=None):
+    queryset = _filtrar(desde, hasta)
+    consultas = [partial(_totales, queryset)]
+    if agrupar_por:
+        consultas.append(partial(_grupos, queryset, agrupar_por))
+    datos, *grupos = await consultas_concurrentes(*consultas)
+    if agrupar_por:
+        datos['grupos'] = grupos[0]
+    return datos
+
+
+def _nueva_version():
+    # Un valor único y no un contador: dos invalidaciones simultáneas desde
+    # procesos distintos nunca dejan la misma versión
+    return uuid.uuid4().hex
+
+
+def _version(valores):
+    version = valores.get(VERSION_KEY)
+    if version is None:
+        # Sin versión (caché vacía o clave desalojada) se crea una nueva, que
+        # no coincide con la de ninguna foto guardada
+        version = _nueva_version()
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY)
+    return version
+
+
+async def _aversion(valores):
+    version = valores.get(VERSION_KEY)
+    if version is None:
+        version = _nueva_version()
+        if not await cache.aadd(VERSION_KEY, version, None):
+            version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def invalidar_estadisticas():
+    """
+    Descarta todas las fotos de estadísticas cambiando la versión.
+    """
+    cache.set(VERSION_KEY, _nueva_version(), None)
+
+
+def _clave(desde, hasta, agrupar_por):
+    return 'multas:estadisticas:{}:{}:{}'.format(desde or '', hasta or '', agrupar_por or '')
+
+
+def _timeout():
+    return getattr(settings, 'MULTAS_ESTADISTICAS_CACHE_TIMEOUT', 3600)
+
+
+def _vigente(foto, version):
+    if foto is not None and foto[0] == version:
+        return foto[1]
+    return None
+
+
+def obtener_estadisticas(desde=None, hasta=None, agrupar_por=None):
+    """
+    Devuelve la foto vigente de las estadísticas o la calcula si no existe.
+    """
+    key = _clave(desde, hasta, agrupar_por)
+    valores = cache.get_many([VERSION_KEY, key])
+    version = _version(valores)
+    datos = _vigente(valores.get(key), version)
+    if datos is None:
+        datos = calcular_estadisticas(desde, hasta, agrupar_por)
+        cache.set(key, (version, datos), _timeout())
+    return datos
+
+
+async def aobtener_estadisticas(desde=None, hasta=None, agrupar_por=None):
+    key = _clave(desde, hasta, agrupar_por)
+    valores = await cache.aget_many([VERSION_KEY, key])
+    version = await _aversion(valores)
+    datos = _vigente(valores.get(key), version)
+    if datos is None:
+        datos = await acalcular_estadisticas(desde, hasta, agrupar_por)
+        await cache.aset(key, (version, datos), _timeout())
+    return datos
@@ -0,0 +1,51 @@
+"""
+Exportación del libro de multas.
+"""
+from api.exportacion import iterar_por_lotes
+
+# (encabezado, columnas de .values() que usa)
+COLUMNAS = (
+    ('ID', 'id'),
+    ('Residente', 'usuario__first_name', 'usuario__last_name'),
+    ('Residencia', 'usuario__numero_residencia'),
+    ('Usuario', 'usuario__username'),
+    ('Motivo', 'motivo'),
+    ('Descripción', 'descripcion'),
+    ('Monto', 'monto'),
+    ('Fecha de creación', 'fecha_creacion'),
+    ('Fecha de pago', 'fecha_pago'),
+    ('Estado', 'estado'),
+)
+
+ENCABEZADOS = [columna[0] for columna in COLUMNAS]
+
+
+def _campos():
+    campos = []
+    for columna in COLUMNAS:
+        for campo in columna[1:]:
+            if campo not in campos:
+                campos.append(campo)
+    return campos
+
+
+def filas_multas(queryset, campo_orden, descendente, chunk_size=2000):
+    """
+    Genera una lista de valores por multa, en el orden de ``ENCABEZADOS``.
+    """
+    campos = _campos()
+    if campo_orden not in campos:
+        campos.append(campo_orden)
+    for fila in iterar_por_lotes(queryset.values(*campos), campo_orden, descendente, chunk_size):
+        yield [
+            fila['id'],
+            f"{fila['usuario__first_name']} {fila['usuario__last_name']}".strip(),
+            fila['usuario__numero_residencia'],
+            fila['usuario__username'],
+            fila['motivo'],
+            fila['descripcion'],
+            int(fila['monto']),
+            fila['fecha_creacion'].isoformat(),
+            fila['fecha_pago'].isoformat() if fila['fecha_pago'] else None,
+            fila['estado'],
+        ]
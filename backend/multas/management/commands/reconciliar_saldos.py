@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from multas.saldos import reconciliar
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula desde las multas el saldo de cada residente, informa las '
+        'diferencias con los saldos guardados y los corrige.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--solo-informar', action='store_true',
+            help='Informa las diferencias sin corregirlas.',
+        )
+        parser.add_argument(
+            '--mostrar', type=int, default=20,
+            help='Cantidad máxima de diferencias a detallar.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Saldos por inserción o actualización.',
+        )
+
+    def handle(self, *args, **options):
+        diferencias = reconciliar(
+            corregir=not options['solo_informar'], batch_size=options['batch_size']
+        )
+        for usuario_id, guardado, calculado in diferencias[:options['mostrar']]:
+            if guardado is None:
+                self.stdout.write(f'Usuario {usuario_id}: sin saldo, calculado {calculado}')
+                continue
+            detalle = ', '.join(
+                f'{campo} {guardado[campo]} -> {valor}'
+                for campo, valor in calculado.items() if guardado[campo] != valor
+            )
+            self.stdout.write(f'Usuario {usuario_id}: {detalle}')
+
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS('Los saldos coinciden con las multas.'))
+        elif options['solo_informar']:
+            self.stdout.write(self.style.WARNING(f'{len(diferencias)} saldos con diferencias.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{len(diferencias)} saldos corregidos.'))
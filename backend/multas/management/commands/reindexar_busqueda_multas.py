@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from multas.busqueda import indexar_multas
+from multas.models import Multa
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye los documentos de búsqueda de las multas. Útil después '
+        'de cargas masivas que no disparan señales (bulk_create, update).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Cantidad de documentos por inserción.',
+        )
+
+    def handle(self, *args, **options):
+        total = indexar_multas(Multa.objects.all(), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} documentos de búsqueda actualizados.'))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multas', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='multa',
+            index=models.Index(fields=['usuario', 'estado', '-fecha_creacion'], name='multa_usuario_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='multa',
+            index=models.Index(fields=['estado', 'fecha_creacion'], name='multa_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='multa',
+            index=models.Index(fields=['fecha_creacion', 'id'], name='multa_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='multa',
+            index=models.Index(fields=['monto', 'id'], name='multa_monto_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='multa',
+            index=models.Index(condition=models.Q(('estado', 'pendiente')), fields=['fecha_creacion'], name='multa_pendiente_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:02
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TABLA_FTS = 'multas_documento_fts'
+TABLA_DOCUMENTOS = 'multas_documentobusquedamulta'
+
+SQL_SQLITE = [
+    f"""CREATE VIRTUAL TABLE {TABLA_FTS} USING fts5(
+        documento,
+        content='{TABLA_DOCUMENTOS}',
+        content_rowid='multa_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {TABLA_FTS}_ai AFTER INSERT ON {TABLA_DOCUMENTOS} BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, documento) VALUES (new.multa_id, new.documento);
+    END""",
+    f"""CREATE TRIGGER {TABLA_FTS}_ad AFTER DELETE ON {TABLA_DOCUMENTOS} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, documento)
+        VALUES ('delete', old.multa_id, old.documento);
+    END""",
+    f"""CREATE TRIGGER {TABLA_FTS}_au AFTER UPDATE ON {TABLA_DOCUMENTOS} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, documento)
+        VALUES ('delete', old.multa_id, old.documento);
+        INSERT INTO {TABLA_FTS}(rowid, documento) VALUES (new.multa_id, new.documento);
+    END""",
+]
+
+SQL_SQLITE_REVERSA = [
+    f'DROP TRIGGER IF EXISTS {TABLA_FTS}_ai',
+    f'DROP TRIGGER IF EXISTS {TABLA_FTS}_ad',
+    f'DROP TRIGGER IF EXISTS {TABLA_FTS}_au',
+    f'DROP TABLE IF EXISTS {TABLA_FTS}',
+]
+
+SQL_MYSQL = [
+    f'ALTER TABLE {TABLA_DOCUMENTOS} ADD FULLTEXT INDEX multa_documento_ft (documento)',
+]
+
+SQL_MYSQL_REVERSA = [
+    f'ALTER TABLE {TABLA_DOCUMENTOS} DROP INDEX multa_documento_ft',
+]
+
+
+def _ejecutar(schema_editor, sentencias):
+    for sql in sentencias:
+        schema_editor.execute(sql)
+
+
+def crear_indice_texto(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _ejecutar(schema_editor, SQL_SQLITE)
+    elif vendor == 'mysql':
+        _ejecutar(schema_editor, SQL_MYSQL)
+
+
+def eliminar_indice_texto(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _ejecutar(schema_editor, SQL_SQLITE_REVERSA)
+    elif vendor == 'mysql':
+        _ejecutar(schema_editor, SQL_MYSQL_REVERSA)
+
+
+def _normalizar(texto):
+    if not texto:
+        return []
+    descompuesto = unicodedata.normalize('NFKD', str(texto))
+    sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return re.findall(r'\w+', sin_tildes.lower())
+
+
+def poblar_documentos(apps, schema_editor):
+    Multa = apps.get_model('multas', 'Multa')
+    DocumentoBusquedaMulta = apps.get_model('multas', 'DocumentoBusquedaMulta')
+    db_alias = schema_editor.connection.alias
+    filas = Multa.objects.using(db_alias).order_by().values_list(
+        'id', 'motivo', 'descripcion',
+        'usuario__username', 'usuario__first_name', 'usuario__last_name',
+    )
+    lote = []
+    for fila in filas.iterator(chunk_size=1000):
+        documento = ' '.join(t for texto in fila[1:] for t in _normalizar(texto))
+        lote.append(DocumentoBusquedaMulta(multa_id=fila[0], documento=documento))
+        if len(lote) >= 1000:
+            DocumentoBusquedaMulta.objects.using(db_alias).bulk_create(lote)
+            lote = []
+    if lote:
+        DocumentoBusquedaMulta.objects.using(db_alias).bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multas', '0002_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusquedaMulta',
+            fields=[
+                ('multa', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='documento_busqueda', serialize=False, to='multas.multa', verbose_name='Multa')),
+                ('documento', models.TextField(verbose_name='Documento')),
+            ],
+            options={
+                'verbose_name': 'Documento de búsqueda',
+                'verbose_name_plural': 'Documentos de búsqueda',
+            },
+        ),
+        migrations.RunPython(crear_indice_texto, eliminar_indice_texto),
+        migrations.RunPython(poblar_documentos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multas', '0003_documento_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='multa',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Fecha de modificación'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='multa',
+            index=models.Index(fields=['fecha_modificacion'], name='multa_modificacion_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum
+
+
+def poblar_saldos(apps, schema_editor):
+    Multa = apps.get_model('multas', 'Multa')
+    SaldoResidente = apps.get_model('multas', 'SaldoResidente')
+    db_alias = schema_editor.connection.alias
+    pendiente = Q(estado='pendiente')
+    filas = Multa.objects.using(db_alias).order_by().values('usuario_id').annotate(
+        pendientes=Count('id', filter=pendiente),
+        monto_pendiente=Sum('monto', filter=pendiente),
+        monto_pagado=Sum('monto', filter=~pendiente),
+        pendiente_mas_antigua=Min('fecha_creacion', filter=pendiente),
+    )
+    SaldoResidente.objects.using(db_alias).bulk_create([
+        SaldoResidente(
+            usuario_id=fila['usuario_id'],
+            pendientes=fila['pendientes'],
+            monto_pendiente=fila['monto_pendiente'] or 0,
+            monto_pagado=fila['monto_pagado'] or 0,
+            pendiente_mas_antigua=fila['pendiente_mas_antigua'],
+        )
+        for fila in filas
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multas', '0004_multa_fecha_modificacion'),
+        ('usuarios', '0003_usuario_fecha_modificacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoResidente',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='saldo_multas', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+                ('pendientes', models.IntegerField(default=0, verbose_name='Multas pendientes')),
+                ('monto_pendiente', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='Monto pendiente')),
+                ('monto_pagado', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='Monto pagado')),
+                ('pendiente_mas_antigua', models.DateField(blank=True, null=True, verbose_name='Pendiente más antigua')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Fecha de modificación')),
+            ],
+            options={
+                'verbose_name': 'Saldo de residente',
+                'verbose_name_plural': 'Saldos de residentes',
+            },
+        ),
+        migrations.RunPython(poblar_saldos, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,45 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from usuarios.models import Usuario
 
+class MultaQuerySet(models.QuerySet):
+    """
+    QuerySet de multas con proyecciones de los datos del usuario.
+
+    Cada proyección agrega mediante un JOIN solo las columnas de ``Usuario``
+    que necesita el serializer correspondiente, con el prefijo ``usuario_``,
+    para no cargar el modelo completo del usuario por cada fila.
+    """
+    def con_nombre_usuario(self):
+        return self.annotate(
+            usuario_first_name=models.F('usuario__first_name'),
+            usuario_last_name=models.F('usuario__last_name'),
+        )
+    
+    def con_detalle_usuario(self):
+        return self.con_nombre_usuario().annotate(
+            usuario_username=models.F('usuario__username'),
+            usuario_numero_residencia=models.F('usuario__numero_residencia'),
+            usuario_rol=models.F('usuario__rol'),
+        )
+    
+    def delete(self):
+        """
+        Elimina las multas y descuenta sus estados guardados de los saldos
+        de sus residentes, con un ``UPDATE`` para todos (``QuerySet.delete``
+        no pasa por ``Multa.delete``). Cubre también la acción de eliminar
+        del admin.
+        """
+        from .saldos import aplicar, estados_guardados
+        with transaction.atomic(using=self.db, savepoint=False):
+            anteriores = estados_guardados(self)
+            resultado = super().delete()
+            aplicar([(anterior, None) for anterior in anteriores])
+        return resultado
+    
+    delete.alters_data = True
+    delete.queryset_only = True
+
 class Multa(models.Model):
     """
     Modelo para gestionar las multas aplicadas a los residentes.
@@ -46,20 +84,119 @@ class Multa(models.Model):
         default='pendiente', 
         verbose_name=_("Estado")
     )
+    fecha_modificacion = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_("Fecha de modificación")
+    )
+    
+    objects = MultaQuerySet.as_manager()
     
     class Meta:
         verbose_name = _("Multa")
         verbose_name_plural = _("Multas")
         ordering = ['-fecha_creacion']
+        indexes = [
+            # Vista del residente: sus multas por estado, más recientes primero
+            models.Index(fields=['usuario', 'estado', '-fecha_creacion'], name='multa_usuario_estado_idx'),
+            # Filtro por estado del administrador y estadísticas por rango
+            models.Index(fields=['estado', 'fecha_creacion'], name='multa_estado_fecha_idx'),
+            # Orden por defecto y paginación por cursor (fecha_creacion, id)
+            models.Index(fields=['fecha_creacion', 'id'], name='multa_fecha_id_idx'),
+            # Paginación por cursor ordenando por monto
+            models.Index(fields=['monto', 'id'], name='multa_monto_id_idx'),
+            # Validadores de peticiones condicionales (ETag / Last-Modified)
+            models.Index(fields=['fecha_modificacion'], name='multa_modificacion_idx'),
+            # Multas pendientes por fecha (MySQL no soporta índices parciales y lo omite)
+            models.Index(
+                fields=['fecha_creacion'],
+                condition=models.Q(estado='pendiente'),
+                name='multa_pendiente_fecha_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"Multa {self.id} - {self.usuario.username} - ${self.monto}"
     
+    def save(self, *args, **kwargs):
+        """
+        Guarda la multa y actualiza el saldo de su residente en la misma
+        transacción.
+        """
+        from .saldos import aplicar, estado_guardado, estado_nuevo
+        with transaction.atomic(savepoint=False):
+            anterior = None if self._state.adding else estado_guardado(self.pk)
+            super().save(*args, **kwargs)
+            aplicar([(anterior, estado_nuevo(self, anterior, kwargs.get('update_fields')))])
+    
+    def delete(self, *args, **kwargs):
+        from .saldos import aplicar, estado_guardado
+        with transaction.atomic(savepoint=False):
+            anterior = estado_guardado(self.pk)
+            resultado = super().delete(*args, **kwargs)
+            aplicar([(anterior, None)])
+        return resultado
+    
     def marcar_como_pagada(self):
         """
         Marca la multa como pagada y registra la fecha de pago.
+        
+        Devuelve False si la multa ya estaba pagada.
         """
-        from django.utils import timezone
-        self.estado = 'pagado'
-        self.fecha_pago = timezone.now().date()
-        self.save()
+        from .pagos import marcar_pagada
+        return marcar_pagada(self)
+
+class DocumentoBusquedaMulta(models.Model):
+    """
+    Documento de búsqueda desnormalizado de una multa.
+
+    Contiene el motivo, la descripción y los datos del residente ya
+    normalizados (minúsculas y sin tildes), para que el backend de búsqueda
+    pueda responder con un índice en lugar de varios ``LIKE`` sobre un JOIN.
+    """
+    multa = models.OneToOneField(
+        Multa,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='documento_busqueda',
+        verbose_name=_("Multa")
+    )
+    documento = models.TextField(verbose_name=_("Documento"))
+    
+    class Meta:
+        verbose_name = _("Documento de búsqueda")
+        verbose_name_plural = _("Documentos de búsqueda")
+    
+    def __str__(self):
+        return f"Documento de búsqueda de la multa {self.multa_id}"
+
+
+class SaldoResidente(models.Model):
+    """
+    Resumen de las multas de un residente, mantenido en la misma transacción
+    que cada cambio de sus multas (ver ``multas.saldos``).
+    """
+    usuario = models.OneToOneField(
+        Usuario,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='saldo_multas',
+        verbose_name=_("Usuario")
+    )
+    pendientes = models.IntegerField(default=0, verbose_name=_("Multas pendientes"))
+    monto_pendiente = models.DecimalField(
+        max_digits=14, decimal_places=0, default=0, verbose_name=_("Monto pendiente")
+    )
+    monto_pagado = models.DecimalField(
+        max_digits=14, decimal_places=0, default=0, verbose_name=_("Monto pagado")
+    )
+    pendiente_mas_antigua = models.DateField(
+        null=True, blank=True, verbose_name=_("Pendiente más antigua")
+    )
+    fecha_modificacion = models.DateTimeField(auto_now=True, verbose_name=_("Fecha de modificación"))
+
+    class Meta:
+        verbose_name = _("Saldo de residente")
+        verbose_name_plural = _("Saldos de residentes")
+
+    def __str__(self):
+        return f"Saldo {self.usuario_id} - ${self.monto_pendiente}"
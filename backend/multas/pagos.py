@@ -0,0 +1,84 @@
+"""
+Marcado de multas como pagadas.
+
+El cambio de estado se hace con un ``UPDATE ... WHERE estado='pendiente'``
+condicional que escribe solo ``estado``, ``fecha_pago`` y ``fecha_modificacion``. Como la condición
+se evalúa en la base de datos, dos peticiones concurrentes sobre la misma
+multa no pueden marcarla ambas: solo una ve una fila actualizada.
+
+El saldo del residente y el aviso en la bandeja de salida de notificaciones
+se escriben dentro de la misma transacción.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from notificaciones.bandeja import encolar_multas
+from .estadisticas import invalidar_estadisticas
+from .models import Multa
+from .saldos import aplicar, cambio_pago
+
+
+def _campos_pago():
+    ahora = timezone.now()
+    return {'estado': 'pagado', 'fecha_pago': ahora.date(), 'fecha_modificacion': ahora}
+
+
+def marcar_pagada(multa):
+    """
+    Marca una multa como pagada si sigue pendiente.
+
+    Devuelve ``True`` si esta llamada hizo la transición y ``False`` si la
+    multa ya estaba pagada. La instancia se actualiza en memoria.
+    """
+    campos = _campos_pago()
+    with transaction.atomic():
+        actualizadas = Multa.objects.filter(pk=multa.pk, estado='pendiente').update(**campos)
+        if actualizadas:
+            aplicar([cambio_pago(multa)])
+            encolar_multas('multa_pagada', [multa])
+            transaction.on_commit(invalidar_estadisticas)
+
+    if actualizadas:
+        for campo, valor in campos.items():
+            setattr(multa, campo, valor)
+        return True
+
+    multa.refresh_from_db(fields=['estado', 'fecha_pago'])
+    return False
+
+
+def marcar_pagadas(ids, queryset=None):
+    """
+    Marca como pagadas las multas pendientes de ``ids`` con un solo UPDATE.
+
+    ``queryset`` restringe las multas visibles (por ejemplo, las del
+    residente). Devuelve un diccionario con las listas de ids ``marcadas``,
+    ``ya_pagadas`` y ``no_encontradas``.
+    """
+    if queryset is None:
+        queryset = Multa.objects.all()
+    ids = list(dict.fromkeys(ids))
+
+    with transaction.atomic():
+        # El bloqueo de filas garantiza que las pendientes leídas son las
+        # mismas que actualiza el UPDATE
+        filas = {
+            multa.pk: multa
+            for multa in queryset.order_by()
+            .filter(pk__in=ids)
+            .select_for_update()
+            .only('estado', 'usuario', 'motivo', 'monto')
+        }
+        estados = {pk: multa.estado for pk, multa in filas.items()}
+        pendientes = [pk for pk in ids if estados.get(pk) == 'pendiente']
+        if pendientes:
+            Multa.objects.filter(pk__in=pendientes, estado='pendiente').update(**_campos_pago())
+            aplicar([cambio_pago(filas[pk]) for pk in pendientes])
+            encolar_multas('multa_pagada', [filas[pk] for pk in pendientes])
+            transaction.on_commit(invalidar_estadisticas)
+
+    return {
+        'marcadas': pendientes,
+        'ya_pagadas': [pk for pk in ids if estados.get(pk) == 'pagado'],
+        'no_encontradas': [pk for pk in ids if pk not in estados],
+    }
@@ -0,0 +1,240 @@
+"""
+Saldo de multas por residente.
+
+``SaldoResidente`` guarda, por usuario, la cantidad y el monto de sus multas
+pendientes, el monto pagado y la fecha de la pendiente más antigua, para que
+el dashboard del residente lo lea con una búsqueda por clave primaria.
+
+Se mantiene de forma incremental: cada cambio de multas se describe como
+pares ``(antes, después)`` de ``EstadoSaldo`` y ``aplicar`` suma las
+diferencias de todos los residentes afectados con un solo ``UPDATE ...
+CASE``, en la transacción del cambio. La fecha de la pendiente más antigua
+de un residente cuyas pendientes cambiaron se vuelve a leer en ese mismo
+``UPDATE`` con una subconsulta sobre el índice (usuario, estado, fecha).
+
+``Multa.save``/``delete`` y ``MultaQuerySet.delete`` (que también usa la
+acción de eliminar del admin) aplican sus cambios. Los caminos que no pasan
+por ellos (``update`` y ``bulk_create``) llaman a ``aplicar`` directamente.
+``reconciliar`` recalcula todos los saldos desde las multas e informa las
+diferencias.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DecimalField, F, IntegerField, Min, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.utils import timezone
+
+from .models import Multa, SaldoResidente
+
+EstadoSaldo = namedtuple('EstadoSaldo', ['usuario_id', 'estado', 'monto'])
+
+CAMPOS_SALDO = ('usuario_id', 'estado', 'monto')
+
+
+def estado(multa):
+    return EstadoSaldo(multa.usuario_id, multa.estado, Decimal(multa.monto))
+
+
+def cambio_pago(multa):
+    """
+    Par ``(antes, después)`` de una multa pendiente que se marcó pagada.
+    """
+    actual = estado(multa)
+    return actual._replace(estado='pendiente'), actual._replace(estado='pagado')
+
+
+def estado_guardado(pk):
+    """
+    Estado de la multa en la base de datos, con la fila bloqueada hasta el
+    fin de la transacción para que dos cambios concurrentes no partan del
+    mismo estado.
+    """
+    fila = (
+        Multa.objects.filter(pk=pk).select_for_update()
+        .values_list(*CAMPOS_SALDO).first()
+    )
+    return EstadoSaldo(fila[0], fila[1], Decimal(fila[2])) if fila else None
+
+
+def estados_guardados(queryset):
+    """
+    Estados en la base de datos de las multas de ``queryset``, con las filas
+    bloqueadas hasta el fin de la transacción.
+    """
+    filas = queryset.order_by().select_for_update().values_list(*CAMPOS_SALDO)
+    return [EstadoSaldo(usuario_id, estado, Decimal(monto)) for usuario_id, estado, monto in filas]
+
+
+def estado_nuevo(multa, anterior, update_fields=None):
+    """
+    Estado guardado por ``multa.save(update_fields=...)``: los campos no
+    incluidos conservan su valor anterior.
+    """
+    nuevo = estado(multa)
+    if update_fields is None or anterior is None:
+        return nuevo
+    campos = {Multa._meta.get_field(campo).attname for campo in update_fields}
+    return EstadoSaldo(*(
+        valor if nombre in campos else previo
+        for nombre, valor, previo in zip(CAMPOS_SALDO, nuevo, anterior)
+    ))
+
+
+class _Diferencia:
+    __slots__ = ('pendientes', 'monto_pendiente', 'monto_pagado', 'cambia_pendiente')
+
+    def __init__(self):
+        self.pendientes = 0
+        self.monto_pendiente = Decimal(0)
+        self.monto_pagado = Decimal(0)
+        self.cambia_pendiente = False
+
+    def sumar(self, estado, signo):
+        if estado.estado == 'pendiente':
+            self.pendientes += signo
+            self.monto_pendiente += signo * estado.monto
+            self.cambia_pendiente = True
+        else:
+            self.monto_pagado += signo * estado.monto
+
+    def vacia(self):
+        return not (self.pendientes or self.monto_pendiente or self.monto_pagado or self.cambia_pendiente)
+
+
+def _caso(diferencias, campo, output_field):
+    return Case(
+        *[
+            When(pk=usuario_id, then=Value(getattr(diferencia, campo), output_field=output_field))
+            for usuario_id, diferencia in diferencias.items()
+            if getattr(diferencia, campo)
+        ],
+        default=Value(0, output_field=output_field),
+        output_field=output_field,
+    )
+
+
+def aplicar(cambios, batch_size=500):
+    """
+    Actualiza los saldos según ``cambios``, pares ``(antes, después)`` de
+    ``EstadoSaldo`` (``None`` para una multa creada o eliminada). Debe
+    llamarse después de escribir las multas y dentro de su transacción.
+    """
+    diferencias = {}
+    con_altas = set()
+    con_bajas = set()
+    for antes, despues in cambios:
+        if antes == despues:
+            continue
+        if antes is not None:
+            diferencias.setdefault(antes.usuario_id, _Diferencia()).sumar(antes, -1)
+            con_bajas.add(antes.usuario_id)
+        if despues is not None:
+            diferencias.setdefault(despues.usuario_id, _Diferencia()).sumar(despues, 1)
+            con_altas.add(despues.usuario_id)
+    diferencias = {pk: diferencia for pk, diferencia in diferencias.items() if not diferencia.vacia()}
+    if not diferencias:
+        return
+
+    with transaction.atomic(savepoint=False):
+        # Un residente sin multas previas todavía no tiene fila de saldo
+        nuevos = con_altas - con_bajas
+        if nuevos:
+            SaldoResidente.objects.bulk_create(
+                [SaldoResidente(usuario_id=pk) for pk in nuevos if pk in diferencias],
+                ignore_conflicts=True,
+            )
+
+        mas_antigua = Subquery(
+            Multa.objects
+            .filter(usuario_id=OuterRef('pk'), estado='pendiente')
+            .order_by('fecha_creacion')
+            .values('fecha_creacion')[:1]
+        )
+        ids = sorted(diferencias)
+        for inicio in range(0, len(ids), batch_size):
+            lote = {pk: diferencias[pk] for pk in ids[inicio:inicio + batch_size]}
+            recalcular = [pk for pk, diferencia in lote.items() if diferencia.cambia_pendiente]
+            monto = DecimalField(max_digits=14, decimal_places=0)
+            campos = {
+                'pendientes': F('pendientes') + _caso(lote, 'pendientes', IntegerField()),
+                'monto_pendiente': F('monto_pendiente') + _caso(lote, 'monto_pendiente', monto),
+                'monto_pagado': F('monto_pagado') + _caso(lote, 'monto_pagado', monto),
+                'fecha_modificacion': timezone.now(),
+            }
+            if recalcular:
+                campos['pendiente_mas_antigua'] = Case(
+                    When(pk__in=recalcular, then=mas_antigua),
+                    default=F('pendiente_mas_antigua'),
+                )
+            SaldoResidente.objects.filter(pk__in=list(lote)).update(**campos)
+
+
+def calcular_saldos():
+    """
+    Saldos calculados desde las multas: ``{usuario_id: {campo: valor}}``.
+    """
+    pendiente = Q(estado='pendiente')
+    filas = (
+        Multa.objects.order_by().values('usuario_id').annotate(
+            pendientes=Count('id', filter=pendiente),
+            monto_pendiente=Sum('monto', filter=pendiente),
+            monto_pagado=Sum('monto', filter=~pendiente),
+            pendiente_mas_antigua=Min('fecha_creacion', filter=pendiente),
+        )
+    )
+    return {
+        fila.pop('usuario_id'): {
+            **fila,
+            'monto_pendiente': fila['monto_pendiente'] or Decimal(0),
+            'monto_pagado': fila['monto_pagado'] or Decimal(0),
+        }
+        for fila in filas
+    }
+
+
+CAMPOS_RESUMEN = ('pendientes', 'monto_pendiente', 'monto_pagado', 'pendiente_mas_antigua')
+
+VACIO = {'pendientes': 0, 'monto_pendiente': Decimal(0), 'monto_pagado': Decimal(0), 'pendiente_mas_antigua': None}
+
+
+def reconciliar(corregir=True, batch_size=1000):
+    """
+    Compara los saldos guardados con los calculados desde las multas y, con
+    ``corregir``, reescribe los que difieren. Devuelve la lista de
+    diferencias ``(usuario_id, guardado, calculado)``; ``guardado`` es
+    ``None`` si faltaba la fila.
+
+    Bloquea los saldos durante el cálculo: un cambio de multas concurrente
+    espera y luego aplica su diferencia sobre el valor reconstruido.
+    """
+    with transaction.atomic():
+        guardados = {
+            saldo.pk: saldo
+            for saldo in SaldoResidente.objects.select_for_update().order_by('pk')
+        }
+        calculados = calcular_saldos()
+
+        diferencias = []
+        nuevos = []
+        cambiados = []
+        for usuario_id in sorted(guardados.keys() | calculados.keys()):
+            calculado = calculados.get(usuario_id, VACIO)
+            saldo = guardados.get(usuario_id)
+            if saldo is None:
+                diferencias.append((usuario_id, None, calculado))
+                nuevos.append(SaldoResidente(usuario_id=usuario_id, **calculado))
+                continue
+            actual = {campo: getattr(saldo, campo) for campo in CAMPOS_RESUMEN}
+            if actual != calculado:
+                diferencias.append((usuario_id, actual, calculado))
+                for campo, valor in calculado.items():
+                    setattr(saldo, campo, valor)
+                cambiados.append(saldo)
+
+        if corregir:
+            SaldoResidente.objects.bulk_create(nuevos, batch_size=batch_size)
+            SaldoResidente.objects.bulk_update(cambiados, CAMPOS_RESUMEN, batch_size=batch_size)
+    return diferencias
@@ -3,6 +3,16 @@ from .models import Multa
 from usuarios.models import Usuario
 from usuarios.serializers import UsuarioSerializer
 
+def dato_usuario(obj, campo):
+    """
+    Lee un campo del usuario de la multa desde la proyección anotada por
+    ``MultaQuerySet``; si la instancia no fue anotada, usa la relación.
+    """
+    try:
+        return getattr(obj, f'usuario_{campo}')
+    except AttributeError:
+        return getattr(obj.usuario, campo)
+
 class MultaSerializer(serializers.ModelSerializer):
     """
     Serializer para el modelo Multa con información básica.
@@ -18,7 +28,7 @@ class MultaSerializer(serializers.ModelSerializer):
         read_only_fields = ['fecha_creacion']
     
     def get_usuario_nombre(self, obj):
-        return f"{obj.usuario.first_name} {obj.usuario.last_name}"
+        return f"{dato_usuario(obj, 'first_name')} {dato_usuario(obj, 'last_name')}"
 
 class MultaDetalleSerializer(serializers.ModelSerializer):
     """
@@ -36,11 +46,11 @@ class MultaDetalleSerializer(serializers.ModelSerializer):
     
     def get_usuario_detalle(self, obj):
         return {
-            'id': obj.usuario.id,
-            'username': obj.usuario.username,
-            'nombre': f"{obj.usuario.first_name} {obj.usuario.last_name}",
-            'numero_residencia': obj.usuario.numero_residencia,
-            'rol': obj.usuario.rol
+            'id': obj.usuario_id,
+            'username': dato_usuario(obj, 'username'),
+            'nombre': f"{dato_usuario(obj, 'first_name')} {dato_usuario(obj, 'last_name')}",
+            'numero_residencia': dato_usuario(obj, 'numero_residencia'),
+            'rol': dato_usuario(obj, 'rol')
         }
 
 class MultaCreateUpdateSerializer(serializers.ModelSerializer):
@@ -65,3 +75,61 @@ class MultaCreateUpdateSerializer(serializers.ModelSerializer):
             from django.utils import timezone
             data['fecha_pago'] = timezone.now().date()
         return data
+
+class MultaPlantillaSerializer(serializers.Serializer):
+    """
+    Datos comunes de una multa, sin el usuario, para la emisión masiva.
+    """
+    motivo = serializers.CharField(max_length=255)
+    descripcion = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    monto = serializers.DecimalField(max_digits=10, decimal_places=0)
+
+class MultaMasivaItemSerializer(MultaPlantillaSerializer):
+    """
+    Multa individual dentro de una emisión masiva.
+    
+    El usuario se recibe como id y el rol se valida para todos los ítems
+    en una sola consulta, en lugar de cargar cada usuario por separado.
+    """
+    usuario = serializers.IntegerField()
+
+class FiltroResidentesSerializer(serializers.Serializer):
+    """
+    Selección de residentes activos a los que se aplica una plantilla.
+    """
+    numero_residencia_prefijo = serializers.CharField(max_length=20)
+
+class EmisionMasivaSerializer(serializers.Serializer):
+    """
+    Serializer para emitir multas en bloque.
+    
+    Acepta una lista de multas (``multas``) o una plantilla aplicada a los
+    residentes que cumplen un filtro (``plantilla`` + ``filtro``).
+    """
+    multas = serializers.ListField(child=serializers.DictField(), required=False, allow_empty=False)
+    plantilla = MultaPlantillaSerializer(required=False)
+    filtro = FiltroResidentesSerializer(required=False)
+    batch_size = serializers.IntegerField(required=False, min_value=1, max_value=5000, default=500)
+    
+    def validate(self, data):
+        por_lista = 'multas' in data
+        por_plantilla = 'plantilla' in data or 'filtro' in data
+        if por_lista == por_plantilla:
+            raise serializers.ValidationError(
+                "Debe enviar 'multas' o bien 'plantilla' y 'filtro'."
+            )
+        if por_plantilla and not ('plantilla' in data and 'filtro' in data):
+            raise serializers.ValidationError(
+                "La emisión por plantilla requiere 'plantilla' y 'filtro'."
+            )
+        return data
+
+class MarcarPagadasSerializer(serializers.Serializer):
+    """
+    Serializer para marcar varias multas como pagadas.
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=5000
+    )
@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from usuarios.models import Usuario
+from .busqueda import indexar_multas
+from .estadisticas import invalidar_estadisticas
+from .models import Multa
+
+# Campos del usuario que se muestran con sus multas o forman parte de su
+# documento de búsqueda
+CAMPOS_USUARIO_MULTA = {'username', 'first_name', 'last_name', 'numero_residencia', 'rol'}
+
+
+@receiver([post_save, post_delete], sender=Multa)
+def invalidar_estadisticas_multa(sender, **kwargs):
+    """
+    Invalida la foto de estadísticas cuando cambia una multa.
+
+    Se espera al commit para que otra petición no vuelva a guardar en la
+    caché datos de una transacción que todavía no es visible.
+    """
+    transaction.on_commit(invalidar_estadisticas)
+
+
+@receiver(post_save, sender=Multa)
+def indexar_multa(sender, instance, **kwargs):
+    """
+    Actualiza el documento de búsqueda de la multa guardada.
+    """
+    indexar_multas(Multa.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Usuario)
+def actualizar_multas_usuario(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Cuando cambian los datos del usuario que se muestran con sus multas,
+    actualiza los documentos de búsqueda y la fecha de modificación de esas
+    multas (para que cambie su ETag). La residencia además agrupa las
+    estadísticas, así que también se invalidan.
+
+    Solo se actúa si alguno de esos campos cambió de verdad: un ``save()``
+    completo por otro motivo (cambio de contraseña, primer login) no toca
+    las multas.
+    """
+    if created:
+        return
+    cambiados = instance.campos_cambiados(CAMPOS_USUARIO_MULTA, update_fields)
+    if not cambiados:
+        return
+    multas = Multa.objects.filter(usuario=instance)
+    multas.update(fecha_modificacion=timezone.now())
+    indexar_multas(multas)
+    if 'numero_residencia' in cambiados:
+        transaction.on_commit(invalidar_estadisticas)
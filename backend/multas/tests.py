@@ -1,3 +1,823 @@
-from django.test import TestCase
+import csv
+import random
+import threading
+import time
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from notificaciones.models import EventoNotificacion
+from usuarios.models import Usuario
+from .models import Multa, SaldoResidente
+from .saldos import VACIO, calcular_saldos, reconciliar
+
+
+class MultaAPITestCase(TestCase):
+    """
+    Base con un administrador, un residente y utilidades para crear multas.
+    """
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(
+            username='admin', password='admin123', rol='admin'
+        )
+        self.residente = Usuario.objects.create_user(
+            username='residente', password='residente123', rol='residente',
+            first_name='Ana', last_name='Pérez', numero_residencia='101'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def crear_multas(self, cantidad, usuario=None, **extra):
+        usuario = usuario or self.residente
+        multas = Multa.objects.bulk_create([
+            Multa(usuario=usuario, motivo=f'Motivo {i}', monto=1000 + i, **extra)
+            for i in range(cantidad)
+        ])
+        # auto_now_add fija la fecha de hoy; se reparten para probar el orden
+        for i, multa in enumerate(Multa.objects.order_by('id')):
+            Multa.objects.filter(pk=multa.pk).update(
+                fecha_creacion=date(2025, 1, 1) + timedelta(days=i // 3)
+            )
+        return multas
+
+
+class PaginacionCursorTests(MultaAPITestCase):
+
+    def test_sin_parametros_devuelve_lista_completa(self):
+        self.crear_multas(5)
+        response = self.client.get('/api/multas/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 5)
+
+    def recorrer(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_recorre_todas_las_paginas_sin_repetir(self):
+        self.crear_multas(23)
+        esperado = list(
+            Multa.objects.order_by('-fecha_creacion', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(self.recorrer('/api/multas/?page_size=5'), esperado)
+
+    def test_respeta_ordering_filter(self):
+        self.crear_multas(12)
+        esperado = list(Multa.objects.order_by('monto', 'id').values_list('id', flat=True))
+        self.assertEqual(self.recorrer('/api/multas/?page_size=5&ordering=monto'), esperado)
+
+    def test_pagina_anterior(self):
+        self.crear_multas(10)
+        primera = self.client.get('/api/multas/?page_size=4').data
+        segunda = self.client.get(primera['next']).data
+        anterior = self.client.get(segunda['previous']).data
+        self.assertEqual(
+            [m['id'] for m in anterior['results']],
+            [m['id'] for m in primera['results']],
+        )
+
+    def test_conteo_aproximado(self):
+        self.crear_multas(7)
+        response = self.client.get('/api/multas/?page_size=2&count=1')
+        self.assertEqual(response.data['count'], 7)
+        self.assertIn('count_is_approximate', response.data)
+
+    def test_cursor_invalido(self):
+        response = self.client.get('/api/multas/?cursor=no-es-un-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+class ConsultasPorAccionTests(MultaAPITestCase):
+    """
+    El número de consultas de list y retrieve no debe crecer con las filas:
+    una para el validador de la petición condicional y una para los datos.
+    """
+    def contar_consultas(self, url):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(contexto.captured_queries)
+
+    def test_list_constante(self):
+        otro = Usuario.objects.create_user(username='otro', password='x', rol='residente')
+        self.crear_multas(3)
+        pocas = self.contar_consultas('/api/multas/')
+        self.crear_multas(30, usuario=otro)
+        self.assertEqual(self.contar_consultas('/api/multas/'), pocas)
+        self.assertEqual(pocas, 2)
+
+    def test_list_residente_constante(self):
+        self.client.force_authenticate(self.residente)
+        self.crear_multas(3)
+        pocas = self.contar_consultas('/api/multas/')
+        self.crear_multas(30)
+        self.assertEqual(self.contar_consultas('/api/multas/'), pocas)
+
+    def test_retrieve_consultas_constantes(self):
+        multa = self.crear_multas(3)[0]
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/multas/{multa.pk}/')
+        self.assertEqual(response.data['usuario_detalle'], {
+            'id': self.residente.id,
+            'username': 'residente',
+            'nombre': 'Ana Pérez',
+            'numero_residencia': '101',
+            'rol': 'residente',
+        })
+
+    def test_nombre_usuario_en_lista(self):
+        self.crear_multas(1)
+        response = self.client.get('/api/multas/')
+        self.assertEqual(response.data[0]['usuario_nombre'], 'Ana Pérez')
+
+
+class CamposDinamicosTests(MultaAPITestCase):
+
+    def consulta_de_datos(self, url):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # La primera consulta es la del validador de la petición condicional
+        return response, contexto.captured_queries[-1]['sql']
+
+    def test_fields_reduce_respuesta_y_consulta(self):
+        self.crear_multas(3)
+        response, sql = self.consulta_de_datos('/api/multas/?fields=id,monto,estado')
+        self.assertEqual(list(response.data[0]), ['id', 'monto', 'estado'])
+        self.assertNotIn('"descripcion"', sql)
+        self.assertNotIn('usuarios_usuario', sql)
+
+    def test_omit(self):
+        self.crear_multas(1)
+        response, sql = self.consulta_de_datos('/api/multas/?omit=descripcion,usuario_nombre')
+        self.assertEqual(
+            list(response.data[0]),
+            ['id', 'usuario', 'motivo', 'monto', 'fecha_creacion', 'fecha_pago', 'estado'],
+        )
+        self.assertNotIn('"descripcion"', sql)
+        self.assertNotIn('usuarios_usuario', sql)
+
+    def test_campo_calculado_mantiene_join(self):
+        self.crear_multas(1)
+        response, sql = self.consulta_de_datos('/api/multas/?fields=id,usuario_nombre')
+        self.assertEqual(response.data[0]['usuario_nombre'], 'Ana Pérez')
+        self.assertIn('usuarios_usuario', sql)
+
+    def test_retrieve(self):
+        multa = self.crear_multas(1)[0]
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/multas/{multa.pk}/?fields=id,usuario_detalle')
+        self.assertEqual(list(response.data), ['id', 'usuario_detalle'])
+        self.assertEqual(response.data['usuario_detalle']['nombre'], 'Ana Pérez')
+
+    def test_paginacion_con_campos(self):
+        self.crear_multas(7)
+        esperado = list(Multa.objects.order_by('monto', 'id').values_list('id', flat=True))
+        url = '/api/multas/?fields=id&ordering=monto&page_size=3'
+        ids = []
+        while url:
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            ids.extend(fila['id'] for fila in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(ids, esperado)
+
+    def test_campo_desconocido(self):
+        response = self.client.get('/api/multas/?fields=id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', str(response.data['fields']))
+
+    def test_formato_columnas(self):
+        self.crear_multas(3)
+        filas = self.client.get('/api/multas/?fields=id,monto').data
+        response = self.client.get('/api/multas/?fields=id,monto&formato=columnas')
+        self.assertEqual(response.data, {
+            'id': [fila['id'] for fila in filas],
+            'monto': [fila['monto'] for fila in filas],
+        })
+        paginada = self.client.get('/api/multas/?formato=columnas&page_size=2').data
+        self.assertEqual(len(paginada['results']['id']), 2)
+        self.assertIn('usuario_nombre', paginada['results'])
+        vacia = self.client.get('/api/multas/?estado=pagado&formato=columnas&fields=id').data
+        self.assertEqual(vacia, {'id': []})
+
+
+class EstadisticasTests(MultaAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def consultas_multas(self, consultas):
+        return [c['sql'] for c in consultas.captured_queries if 'multas_multa' in c['sql']]
+
+    def test_una_consulta_y_luego_cache(self):
+        self.crear_multas(4)
+        Multa.objects.filter(monto__in=[1000, 1001]).update(estado='pagado')
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/multas/estadisticas/')
+        self.assertEqual(len(self.consultas_multas(consultas)), 1)
+        self.assertEqual(response.data, {
+            'total_multas': 4,
+            'multas_pendientes': 2,
+            'multas_pagadas': 2,
+            'monto_pendiente': 2005,
+            'monto_pagado': 2001,
+        })
+        # La foto y su versión se leen de la caché compartida en una consulta
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get('/api/multas/estadisticas/')
+        self.assertEqual(self.consultas_multas(consultas), [])
+        self.assertEqual(len(consultas), 1)
+
+    def test_invalida_al_guardar_y_eliminar(self):
+        self.crear_multas(2)
+        self.assertEqual(self.client.get('/api/multas/estadisticas/').data['total_multas'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            multa = Multa.objects.create(usuario=self.residente, motivo='Ruido', monto=500)
+        self.assertEqual(self.client.get('/api/multas/estadisticas/').data['total_multas'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            multa.delete()
+        self.assertEqual(self.client.get('/api/multas/estadisticas/').data['total_multas'], 2)
+
+    def test_invalida_al_cambiar_la_residencia(self):
+        self.crear_multas(2)
+        url = '/api/multas/estadisticas/?agrupar_por=residencia'
+        self.assertEqual(self.client.get(url).data['grupos'][0]['grupo'], '101')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.residente.numero_residencia = '202'
+            self.residente.save()
+        self.assertEqual(self.client.get(url).data['grupos'][0]['grupo'], '202')
+
+    def test_foto_de_otra_version(self):
+        # Otro proceso invalidó la versión: la foto guardada ya no sirve
+        self.crear_multas(2)
+        self.client.get('/api/multas/estadisticas/')
+        Multa.objects.filter(monto=1000).delete()
+        cache.set('multas:estadisticas:version', 'de-otro-proceso', None)
+        self.assertEqual(self.client.get('/api/multas/estadisticas/').data['total_multas'], 1)
+
+    def test_rango_y_agrupacion(self):
+        self.crear_multas(6)
+        response = self.client.get(
+            '/api/multas/estadisticas/?desde=2025-01-02&agrupar_por=mes'
+        )
+        self.assertEqual(response.data['total_multas'], 3)
+        self.assertEqual(len(response.data['grupos']), 1)
+        self.assertEqual(response.data['grupos'][0]['grupo'], date(2025, 1, 1))
+
+        response = self.client.get('/api/multas/estadisticas/?agrupar_por=residencia')
+        self.assertEqual(response.data['grupos'][0]['grupo'], '101')
+        self.assertEqual(response.data['grupos'][0]['total_multas'], 6)
+
+    def test_parametros_invalidos(self):
+        response = self.client.get('/api/multas/estadisticas/?desde=ayer&agrupar_por=x')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('desde', response.data)
+        self.assertIn('agrupar_por', response.data)
+
+
+class AuditoriaIndicesTests(TestCase):
+
+    def test_consultas_de_las_vistas_usan_indices(self):
+        salida = StringIO()
+        call_command('auditar_indices', stdout=salida)
+        self.assertNotIn('SCAN    multas.list', salida.getvalue())
+
+
+class BusquedaTests(MultaAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.otro = Usuario.objects.create_user(
+            username='jpena', password='x', rol='residente',
+            first_name='José', last_name='Peña'
+        )
+        self.ruido = Multa.objects.create(
+            usuario=self.residente, motivo='Ruidos molestos', monto=1000,
+            descripcion='Música después de las 23:00'
+        )
+        self.mascota = Multa.objects.create(
+            usuario=self.otro, motivo='Mascota sin correa', monto=2000
+        )
+
+    def buscar(self, termino):
+        response = self.client.get('/api/multas/', {'search': termino})
+        self.assertEqual(response.status_code, 200)
+        return {item['id'] for item in response.data}
+
+    def test_prefijo_y_varios_terminos(self):
+        self.assertEqual(self.buscar('ruid'), {self.ruido.id})
+        self.assertEqual(self.buscar('ruido ana'), {self.ruido.id})
+        self.assertEqual(self.buscar('ruido jose'), set())
+
+    def test_ignora_tildes(self):
+        self.assertEqual(self.buscar('pena'), {self.mascota.id})
+        self.assertEqual(self.buscar('Peña'), {self.mascota.id})
+        self.assertEqual(self.buscar('musica'), {self.ruido.id})
+
+    def test_actualiza_al_guardar(self):
+        self.mascota.motivo = 'Estacionamiento indebido'
+        self.mascota.save()
+        self.assertEqual(self.buscar('mascota'), set())
+        self.assertEqual(self.buscar('estacionamiento'), {self.mascota.id})
+
+    def test_actualiza_al_cambiar_nombre_del_usuario(self):
+        self.otro.last_name = 'Soto'
+        self.otro.save()
+        self.assertEqual(self.buscar('soto'), {self.mascota.id})
+
+    def test_backend_documento(self):
+        with self.settings(MULTAS_BUSQUEDA_BACKEND='multas.busqueda.DocumentoBackend'):
+            self.assertEqual(self.buscar('pen mascota'), {self.mascota.id})
+            self.assertEqual(self.buscar('ota'), set())
+
+    def test_mysql_sin_palabras_cortas_ni_vacias_en_el_match(self):
+        from .busqueda import MySQLFullTextBackend
+        queryset = MySQLFullTextBackend().filtrar(Multa.objects.all(), ['ruido', 'de', 'an', 'perez'])
+        sql, params = queryset.query.sql_with_params()
+        self.assertIn('+ruido* +perez*', params)
+        self.assertNotIn('de*', ' '.join(str(param) for param in params))
+        self.assertEqual(sql.count('MATCH'), 1)
+
+        # Sin términos indexables no hay MATCH y se busca en el documento
+        queryset = MySQLFullTextBackend().filtrar(Multa.objects.all(), ['de', 'an'])
+        self.assertNotIn('MATCH', str(queryset.query))
+        self.assertEqual(set(queryset.values_list('id', flat=True)), {self.ruido.id})
+
+    def test_sin_termino_devuelve_todo(self):
+        self.assertEqual(self.buscar(''), {self.ruido.id, self.mascota.id})
+
+
+class EmisionMasivaTests(MultaAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.torre_b = [
+            Usuario.objects.create_user(
+                username=f'b{i}', password='x', rol='residente',
+                numero_residencia=f'B-{i:03d}', last_name='Torres'
+            )
+            for i in range(3)
+        ]
+
+    def test_lista_con_errores_por_item(self):
+        response = self.client.post('/api/multas/emision-masiva/', {
+            'multas': [
+                {'usuario': self.residente.id, 'motivo': 'Ruido', 'monto': 1000},
+                {'usuario': self.admin.id, 'motivo': 'Ruido', 'monto': 1000},
+                {'usuario': 999999, 'motivo': 'Ruido', 'monto': 1000},
+                {'usuario': self.residente.id, 'monto': 1000},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['creadas'], 1)
+        self.assertEqual(response.data['rechazadas'], 3)
+        resultados = response.data['resultados']
+        self.assertEqual(Multa.objects.get().pk, resultados[0]['id'])
+        self.assertIn('usuario', resultados[1]['errores'])
+        self.assertIn('usuario', resultados[2]['errores'])
+        self.assertIn('motivo', resultados[3]['errores'])
+
+    def test_plantilla_con_filtro(self):
+        Usuario.objects.filter(pk=self.torre_b[2].pk).update(is_active=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/multas/emision-masiva/', {
+                'plantilla': {'motivo': 'Basura en pasillo', 'monto': 5000},
+                'filtro': {'numero_residencia_prefijo': 'B-'},
+                'batch_size': 1,
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['creadas'], 2)
+        self.assertEqual(
+            set(Multa.objects.values_list('usuario_id', flat=True)),
+            {self.torre_b[0].id, self.torre_b[1].id},
+        )
+        # Las multas quedan indexadas y las estadísticas actualizadas
+        busqueda = self.client.get('/api/multas/', {'search': 'basura torres'})
+        self.assertEqual(len(busqueda.data), 2)
+        estadisticas = self.client.get('/api/multas/estadisticas/')
+        self.assertEqual(estadisticas.data['total_multas'], 2)
+
+    def test_consultas_constantes(self):
+        def emitir(cantidad):
+            with CaptureQueriesContext(connection) as contexto:
+                self.client.post('/api/multas/emision-masiva/', {
+                    'multas': [
+                        {'usuario': self.residente.id, 'motivo': 'Ruido', 'monto': 1000}
+                    ] * cantidad,
+                }, format='json')
+            return len(contexto.captured_queries)
+        self.assertEqual(emitir(2), emitir(40))
+
+    def test_ids_sin_retorno_de_bulk_create(self):
+        # Como en MySQL: bulk_create no asigna los ids
+        Multa.objects.create(usuario=self.torre_b[0], motivo='Ruido', monto=1000)
+        multas = [
+            {'usuario': self.residente.id, 'motivo': 'Ruido', 'monto': 1000},
+            {'usuario': self.torre_b[0].id, 'motivo': 'Ruido', 'monto': 1000},
+            {'usuario': self.residente.id, 'motivo': 'Ruido', 'monto': 1000},
+            {'usuario': self.residente.id, 'motivo': 'Basura', 'monto': 2000},
+        ]
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            response = self.client.post('/api/multas/emision-masiva/', {'multas': multas}, format='json')
+        self.assertEqual(response.status_code, 201)
+        ids = [resultado['id'] for resultado in response.data['resultados']]
+        self.assertNotIn(None, ids)
+        self.assertEqual(len(set(ids)), 4)
+        for pk, datos in zip(ids, multas):
+            multa = Multa.objects.get(pk=pk)
+            self.assertEqual(
+                (multa.usuario_id, multa.motivo, multa.monto),
+                (datos['usuario'], datos['motivo'], datos['monto']),
+            )
+        avisos = EventoNotificacion.objects.filter(tipo='multa_creada')
+        self.assertEqual(sorted(evento.datos['multa'] for evento in avisos), sorted(ids))
+        self.assertEqual(
+            Multa.objects.filter(pk__in=ids, documento_busqueda__isnull=False).count(), 4,
+        )
+
+    def test_requiere_lista_o_plantilla(self):
+        response = self.client.post('/api/multas/emision-masiva/', {
+            'plantilla': {'motivo': 'Ruido', 'monto': 1000},
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_solo_administradores(self):
+        self.client.force_authenticate(self.residente)
+        response = self.client.post('/api/multas/emision-masiva/', {
+            'multas': [{'usuario': self.residente.id, 'motivo': 'Ruido', 'monto': 1000}],
+        }, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class ExportacionTests(MultaAPITestCase):
+
+    def leer_csv(self, response):
+        self.assertTrue(response.streaming)
+        texto = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(StringIO(texto)))
+
+    def test_csv_con_filtros_y_orden(self):
+        self.crear_multas(4)
+        self.crear_multas(2, estado='pagado')
+        response = self.client.get('/api/multas/exportar/?estado=pendiente&ordering=monto')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment; filename="multas.csv"', response['Content-Disposition'])
+        filas = self.leer_csv(response)
+        self.assertEqual(filas[0][:3], ['ID', 'Residente', 'Residencia'])
+        self.assertEqual(len(filas), 5)
+        self.assertEqual([f[6] for f in filas[1:]], ['1000', '1001', '1002', '1003'])
+        self.assertEqual(filas[1][1], 'Ana Pérez')
+
+    def test_residente_solo_exporta_sus_multas(self):
+        otro = Usuario.objects.create_user(username='otro', password='x', rol='residente')
+        self.crear_multas(2)
+        self.crear_multas(3, usuario=otro)
+        self.client.force_authenticate(self.residente)
+        filas = self.leer_csv(self.client.get('/api/multas/exportar/'))
+        self.assertEqual(len(filas), 3)
+
+    def test_xlsx(self):
+        self.crear_multas(3)
+        response = self.client.get('/api/multas/exportar/?formato=xlsx&ordering=-monto')
+        self.assertEqual(response.status_code, 200)
+        libro = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(libro.testzip())
+        hoja = libro.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertEqual(hoja.count('<row>'), 4)
+        self.assertLess(hoja.index('<v>1002</v>'), hoja.index('<v>1000</v>'))
+        self.assertIn('Ana Pérez', hoja)
+
+    def test_textos_con_formula(self):
+        Multa.objects.create(usuario=self.residente, motivo='=HYPERLINK("http://x")', monto=1000)
+        Multa.objects.create(usuario=self.residente, motivo='-2+3', monto=1001, descripcion='@SUM(A1)')
+        Multa.objects.create(usuario=self.residente, motivo='\tTab', monto=1002, descripcion='normal')
+        filas = self.leer_csv(self.client.get('/api/multas/exportar/?ordering=monto'))
+        columnas = filas[0].index('Motivo'), filas[0].index('Descripción')
+        self.assertEqual(
+            [[f[i] for i in columnas] for f in filas[1:]],
+            [["'=HYPERLINK(\"http://x\")", ''], ["'-2+3", "'@SUM(A1)"], ["'\tTab", 'normal']],
+        )
+        self.assertEqual(filas[1][6], '1000')
+
+        response = self.client.get('/api/multas/exportar/?formato=xlsx&ordering=monto')
+        libro = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        hoja = libro.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertNotIn('<f>', hoja)
+        self.assertIn('<c t="inlineStr"><is><t xml:space="preserve">=HYPERLINK("http://x")</t></is></c>', hoja)
+
+    def test_formato_invalido(self):
+        self.assertEqual(self.client.get('/api/multas/exportar/?formato=pdf').status_code, 400)
+
+    def test_lotes_por_keyset(self):
+        from api.exportacion import iterar_por_lotes
+        self.crear_multas(7)
+        queryset = Multa.objects.values('id', 'fecha_creacion')
+        esperado = list(queryset.order_by('-fecha_creacion', '-id'))
+        with CaptureQueriesContext(connection) as consultas:
+            filas = list(iterar_por_lotes(queryset, 'fecha_creacion', True, chunk_size=3, keyset=True))
+        self.assertEqual(filas, esperado)
+        self.assertEqual(len(consultas), 4)
+
+
+class MarcarPagadaTests(MultaAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.pendiente, self.pagada = self.crear_multas(2)
+        Multa.objects.filter(pk=self.pagada.pk).update(estado='pagado')
+
+    def test_marca_una_vez(self):
+        url = f'/api/multas/{self.pendiente.pk}/marcar_como_pagada/'
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['estado'], 'pagado')
+        self.assertIsNotNone(response.data['fecha_pago'])
+        self.assertEqual(self.client.post(url).status_code, 400)
+
+    def test_solo_escribe_campos_de_pago(self):
+        with CaptureQueriesContext(connection) as contexto:
+            self.assertTrue(self.pendiente.marcar_como_pagada())
+        update, = [
+            q['sql'] for q in contexto.captured_queries
+            if q['sql'].startswith('UPDATE') and 'multas_multa' in q['sql'].split(' SET ')[0]
+        ]
+        self.assertNotIn('motivo', update)
+        self.assertIn("'pendiente'", update)
+        self.assertFalse(self.pendiente.marcar_como_pagada())
+
+    def test_lote(self):
+        response = self.client.post('/api/multas/marcar-pagadas/', {
+            'ids': [self.pendiente.pk, self.pagada.pk, 999999],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {
+            'marcadas': [self.pendiente.pk],
+            'ya_pagadas': [self.pagada.pk],
+            'no_encontradas': [999999],
+        })
+        self.assertFalse(Multa.objects.filter(estado='pendiente').exists())
+
+
+class MarcarPagadaConcurrenciaTests(TransactionTestCase):
+    """
+    Muchos hilos intentan marcar la misma multa: solo uno debe lograrlo.
+    """
+    hilos = 12
+
+    def test_una_sola_transicion(self):
+        residente = Usuario.objects.create(username='residente', rol='residente')
+        multa = Multa.objects.create(usuario=residente, motivo='Ruido', monto=1000)
+        barrera = threading.Barrier(self.hilos)
+        resultados = []
+
+        def marcar():
+            try:
+                instancia = Multa.objects.get(pk=multa.pk)
+                barrera.wait()
+                while True:
+                    try:
+                        resultados.append(instancia.marcar_como_pagada())
+                        break
+                    except OperationalError:
+                        # SQLite en memoria responde "locked" en vez de esperar
+                        time.sleep(0.001)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=marcar) for _ in range(self.hilos)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(len(resultados), self.hilos)
+        self.assertEqual(resultados.count(True), 1)
+        self.assertEqual(Multa.objects.get(pk=multa.pk).estado, 'pagado')
+
+
+class PeticionCondicionalTests(MultaAPITestCase):
+
+    def test_list_304_hasta_que_cambian_los_datos(self):
+        multa, _ = self.crear_multas(2)
+        response = self.client.get('/api/multas/')
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('Last-Modified', self.client.get(f'/api/multas/{multa.pk}/'))
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/multas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        multa.marcar_como_pagada()
+        response = self.client.get('/api/multas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_cambia_al_eliminar_o_filtrar(self):
+        multa, _ = self.crear_multas(2)
+        etag = self.client.get('/api/multas/')['ETag']
+        filtrada = self.client.get('/api/multas/?estado=pagado', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(filtrada.status_code, 200)
+        multa.delete()
+        self.assertEqual(self.client.get('/api/multas/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        # Solo con If-Modified-Since tampoco hay un 304 viejo
+        response = self.client.get('/api/multas/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+    def test_cambio_de_nombre_del_residente(self):
+        multa, = self.crear_multas(1)
+        etag = self.client.get(f'/api/multas/{multa.pk}/')['ETag']
+        self.assertEqual(
+            self.client.get(f'/api/multas/{multa.pk}/', HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        self.residente.first_name = 'Ana María'
+        self.residente.save()
+        response = self.client.get(f'/api/multas/{multa.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['usuario_detalle']['nombre'], 'Ana María Pérez')
+
+    def test_guardar_sin_cambios_visibles_no_toca_las_multas(self):
+        multa, = self.crear_multas(1)
+        etag = self.client.get(f'/api/multas/{multa.pk}/')['ETag']
+        residente = Usuario.objects.get(pk=self.residente.pk)
+        residente.set_password('otra-clave')
+        residente.first_login = False
+        with CaptureQueriesContext(connection) as consultas:
+            residente.save()
+        self.assertFalse([c for c in consultas.captured_queries if 'multas_' in c['sql']])
+        self.assertEqual(
+            self.client.get(f'/api/multas/{multa.pk}/', HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        # Un segundo cambio sobre la misma instancia se compara con lo guardado
+        residente.last_name = 'Soto'
+        residente.save()
+        residente.save()
+        self.assertEqual(
+            self.client.get(f'/api/multas/{multa.pk}/', HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+    def test_retrieve_inexistente(self):
+        self.assertEqual(self.client.get('/api/multas/999999/').status_code, 404)
+        self.assertEqual(self.client.get('/api/multas/abc/').status_code, 404)
+
+    def test_mi_perfil(self):
+        response = self.client.get('/api/auth/usuarios/mi-perfil/')
+        etag = response['ETag']
+        response = self.client.get('/api/auth/usuarios/mi-perfil/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class SaldoResidenteTests(MultaAPITestCase):
+
+    def saldo(self, usuario=None):
+        usuario = usuario or self.residente
+        saldo = SaldoResidente.objects.filter(pk=usuario.pk).first()
+        if saldo is None:
+            return VACIO
+        return {campo: getattr(saldo, campo) for campo in VACIO}
+
+    def assertSaldosCoinciden(self):
+        calculados = calcular_saldos()
+        for saldo in SaldoResidente.objects.all():
+            self.assertEqual(
+                {campo: getattr(saldo, campo) for campo in VACIO},
+                calculados.get(saldo.pk, VACIO),
+                f'usuario {saldo.pk}'
+            )
+        self.assertLessEqual(calculados.keys(), set(SaldoResidente.objects.values_list('pk', flat=True)))
+
+    def test_crear_editar_pagar_y_eliminar(self):
+        primera = self.client.post('/api/multas/', {
+            'usuario': self.residente.pk, 'motivo': 'Ruidos', 'monto': 10000,
+        })
+        self.assertEqual(primera.status_code, 201)
+        Multa.objects.update(fecha_creacion=date(2025, 1, 10))
+        segunda = Multa.objects.create(usuario=self.residente, motivo='Basura', monto=5000)
+        self.assertEqual(self.saldo(), {
+            'pendientes': 2, 'monto_pendiente': 15000, 'monto_pagado': 0,
+            'pendiente_mas_antigua': date(2025, 1, 10),
+        })
+
+        antigua = Multa.objects.get(fecha_creacion=date(2025, 1, 10))
+        self.client.patch(f'/api/multas/{antigua.pk}/', {'monto': 12000})
+        self.assertEqual(self.saldo()['monto_pendiente'], 17000)
+
+        self.client.post(f'/api/multas/{antigua.pk}/marcar_como_pagada/')
+        self.assertEqual(self.saldo(), {
+            'pendientes': 1, 'monto_pendiente': 5000, 'monto_pagado': 12000,
+            'pendiente_mas_antigua': segunda.fecha_creacion,
+        })
+
+        self.client.delete(f'/api/multas/{segunda.pk}/')
+        self.assertEqual(self.saldo(), {
+            'pendientes': 0, 'monto_pendiente': 0, 'monto_pagado': 12000,
+            'pendiente_mas_antigua': None,
+        })
+        self.assertSaldosCoinciden()
+
+    def test_cambio_de_residente(self):
+        otro = Usuario.objects.create_user(username='otro', password='x', rol='residente')
+        multa = Multa.objects.create(usuario=self.residente, motivo='Ruidos', monto=3000)
+        self.client.put(f'/api/multas/{multa.pk}/', {'usuario': otro.pk, 'motivo': 'Ruidos', 'monto': 4000})
+        self.assertEqual(self.saldo()['pendientes'], 0)
+        self.assertEqual(self.saldo(otro)['monto_pendiente'], 4000)
+        self.assertSaldosCoinciden()
+
+    def test_caminos_masivos(self):
+        otro = Usuario.objects.create_user(username='otro', password='x', rol='residente')
+        self.client.post('/api/multas/emision-masiva/', {
+            'multas': [{'usuario': usuario.pk, 'motivo': 'Cuota', 'monto': 1000 * (i + 1)}
+                       for i, usuario in enumerate([self.residente, otro, self.residente])],
+        }, format='json')
+        self.assertEqual(self.saldo()['monto_pendiente'], 4000)
+        ids = list(Multa.objects.filter(monto__lte=2000).values_list('pk', flat=True))
+        self.client.post('/api/multas/marcar-pagadas/', {'ids': ids}, format='json')
+        self.assertEqual(self.saldo(otro)['monto_pagado'], 2000)
+        self.assertSaldosCoinciden()
+
+    def test_eliminar_con_queryset_y_desde_el_admin(self):
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+
+        otro = Usuario.objects.create_user(username='otro', password='x', rol='residente')
+        for usuario, monto in [(self.residente, 1000), (self.residente, 2000), (otro, 4000), (otro, 8000)]:
+            Multa.objects.create(usuario=usuario, motivo='Ruidos', monto=monto)
+        Multa.objects.get(monto=2000).marcar_como_pagada()
+
+        Multa.objects.filter(monto__lte=2000).delete()
+        self.assertEqual(self.saldo(), VACIO)
+
+        request = RequestFactory().post('/admin/multas/multa/')
+        request.user = self.admin
+        site._registry[Multa].delete_queryset(request, Multa.objects.filter(monto=4000))
+        self.assertEqual(self.saldo(otro)['monto_pendiente'], 8000)
+        self.assertSaldosCoinciden()
+
+    def test_secuencia_aleatoria_coincide_con_el_recalculo(self):
+        aleatorio = random.Random(5)
+        residentes = [self.residente] + [
+            Usuario.objects.create_user(username=f'r{i}', password='x', rol='residente') for i in range(3)
+        ]
+        for _ in range(60):
+            multas = list(Multa.objects.all())
+            operacion = aleatorio.choice(['crear', 'crear', 'editar', 'pagar', 'eliminar'])
+            if operacion == 'crear' or not multas:
+                Multa.objects.create(usuario=aleatorio.choice(residentes), motivo='M', monto=aleatorio.randint(1, 9) * 1000)
+            elif operacion == 'editar':
+                multa = aleatorio.choice(multas)
+                multa.monto = aleatorio.randint(1, 9) * 1000
+                multa.usuario = aleatorio.choice(residentes)
+                multa.save()
+            elif operacion == 'pagar':
+                aleatorio.choice(multas).marcar_como_pagada()
+            else:
+                aleatorio.choice(multas).delete()
+        self.assertSaldosCoinciden()
+
+    def test_dashboard_con_una_consulta(self):
+        Multa.objects.create(usuario=self.residente, motivo='Ruidos', monto=7000)
+        self.client.force_authenticate(self.residente)
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get('/api/auth/residente-dashboard/')
+        self.assertEqual(len(contexto.captured_queries), 1)
+        self.assertEqual(response.data['multas'], {
+            'pendientes': 1, 'monto_pendiente': 7000, 'monto_pagado': 0,
+            'pendiente_mas_antigua': date.today(),
+        })
+
+        otro = Usuario.objects.create_user(username='otro', password='x', rol='residente')
+        self.client.force_authenticate(otro)
+        self.assertEqual(self.client.get('/api/auth/residente-dashboard/').data['multas']['pendientes'], 0)
+
+    def test_reconciliar(self):
+        # bulk_create no actualiza los saldos: quedan diferencias
+        self.crear_multas(3)
+        Multa.objects.create(usuario=self.residente, motivo='Ruidos', monto=1000)
+        salida = StringIO()
+        call_command('reconciliar_saldos', '--solo-informar', stdout=salida)
+        self.assertIn('1 saldos con diferencias', salida.getvalue())
+        self.assertEqual(self.saldo()['pendientes'], 1)
+
+        call_command('reconciliar_saldos', stdout=StringIO())
+        self.assertEqual(self.saldo()['pendientes'], 4)
+        self.assertEqual(self.saldo()['monto_pendiente'], Decimal(1000 + 1001 + 1002 + 1000))
+        self.assertSaldosCoinciden()
+        self.assertEqual(reconciliar(), [])
@@ -2,11 +2,31 @@ from django.shortcuts import render
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.utils import timezone
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Multa
-from .serializers import MultaSerializer, MultaDetalleSerializer, MultaCreateUpdateSerializer
+from .busqueda import BusquedaMultaFilter
+from .estadisticas import AGRUPACIONES, aobtener_estadisticas, obtener_estadisticas
+from .emision import emitir_multas
+from .exportacion import ENCABEZADOS as ENCABEZADOS_EXPORTACION, filas_multas
+from .pagos import marcar_pagada, marcar_pagadas
+from .serializers import (
+    MultaSerializer,
+    MultaDetalleSerializer,
+    MultaCreateUpdateSerializer,
+    EmisionMasivaSerializer,
+    MarcarPagadasSerializer
+)
 from usuarios.models import Usuario
+from notificaciones.bandeja import encolar_multas
+from api.asincrono import DespachoAsincronoMixin, ListaAsincronaMixin
+from api.campos import CamposDinamicosMixin
+from api.condicional import ConditionalGetMixin
+from api.exportacion import FORMATOS_EXPORTACION, generar_csv, generar_xlsx
+from api.pagination import KeysetCursorPagination
+from api.serializacion import ListaRapidaMixin
 
 class IsAdminUser(permissions.BasePermission):
     """
@@ -45,19 +65,47 @@ class IsResidenteForOwnMultas(permissions.BasePermission):
         
         # Residentes solo pueden ver sus propias multas
         if request.user.rol == 'residente':
-            return obj.usuario == request.user
+            return obj.usuario_id == request.user.id
         
         return False
 
-class MultaViewSet(viewsets.ModelViewSet):
+class MultaViewSet(DespachoAsincronoMixin, ListaAsincronaMixin, CamposDinamicosMixin,
+                   ConditionalGetMixin, ListaRapidaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gestionar multas.
+    
+    ``list`` y ``estadisticas`` tienen variantes asíncronas (``alist`` y
+    ``aestadisticas``) que se usan con ``API_VISTAS_ASINCRONAS`` (ver
+    ``api.asincrono``).
     """
     queryset = Multa.objects.all().order_by('-fecha_creacion')
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, BusquedaMultaFilter, filters.OrderingFilter]
     filterset_fields = ['estado', 'usuario']
     search_fields = ['motivo', 'descripcion', 'usuario__username', 'usuario__first_name', 'usuario__last_name']
     ordering_fields = ['fecha_creacion', 'monto', 'estado']
+    ordering = ['-fecha_creacion']
+    pagination_class = KeysetCursorPagination
+    
+    # Proyección de datos del usuario que necesita el serializer de cada acción
+    proyecciones = {
+        'list': 'con_nombre_usuario',
+        'retrieve': 'con_detalle_usuario',
+        'marcar_como_pagada': 'con_detalle_usuario',
+    }
+    # Campo del serializer que usa cada proyección; con ``?fields=``/``?omit=``
+    # la proyección (y su JOIN) se omite si ese campo no se pide
+    campos_proyeccion = {
+        'con_nombre_usuario': 'usuario_nombre',
+        'con_detalle_usuario': 'usuario_detalle',
+    }
+    columnas_campos_calculados = {'usuario_detalle': ('usuario',)}
+    # ``MultaSerializer.get_usuario_nombre`` para la serialización rápida de list
+    campos_calculados_lista = {
+        'usuario_nombre': (
+            ('usuario__first_name', 'usuario__last_name'),
+            lambda first_name, last_name: f"{first_name} {last_name}",
+        ),
+    }
     
     permission_classes = [permissions.IsAuthenticated]
     
@@ -89,6 +137,19 @@ class MultaViewSet(viewsets.ModelViewSet):
         - Administradores: todas las multas
         - Residentes: solo sus propias multas
         """
+        queryset = self.get_queryset_validador()
+        
+        proyeccion = self.proyecciones.get(self.action)
+        if proyeccion and self.incluye_campo(self.campos_proyeccion[proyeccion]):
+            queryset = getattr(queryset, proyeccion)()
+        
+        return queryset
+    
+    def get_queryset_validador(self):
+        """
+        Multas visibles para el usuario, sin la proyección de datos del
+        usuario, para calcular ETag/Last-Modified sin el JOIN.
+        """
         queryset = super().get_queryset()
         user = self.request.user
         
@@ -97,6 +158,14 @@ class MultaViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def perform_create(self, serializer):
+        """
+        Crea la multa y encola el aviso al residente en la misma transacción.
+        """
+        with transaction.atomic():
+            multa = serializer.save()
+            encolar_multas('multa_creada', [multa])
+    
     @action(detail=True, methods=['post'], permission_classes=[IsResidenteForOwnMultas])
     def marcar_como_pagada(self, request, pk=None):
         """
@@ -107,43 +176,141 @@ class MultaViewSet(viewsets.ModelViewSet):
         multa = self.get_object()
         
         # Verificar permisos
-        if request.user.rol == 'residente' and multa.usuario != request.user:
+        if request.user.rol == 'residente' and multa.usuario_id != request.user.id:
             return Response(
                 {"detail": "No tienes permiso para marcar esta multa como pagada."},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        if multa.estado == 'pagado':
+        if not marcar_pagada(multa):
             return Response(
                 {"detail": "Esta multa ya está marcada como pagada."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        multa.estado = 'pagado'
-        multa.fecha_pago = timezone.now().date()
-        multa.save()
-        
         serializer = MultaDetalleSerializer(multa)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['post'], url_path='marcar-pagadas', permission_classes=[IsResidenteForOwnMultas])
+    def marcar_pagadas(self, request):
+        """
+        Marca varias multas como pagadas en una sola operación.
+        
+        Recibe ``ids`` y responde con las multas marcadas, las que ya estaban
+        pagadas y las que no existen o no son visibles para el usuario.
+        """
+        serializer = MarcarPagadasSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(marcar_pagadas(serializer.validated_data['ids'], self.get_queryset()))
+    
+    @action(detail=False, methods=['post'], url_path='emision-masiva', permission_classes=[IsAdminUser])
+    def emision_masiva(self, request):
+        """
+        Emite multas en bloque (solo para administradores).
+        
+        Recibe una lista de multas (``multas``) o una plantilla y un filtro
+        de residentes (``plantilla`` + ``filtro``), y devuelve el resultado
+        de cada ítem.
+        """
+        serializer = EmisionMasivaSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        resultados, creadas = emitir_multas(**serializer.validated_data)
+        
+        if creadas:
+            codigo = status.HTTP_201_CREATED
+        elif resultados:
+            codigo = status.HTTP_400_BAD_REQUEST
+        else:
+            codigo = status.HTTP_200_OK
+        
+        return Response(
+            {
+                'creadas': creadas,
+                'rechazadas': len(resultados) - creadas,
+                'resultados': resultados,
+            },
+            status=codigo
+        )
+    
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta las multas visibles como CSV o XLSX (``?formato=csv|xlsx``).
+        
+        Respeta los mismos filtros, búsqueda y orden que el listado, y envía
+        el archivo en streaming a medida que se leen las filas.
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS_EXPORTACION:
+            return Response(
+                {'formato': [f"Formato no soportado, opciones: {', '.join(FORMATOS_EXPORTACION)}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        campo, descendente = KeysetCursorPagination().get_ordering(request, queryset, self)
+        filas = filas_multas(queryset, campo, descendente)
+        
+        if formato == 'xlsx':
+            contenido = generar_xlsx(ENCABEZADOS_EXPORTACION, filas, nombre_hoja='Multas')
+        else:
+            contenido = generar_csv(ENCABEZADOS_EXPORTACION, filas)
+        
+        content_type, extension = FORMATOS_EXPORTACION[formato]
+        response = StreamingHttpResponse(contenido, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="multas.{extension}"'
+        return response
+    
+    def parametros_estadisticas(self, request):
+        """
+        Lee ``desde``, ``hasta`` y ``agrupar_por`` de la petición. Devuelve
+        ``(parametros, errores)``.
+        """
+        errores = {}
+        fechas = {}
+        for nombre in ('desde', 'hasta'):
+            valor = request.query_params.get(nombre)
+            if valor:
+                try:
+                    fechas[nombre] = parse_date(valor)
+                except ValueError:
+                    fechas[nombre] = None
+                if fechas[nombre] is None:
+                    errores[nombre] = ["Fecha inválida, use el formato AAAA-MM-DD."]
+        
+        agrupar_por = request.query_params.get('agrupar_por')
+        if agrupar_por and agrupar_por not in AGRUPACIONES:
+            errores['agrupar_por'] = [
+                f"Valor inválido, opciones: {', '.join(AGRUPACIONES)}."
+            ]
+        
+        parametros = {'desde': fechas.get('desde'), 'hasta': fechas.get('hasta'), 'agrupar_por': agrupar_por}
+        return parametros, errores
+    
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
     def estadisticas(self, request):
         """
         Proporciona estadísticas sobre las multas (solo para administradores).
+        
+        Parámetros opcionales:
+        - desde / hasta: rango de fecha_creacion (AAAA-MM-DD, inclusive)
+        - agrupar_por: estado, mes o residencia
+        """
+        parametros, errores = self.parametros_estadisticas(request)
+        if errores:
+            return Response(errores, status=status.HTTP_400_BAD_REQUEST)
+        return Response(obtener_estadisticas(**parametros))
+    
+    async def aestadisticas(self, request):
+        """
+        Variante asíncrona de ``estadisticas``: los totales y los grupos se
+        consultan a la vez.
         """
-        total_multas = Multa.objects.count()
-        multas_pendientes = Multa.objects.filter(estado='pendiente').count()
-        multas_pagadas = Multa.objects.filter(estado='pagado').count()
-        
-        # Calcular el monto total de multas pendientes y pagadas
-        from django.db.models import Sum
-        monto_pendiente = Multa.objects.filter(estado='pendiente').aggregate(Sum('monto'))['monto__sum'] or 0
-        monto_pagado = Multa.objects.filter(estado='pagado').aggregate(Sum('monto'))['monto__sum'] or 0
-        
-        return Response({
-            'total_multas': total_multas,
-            'multas_pendientes': multas_pendientes,
-            'multas_pagadas': multas_pagadas,
-            'monto_pendiente': monto_pendiente,
-            'monto_pagado': monto_pagado,
-        })
+        parametros, errores = self.parametros_estadisticas(request)
+        if errores:
+            return Response(errores, status=status.HTTP_400_BAD_REQUEST)
+        return Response(await aobtener_estadisticas(**parametros))
@@ -1,3 +1,13 @@
 from django.contrib import admin
+from .models import EventoNotificacion
 
 # Register your models here.
+
+@admin.register(EventoNotificacion)
+class EventoNotificacionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'usuario', 'tipo', 'estado', 'intentos', 'disponible_en', 'fecha_envio')
+    list_filter = ('estado', 'tipo')
+    search_fields = ('usuario__username',)
+    raw_id_fields = ('usuario',)
+    readonly_fields = ('fecha_creacion', 'fecha_envio', 'reclamado_por', 'error')
+    list_per_page = 50
@@ -0,0 +1,28 @@
+"""
+Escritura de eventos en la bandeja de salida de notificaciones.
+
+Estas funciones deben llamarse dentro de la misma transacción que el cambio
+que notifican (creación o pago de multas): si la transacción se revierte,
+el evento desaparece con ella y nunca se envía un aviso de algo que no
+ocurrió. Solo insertan filas; el envío lo hace ``procesar_notificaciones``.
+"""
+from .models import EventoNotificacion
+
+
+def datos_multa(multa):
+    return {'multa': multa.pk, 'motivo': multa.motivo, 'monto': int(multa.monto)}
+
+
+def encolar_multas(tipo, multas, batch_size=500):
+    """
+    Agrega un evento ``tipo`` por cada multa, dirigido a su residente.
+
+    Las multas deben tener ``pk``: el evento se arma con él y con los datos
+    que se muestran al residente.
+    """
+    eventos = [
+        EventoNotificacion(usuario_id=multa.usuario_id, tipo=tipo, datos=datos_multa(multa))
+        for multa in multas
+    ]
+    EventoNotificacion.objects.bulk_create(eventos, batch_size=batch_size)
+    return len(eventos)
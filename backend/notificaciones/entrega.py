@@ -0,0 +1,222 @@
+"""
+Entrega de los eventos de la bandeja de salida.
+
+Un proceso de entrega repite estos pasos:
+
+1. Reclama un lote de eventos pendientes con ``SELECT ... FOR UPDATE SKIP
+   LOCKED``, de modo que varios procesos en paralelo no tomen los mismos
+   eventos ni se esperen entre sí. El reclamo corre ``disponible_en`` unos
+   segundos hacia adelante (``NOTIFICACIONES_BLOQUEO``); si el proceso
+   muere a mitad de camino, los eventos vuelven a estar disponibles
+   después de ese plazo.
+2. Agrupa los eventos del lote por residente y arma un solo mensaje por
+   residente.
+3. Entrega los mensajes con el transporte configurado. Los eventos de un
+   mensaje fallido se reintentan con espera exponencial hasta
+   ``NOTIFICACIONES_REINTENTOS`` intentos, después quedan como fallidos.
+
+En motores sin bloqueo de filas (SQLite) el reclamo se apoya solo en el
+``UPDATE`` condicional sobre ``disponible_en``.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EventoNotificacion
+
+
+def _ajuste(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def espera_reintento(intentos):
+    """
+    Segundos de espera antes del siguiente intento, después de ``intentos``
+    intentos fallidos.
+    """
+    base = _ajuste('NOTIFICACIONES_ESPERA_BASE', 30)
+    maximo = _ajuste('NOTIFICACIONES_ESPERA_MAXIMA', 3600)
+    return min(base * 2 ** (intentos - 1), maximo)
+
+
+def _formato_monto(monto):
+    return '$' + f'{monto:,}'.replace(',', '.')
+
+
+class Mensaje:
+    """
+    Notificación a un residente que agrupa uno o más eventos.
+    """
+    PLANTILLAS = {
+        'multa_creada': 'Nueva multa: {motivo} por {monto}.',
+        'multa_pagada': 'Multa pagada: {motivo} por {monto}.',
+    }
+
+    def __init__(self, usuario, eventos):
+        self.usuario_id = usuario.pk
+        self.nombre = usuario.get_full_name() or usuario.username
+        self.email = usuario.email
+        self.telefono = usuario.telefono
+        self.eventos = eventos
+
+    def destino(self):
+        return self.email or self.telefono or self.nombre
+
+    @property
+    def asunto(self):
+        if len(self.eventos) == 1:
+            return self.eventos[0].get_tipo_display()
+        return f'Tienes {len(self.eventos)} novedades en tus multas'
+
+    @property
+    def cuerpo(self):
+        lineas = [f'Hola {self.nombre}:', '']
+        for evento in self.eventos:
+            datos = {**evento.datos, 'monto': _formato_monto(evento.datos.get('monto', 0))}
+            lineas.append(self.PLANTILLAS[evento.tipo].format(**datos))
+        return '\n'.join(lineas)
+
+    def como_dict(self):
+        return {
+            'usuario': self.usuario_id,
+            'email': self.email,
+            'telefono': self.telefono,
+            'asunto': self.asunto,
+            'cuerpo': self.cuerpo,
+            'eventos': [evento.pk for evento in self.eventos],
+        }
+
+
+class MetricasEntrega:
+    """
+    Contadores acumulados de un proceso de entrega.
+    """
+    CAMPOS = ('lotes', 'eventos', 'mensajes', 'enviados', 'reintentos', 'fallidos')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.segundos_envio = 0.0
+        for campo in self.CAMPOS:
+            setattr(self, campo, 0)
+
+    def como_dict(self):
+        transcurrido = time.perf_counter() - self.inicio
+        datos = {campo: getattr(self, campo) for campo in self.CAMPOS}
+        datos['segundos'] = round(transcurrido, 3)
+        datos['segundos_envio'] = round(self.segundos_envio, 3)
+        datos['eventos_por_segundo'] = round(self.eventos / transcurrido, 1) if transcurrido else 0.0
+        datos['mensajes_por_segundo'] = round(self.mensajes / transcurrido, 1) if transcurrido else 0.0
+        return datos
+
+
+def reclamar(trabajador, lote):
+    """
+    Reclama hasta ``lote`` eventos pendientes para ``trabajador`` y los
+    devuelve con los datos de contacto de su residente.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            EventoNotificacion.objects
+            .filter(estado='pendiente', disponible_en__lte=ahora)
+            .order_by('disponible_en', 'id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:lote]
+        )
+        if not ids:
+            return []
+        # La condición repetida impide que dos procesos sin bloqueo de filas
+        # reclamen el mismo evento
+        EventoNotificacion.objects.filter(
+            pk__in=ids, estado='pendiente', disponible_en__lte=ahora
+        ).update(
+            disponible_en=ahora + timedelta(seconds=_ajuste('NOTIFICACIONES_BLOQUEO', 300)),
+            reclamado_por=trabajador,
+            intentos=F('intentos') + 1,
+        )
+    return list(
+        EventoNotificacion.objects
+        .filter(pk__in=ids, reclamado_por=trabajador, disponible_en__gt=ahora)
+        .select_related('usuario')
+        .only(
+            'usuario', 'tipo', 'datos', 'intentos', 'usuario__username', 'usuario__first_name',
+            'usuario__last_name', 'usuario__email', 'usuario__telefono',
+        )
+        .order_by('id')
+    )
+
+
+def agrupar(eventos):
+    """
+    Un ``Mensaje`` por residente, con sus eventos en orden de llegada.
+    """
+    por_usuario = {}
+    for evento in eventos:
+        por_usuario.setdefault(evento.usuario_id, []).append(evento)
+    return [Mensaje(grupo[0].usuario, grupo) for grupo in por_usuario.values()]
+
+
+def registrar_resultados(mensajes, errores, metricas=None):
+    """
+    Marca como enviados los eventos de los mensajes entregados y programa
+    el reintento (o marca como fallidos) los de los mensajes con error.
+    """
+    ahora = timezone.now()
+    maximo = _ajuste('NOTIFICACIONES_REINTENTOS', 5)
+    enviados = []
+    pendientes = []
+    for mensaje, error in zip(mensajes, errores):
+        if error is None:
+            enviados.extend(evento.pk for evento in mensaje.eventos)
+            continue
+        for evento in mensaje.eventos:
+            evento.error = f'{type(error).__name__}: {error}'
+            if evento.intentos >= maximo:
+                evento.estado = 'fallido'
+            else:
+                evento.disponible_en = ahora + timedelta(seconds=espera_reintento(evento.intentos))
+            pendientes.append(evento)
+
+    with transaction.atomic():
+        if enviados:
+            EventoNotificacion.objects.filter(pk__in=enviados).update(
+                estado='enviado', fecha_envio=ahora, error=''
+            )
+        if pendientes:
+            EventoNotificacion.objects.bulk_update(pendientes, ['estado', 'disponible_en', 'error'])
+
+    if metricas is not None:
+        metricas.enviados += len(enviados)
+        fallidos = sum(1 for evento in pendientes if evento.estado == 'fallido')
+        metricas.fallidos += fallidos
+        metricas.reintentos += len(pendientes) - fallidos
+
+
+def procesar_lote(transporte, trabajador, lote=100, metricas=None):
+    """
+    Reclama, agrupa y entrega un lote. Devuelve el número de eventos
+    reclamados (0 si no había pendientes).
+    """
+    eventos = reclamar(trabajador, lote)
+    if not eventos:
+        return 0
+
+    mensajes = agrupar(eventos)
+    inicio = time.perf_counter()
+    try:
+        errores = transporte.enviar(mensajes)
+    except Exception as error:
+        errores = [error] * len(mensajes)
+    duracion = time.perf_counter() - inicio
+
+    registrar_resultados(mensajes, errores, metricas)
+    if metricas is not None:
+        metricas.lotes += 1
+        metricas.eventos += len(eventos)
+        metricas.mensajes += len(mensajes)
+        metricas.segundos_envio += duracion
+    return len(eventos)
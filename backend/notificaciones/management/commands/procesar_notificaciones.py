@@ -0,0 +1,58 @@
+import json
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from notificaciones.entrega import MetricasEntrega, procesar_lote
+from notificaciones.transportes import obtener_transporte
+
+
+class Command(BaseCommand):
+    help = (
+        'Entrega las notificaciones pendientes de la bandeja de salida, '
+        'agrupadas por residente. Se pueden ejecutar varios procesos a la vez.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=200,
+            help='Eventos reclamados por lote.',
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=2.0,
+            help='Segundos de espera cuando no hay eventos pendientes.',
+        )
+        parser.add_argument(
+            '--reporte', type=float, default=60.0,
+            help='Segundos entre reportes de métricas.',
+        )
+        parser.add_argument(
+            '--una-vez', action='store_true',
+            help='Procesa los pendientes y termina en vez de quedar esperando.',
+        )
+        parser.add_argument(
+            '--max-lotes', type=int, default=None,
+            help='Termina después de esta cantidad de lotes.',
+        )
+
+    def handle(self, *args, **options):
+        trabajador = f'{socket.gethostname()}:{os.getpid()}'
+        transporte = obtener_transporte()
+        metricas = MetricasEntrega()
+        ultimo_reporte = time.monotonic()
+
+        try:
+            while options['max_lotes'] is None or metricas.lotes < options['max_lotes']:
+                if not procesar_lote(transporte, trabajador, options['lote'], metricas):
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                if time.monotonic() - ultimo_reporte >= options['reporte']:
+                    self.stderr.write(json.dumps(metricas.como_dict()))
+                    ultimo_reporte = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(json.dumps(metricas.como_dict())))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoNotificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('multa_creada', 'Multa creada'), ('multa_pagada', 'Multa pagada')], max_length=20, verbose_name='Tipo')),
+                ('datos', models.JSONField(default=dict, verbose_name='Datos')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviado', 'Enviado'), ('fallido', 'Fallido')], default='pendiente', max_length=10, verbose_name='Estado')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('disponible_en', models.DateTimeField(default=django.utils.timezone.now, help_text='Desde cuándo puede reclamarlo un proceso de entrega.', verbose_name='Disponible en')),
+                ('reclamado_por', models.CharField(blank=True, max_length=100, verbose_name='Reclamado por')),
+                ('error', models.TextField(blank=True, verbose_name='Último error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('fecha_envio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de envío')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos_notificacion', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Evento de notificación',
+                'verbose_name_plural': 'Eventos de notificación',
+                'indexes': [models.Index(fields=['estado', 'disponible_en', 'id'], name='evento_pendiente_idx')],
+            },
+        ),
+    ]
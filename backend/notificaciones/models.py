@@ -1,3 +1,54 @@
 from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from usuarios.models import Usuario
 
-# Create your models here.
+
+class EventoNotificacion(models.Model):
+    """
+    Bandeja de salida (outbox) de notificaciones a residentes.
+
+    Cada evento se escribe en la misma transacción que el cambio que lo
+    origina, así que solo existe si ese cambio se confirmó. El proceso
+    ``procesar_notificaciones`` los entrega fuera de la petición.
+    """
+    TIPOS = (
+        ('multa_creada', 'Multa creada'),
+        ('multa_pagada', 'Multa pagada'),
+    )
+    ESTADOS = (
+        ('pendiente', 'Pendiente'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    )
+
+    usuario = models.ForeignKey(
+        Usuario,
+        on_delete=models.CASCADE,
+        related_name='eventos_notificacion',
+        verbose_name=_("Usuario")
+    )
+    tipo = models.CharField(max_length=20, choices=TIPOS, verbose_name=_("Tipo"))
+    datos = models.JSONField(default=dict, verbose_name=_("Datos"))
+    estado = models.CharField(max_length=10, choices=ESTADOS, default='pendiente', verbose_name=_("Estado"))
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name=_("Intentos"))
+    disponible_en = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_("Disponible en"),
+        help_text=_("Desde cuándo puede reclamarlo un proceso de entrega.")
+    )
+    reclamado_por = models.CharField(max_length=100, blank=True, verbose_name=_("Reclamado por"))
+    error = models.TextField(blank=True, verbose_name=_("Último error"))
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name=_("Fecha de creación"))
+    fecha_envio = models.DateTimeField(null=True, blank=True, verbose_name=_("Fecha de envío"))
+
+    class Meta:
+        verbose_name = _("Evento de notificación")
+        verbose_name_plural = _("Eventos de notificación")
+        indexes = [
+            # Eventos listos para reclamar, en orden de llegada
+            models.Index(fields=['estado', 'disponible_en', 'id'], name='evento_pendiente_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.usuario_id}"
@@ -1,3 +1,173 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from multas.models import Multa
+from usuarios.models import Usuario
+from .bandeja import encolar_multas
+from .entrega import MetricasEntrega, espera_reintento, procesar_lote, reclamar
+from .models import EventoNotificacion
+from .transportes import ArchivoTransporte, MemoriaTransporte, Transporte
+
+
+class TransporteQueFalla(Transporte):
+    def enviar_uno(self, mensaje):
+        raise ConnectionError('servidor no disponible')
+
+
+@override_settings(NOTIFICACIONES_TRANSPORTE='notificaciones.transportes.MemoriaTransporte')
+class NotificacionesTestCase(TestCase):
+
+    def setUp(self):
+        MemoriaTransporte.bandeja.clear()
+        self.admin = Usuario.objects.create_user(username='admin', password='admin123', rol='admin')
+        self.ana = Usuario.objects.create_user(
+            username='ana', password='clave123', rol='residente',
+            first_name='Ana', email='ana@example.com'
+        )
+        self.luis = Usuario.objects.create_user(
+            username='luis', password='clave123', rol='residente', telefono='+56911111111'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+
+class BandejaTests(NotificacionesTestCase):
+
+    def test_crear_multa_encola_aviso(self):
+        response = self.client.post('/api/multas/', {
+            'usuario': self.ana.pk, 'motivo': 'Ruidos molestos', 'monto': 15000,
+        })
+        self.assertEqual(response.status_code, 201)
+        evento = EventoNotificacion.objects.get()
+        self.assertEqual(evento.usuario, self.ana)
+        self.assertEqual(evento.tipo, 'multa_creada')
+        self.assertEqual(evento.datos, {'multa': Multa.objects.get().pk, 'motivo': 'Ruidos molestos', 'monto': 15000})
+
+    def test_revertir_la_transaccion_descarta_el_aviso(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                multa = Multa.objects.create(usuario=self.ana, motivo='Ruidos', monto=1000)
+                encolar_multas('multa_creada', [multa])
+                raise RuntimeError
+        self.assertFalse(EventoNotificacion.objects.exists())
+
+    def test_pagar_encola_solo_las_marcadas(self):
+        pendiente = Multa.objects.create(usuario=self.ana, motivo='Ruidos', monto=1000)
+        pagada = Multa.objects.create(usuario=self.luis, motivo='Basura', monto=2000, estado='pagado')
+        response = self.client.post('/api/multas/marcar-pagadas/', {'ids': [pendiente.pk, pagada.pk]}, format='json')
+        self.assertEqual(response.data['marcadas'], [pendiente.pk])
+        self.assertEqual(
+            list(EventoNotificacion.objects.values_list('usuario_id', 'tipo')),
+            [(self.ana.pk, 'multa_pagada')]
+        )
+
+        otra = Multa.objects.create(usuario=self.luis, motivo='Mascotas', monto=3000)
+        self.client.post(f'/api/multas/{otra.pk}/marcar_como_pagada/')
+        self.client.post(f'/api/multas/{otra.pk}/marcar_como_pagada/')
+        self.assertEqual(EventoNotificacion.objects.filter(usuario=self.luis).count(), 1)
+
+    def test_emision_masiva_encola_un_aviso_por_multa(self):
+        response = self.client.post('/api/multas/emision-masiva/', {'multas': [
+            {'usuario': self.ana.pk, 'motivo': 'Cuota', 'monto': 1000},
+            {'usuario': self.luis.pk, 'motivo': 'Cuota', 'monto': 1000},
+            {'usuario': self.admin.pk, 'motivo': 'Cuota', 'monto': 1000},
+        ]}, format='json')
+        self.assertEqual(response.data['creadas'], 2)
+        self.assertEqual(EventoNotificacion.objects.filter(tipo='multa_creada').count(), 2)
+
+
+class EntregaTests(NotificacionesTestCase):
+
+    def encolar(self, usuario, cantidad, tipo='multa_creada'):
+        multas = [Multa(usuario=usuario, motivo=f'Motivo {i}', monto=1000 * (i + 1)) for i in range(cantidad)]
+        encolar_multas(tipo, multas)
+
+    def test_agrupa_por_residente(self):
+        self.encolar(self.ana, 3)
+        self.encolar(self.luis, 1, tipo='multa_pagada')
+        metricas = MetricasEntrega()
+        self.assertEqual(procesar_lote(MemoriaTransporte(), 'prueba', 100, metricas), 4)
+
+        mensajes = {mensaje.usuario_id: mensaje for mensaje in MemoriaTransporte.bandeja}
+        self.assertEqual(len(mensajes), 2)
+        self.assertEqual(mensajes[self.ana.pk].destino(), 'ana@example.com')
+        self.assertEqual(mensajes[self.ana.pk].asunto, 'Tienes 3 novedades en tus multas')
+        self.assertIn('Nueva multa: Motivo 2 por $3.000.', mensajes[self.ana.pk].cuerpo)
+        self.assertEqual(mensajes[self.luis.pk].destino(), '+56911111111')
+        self.assertEqual(mensajes[self.luis.pk].asunto, 'Multa pagada')
+
+        self.assertEqual(EventoNotificacion.objects.filter(estado='enviado').count(), 4)
+        datos = metricas.como_dict()
+        self.assertEqual((datos['lotes'], datos['eventos'], datos['mensajes'], datos['enviados']), (1, 4, 2, 4))
+        self.assertEqual(procesar_lote(MemoriaTransporte(), 'prueba', 100), 0)
+
+    def test_reclamo_respeta_el_lote_y_no_se_comparte(self):
+        self.encolar(self.ana, 5)
+        primeros = reclamar('a', 3)
+        self.assertEqual(len(primeros), 3)
+        resto = reclamar('b', 10)
+        self.assertEqual(len(resto), 2)
+        self.assertFalse({e.pk for e in primeros} & {e.pk for e in resto})
+        self.assertEqual(reclamar('c', 10), [])
+
+        # Si el proceso muere, los eventos vuelven después del plazo de bloqueo
+        EventoNotificacion.objects.filter(reclamado_por='a').update(
+            disponible_en=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(len(reclamar('c', 10)), 3)
+
+    @override_settings(NOTIFICACIONES_REINTENTOS=2, NOTIFICACIONES_ESPERA_BASE=30)
+    def test_reintenta_con_espera_y_luego_falla(self):
+        self.encolar(self.ana, 2)
+        metricas = MetricasEntrega()
+        antes = timezone.now()
+        procesar_lote(TransporteQueFalla(), 'prueba', 100, metricas)
+
+        for evento in EventoNotificacion.objects.all():
+            self.assertEqual(evento.estado, 'pendiente')
+            self.assertEqual(evento.intentos, 1)
+            self.assertIn('servidor no disponible', evento.error)
+            self.assertGreaterEqual(evento.disponible_en, antes + timedelta(seconds=30))
+        self.assertEqual(procesar_lote(TransporteQueFalla(), 'prueba', 100), 0)
+
+        EventoNotificacion.objects.update(disponible_en=timezone.now())
+        procesar_lote(TransporteQueFalla(), 'prueba', 100, metricas)
+        self.assertEqual(EventoNotificacion.objects.filter(estado='fallido', intentos=2).count(), 2)
+        self.assertEqual((metricas.reintentos, metricas.fallidos), (2, 2))
+
+    @override_settings(NOTIFICACIONES_ESPERA_BASE=30, NOTIFICACIONES_ESPERA_MAXIMA=100)
+    def test_espera_exponencial(self):
+        self.assertEqual([espera_reintento(i) for i in range(1, 5)], [30, 60, 100, 100])
+
+    def test_transporte_archivo(self):
+        self.encolar(self.ana, 2)
+        descriptor, ruta = tempfile.mkstemp(suffix='.jsonl')
+        os.close(descriptor)
+        self.addCleanup(os.remove, ruta)
+        procesar_lote(ArchivoTransporte(ruta), 'prueba')
+        with open(ruta, encoding='utf-8') as archivo:
+            lineas = [json.loads(linea) for linea in archivo]
+        self.assertEqual(len(lineas), 1)
+        self.assertEqual(lineas[0]['email'], 'ana@example.com')
+        self.assertEqual(len(lineas[0]['eventos']), 2)
+
+    def test_comando(self):
+        self.encolar(self.ana, 3)
+        self.encolar(self.luis, 2)
+        salida = StringIO()
+        call_command('procesar_notificaciones', '--una-vez', '--lote', '2', stdout=salida)
+        metricas = json.loads(salida.getvalue())
+        self.assertEqual(metricas['eventos'], 5)
+        self.assertEqual(metricas['lotes'], 3)
+        self.assertEqual(metricas['enviados'], 5)
+        # Los eventos de Ana quedan en dos lotes: uno de ellos comparte lote con Luis
+        self.assertEqual(metricas['mensajes'], 4)
@@ -0,0 +1,82 @@
+"""
+Transportes de entrega de notificaciones.
+
+El transporte se elige con ``NOTIFICACIONES_TRANSPORTE`` (ruta a la clase).
+Un transporte real (correo, SMS) implementa ``enviar_uno`` o, si el
+proveedor acepta envíos en lote, ``enviar``.
+"""
+import json
+import sys
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Transporte:
+    """
+    Base de los transportes.
+    """
+    def enviar(self, mensajes):
+        """
+        Envía los mensajes y devuelve una lista alineada con ellos: ``None``
+        para cada mensaje entregado o la excepción con la que falló.
+        """
+        errores = []
+        for mensaje in mensajes:
+            try:
+                self.enviar_uno(mensaje)
+            except Exception as error:
+                errores.append(error)
+            else:
+                errores.append(None)
+        return errores
+
+    def enviar_uno(self, mensaje):
+        raise NotImplementedError
+
+
+class ConsolaTransporte(Transporte):
+    """
+    Escribe cada mensaje en la salida estándar. Para desarrollo.
+    """
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def enviar_uno(self, mensaje):
+        self.stream.write(
+            f'Para: {mensaje.destino()}\nAsunto: {mensaje.asunto}\n\n{mensaje.cuerpo}\n{"-" * 40}\n'
+        )
+        self.stream.flush()
+
+
+class ArchivoTransporte(Transporte):
+    """
+    Agrega cada mensaje como una línea JSON al archivo
+    ``NOTIFICACIONES_ARCHIVO``.
+    """
+    def __init__(self, ruta=None):
+        self.ruta = ruta or getattr(settings, 'NOTIFICACIONES_ARCHIVO', 'notificaciones.jsonl')
+
+    def enviar(self, mensajes):
+        with open(self.ruta, 'a', encoding='utf-8') as archivo:
+            for mensaje in mensajes:
+                archivo.write(json.dumps(mensaje.como_dict(), ensure_ascii=False) + '\n')
+        return [None] * len(mensajes)
+
+
+class MemoriaTransporte(Transporte):
+    """
+    Guarda los mensajes en ``MemoriaTransporte.bandeja``. Para pruebas.
+    """
+    bandeja = []
+    _lock = threading.Lock()
+
+    def enviar_uno(self, mensaje):
+        with self._lock:
+            self.bandeja.append(mensaje)
+
+
+def obtener_transporte():
+    ruta = getattr(settings, 'NOTIFICACIONES_TRANSPORTE', 'notificaciones.transportes.ConsolaTransporte')
+    return import_string(ruta)()
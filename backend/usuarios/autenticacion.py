@@ -0,0 +1,135 @@
+"""
+Autenticación JWT con caché de usuarios.
+
+``JWTAuthentication`` de simplejwt carga el ``Usuario`` desde la base de
+datos en cada petición. Esta variante guarda en memoria del proceso, con un
+tiempo de vida (TTL) y un máximo de entradas (LRU), la fila del usuario y
+reconstruye la instancia a partir de ella, de modo que la base de datos se
+consulta una vez por usuario cada ``USUARIOS_AUTH_CACHE_TTL`` segundos.
+
+Los claims del token (``rol``, ``first_login``) no bastan por sí solos: no
+reflejan una desactivación ni un cambio de contraseña posterior a la emisión
+del token. Por eso la fila cacheada es la fuente de ``is_active`` y se
+invalida cuando el usuario se guarda o se elimina. En despliegues con varios
+procesos, los demás procesos ven el cambio a más tardar al vencer el TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import Usuario
+
+
+class CacheUsuarios:
+    """
+    Caché LRU con TTL de filas de ``Usuario`` indexadas por id.
+    """
+    def __init__(self, ttl=None, max_entradas=None):
+        self._ttl = ttl
+        self._max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'USUARIOS_AUTH_CACHE_TTL', 60)
+
+    @property
+    def max_entradas(self):
+        if self._max_entradas is not None:
+            return self._max_entradas
+        return getattr(settings, 'USUARIOS_AUTH_CACHE_MAX', 2048)
+
+    def obtener(self, user_id):
+        """
+        Devuelve ``(campos, valores)`` del usuario o ``None`` si no existe.
+        """
+        # simplejwt puede entregar el id del claim como texto
+        clave = str(user_id)
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and entrada[0] > ahora:
+                self._datos.move_to_end(clave)
+                return entrada[1]
+
+        fila = self._cargar(user_id)
+        if fila is None:
+            return None
+
+        with self._lock:
+            self._datos[clave] = (ahora + self.ttl, fila)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+        return fila
+
+    def _cargar(self, user_id):
+        campos = tuple(field.attname for field in Usuario._meta.concrete_fields)
+        # Se lee de la primaria: una réplica atrasada dejaría en caché un
+        # usuario ya desactivado o modificado durante todo el TTL
+        valores = (
+            Usuario.objects.using(router.db_for_write(Usuario))
+            .filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values_list(*campos)
+            .first()
+        )
+        if valores is None:
+            return None
+        return campos, valores
+
+    def invalidar(self, user_id):
+        with self._lock:
+            self._datos.pop(str(user_id), None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+
+cache_usuarios = CacheUsuarios()
+
+
+class JWTAutenticacionCacheada(JWTAuthentication):
+    """
+    ``JWTAuthentication`` que obtiene el usuario desde ``cache_usuarios``.
+
+    Cada petición recibe su propia instancia de ``Usuario``, reconstruida
+    con ``from_db``, por lo que las vistas pueden modificarla y guardarla
+    como cualquier otra.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        fila = cache_usuarios.obtener(user_id)
+        if fila is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        campos, valores = fila
+        user = Usuario.from_db(router.db_for_write(Usuario), campos, valores)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
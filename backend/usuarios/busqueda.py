@@ -0,0 +1,189 @@
+"""
+Autocompletado de usuarios.
+
+Cada usuario tiene una fila ``TerminoBusquedaUsuario`` por palabra de su
+nombre, apellido, nombre de usuario y número de residencia, normalizada a
+minúsculas y sin tildes. El nombre de usuario y la residencia también se
+guardan completos, para que "e01-00" encuentre "E01-0042". Cada fila copia
+el rol y si el usuario está activo, de modo que el índice
+``(rol, activo, termino, usuario)`` resuelve la búsqueda completa.
+
+Una búsqueda toma la palabra más larga de la consulta como rango sobre el
+índice (``termino >= p AND termino < sucesor(p)``, que funciona con
+cualquier motor y collation) y exige las demás como prefijos de otros
+términos del mismo usuario. Los resultados salen en el orden del índice,
+así que la base de datos se detiene al juntar las primeras filas.
+"""
+import django_filters
+from django.db import transaction
+from django.db.models import Q
+
+from api.texto import minusculas_sin_tildes, normalizar
+from .models import TerminoBusquedaUsuario, Usuario
+
+MAX_PALABRAS = 4
+# Filas leídas por resultado pedido en cada tanda: un usuario puede
+# coincidir con varias de sus palabras y solo se devuelve una vez; si una
+# tanda no junta ``limite`` usuarios distintos se lee la siguiente
+FILAS_POR_RESULTADO = 6
+
+
+def terminos(username, first_name, last_name, numero_residencia):
+    """
+    Términos de búsqueda de un usuario, sin repetir.
+    """
+    encontrados = []
+    for texto in (first_name, last_name, username, numero_residencia):
+        encontrados.extend(normalizar(texto))
+    for texto in (username, numero_residencia):
+        if texto:
+            encontrados.append(minusculas_sin_tildes(texto.strip()))
+    return [termino[:150] for termino in dict.fromkeys(encontrados) if termino]
+
+
+CAMPOS_TEXTO = ('username', 'first_name', 'last_name', 'numero_residencia')
+CAMPOS_TERMINOS = CAMPOS_TEXTO + ('rol', 'is_active')
+
+
+def indexar_usuarios(usuarios, reemplazar=True, batch_size=1000):
+    """
+    Regenera los términos de ``usuarios`` (instancias de ``Usuario``).
+    Con ``reemplazar=False`` solo inserta, para usuarios recién creados.
+    """
+    usuarios = [usuario for usuario in usuarios if usuario.pk is not None]
+    if not usuarios:
+        return 0
+    filas = [
+        TerminoBusquedaUsuario(
+            usuario_id=usuario.pk, termino=termino, rol=usuario.rol, activo=usuario.is_active
+        )
+        for usuario in usuarios
+        for termino in terminos(*(getattr(usuario, campo) for campo in CAMPOS_TEXTO))
+    ]
+    with transaction.atomic(savepoint=False):
+        if reemplazar:
+            TerminoBusquedaUsuario.objects.filter(usuario__in=[u.pk for u in usuarios]).delete()
+        TerminoBusquedaUsuario.objects.bulk_create(filas, batch_size=batch_size)
+    return len(filas)
+
+
+def reindexar_todos(batch_size=1000):
+    """
+    Reconstruye los términos de todos los usuarios.
+    """
+    total = 0
+    with transaction.atomic():
+        TerminoBusquedaUsuario.objects.all().delete()
+        lote = []
+        for usuario in Usuario.objects.only(*CAMPOS_TERMINOS).order_by('id').iterator(chunk_size=batch_size):
+            lote.append(usuario)
+            if len(lote) >= batch_size:
+                total += indexar_usuarios(lote, reemplazar=False, batch_size=batch_size)
+                lote = []
+        total += indexar_usuarios(lote, reemplazar=False, batch_size=batch_size)
+    return total
+
+
+def palabras_consulta(texto):
+    """
+    Palabras de la consulta en minúsculas y sin tildes. Se conservan los
+    signos internos ("e01-00") para que coincidan con los términos completos.
+    """
+    return [
+        palabra for palabra in minusculas_sin_tildes(texto or '').split() if palabra
+    ][:MAX_PALABRAS]
+
+
+def rango_prefijo(campo, prefijo):
+    """
+    Filtro ``campo >= prefijo AND campo < sucesor(prefijo)``. A diferencia de
+    ``startswith`` (``LIKE ... ESCAPE`` en SQLite) usa el índice del campo.
+    """
+    sucesor = prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+    return {f'{campo}__gte': prefijo, f'{campo}__lt': sucesor}
+
+
+def _prefijo(palabra):
+    return rango_prefijo('termino', palabra)
+
+
+class UsuarioFilter(django_filters.FilterSet):
+    """
+    Filtros de la lista de usuarios: rol, activo y número de residencia
+    (exacto o por prefijo).
+    """
+    numero_residencia__startswith = django_filters.CharFilter(
+        field_name='numero_residencia', method='filtrar_prefijo'
+    )
+
+    class Meta:
+        model = Usuario
+        fields = {
+            'rol': ['exact'],
+            'is_active': ['exact'],
+            'numero_residencia': ['exact'],
+        }
+
+    def filtrar_prefijo(self, queryset, name, value):
+        return queryset.filter(**rango_prefijo(name, value)) if value else queryset
+
+
+def consulta_busqueda(texto, limite=10, rol='residente', solo_activos=True, despues_de=None):
+    """
+    Queryset de filas ``(termino, id, first_name, last_name, username,
+    numero_residencia)`` de los usuarios que coinciden, en el orden del
+    índice, con hasta ``limite * FILAS_POR_RESULTADO`` filas (con repetidos).
+    ``despues_de`` es el par ``(termino, id)`` de la última fila de la tanda
+    anterior: la siguiente continúa el recorrido del índice desde ahí.
+    """
+    palabras = sorted(palabras_consulta(texto), key=len, reverse=True)
+    if not palabras:
+        return TerminoBusquedaUsuario.objects.none().values_list('termino', 'usuario_id')
+    principal, *resto = palabras
+    terminos_usuarios = TerminoBusquedaUsuario.objects.all()
+    if rol:
+        terminos_usuarios = terminos_usuarios.filter(rol=rol)
+    if solo_activos:
+        # ``IN (1)`` y no ``= True``: Django escribe la comparación con un
+        # booleano como ``WHERE activo``, que no usa el índice
+        terminos_usuarios = terminos_usuarios.filter(activo__in=[True])
+    queryset = terminos_usuarios.filter(**_prefijo(principal))
+    if despues_de:
+        termino, usuario_id = despues_de
+        queryset = queryset.filter(
+            Q(termino__gt=termino) | Q(termino=termino, usuario_id__gt=usuario_id)
+        )
+    for palabra in resto:
+        queryset = queryset.filter(
+            usuario_id__in=terminos_usuarios.filter(**_prefijo(palabra)).values('usuario_id')
+        )
+    return (
+        queryset.order_by('termino', 'usuario_id')
+        .values_list(
+            'termino', 'usuario_id', 'usuario__first_name', 'usuario__last_name',
+            'usuario__username', 'usuario__numero_residencia',
+        )[:limite * FILAS_POR_RESULTADO]
+    )
+
+
+def buscar_usuarios(texto, limite=10, rol='residente', solo_activos=True):
+    """
+    Hasta ``limite`` usuarios cuyo nombre, usuario o residencia empiezan con
+    las palabras de ``texto``: ``[{'id', 'nombre', 'residencia'}]``.
+
+    Casi siempre basta una consulta; solo cuando los usuarios de la tanda
+    coinciden con muchas de sus palabras se leen más filas del índice.
+    """
+    resultados = {}
+    despues_de = None
+    while True:
+        filas = list(consulta_busqueda(texto, limite, rol, solo_activos, despues_de))
+        for termino, pk, first_name, last_name, username, residencia in filas:
+            if pk not in resultados:
+                nombre = f'{first_name} {last_name}'.strip() or username
+                resultados[pk] = {'id': pk, 'nombre': nombre, 'residencia': residencia}
+                if len(resultados) == limite:
+                    return list(resultados.values())
+        if len(filas) < limite * FILAS_POR_RESULTADO:
+            return list(resultados.values())
+        despues_de = filas[-1][:2]
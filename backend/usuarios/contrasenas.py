@@ -0,0 +1,47 @@
+"""
+Verificación de contraseñas que se ejecuta en los procesos del pool de
+``usuarios.hashing``.
+
+Con los métodos de inicio ``spawn`` y ``forkserver`` (por defecto en macOS,
+Windows y, desde Python 3.14, Linux) cada proceso del pool importa este
+módulo sin haber cargado las aplicaciones de Django. Por eso solo depende de
+``django.contrib.auth.hashers`` y de la configuración, nunca de modelos.
+"""
+from django.contrib.auth.hashers import get_hasher, identify_hasher, make_password
+
+
+def verificar_password(password, encoded):
+    """
+    Verifica ``password`` contra ``encoded``.
+
+    Devuelve ``(es_correcta, nuevo_hash)``. ``nuevo_hash`` solo se calcula
+    cuando la contraseña es correcta y el hash guardado usa otro algoritmo u
+    otro costo que el hasher configurado, para re-hashear en el login.
+    Con ``encoded`` en ``None`` (usuario inexistente) se hashea igualmente
+    para no revelar por tiempo de respuesta si el usuario existe.
+    """
+    if encoded is None:
+        make_password(password)
+        return False, None
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False, None
+
+    preferido = get_hasher('default')
+    hasher_cambiado = hasher.algorithm != preferido.algorithm
+    debe_actualizar = hasher_cambiado or preferido.must_update(encoded)
+    es_correcta = hasher.verify(password, encoded)
+
+    if not es_correcta:
+        if not hasher_cambiado and debe_actualizar:
+            hasher.harden_runtime(password, encoded)
+        return False, None
+    if debe_actualizar:
+        return True, make_password(password)
+    return True, None
+
+
+def hashear_passwords(passwords):
+    """Hashea un lote de contraseñas con el hasher configurado."""
+    return [make_password(password) for password in passwords]
@@ -0,0 +1,175 @@
+"""
+Verificación de contraseñas en un pool de procesos acotado.
+
+PBKDF2 consume CPU durante cientos de milisegundos por login. Si se calcula
+en el hilo de la petición, una ráfaga de logins (por ejemplo, a fin de mes)
+acapara la CPU y el GIL del proceso web y ralentiza todos los demás
+endpoints. Este módulo envía la verificación a un ``ProcessPoolExecutor``
+con un límite de tareas en cola; cuando el límite se alcanza, se rechaza la
+petición de inmediato para que la vista responda 503 en lugar de encolarla.
+La función que corre en los procesos vive en ``usuarios.contrasenas``, que
+no importa modelos, para que el pool funcione con cualquier método de inicio.
+
+Configuración:
+- ``USUARIOS_HASH_PROCESOS``: procesos del pool (0 verifica en el proceso actual).
+- ``USUARIOS_HASH_COLA_MAXIMA``: tareas pendientes admitidas (en ejecución + en cola).
+- ``USUARIOS_HASH_TIMEOUT``: segundos máximos de espera por una verificación.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+from django.conf import settings
+from django.contrib.auth.signals import user_login_failed
+
+from .autenticacion import cache_usuarios
+from .contrasenas import verificar_password
+from .models import Usuario
+
+
+class EjecutorSaturado(Exception):
+    """
+    El pool de hashing tiene su cola llena o no respondió a tiempo.
+    """
+
+
+class EjecutorHash:
+    """
+    Pool de procesos con un límite de tareas pendientes.
+
+    ``mp_context`` elige el método de inicio de los procesos (por defecto
+    el de la plataforma). Una tarea ocupa su lugar en la cola hasta que el
+    pool la termina, aunque quien la pidió haya dejado de esperarla.
+    """
+    def __init__(self, procesos, cola_maxima, timeout, mp_context=None):
+        self.procesos = procesos
+        self.cola_maxima = cola_maxima
+        self.timeout = timeout
+        self.mp_context = mp_context
+        self._pendientes = 0
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    def _obtener_pool(self):
+        # Un pool heredado por fork (p. ej. gunicorn --preload) no es usable
+        if self._pool is None or self._pid != os.getpid():
+            self._pool = ProcessPoolExecutor(max_workers=self.procesos, mp_context=self.mp_context)
+            self._pid = os.getpid()
+        return self._pool
+
+    @property
+    def pendientes(self):
+        return self._pendientes
+
+    def _liberar(self, future=None):
+        with self._lock:
+            self._pendientes -= 1
+
+    def ejecutar(self, funcion, *args):
+        if self.procesos <= 0:
+            return funcion(*args)
+
+        with self._lock:
+            if self._pendientes >= self.cola_maxima:
+                raise EjecutorSaturado()
+            self._pendientes += 1
+            try:
+                future = self._obtener_pool().submit(funcion, *args)
+            except BaseException:
+                self._pendientes -= 1
+                raise
+        # Al vencer el timeout la tarea sigue en el pool: su lugar se libera
+        # cuando termina, no cuando se deja de esperar
+        future.add_done_callback(self._liberar)
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            raise EjecutorSaturado()
+
+    def mapear(self, funcion, argumentos):
+        """
+        Ejecuta ``funcion`` con cada argumento en el pool y devuelve los
+        resultados en orden, para trabajos por lotes como la importación de
+        usuarios. Espera sin timeout y sin el límite de la cola, pero con a
+        lo sumo ``procesos`` tareas pendientes a la vez, para que los logins
+        que llegan mientras tanto no queden detrás de todo el lote.
+        """
+        if self.procesos <= 0:
+            return [funcion(argumento) for argumento in argumentos]
+
+        simultaneas = threading.BoundedSemaphore(self.procesos)
+        futures = []
+        for argumento in argumentos:
+            simultaneas.acquire()
+            with self._lock:
+                self._pendientes += 1
+                try:
+                    future = self._obtener_pool().submit(funcion, argumento)
+                except BaseException:
+                    self._pendientes -= 1
+                    simultaneas.release()
+                    raise
+            future.add_done_callback(self._liberar)
+            future.add_done_callback(lambda future: simultaneas.release())
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def cerrar(self):
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+
+_ejecutor = None
+_ejecutor_lock = threading.Lock()
+
+
+def obtener_ejecutor():
+    global _ejecutor
+    with _ejecutor_lock:
+        if _ejecutor is None:
+            procesos = getattr(settings, 'USUARIOS_HASH_PROCESOS', None)
+            if procesos is None:
+                procesos = os.cpu_count() or 1
+            cola_maxima = getattr(settings, 'USUARIOS_HASH_COLA_MAXIMA', None) or procesos * 4
+            timeout = getattr(settings, 'USUARIOS_HASH_TIMEOUT', 10)
+            _ejecutor = EjecutorHash(procesos, cola_maxima, timeout)
+        return _ejecutor
+
+
+def reiniciar_ejecutor():
+    """
+    Cierra el pool actual; el siguiente uso lo crea con la configuración vigente.
+    """
+    global _ejecutor
+    with _ejecutor_lock:
+        if _ejecutor is not None:
+            _ejecutor.cerrar()
+        _ejecutor = None
+
+
+def autenticar(username, password):
+    """
+    Equivalente a ``authenticate`` del ``ModelBackend`` con la verificación
+    en el pool. Si el hasher configurado cambió, guarda el nuevo hash.
+
+    Lanza ``EjecutorSaturado`` si el pool no admite más trabajo.
+    """
+    user = Usuario._default_manager.filter(
+        **{Usuario.USERNAME_FIELD: username}
+    ).first()
+    encoded = user.password if user is not None else None
+
+    es_correcta, nuevo_hash = obtener_ejecutor().ejecutar(verificar_password, password, encoded)
+    if not es_correcta or not user.is_active:
+        user_login_failed.send(sender=__name__, credentials={'username': username})
+        return None
+
+    if nuevo_hash:
+        # Solo si nadie cambió la contraseña mientras se verificaba
+        Usuario._default_manager.filter(pk=user.pk, password=encoded).update(password=nuevo_hash)
+        user.password = nuevo_hash
+        cache_usuarios.invalidar(user.pk)
+    return user
@@ -0,0 +1,235 @@
+"""
+Importación masiva de usuarios desde CSV o JSON Lines.
+
+Las filas se leen de forma perezosa y se procesan por lotes: cada lote se
+valida, sus contraseñas temporales se hashean en un pool de procesos y los
+usuarios se insertan con ``bulk_create``. Los errores se informan por fila
+sin abortar el resto de la importación.
+
+El comando ``importar_usuarios`` usa su propio pool y escribe cada resultado
+a medida que se genera, así que su memoria queda acotada por el tamaño del
+lote. La vista de la API acota el tamaño del archivo
+(``USUARIOS_IMPORTACION_TAMANIO_MAXIMO``) y hashea en el pool compartido con
+los logins (``usuarios.hashing``) para no crear procesos por petición.
+"""
+import csv
+import json
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .busqueda import indexar_usuarios
+from .contrasenas import hashear_passwords
+from .hashing import obtener_ejecutor
+from .models import Usuario
+from .serializers import UsuarioImportacionSerializer
+
+FORMATOS = ('csv', 'jsonl')
+
+
+def leer_csv(stream):
+    """
+    Genera un diccionario por fila de un CSV con encabezados.
+    """
+    for fila in csv.DictReader(stream):
+        # Las celdas vacías se omiten para que apliquen los valores por defecto
+        yield {clave.strip(): valor for clave, valor in fila.items() if clave and valor}
+
+
+def leer_jsonl(stream):
+    """
+    Genera un diccionario por línea de un archivo JSON Lines.
+    """
+    for linea in stream:
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            fila = json.loads(linea)
+        except ValueError as error:
+            yield {'_error': f"JSON inválido: {error}"}
+            continue
+        if not isinstance(fila, dict):
+            yield {'_error': "Cada línea debe ser un objeto JSON."}
+            continue
+        yield fila
+
+
+def leer_filas(stream, formato):
+    if formato == 'csv':
+        return leer_csv(stream)
+    if formato == 'jsonl':
+        return leer_jsonl(stream)
+    raise ValueError(f"Formato no soportado: {formato}")
+
+
+# Contraseñas por tarea en el pool compartido: tareas cortas, para que un
+# login no espere detrás de un lote completo
+PASSWORDS_POR_TAREA = 4
+
+
+def _hashear_por_grupos(mapear, passwords, por_tarea):
+    """
+    Reparte ``passwords`` en grupos de ``por_tarea`` y los hashea con
+    ``hashear_passwords`` mediante ``mapear``, conservando el orden.
+    """
+    grupos = [passwords[inicio:inicio + por_tarea] for inicio in range(0, len(passwords), por_tarea)]
+    return [hash_ for grupo in mapear(hashear_passwords, grupos) for hash_ in grupo]
+
+
+def hashear_compartido(passwords):
+    """
+    Hashea en el pool de procesos de ``usuarios.hashing``, el mismo que
+    verifica las contraseñas del login.
+    """
+    return _hashear_por_grupos(obtener_ejecutor().mapear, passwords, PASSWORDS_POR_TAREA)
+
+
+@contextmanager
+def ejecutor_hash(procesos=None):
+    """
+    Entrega una función que hashea una lista de contraseñas.
+
+    Con más de un proceso el trabajo se reparte en un ``ProcessPoolExecutor``;
+    con uno se hashea en el proceso actual.
+    """
+    if procesos is None:
+        procesos = getattr(settings, 'USUARIOS_IMPORTACION_PROCESOS', None) or os.cpu_count() or 1
+    if procesos <= 1:
+        yield hashear_passwords
+        return
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        def hashear(passwords):
+            por_tarea = max(1, len(passwords) // (procesos * 4))
+            return _hashear_por_grupos(pool.map, passwords, por_tarea)
+        yield hashear
+
+
+def _error(numero, fila, errores):
+    return {
+        'fila': numero,
+        'username': fila.get('username') if isinstance(fila, dict) else None,
+        'estado': 'error',
+        'errores': errores,
+    }
+
+
+def _insertar(usuarios):
+    """
+    Inserta el lote completo; si otro proceso creó alguno de los usuarios
+    entretanto, inserta uno por uno para aislar las filas en conflicto.
+    """
+    try:
+        with transaction.atomic():
+            Usuario.objects.bulk_create(usuarios)
+            # bulk_create no envía post_save: los términos de autocompletado
+            # se generan aquí (MySQL no devuelve los ids insertados)
+            if any(usuario.pk is None for usuario in usuarios):
+                usuarios = Usuario.objects.filter(username__in=[u.username for u in usuarios])
+            indexar_usuarios(usuarios, reemplazar=False)
+        return {}
+    except IntegrityError:
+        pass
+
+    fallidos = {}
+    for usuario in usuarios:
+        try:
+            with transaction.atomic():
+                usuario.save(force_insert=True)
+        except IntegrityError:
+            fallidos[usuario.username] = "Ya existe un usuario con ese nombre de usuario."
+    return fallidos
+
+
+def _procesar_lote(lote, hashear):
+    resultados = {}
+    validos = []
+    for numero, fila in lote:
+        if '_error' in fila:
+            resultados[numero] = _error(numero, fila, {'fila': [fila['_error']]})
+            continue
+        serializer = UsuarioImportacionSerializer(data=fila)
+        if serializer.is_valid():
+            validos.append((numero, serializer.validated_data))
+        else:
+            resultados[numero] = _error(numero, fila, serializer.errors)
+
+    existentes = set(
+        Usuario.objects
+        .filter(username__in=[datos['username'] for _, datos in validos])
+        .values_list('username', flat=True)
+    )
+    vistos = set()
+    candidatos = []
+    for numero, datos in validos:
+        username = datos['username']
+        if username in existentes or username in vistos:
+            resultados[numero] = _error(
+                numero, datos, {'username': ["Ya existe un usuario con ese nombre de usuario."]}
+            )
+            continue
+        vistos.add(username)
+        candidatos.append((numero, datos, datos.get('password') or None))
+
+    passwords = [password or secrets.token_urlsafe(9) for _, _, password in candidatos]
+    hashes = hashear(passwords) if passwords else []
+
+    usuarios = []
+    for (numero, datos, password), temporal, hash_ in zip(candidatos, passwords, hashes):
+        usuarios.append(Usuario(
+            username=datos['username'],
+            email=datos.get('email', ''),
+            first_name=datos.get('first_name', ''),
+            last_name=datos.get('last_name', ''),
+            numero_residencia=datos.get('numero_residencia', ''),
+            telefono=datos.get('telefono', ''),
+            rol=datos.get('rol', 'residente'),
+            first_login=True,
+            password=hash_,
+        ))
+        resultado = {'fila': numero, 'username': datos['username'], 'estado': 'creado'}
+        if password is None:
+            # Contraseña generada: el administrador debe entregarla al residente
+            resultado['password_temporal'] = temporal
+        resultados[numero] = resultado
+
+    fallidos = _insertar(usuarios) if usuarios else {}
+    for numero, datos, _ in candidatos:
+        if datos['username'] in fallidos:
+            resultados[numero] = _error(
+                numero, datos, {'username': [fallidos[datos['username']]]}
+            )
+
+    for numero, _ in lote:
+        yield resultados[numero]
+
+
+def _importar(filas, batch_size, hashear):
+    lote = []
+    for numero, fila in enumerate(filas, start=1):
+        lote.append((numero, fila))
+        if len(lote) >= batch_size:
+            yield from _procesar_lote(lote, hashear)
+            lote = []
+    if lote:
+        yield from _procesar_lote(lote, hashear)
+
+
+def importar_usuarios(filas, batch_size=500, procesos=None, hashear=None):
+    """
+    Importa usuarios desde un iterable de diccionarios y genera un
+    resultado por fila (``estado`` 'creado' o 'error'), en orden.
+
+    ``hashear`` recibe una lista de contraseñas y devuelve sus hashes; por
+    defecto se crea un pool de ``procesos`` procesos para la importación.
+    """
+    if hashear is not None:
+        yield from _importar(filas, batch_size, hashear)
+        return
+    with ejecutor_hash(procesos) as hashear:
+        yield from _importar(filas, batch_size, hashear)
@@ -0,0 +1,53 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from usuarios.importacion import FORMATOS, importar_usuarios, leer_filas
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa usuarios desde un archivo CSV o JSON Lines. Escribe un '
+        'reporte CSV con el resultado de cada fila.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo, o '-' para leer de la entrada estándar.")
+        parser.add_argument('--formato', choices=FORMATOS, help='Por defecto se deduce de la extensión.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--procesos', type=int, help='Procesos para hashear contraseñas.')
+        parser.add_argument('--reporte', help='Ruta del reporte CSV (por defecto, salida estándar).')
+
+    def handle(self, *args, **options):
+        archivo = options['archivo']
+        formato = options['formato'] or archivo.rsplit('.', 1)[-1].lower()
+        if formato not in FORMATOS:
+            raise CommandError(f"No se pudo deducir el formato de '{archivo}', use --formato.")
+
+        entrada = sys.stdin if archivo == '-' else open(archivo, encoding='utf-8-sig', newline='')
+        salida = open(options['reporte'], 'w', newline='') if options['reporte'] else self.stdout
+        creados = errores = 0
+        try:
+            reporte = csv.writer(salida)
+            reporte.writerow(['fila', 'username', 'estado', 'password_temporal', 'errores'])
+            filas = leer_filas(entrada, formato)
+            for resultado in importar_usuarios(filas, options['batch_size'], options['procesos']):
+                if resultado['estado'] == 'creado':
+                    creados += 1
+                else:
+                    errores += 1
+                reporte.writerow([
+                    resultado['fila'],
+                    resultado['username'] or '',
+                    resultado['estado'],
+                    resultado.get('password_temporal', ''),
+                    resultado.get('errores', ''),
+                ])
+        finally:
+            if entrada is not sys.stdin:
+                entrada.close()
+            if salida is not self.stdout:
+                salida.close()
+
+        self.stderr.write(self.style.SUCCESS(f'{creados} usuarios creados, {errores} filas con errores.'))
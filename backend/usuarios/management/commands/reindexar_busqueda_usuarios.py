@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from usuarios.busqueda import reindexar_todos
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye los términos de autocompletado de los usuarios. Útil '
+        'después de cargas masivas que no disparan señales (bulk_create, update).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Cantidad de usuarios por lote.',
+        )
+
+    def handle(self, *args, **options):
+        total = reindexar_todos(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} términos de búsqueda generados.'))
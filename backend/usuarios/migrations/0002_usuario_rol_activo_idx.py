@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('usuarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['rol', 'is_active'], name='usuario_rol_activo_idx'),
+        ),
+    ]
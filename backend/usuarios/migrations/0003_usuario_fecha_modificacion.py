@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0002_usuario_rol_activo_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Fecha de modificación'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:11
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def _minusculas_sin_tildes(texto):
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def _terminos(username, first_name, last_name, numero_residencia):
+    encontrados = []
+    for texto in (first_name, last_name, username, numero_residencia):
+        if texto:
+            encontrados.extend(re.findall(r'\w+', _minusculas_sin_tildes(str(texto))))
+    for texto in (username, numero_residencia):
+        if texto:
+            encontrados.append(_minusculas_sin_tildes(texto.strip()))
+    return [termino[:150] for termino in dict.fromkeys(encontrados) if termino]
+
+
+def poblar_terminos(apps, schema_editor):
+    Usuario = apps.get_model('usuarios', 'Usuario')
+    TerminoBusquedaUsuario = apps.get_model('usuarios', 'TerminoBusquedaUsuario')
+    db_alias = schema_editor.connection.alias
+    filas = Usuario.objects.using(db_alias).values_list(
+        'id', 'rol', 'is_active', 'username', 'first_name', 'last_name', 'numero_residencia'
+    )
+    TerminoBusquedaUsuario.objects.using(db_alias).bulk_create((
+        TerminoBusquedaUsuario(usuario_id=pk, termino=termino, rol=rol, activo=activo)
+        for pk, rol, activo, *textos in filas.iterator(chunk_size=2000)
+        for termino in _terminos(*textos)
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('usuarios', '0003_usuario_fecha_modificacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoBusquedaUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=150, verbose_name='Término')),
+                ('rol', models.CharField(choices=[('admin', 'Administrador'), ('residente', 'Residente')], max_length=10, verbose_name='Rol')),
+                ('activo', models.BooleanField(verbose_name='Activo')),
+            ],
+            options={
+                'verbose_name': 'Término de búsqueda de usuario',
+                'verbose_name_plural': 'Términos de búsqueda de usuarios',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['numero_residencia'], name='usuario_residencia_idx'),
+        ),
+        migrations.AddField(
+            model_name='terminobusquedausuario',
+            name='usuario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos_busqueda', to=settings.AUTH_USER_MODEL, verbose_name='Usuario'),
+        ),
+        migrations.AddIndex(
+            model_name='terminobusquedausuario',
+            index=models.Index(fields=['rol', 'activo', 'termino', 'usuario'], name='termino_rol_activo_idx'),
+        ),
+        migrations.RunPython(poblar_terminos, migrations.RunPython.noop),
+    ]
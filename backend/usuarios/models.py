@@ -17,6 +17,7 @@ class Usuario(AbstractUser):
     telefono = models.CharField(max_length=20, blank=True, null=True, verbose_name=_("Teléfono"))
     rol = models.CharField(max_length=10, choices=ROLES, default='residente', verbose_name=_("Rol"))
     first_login = models.BooleanField(default=True, verbose_name=_("Primer inicio de sesión"))
+    fecha_modificacion = models.DateTimeField(auto_now=True, verbose_name=_("Fecha de modificación"))
     
     # Campos para relacionar con otros modelos
     # Se agregarán relaciones con Gastos, Multas y Pagos
@@ -24,9 +25,47 @@ class Usuario(AbstractUser):
     class Meta:
         verbose_name = _("Usuario")
         verbose_name_plural = _("Usuarios")
+        indexes = [
+            # Listados y conteos de residentes activos en los dashboards
+            models.Index(fields=['rol', 'is_active'], name='usuario_rol_activo_idx'),
+            # Filtro por número de residencia (exacto o por prefijo)
+            models.Index(fields=['numero_residencia'], name='usuario_residencia_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.numero_residencia or 'Sin residencia'}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Valores guardados, para que las señales sepan qué campos cambiaron
+        instancia._valores_guardados = dict(zip(field_names, values))
+        return instancia
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        campos = kwargs.get('update_fields')
+        if campos is None:
+            diferidos = self.get_deferred_fields()
+            campos = [f.attname for f in self._meta.concrete_fields if f.attname not in diferidos]
+        valores = getattr(self, '_valores_guardados', {})
+        valores.update((campo, getattr(self, campo)) for campo in campos)
+        self._valores_guardados = valores
+
+    def campos_cambiados(self, campos, update_fields=None):
+        """
+        Campos de ``campos`` cuyo valor difiere del último leído o guardado.
+        Pensado para ``post_save``, donde todavía se compara con los valores
+        anteriores. Un campo sin valor conocido (instancia creada a mano o
+        campo diferido) se considera cambiado.
+        """
+        if update_fields is not None:
+            campos = set(campos).intersection(update_fields)
+        guardados = getattr(self, '_valores_guardados', {})
+        return {
+            campo for campo in campos
+            if campo not in guardados or guardados[campo] != getattr(self, campo)
+        }
     
     @property
     def nombre_completo(self):
@@ -39,3 +78,32 @@ class Usuario(AbstractUser):
     @property
     def es_residente(self):
         return self.rol == 'residente'
+
+
+class TerminoBusquedaUsuario(models.Model):
+    """
+    Palabra normalizada (minúsculas, sin tildes) del nombre, el nombre de
+    usuario o el número de residencia de un usuario. ``rol`` y ``activo``
+    se copian del usuario para que el índice responda solo las búsquedas por
+    prefijo del autocompletado, sin recorrer la tabla de usuarios.
+    """
+    usuario = models.ForeignKey(
+        Usuario,
+        on_delete=models.CASCADE,
+        related_name='terminos_busqueda',
+        verbose_name=_("Usuario")
+    )
+    termino = models.CharField(max_length=150, verbose_name=_("Término"))
+    rol = models.CharField(max_length=10, choices=Usuario.ROLES, verbose_name=_("Rol"))
+    activo = models.BooleanField(verbose_name=_("Activo"))
+
+    class Meta:
+        verbose_name = _("Término de búsqueda de usuario")
+        verbose_name_plural = _("Términos de búsqueda de usuarios")
+        indexes = [
+            models.Index(fields=['rol', 'activo', 'termino', 'usuario'], name='termino_rol_activo_idx'),
+        ]
+
+    def __str__(self):
+        return self.termino
+
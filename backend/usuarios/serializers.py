@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from .models import Usuario
 
 class UsuarioSerializer(serializers.ModelSerializer):
@@ -25,8 +26,8 @@ class UsuarioCreateSerializer(serializers.ModelSerializer):
                   'numero_residencia', 'telefono', 'rol']
     
     def create(self, validated_data):
-        # Crear usuario con contraseña encriptada
-        user = Usuario.objects.create(
+        # Crear usuario con contraseña encriptada en una sola escritura
+        user = Usuario(
             username=validated_data['username'],
             email=validated_data['email'],
             first_name=validated_data.get('first_name', ''),
@@ -38,10 +39,26 @@ class UsuarioCreateSerializer(serializers.ModelSerializer):
         )
         
         user.set_password(validated_data['password'])
-        user.save()
+        user.save(force_insert=True)
         
         return user
 
+class UsuarioImportacionSerializer(serializers.Serializer):
+    """
+    Serializador para validar cada fila de una importación masiva.
+    
+    La unicidad del nombre de usuario se verifica por lote en la
+    importación, no aquí, para no hacer una consulta por fila.
+    """
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField(required=False, allow_blank=True, default='')
+    password = serializers.CharField(required=False, allow_blank=True, write_only=True)
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    numero_residencia = serializers.CharField(max_length=20, required=False, allow_blank=True, default='')
+    telefono = serializers.CharField(max_length=20, required=False, allow_blank=True, default='')
+    rol = serializers.ChoiceField(choices=Usuario.ROLES, required=False, default='residente')
+
 class CambioPasswordSerializer(serializers.Serializer):
     """
     Serializador para cambiar la contraseña del usuario.
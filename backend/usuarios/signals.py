@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .autenticacion import cache_usuarios
+from .busqueda import CAMPOS_TERMINOS, indexar_usuarios
+from .models import Usuario
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+def invalidar_cache_autenticacion(sender, instance, **kwargs):
+    """
+    Descarta la fila cacheada del usuario para que la siguiente petición
+    vea sus cambios (por ejemplo, una desactivación).
+    """
+    cache_usuarios.invalidar(instance.pk)
+
+
+@receiver(post_save, sender=Usuario)
+def indexar_usuario(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Actualiza los términos de autocompletado del usuario guardado, si
+    cambió alguno de los campos que los forman.
+    """
+    if not created and not instance.campos_cambiados(CAMPOS_TERMINOS, update_fields):
+        return
+    indexar_usuarios([instance], reemplazar=not created)
@@ -1,3 +1,368 @@
-from django.test import TestCase
+import json
+import multiprocessing
+import tempfile
+import time
+from unittest import mock
+from io import StringIO
+
+from django.conf import global_settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .autenticacion import CacheUsuarios, cache_usuarios
+from .busqueda import buscar_usuarios
+from .hashing import EjecutorHash, EjecutorSaturado, obtener_ejecutor, reiniciar_ejecutor
+from .importacion import importar_usuarios, leer_csv
+from .models import TerminoBusquedaUsuario, Usuario
+
+HASH_RAPIDO = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@override_settings(PASSWORD_HASHERS=HASH_RAPIDO, USUARIOS_IMPORTACION_PROCESOS=1, USUARIOS_HASH_PROCESOS=0)
+class ImportacionUsuariosTests(TestCase):
+
+    def setUp(self):
+        reiniciar_ejecutor()
+        self.addCleanup(reiniciar_ejecutor)
+        self.admin = Usuario.objects.create_user(username='admin', password='x', rol='admin')
+        Usuario.objects.create_user(username='existente', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def importar(self, contenido, nombre='usuarios.csv'):
+        archivo = SimpleUploadedFile(nombre, contenido.encode('utf-8'))
+        return self.client.post('/api/auth/usuarios/importar/', {'archivo': archivo})
+
+    def test_csv_con_errores_por_fila(self):
+        response = self.importar(
+            'username,email,first_name,last_name,numero_residencia,password,rol\n'
+            'ana,ana@ejemplo.cl,Ana,Pérez,101,Secreta123,\n'
+            'existente,,,,102,,\n'
+            'luis,no-es-email,Luis,Soto,103,,\n'
+            'ana,,,,104,,\n'
+            'marta,,Marta,Díaz,105,,\n'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['creados'], 2)
+        self.assertEqual([e['fila'] for e in response.data['errores']], [2, 3, 4])
+
+        ana = Usuario.objects.get(username='ana')
+        self.assertTrue(ana.check_password('Secreta123'))
+        self.assertTrue(ana.first_login)
+        self.assertEqual(ana.rol, 'residente')
+
+        temporal, = response.data['passwords_temporales']
+        self.assertEqual(temporal['username'], 'marta')
+        marta = Usuario.objects.get(username='marta')
+        self.assertTrue(check_password(temporal['password_temporal'], marta.password))
+
+    def test_consultas_por_lote(self):
+        filas = ''.join(f'u{i},,,,{i},,\n' for i in range(30))
+        contenido = 'username,email,first_name,last_name,numero_residencia,password,rol\n' + filas
+        # Verificación de existentes + una sola inserción de usuarios y otra
+        # de términos de búsqueda (con su savepoint)
+        with self.assertNumQueries(5):
+            list(importar_usuarios(leer_csv(StringIO(contenido))))
+        self.assertEqual(Usuario.objects.filter(username__startswith='u').count(), 30)
+
+    def test_pool_de_procesos(self):
+        filas = [{'username': f'p{i}', 'password': f'clave{i}'} for i in range(6)]
+        resultados = list(importar_usuarios(filas, batch_size=4, procesos=2))
+        self.assertEqual([r['estado'] for r in resultados], ['creado'] * 6)
+        self.assertTrue(Usuario.objects.get(username='p5').check_password('clave5'))
+
+    @override_settings(USUARIOS_HASH_PROCESOS=1)
+    def test_api_usa_el_pool_del_login(self):
+        filas = ''.join(f'api{i},,,,{i},,\n' for i in range(9))
+        with mock.patch('usuarios.importacion.ProcessPoolExecutor') as pool_propio:
+            response = self.importar('username,email,first_name,last_name,numero_residencia,password,rol\n' + filas)
+        pool_propio.assert_not_called()
+        self.assertEqual(response.data['creados'], 9)
+        self.assertEqual(obtener_ejecutor().pendientes, 0)
+        temporal = response.data['passwords_temporales'][8]
+        self.assertTrue(Usuario.objects.get(username='api8').check_password(temporal['password_temporal']))
+
+    @override_settings(USUARIOS_IMPORTACION_TAMANIO_MAXIMO=20)
+    def test_archivo_demasiado_grande(self):
+        response = self.importar('username\nuno\ndos\ntres\ncuatro\n')
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(Usuario.objects.filter(username='uno').exists())
+
+    def test_solo_administradores(self):
+        self.client.force_authenticate(Usuario.objects.get(username='existente'))
+        response = self.importar('username\nnuevo\n')
+        self.assertEqual(response.status_code, 403)
+
+    def test_comando_jsonl(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as archivo:
+            archivo.write(json.dumps({'username': 'pedro', 'numero_residencia': '201'}) + '\n')
+            archivo.write('{no es json}\n')
+            archivo.write(json.dumps({'username': 'sofia', 'rol': 'admin'}) + '\n')
+        salida = StringIO()
+        call_command('importar_usuarios', archivo.name, batch_size=1, stdout=salida, stderr=StringIO())
+        reporte = salida.getvalue().splitlines()
+        self.assertEqual(len(reporte), 4)
+        self.assertIn('error', reporte[2])
+        self.assertEqual(Usuario.objects.get(username='sofia').rol, 'admin')
+        self.assertTrue(Usuario.objects.filter(username='pedro').exists())
+
+
+@override_settings(PASSWORD_HASHERS=HASH_RAPIDO)
+class AutenticacionCacheadaTests(TestCase):
+
+    def setUp(self):
+        cache_usuarios.limpiar()
+        self.residente = Usuario.objects.create_user(
+            username='residente', password='x', rol='residente', numero_residencia='101'
+        )
+        token = RefreshToken.for_user(self.residente).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_una_consulta_por_usuario(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/auth/usuarios/mi-perfil/')
+        self.assertEqual(response.data['numero_residencia'], '101')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/usuarios/mi-perfil/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_desactivar_invalida(self):
+        self.client.get('/api/auth/usuarios/mi-perfil/')
+        self.residente.is_active = False
+        self.residente.save()
+        response = self.client.get('/api/auth/usuarios/mi-perfil/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_eliminar_invalida(self):
+        self.client.get('/api/auth/usuarios/mi-perfil/')
+        self.residente.delete()
+        response = self.client.get('/api/auth/usuarios/mi-perfil/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_cambios_visibles_tras_guardar(self):
+        self.client.get('/api/auth/usuarios/mi-perfil/')
+        self.residente.numero_residencia = '202'
+        self.residente.save()
+        response = self.client.get('/api/auth/usuarios/mi-perfil/')
+        self.assertEqual(response.data['numero_residencia'], '202')
+
+    def test_ttl(self):
+        cache = CacheUsuarios(ttl=0)
+        self.assertIsNotNone(cache.obtener(self.residente.pk))
+        with self.assertNumQueries(1):
+            cache.obtener(self.residente.pk)
+
+
+class PBKDF2Rapido(PBKDF2PasswordHasher):
+    iterations = 1000
+
+
+class PBKDF2RapidoReforzado(PBKDF2PasswordHasher):
+    iterations = 2000
+
+
+@override_settings(PASSWORD_HASHERS=HASH_RAPIDO, USUARIOS_HASH_PROCESOS=0)
+class LoginTests(TestCase):
+
+    def setUp(self):
+        reiniciar_ejecutor()
+        self.addCleanup(reiniciar_ejecutor)
+        self.residente = Usuario.objects.create_user(
+            username='residente', password='Clave123', rol='residente'
+        )
+        self.client = APIClient()
+
+    def login(self, password='Clave123', username='residente'):
+        return self.client.post(
+            '/api/auth/login/', {'username': username, 'password': password}, format='json'
+        )
+
+    def test_login_correcto_e_incorrecto(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['rol'], 'residente')
+        self.assertEqual(self.login('otra').status_code, 401)
+        self.assertEqual(self.login(username='nadie').status_code, 401)
+
+    def test_usuario_inactivo(self):
+        Usuario.objects.filter(pk=self.residente.pk).update(is_active=False)
+        self.assertEqual(self.login().status_code, 401)
+
+    def test_rehash_al_cambiar_costo(self):
+        ruta = 'usuarios.tests.'
+        with self.settings(PASSWORD_HASHERS=[ruta + 'PBKDF2Rapido']):
+            self.residente.set_password('Clave123')
+            self.residente.save()
+        anterior = Usuario.objects.get(pk=self.residente.pk).password
+        self.assertIn('$1000$', anterior)
+
+        with self.settings(PASSWORD_HASHERS=[ruta + 'PBKDF2RapidoReforzado', ruta + 'PBKDF2Rapido']):
+            self.assertEqual(self.login().status_code, 200)
+            nuevo = Usuario.objects.get(pk=self.residente.pk).password
+            self.assertIn('$2000$', nuevo)
+            self.assertEqual(self.login().status_code, 200)
+
+    def test_cola_llena_responde_503(self):
+        ejecutor = EjecutorHash(procesos=1, cola_maxima=1, timeout=5)
+        ejecutor._pendientes = 1
+        with mock.patch('usuarios.hashing._ejecutor', ejecutor):
+            response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    @override_settings(USUARIOS_HASH_PROCESOS=1)
+    def test_pool_de_procesos(self):
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(self.login('otra').status_code, 401)
+        self.assertEqual(obtener_ejecutor().pendientes, 0)
+
+    def test_pool_con_spawn(self):
+        # Los procesos creados con spawn importan la función sin las
+        # aplicaciones de Django cargadas y leen los hashers del módulo de
+        # configuración, no los de override_settings
+        with self.settings(PASSWORD_HASHERS=global_settings.PASSWORD_HASHERS):
+            self.residente.set_password('Clave123')
+            self.residente.save()
+        ejecutor = EjecutorHash(
+            procesos=1, cola_maxima=2, timeout=60, mp_context=multiprocessing.get_context('spawn'),
+        )
+        self.addCleanup(ejecutor.cerrar)
+        with mock.patch('usuarios.hashing._ejecutor', ejecutor):
+            self.assertEqual(self.login().status_code, 200)
+            self.assertEqual(self.login('otra').status_code, 401)
+
+    def test_timeout_conserva_el_lugar_hasta_terminar(self):
+        ejecutor = EjecutorHash(procesos=1, cola_maxima=1, timeout=0.05)
+        self.addCleanup(ejecutor.cerrar)
+        with self.assertRaises(EjecutorSaturado):
+            ejecutor.ejecutar(time.sleep, 1)
+        # La tarea sigue en el pool: la cola sigue llena
+        self.assertEqual(ejecutor.pendientes, 1)
+        with self.assertRaises(EjecutorSaturado):
+            ejecutor.ejecutar(time.sleep, 0)
+
+        limite = time.monotonic() + 10
+        while ejecutor.pendientes and time.monotonic() < limite:
+            time.sleep(0.05)
+        self.assertEqual(ejecutor.pendientes, 0)
+        self.assertIsNone(ejecutor.ejecutar(time.sleep, 0))
+
+
+class BusquedaUsuariosTests(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='admin', password='x', rol='admin')
+        self.ana = Usuario.objects.create_user(
+            username='aperez', password='x', first_name='Ana María', last_name='Pérez',
+            numero_residencia='E01-0042',
+        )
+        self.pedro = Usuario.objects.create_user(
+            username='pgomez', password='x', first_name='Pedro', last_name='Gómez',
+            numero_residencia='E02-0007',
+        )
+        self.inactivo = Usuario.objects.create_user(
+            username='pinactivo', password='x', first_name='Pedro', last_name='Peña',
+            numero_residencia='E01-0043', is_active=False,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def ids(self, texto, **kwargs):
+        return [fila['id'] for fila in buscar_usuarios(texto, **kwargs)]
+
+    def test_prefijos_de_nombre_usuario_y_residencia(self):
+        self.assertEqual(self.ids('pe'), [self.pedro.pk, self.ana.pk])
+        self.assertEqual(self.ids('mar'), [self.ana.pk])
+        self.assertEqual(self.ids('PGOM'), [self.pedro.pk])
+        self.assertEqual(self.ids('e01-00'), [self.ana.pk])
+        self.assertEqual(self.ids('0007'), [self.pedro.pk])
+        self.assertEqual(self.ids('ana per'), [self.ana.pk])
+        self.assertEqual(self.ids('ana gom'), [])
+        self.assertEqual(self.ids(''), [])
+
+    def test_filtra_activos_y_limita(self):
+        self.assertEqual(self.ids('pedro'), [self.pedro.pk])
+        self.assertEqual(self.ids('pedro', solo_activos=False), [self.pedro.pk, self.inactivo.pk])
+        self.assertEqual(len(self.ids('e0', limite=1)), 1)
+
+    def test_usuario_con_muchos_terminos_no_oculta_a_los_demas(self):
+        # Las primeras 12 filas del índice para "q" son todas del mismo
+        # usuario: la búsqueda lee otra tanda para completar el límite
+        muchos = Usuario.objects.create_user(
+            username='qaa', password='x', first_name=' '.join(f'Qa{letra}' for letra in 'bcdefgh'),
+            last_name='Qai Qaj Qak Qal', numero_residencia='Qam',
+        )
+        otro = Usuario.objects.create_user(username='qzz', password='x', first_name='Quintín')
+        with self.assertNumQueries(2):
+            self.assertEqual(self.ids('q', limite=2), [muchos.pk, otro.pk])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.ids('q', limite=1), [muchos.pk])
+
+    def test_terminos_se_actualizan_al_guardar(self):
+        self.ana.last_name = 'Soto'
+        self.ana.save()
+        self.assertEqual(self.ids('perez'), [])
+        self.assertEqual(self.ids('soto'), [self.ana.pk])
+        self.ana.telefono = '123'
+        with self.assertNumQueries(1):
+            self.ana.save(update_fields=['telefono'])
+
+    def test_endpoint_una_consulta(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/auth/usuarios/buscar/', {'q': 'Pér', 'limite': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [
+            {'id': self.ana.pk, 'nombre': 'Ana María Pérez', 'residencia': 'E01-0042'},
+        ])
+        self.assertEqual(self.client.get('/api/auth/usuarios/buscar/', {'limite': 'x'}).status_code, 400)
+
+    def test_endpoint_solo_admin(self):
+        self.client.force_authenticate(self.ana)
+        response = self.client.get('/api/auth/usuarios/buscar/', {'q': 'pe'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_filtros_de_la_lista(self):
+        def usernames(params):
+            response = self.client.get('/api/auth/usuarios/', params)
+            self.assertEqual(response.status_code, 200)
+            return sorted(fila['username'] for fila in response.data)
+
+        self.assertEqual(usernames({'rol': 'admin'}), ['admin'])
+        self.assertEqual(usernames({'is_active': 'false'}), ['pinactivo'])
+        self.assertEqual(usernames({'numero_residencia': 'E02-0007'}), ['pgomez'])
+        self.assertEqual(usernames({'numero_residencia__startswith': 'E01'}), ['aperez', 'pinactivo'])
+        self.assertEqual(
+            usernames({'rol': 'residente', 'is_active': 'true', 'numero_residencia__startswith': 'E0'}),
+            ['aperez', 'pgomez'],
+        )
+
+    def test_sparse_fieldsets(self):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get('/api/auth/usuarios/', {'fields': 'id,username', 'rol': 'admin'})
+        self.assertEqual(response.data, [{'id': self.admin.pk, 'username': 'admin'}])
+        sql = contexto.captured_queries[-1]['sql']
+        self.assertNotIn('"email"', sql)
+        self.assertNotIn('"password"', sql)
+
+        response = self.client.get('/api/auth/usuarios/', {
+            'omit': 'email,telefono', 'formato': 'columnas', 'rol': 'residente', 'ordering': 'username',
+        })
+        self.assertEqual(response.data['username'], ['aperez', 'pgomez', 'pinactivo'])
+        self.assertNotIn('email', response.data)
+        self.assertEqual(self.client.get('/api/auth/usuarios/', {'omit': 'x'}).status_code, 400)
+
+    def test_reindexar_todos(self):
+        TerminoBusquedaUsuario.objects.all().delete()
+        self.assertEqual(self.ids('pe'), [])
+        out = StringIO()
+        call_command('reindexar_busqueda_usuarios', stdout=out)
+        self.assertIn(f'{TerminoBusquedaUsuario.objects.count()} términos', out.getvalue())
+        self.assertEqual(self.ids('pe'), [self.pedro.pk, self.ana.pk])
 
-# Create your tests here.
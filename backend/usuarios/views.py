@@ -1,13 +1,24 @@
 from django.shortcuts import render
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, filters
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from django.contrib.auth import authenticate
+import io
+from django.conf import settings
+from django_filters.rest_framework import DjangoFilterBackend
+from api.asincrono import DespachoAsincronoMixin
+from api.campos import CamposDinamicosMixin
+from api.condicional import ConditionalGetMixin, calcular_etag, respuesta_condicional
+from api.pagination import KeysetCursorPagination
+from api.serializacion import ListaRapidaMixin
+from multas.models import SaldoResidente
+from .busqueda import UsuarioFilter, buscar_usuarios
 from .models import Usuario
+from .hashing import EjecutorSaturado, autenticar
+from .importacion import FORMATOS, hashear_compartido, importar_usuarios, leer_filas
 from .serializers import (
     UsuarioSerializer, 
     UsuarioCreateSerializer, 
@@ -59,7 +70,15 @@ class LoginView(APIView):
             username = serializer.validated_data['username']
             password = serializer.validated_data['password']
             
-            user = authenticate(username=username, password=password)
+            # La verificación de la contraseña corre en el pool de hashing
+            try:
+                user = autenticar(username, password)
+            except EjecutorSaturado:
+                return Response(
+                    {'error': 'El servidor está ocupado, intente nuevamente.'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={'Retry-After': '1'}
+                )
             
             if user:
                 refresh = RefreshToken.for_user(user)
@@ -154,19 +173,27 @@ class CambioPasswordView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(CamposDinamicosMixin, ConditionalGetMixin, ListaRapidaMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar usuarios.
     Solo los administradores pueden crear, actualizar y eliminar usuarios.
     """
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = UsuarioFilter
+    ordering_fields = ['username', 'date_joined']
+    ordering = ['id']
+    pagination_class = KeysetCursorPagination
+    # Resultados por defecto y máximos del autocompletado
+    limite_busqueda = 10
+    limite_busqueda_maximo = 50
     
     def get_permissions(self):
         """
         Asignar permisos según la acción.
         """
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'importar', 'buscar']:
             permission_classes = [IsAdminUser]
         else:
             permission_classes = [permissions.IsAuthenticated]
@@ -199,38 +226,130 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         """
         Endpoint para obtener el perfil del usuario autenticado.
         """
-        serializer = self.get_serializer(request.user)
-        return Response(serializer.data)
+        user = request.user
+        etag = calcular_etag('mi-perfil', user.pk, request.get_full_path(), user.fecha_modificacion)
+        return respuesta_condicional(
+            request, etag, user.fecha_modificacion,
+            lambda: Response(self.get_serializer(user).data)
+        )
+
+    @action(detail=False, methods=['get'])
+    def buscar(self, request):
+        """
+        Autocompletado de residentes activos para asignar multas.
 
-class AdminDashboardView(APIView):
+        Devuelve ``[{id, nombre, residencia}]`` de los primeros ``limite``
+        residentes cuyo nombre, apellido, usuario o residencia empieza con
+        cada palabra de ``q``.
+        """
+        try:
+            limite = int(request.query_params.get('limite', self.limite_busqueda))
+        except ValueError:
+            return Response({'limite': 'Debe ser un número entero.'}, status=status.HTTP_400_BAD_REQUEST)
+        limite = min(max(limite, 1), self.limite_busqueda_maximo)
+        return Response(buscar_usuarios(request.query_params.get('q', ''), limite))
+
+    @action(detail=False, methods=['post'])
+    def importar(self, request):
+        """
+        Importa usuarios desde un archivo CSV o JSON Lines (campo ``archivo``).
+        
+        El formato se toma del parámetro ``formato`` o de la extensión del
+        archivo. Las filas con errores se informan sin detener la importación.
+        El archivo no puede superar ``USUARIOS_IMPORTACION_TAMANIO_MAXIMO``
+        bytes; los más grandes se importan con ``manage.py importar_usuarios``.
+        """
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response(
+                {'archivo': ['Debe adjuntar un archivo.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        tamanio_maximo = getattr(settings, 'USUARIOS_IMPORTACION_TAMANIO_MAXIMO', None)
+        if tamanio_maximo is not None and archivo.size > tamanio_maximo:
+            return Response(
+                {'archivo': [
+                    f"El archivo supera los {tamanio_maximo} bytes; "
+                    "para archivos más grandes use manage.py importar_usuarios."
+                ]},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        
+        formato = request.data.get('formato') or archivo.name.rsplit('.', 1)[-1].lower()
+        if formato not in FORMATOS:
+            return Response(
+                {'formato': [f"Formato no soportado, opciones: {', '.join(FORMATOS)}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        stream = io.TextIOWrapper(archivo.file, encoding='utf-8-sig')
+        creados = 0
+        errores = []
+        passwords_temporales = []
+        resultados = importar_usuarios(leer_filas(stream, formato), hashear=hashear_compartido)
+        for resultado in resultados:
+            if resultado['estado'] == 'creado':
+                creados += 1
+                if 'password_temporal' in resultado:
+                    passwords_temporales.append(resultado)
+            else:
+                errores.append(resultado)
+        
+        return Response({
+            'creados': creados,
+            'con_errores': len(errores),
+            'errores': errores,
+            'passwords_temporales': passwords_temporales,
+        }, status=status.HTTP_201_CREATED if creados else status.HTTP_400_BAD_REQUEST)
+
+class AdminDashboardView(DespachoAsincronoMixin, APIView):
     """
     Vista para el dashboard de administradores.
+
+    ``aget`` es la variante para ``API_VISTAS_ASINCRONAS``.
     """
     permission_classes = [IsAdminUser]
-    
-    def get(self, request):
+
+    def residentes(self):
+        return Usuario.objects.filter(rol='residente')
+
+    def respuesta(self, total_residentes):
         # Datos para el dashboard de administradores
-        total_residentes = Usuario.objects.filter(rol='residente').count()
-        
         return Response({
             'total_residentes': total_residentes,
             # Aquí se pueden agregar más estadísticas
         })
 
-class ResidenteDashboardView(APIView):
+    def get(self, request):
+        return self.respuesta(self.residentes().count())
+
+    async def aget(self, request):
+        return self.respuesta(await self.residentes().acount())
+
+class ResidenteDashboardView(DespachoAsincronoMixin, APIView):
     """
     Vista para el dashboard de residentes.
+
+    ``aget`` es la variante para ``API_VISTAS_ASINCRONAS``.
     """
     permission_classes = [permissions.IsAuthenticated]
-    
-    def get(self, request):
-        # Verificar que el usuario sea residente
-        if not request.user.es_residente:
-            return Response(
-                {'error': 'No tiene permiso para acceder a esta vista'}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
+    sin_saldo = {'pendientes': 0, 'monto_pendiente': 0, 'monto_pagado': 0, 'pendiente_mas_antigua': None}
+
+    def saldo(self, request):
+        # Resumen de multas mantenido por multas.saldos: una búsqueda por PK
+        return SaldoResidente.objects.filter(pk=request.user.pk).values(
+            'pendientes', 'monto_pendiente', 'monto_pagado', 'pendiente_mas_antigua'
+        )
+
+    def sin_permiso(self):
+        return Response(
+            {'error': 'No tiene permiso para acceder a esta vista'}, 
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    def respuesta(self, request, saldo):
+        saldo = saldo or self.sin_saldo
         # Datos para el dashboard de residentes
         return Response({
             'usuario': {
@@ -238,5 +357,21 @@ class ResidenteDashboardView(APIView):
                 'nombre': request.user.nombre_completo,
                 'residencia': request.user.numero_residencia,
             },
-            # Aquí se pueden agregar más datos específicos del residente
+            'multas': {
+                'pendientes': saldo['pendientes'],
+                'monto_pendiente': int(saldo['monto_pendiente']),
+                'monto_pagado': int(saldo['monto_pagado']),
+                'pendiente_mas_antigua': saldo['pendiente_mas_antigua'],
+            },
         })
+
+    def get(self, request):
+        # Verificar que el usuario sea residente
+        if not request.user.es_residente:
+            return self.sin_permiso()
+        return self.respuesta(request, self.saldo(request).first())
+
+    async def aget(self, request):
+        if not request.user.es_residente:
+            return self.sin_permiso()
+        return self.respuesta(request, await self.saldo(request).afirst())